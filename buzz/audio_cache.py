@@ -0,0 +1,243 @@
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import threading
+from typing import BinaryIO, Iterable, Optional
+
+import numpy as np
+from platformdirs import user_cache_dir
+
+from buzz.whisper_audio import SAMPLE_RATE, iter_audio
+
+DEFAULT_AUDIO_CACHE_MAX_SIZE_MB = 2048
+# Largest share of the cache a single entry may take. A larger entry is kept
+# until the next one is decoded rather than evicting everything else.
+MAX_ENTRY_FRACTION = 0.5
+
+# Header of a 32-bit float WAV file, the samples start right after it. The
+# chunk after "WAVE" is a JUNK chunk, or the ds64 chunk of an RF64 file with
+# the 64-bit sizes of samples over 4 GiB, so the header size never changes.
+WAV_HEADER = struct.Struct("<4sI4s4sIQQQI4sIHHIIHH4sI")
+WAV_FORMAT_IEEE_FLOAT = 3
+MAX_RIFF_SIZE = 0xFFFFFFFF
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def get_audio_cache_max_size() -> int:
+    """Size limit of the decoded audio cache in bytes"""
+    try:
+        size_mb = float(
+            os.getenv("BUZZ_AUDIO_CACHE_MAX_SIZE_MB", DEFAULT_AUDIO_CACHE_MAX_SIZE_MB)
+        )
+    except ValueError:
+        size_mb = DEFAULT_AUDIO_CACHE_MAX_SIZE_MB
+    return max(0, int(size_mb * 1024 * 1024))
+
+
+def wav_header(sample_rate: int, channels: int, data_size: int) -> bytes:
+    block_align = channels * 4
+    riff_size = WAV_HEADER.size - 8 + data_size
+    if riff_size > MAX_RIFF_SIZE:
+        riff_id, chunk_id, size_32 = b"RF64", b"ds64", MAX_RIFF_SIZE
+        ds64 = (riff_size, data_size, data_size // block_align, 0)
+    else:
+        riff_id, chunk_id, size_32 = b"RIFF", b"JUNK", None
+        ds64 = (0, 0, 0, 0)
+
+    return WAV_HEADER.pack(
+        riff_id,
+        riff_size if size_32 is None else size_32,
+        b"WAVE",
+        chunk_id,
+        28,
+        *ds64,
+        b"fmt ",
+        16,
+        WAV_FORMAT_IEEE_FLOAT,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        32,
+        b"data",
+        data_size if size_32 is None else size_32,
+    )
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE):
+    """Writes float32 samples, shaped like the ones ``AudioCache.load`` returns,
+    to a WAV file"""
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    data = np.ascontiguousarray(samples, dtype="<f4")
+    with open(path, "wb") as file:
+        file.write(wav_header(sample_rate, channels, data.nbytes))
+        file.write(memoryview(data).cast("B"))
+
+
+def write_wav_chunks(
+    file: BinaryIO, chunks: Iterable[np.ndarray], sample_rate: int, channels: int
+) -> int:
+    """Writes float32 chunks, like the ones ``iter_audio`` yields, to a WAV
+    file as they come. Returns the size of the samples in bytes."""
+    file.write(wav_header(sample_rate, channels, 0))
+
+    data_size = 0
+    for chunk in chunks:
+        file.write(memoryview(np.ascontiguousarray(chunk, dtype="<f4")).cast("B"))
+        data_size += chunk.nbytes
+
+    file.seek(0)
+    file.write(wav_header(sample_rate, channels, data_size))
+    return data_size
+
+
+class AudioCache:
+    """Media files decoded to PCM, shared by everything that reads audio.
+
+    Each file is decoded once per sample rate and channel count with PyAV
+    into a 32-bit float WAV file in the cache directory. The WAV files can be
+    passed to programs that read audio files (whisper-cli, ffmpeg) and their
+    samples are opened with ``np.memmap``, so loading audio again costs no
+    decoding and no copy.
+
+    Entries are keyed by the path, size and modification time of the source
+    file. The least recently used ones are removed once the cache is over
+    ``max_size`` bytes. Several processes can share the directory, files are
+    written under a temporary name and renamed when complete.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = os.path.join(user_cache_dir("Buzz"), "audio"),
+        max_size: Optional[int] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_size = max_size if max_size is not None else get_audio_cache_max_size()
+        self.lock = threading.Lock()
+
+    def get_path(
+        self, file_path: str, sample_rate: int = SAMPLE_RATE, channels: int = 1
+    ) -> str:
+        """Returns the path of the decoded WAV file, decoding it if needed"""
+        path = self._entry_path(file_path, sample_rate, channels)
+        if os.path.exists(path):
+            try:
+                # Modification time orders the entries for eviction
+                os.utime(path)
+                return path
+            except OSError:
+                pass
+
+        with self.lock:
+            if not os.path.exists(path):
+                self._decode(file_path, path, sample_rate, channels)
+                self._evict(keep=path)
+        return path
+
+    def load(
+        self, file_path: str, sample_rate: int = SAMPLE_RATE, channels: int = 1
+    ) -> np.ndarray:
+        """Returns a read-only memory-mapped float32 view of the decoded audio,
+        with shape (samples,) for mono and (frames, channels) otherwise."""
+        path = self.get_path(file_path, sample_rate, channels)
+        if os.path.getsize(path) <= WAV_HEADER.size:
+            samples = np.zeros(0, dtype=np.float32)
+        else:
+            samples = np.memmap(path, dtype="<f4", mode="r", offset=WAV_HEADER.size)
+
+        if channels > 1:
+            return samples.reshape(-1, channels)
+        return samples
+
+    def _entry_path(self, file_path: str, sample_rate: int, channels: int) -> str:
+        stat = os.stat(file_path)
+        key = hashlib.blake2b(
+            f"{os.path.abspath(file_path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+            f"\0{sample_rate}\0{channels}\0rf64".encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _decode(self, file_path: str, path: str, sample_rate: int, channels: int):
+        logging.debug(f"Decoding {file_path} to the audio cache")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                write_wav_chunks(
+                    file,
+                    iter_audio(
+                        file_path,
+                        chunk_samples=COPY_CHUNK_SIZE // (4 * channels),
+                        sr=sample_rate,
+                        channels=channels,
+                        reuse_buffer=True,
+                    ),
+                    sample_rate,
+                    channels,
+                )
+
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def _evict(self, keep: str):
+        max_entry_size = self.max_size * MAX_ENTRY_FRACTION
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".wav"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            oversized = stat.st_size > max_entry_size
+            if entry.path == keep and oversized:
+                # Does not count against the other entries, see MAX_ENTRY_FRACTION
+                continue
+            entries.append((not oversized, stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        # Oversized entries go first, then the least recently used ones
+        for fits, _mtime, size, path in sorted(entries):
+            if fits and total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                # Still mapped by another process on Windows
+                pass
+
+
+_audio_cache: Optional[AudioCache] = None
+
+
+def get_audio_cache() -> AudioCache:
+    global _audio_cache
+    if _audio_cache is None:
+        _audio_cache = AudioCache()
+    return _audio_cache
+
+
+def load_pcm(
+    file_path: str, sample_rate: int = SAMPLE_RATE, channels: int = 1
+) -> np.ndarray:
+    return get_audio_cache().load(file_path, sample_rate, channels)
+
+
+def get_decoded_audio_path(
+    file_path: str, sample_rate: int = SAMPLE_RATE, channels: int = 1
+) -> str:
+    return get_audio_cache().get_path(file_path, sample_rate, channels)
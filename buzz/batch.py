@@ -0,0 +1,647 @@
+"""Headless batch transcription: ``buzz batch manifest.jsonl``.
+
+Runs without a QApplication, main window or database. The parent process only
+reads the manifest and prints one JSON event per line on stdout, so it starts
+right away. The transcription backends are imported by the worker processes,
+which keep their last model loaded between files.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+# Values of buzz.cli.CommandLineModelType and the matching ModelType names,
+# buzz.cli is not imported as it loads the Qt application and every backend
+MODEL_TYPES = {
+    "whisper": "WHISPER",
+    "whispercpp": "WHISPER_CPP",
+    "huggingface": "HUGGING_FACE",
+    "fasterwhisper": "FASTER_WHISPER",
+    "openaiapi": "OPEN_AI_WHISPER_API",
+}
+TASKS = ("transcribe", "translate")
+OUTPUT_FORMATS = ("txt", "srt", "vtt")
+
+ENTRY_KEYS = (
+    "file",
+    "model_type",
+    "model_size",
+    "hugging_face_model_id",
+    "language",
+    "task",
+    "initial_prompt",
+    "word_timestamps",
+    "output_formats",
+    "output_directory",
+    "openai_access_token",
+)
+
+
+class ManifestError(Exception):
+    pass
+
+
+def is_url(path: str) -> bool:
+    parsed = urllib.parse.urlparse(path)
+    return all([parsed.scheme, parsed.netloc])
+
+
+def read_manifest(file: TextIO, defaults: dict) -> List[dict]:
+    """Reads one JSON object per line, or just the file path as a JSON string.
+    Keys missing from a line take the values of the command line options."""
+    entries = []
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if line == "":
+            continue
+
+        try:
+            entry = json.loads(line)
+        except ValueError as exc:
+            raise ManifestError(f"Line {line_number}: invalid JSON, {exc}")
+
+        if isinstance(entry, str):
+            entry = {"file": entry}
+        if not isinstance(entry, dict) or not entry.get("file"):
+            raise ManifestError(f'Line {line_number}: expected an object with a "file"')
+
+        unknown_keys = sorted(set(entry) - set(ENTRY_KEYS))
+        if len(unknown_keys) > 0:
+            raise ManifestError(
+                f"Line {line_number}: unknown keys {', '.join(unknown_keys)}"
+            )
+
+        entry = {**defaults, **entry}
+        try:
+            validate_entry(entry)
+        except ManifestError as exc:
+            raise ManifestError(f"Line {line_number}: {exc}")
+        entries.append(entry)
+
+    return entries
+
+
+def validate_entry(entry: dict):
+    if entry["model_type"] not in MODEL_TYPES:
+        raise ManifestError(f"invalid model_type {entry['model_type']}")
+    if entry["model_type"] == "huggingface" and not entry.get("hugging_face_model_id"):
+        raise ManifestError("hugging_face_model_id is required for huggingface models")
+    if entry["task"] not in TASKS:
+        raise ManifestError(f"invalid task {entry['task']}")
+    if not isinstance(entry["output_formats"], list) or any(
+        output_format not in OUTPUT_FORMATS for output_format in entry["output_formats"]
+    ):
+        raise ManifestError(
+            f"output_formats must be a list of {', '.join(OUTPUT_FORMATS)}"
+        )
+    if not is_url(entry["file"]) and not os.path.isfile(entry["file"]):
+        raise ManifestError(f"file not found {entry['file']}")
+
+
+def build_task(entry: dict):
+    """Creates the task of a manifest entry, its model is resolved where it
+    runs with resolve_model"""
+    from buzz.model_loader import ModelType, TranscriptionModel, WhisperModelSize
+    from buzz.transcriber.transcriber import (
+        LANGUAGES,
+        FileTranscriptionOptions,
+        FileTranscriptionTask,
+        OutputFormat,
+        Task,
+        TranscriptionOptions,
+    )
+
+    language = entry.get("language") or None
+    if language is not None and LANGUAGES.get(language) is None:
+        raise Exception(f"Invalid language: {language}")
+
+    model = TranscriptionModel(
+        model_type=ModelType[MODEL_TYPES[entry["model_type"]]],
+        whisper_model_size=WhisperModelSize(entry["model_size"]),
+        hugging_face_model_id=entry.get("hugging_face_model_id") or "",
+    )
+
+    file_path = entry["file"]
+    path_is_url = is_url(file_path)
+    output_formats = {OutputFormat(output_format) for output_format in entry["output_formats"]}
+
+    return FileTranscriptionTask(
+        file_path=file_path if not path_is_url else None,
+        url=file_path if path_is_url else None,
+        source=FileTranscriptionTask.Source.FILE_IMPORT
+        if not path_is_url
+        else FileTranscriptionTask.Source.URL_IMPORT,
+        model_path="",
+        transcription_options=TranscriptionOptions(
+            model=model,
+            task=Task(entry["task"]),
+            language=language,
+            initial_prompt=entry.get("initial_prompt") or "",
+            word_level_timings=bool(entry.get("word_timestamps")),
+            openai_access_token=entry.get("openai_access_token") or "",
+        ),
+        file_transcription_options=FileTranscriptionOptions(
+            file_paths=[file_path] if not path_is_url else None,
+            url=file_path if path_is_url else None,
+            output_formats=output_formats,
+        ),
+        output_directory=entry.get("output_directory") or None,
+    )
+
+
+def resolve_model(task, model_lock):
+    """Sets the local path of the task's model, downloading it if needed, and
+    the OpenAI access token from the keyring if the task has none"""
+    from buzz.model_loader import ModelDownloader, ModelType
+    from buzz.store.keyring_store import Key, get_password
+
+    model = task.transcription_options.model
+
+    # Workers starting together would otherwise download the same model
+    with model_lock:
+        model_path = model.get_local_model_path()
+        if model_path is None:
+            ModelDownloader(model=model).run()
+            model_path = model.get_local_model_path()
+    if model_path is None:
+        raise Exception("Model not found")
+    task.model_path = model_path
+
+    if (
+        model.model_type == ModelType.OPEN_AI_WHISPER_API
+        and task.transcription_options.openai_access_token == ""
+    ):
+        task.transcription_options.openai_access_token = get_password(
+            key=Key.OPENAI_API_KEY
+        )
+        if not task.transcription_options.openai_access_token:
+            raise Exception("No OpenAI access token found")
+
+
+def create_task(entry: dict, model_lock):
+    """Creates the task of a manifest entry, downloading its model if needed"""
+    task = build_task(entry)
+    resolve_model(task, model_lock)
+    return task
+
+
+def _transcribe(
+    task,
+    on_progress: Callable[[float], None],
+    on_checkpoint: Optional[Callable[[int, list], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+):
+    """Runs the backend in this process, reading its messages with the same
+    code as a transcription started from the app"""
+    from buzz.model_loader import ModelType
+    from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
+
+    if task.transcription_options.model.model_type == ModelType.OPEN_AI_WHISPER_API:
+        return _transcribe_openai_api(task, on_progress, cancel_event)
+
+    transcriber = WhisperFileTranscriber(task=task)
+    # Without an event loop the signal calls the slot directly
+    transcriber.progress.connect(lambda progress: on_progress(progress[0] / progress[1]))
+    if on_checkpoint is not None:
+        transcriber.checkpoint.connect(on_checkpoint)
+
+    recv_conn, send_conn = multiprocessing.Pipe(duplex=False)
+
+    def run():
+        try:
+            WhisperFileTranscriber.transcribe_whisper(send_conn, task, cancel_event)
+        except Exception:
+            # Already sent through send_conn
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    completed = transcriber.read_messages(recv_conn)
+    thread.join()
+    send_conn.close()
+    recv_conn.close()
+
+    if transcriber.error_message is not None:
+        raise Exception(transcriber.error_message)
+    if not completed:
+        raise Exception("Transcription ended unexpectedly")
+
+    return transcriber.segments
+
+
+def _transcribe_openai_api(
+    task,
+    on_progress: Callable[[float], None],
+    cancel_event: Optional[threading.Event] = None,
+):
+    """Sends the audio to the OpenAI API, the request runs in this process as
+    there is no model to keep loaded"""
+    from buzz.transcriber.openai_whisper_api_file_transcriber import (
+        OpenAIWhisperAPIFileTranscriber,
+    )
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise Exception("Transcription was canceled")
+
+    transcriber = OpenAIWhisperAPIFileTranscriber(task=task)
+    transcriber.progress.connect(lambda progress: on_progress(progress[0] / progress[1]))
+    segments = transcriber.transcribe()
+
+    # The API transcribes the whole file, keep what a resumed task is missing
+    return [segment for segment in segments if segment.start >= task.resume_offset]
+
+
+def run_task(
+    task,
+    n_threads: int,
+    on_progress: Callable[[float], None],
+    on_checkpoint: Optional[Callable[[int, list], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Tuple[list, List[str]]:
+    """Transcribes a task with a resolved model in this process and writes its
+    output files. Returns the segments and the paths of the output files."""
+    from buzz.transcriber.file_transcriber import download_audio, write_output
+    from buzz.transcriber.metrics import Stage, timed, timed_inference
+    from buzz.transcriber.task_scheduler import probe_duration
+    from buzz.transcriber.transcriber import get_output_file_path
+    from buzz.transcriber.tuning import apply_tuned_config
+
+    task.n_threads = n_threads
+    apply_tuned_config(task)
+
+    if task.url is not None and task.file_path is None:
+        with timed(task.timings, Stage.DOWNLOAD):
+            task.file_path = download_audio(task.url, lambda progress: None)
+    task.audio_duration = probe_duration(task.file_path)
+
+    # Segments before the offset a resumed task starts from
+    previous_segments = list(task.segments) if task.resume_offset > 0 else []
+
+    with timed_inference(task.timings):
+        segments = previous_segments + _transcribe(
+            task, on_progress, on_checkpoint, cancel_event
+        )
+
+    for segment in segments:
+        segment.text = segment.text.strip()
+
+    output_paths = []
+    with timed(task.timings, Stage.EXPORT):
+        for output_format in task.file_transcription_options.output_formats:
+            path = get_output_file_path(
+                file_path=task.file_path,
+                output_format=output_format,
+                language=task.transcription_options.language,
+                output_directory=task.output_directory,
+                model=task.transcription_options.model,
+                task=task.transcription_options.task,
+            )
+            write_output(path=path, segments=segments, output_format=output_format)
+            output_paths.append(path)
+
+    return segments, output_paths
+
+
+def _transcribe_entry(
+    entry: dict,
+    model_lock,
+    n_threads: int,
+    on_progress: Callable[[float], None],
+) -> dict:
+    from buzz.transcriber.metrics import get_real_time_factor
+
+    task = create_task(entry, model_lock)
+    segments, output_paths = run_task(task, n_threads, on_progress)
+
+    return {
+        "outputs": output_paths,
+        "segments": len(segments),
+        "audio_duration": task.audio_duration,
+        "real_time_factor": get_real_time_factor(task.timings, task.audio_duration),
+        "timings": task.timings,
+    }
+
+
+def _worker(worker_id: int, jobs, events, model_lock, n_threads: int):
+    """Entry point of a batch worker process, transcribes manifest entries
+    until it gets ``None``"""
+    # stdout only carries the parent's events, backends print their own output
+    try:
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    except (AttributeError, OSError, ValueError):
+        pass
+    sys.stdout = sys.stderr
+
+    from buzz.transcriber.model_cache import ModelCache
+    from buzz.transcriber.warm_model_pool import get_model_cache_size
+    from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
+
+    WhisperFileTranscriber.model_cache = ModelCache(max_size=get_model_cache_size())
+
+    for index, entry in iter(jobs.get, None):
+        file = entry["file"]
+        events.put(
+            {"event": "file_started", "index": index, "file": file, "worker": worker_id}
+        )
+
+        def on_progress(progress: float):
+            events.put(
+                {
+                    "event": "progress",
+                    "index": index,
+                    "file": file,
+                    "progress": round(progress, 3),
+                }
+            )
+
+        try:
+            result = _transcribe_entry(entry, model_lock, n_threads, on_progress)
+        except Exception as exc:
+            logging.debug(f"Batch transcription of {file} failed", exc_info=True)
+            events.put(
+                {
+                    "event": "file_failed",
+                    "index": index,
+                    "file": file,
+                    "exit_code": EXIT_FAILED,
+                    "error": str(exc),
+                }
+            )
+        else:
+            events.put(
+                {
+                    "event": "file_completed",
+                    "index": index,
+                    "file": file,
+                    "exit_code": EXIT_OK,
+                    **result,
+                }
+            )
+
+    WhisperFileTranscriber.model_cache.clear()
+
+
+class BatchRunner:
+    """Hands manifest entries to worker processes and prints their events"""
+
+    def __init__(self, entries: List[dict], workers: int, output: TextIO = sys.stdout):
+        self.entries = entries
+        self.workers = max(1, min(workers, len(entries)))
+        self.output = output
+        self.started_at = time.monotonic()
+        self.context = multiprocessing.get_context("spawn")
+        self.jobs = self.context.Queue()
+        self.events = self.context.Queue()
+        self.model_lock = self.context.Lock()
+        self.n_threads = max(1, (os.cpu_count() or 8) // self.workers)
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        # Entry each worker is transcribing, by worker id
+        self.running: Dict[int, int] = {}
+        self.exit_codes: Dict[int, int] = {}
+
+    def emit(self, event: dict):
+        event["elapsed"] = round(time.monotonic() - self.started_at, 3)
+        print(json.dumps(event), file=self.output, flush=True)
+
+    def run(self) -> int:
+        self.emit(
+            {"event": "started", "files": len(self.entries), "workers": self.workers}
+        )
+
+        for job in enumerate(self.entries):
+            self.jobs.put(job)
+        for _ in range(self.workers):
+            self.jobs.put(None)
+
+        for worker_id in range(self.workers):
+            self._start_worker(worker_id)
+
+        try:
+            while len(self.exit_codes) < len(self.entries):
+                try:
+                    event = self.events.get(timeout=0.5)
+                except queue.Empty:
+                    self._check_workers()
+                    continue
+                self._handle_event(event)
+        finally:
+            self._stop_workers()
+
+        failed = sum(1 for code in self.exit_codes.values() if code != EXIT_OK)
+        exit_code = EXIT_OK if failed == 0 else EXIT_FAILED
+        self.emit(
+            {
+                "event": "finished",
+                "completed": len(self.entries) - failed,
+                "failed": failed,
+                "exit_code": exit_code,
+            }
+        )
+        return exit_code
+
+    def _start_worker(self, worker_id: int):
+        process = self.context.Process(
+            target=_worker,
+            args=(
+                worker_id,
+                self.jobs,
+                self.events,
+                self.model_lock,
+                self.n_threads,
+            ),
+        )
+        process.start()
+        self.processes[worker_id] = process
+
+    def _handle_event(self, event: dict):
+        if event["event"] == "file_started":
+            self.running[event["worker"]] = event["index"]
+        elif event["event"] in ("file_completed", "file_failed"):
+            self.exit_codes[event["index"]] = event["exit_code"]
+            for worker_id, index in list(self.running.items()):
+                if index == event["index"]:
+                    del self.running[worker_id]
+        self.emit(event)
+
+    def _check_workers(self):
+        """Fails the entry of a worker that crashed and starts another worker
+        for the rest of the manifest"""
+        for worker_id, process in list(self.processes.items()):
+            if process.is_alive() or process.exitcode == 0:
+                continue
+
+            del self.processes[worker_id]
+            index = self.running.pop(worker_id, None)
+            if index is None:
+                # Died before taking an entry, another one would likely too
+                continue
+
+            self._handle_event(
+                {
+                    "event": "file_failed",
+                    "index": index,
+                    "file": self.entries[index]["file"],
+                    "exit_code": EXIT_FAILED,
+                    "error": f"Worker exited unexpectedly with code {process.exitcode}",
+                }
+            )
+            self._start_worker(worker_id)
+
+        if not any(process.is_alive() for process in self.processes.values()):
+            for index, entry in enumerate(self.entries):
+                if index not in self.exit_codes:
+                    self._handle_event(
+                        {
+                            "event": "file_failed",
+                            "index": index,
+                            "file": entry["file"],
+                            "exit_code": EXIT_FAILED,
+                            "error": "No worker left to transcribe the file",
+                        }
+                    )
+
+    def _stop_workers(self):
+        for process in self.processes.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+
+
+def split_output_formats(value: str) -> List[str]:
+    return [
+        output_format.strip()
+        for output_format in value.split(",")
+        if output_format.strip() != ""
+    ]
+
+
+def add_task_options(
+    parser: argparse.ArgumentParser,
+    default_output_formats: str,
+    output_directory_help: str,
+):
+    """Options giving the defaults of the transcriptions, shared with ``buzz serve``"""
+    parser.add_argument(
+        "-m",
+        "--model-type",
+        choices=list(MODEL_TYPES),
+        default="whisper",
+        help="Default model type. Default: whisper.",
+    )
+    parser.add_argument(
+        "-s", "--model-size", default="tiny", help="Default model size. Default: tiny."
+    )
+    parser.add_argument(
+        "--hfid", default="", help="Default Hugging Face model ID, for huggingface models."
+    )
+    parser.add_argument(
+        "-l", "--language", default="", help="Default language code. Default: detect language."
+    )
+    parser.add_argument(
+        "-t", "--task", choices=TASKS, default="transcribe", help="Default task. Default: transcribe."
+    )
+    parser.add_argument(
+        "-p", "--prompt", default="", help="Default initial prompt."
+    )
+    parser.add_argument(
+        "--word-timestamps", action="store_true", help="Generate word-level timestamps."
+    )
+    parser.add_argument(
+        "-f",
+        "--output-formats",
+        default=default_output_formats,
+        help=f"Comma-separated default output formats. Allowed: {', '.join(OUTPUT_FORMATS)}. "
+        f"Default: {default_output_formats or 'none'}.",
+    )
+    parser.add_argument(
+        "-d", "--output-directory", default="", help=output_directory_help
+    )
+
+
+def get_task_defaults(args: argparse.Namespace) -> dict:
+    return {
+        "model_type": args.model_type,
+        "model_size": args.model_size,
+        "hugging_face_model_id": args.hfid,
+        "language": args.language,
+        "task": args.task,
+        "initial_prompt": args.prompt,
+        "word_timestamps": args.word_timestamps,
+        "output_formats": split_output_formats(args.output_formats),
+        "output_directory": args.output_directory,
+    }
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="buzz batch",
+        description="Transcribe the files of a manifest without the user interface. "
+        "Prints one JSON event per line.",
+    )
+    parser.add_argument(
+        "manifest",
+        help="JSON Lines file with one file to transcribe per line, - reads standard input",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of files transcribed at the same time, each worker loads its own model. Default: 1.",
+    )
+    add_task_options(
+        parser,
+        default_output_formats="txt",
+        output_directory_help="Default output directory. Default: the directory of each file.",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Print debug logs to standard error."
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = create_parser()
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="[%(asctime)s] %(module)s.%(funcName)s:%(lineno)d %(levelname)s -> %(message)s",
+    )
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    defaults = get_task_defaults(args)
+
+    try:
+        if args.manifest == "-":
+            entries = read_manifest(sys.stdin, defaults)
+        else:
+            with open(args.manifest, encoding="utf-8") as file:
+                entries = read_manifest(file, defaults)
+    except (OSError, ManifestError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_USAGE
+
+    if len(entries) == 0:
+        print("Error: the manifest has no files", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        return BatchRunner(entries, args.workers).run()
+    except KeyboardInterrupt:
+        return 130
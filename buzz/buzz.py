@@ -64,6 +64,17 @@ def main():
     # https://stackoverflow.com/a/33979091
     multiprocessing.freeze_support()
 
+    # Runs without the Qt application, see buzz.batch
+    if sys.argv[1:2] == ["batch"]:
+        from buzz.batch import main as batch_main
+
+        sys.exit(batch_main(sys.argv[2:]))
+
+    if sys.argv[1:2] == ["spool"]:
+        from buzz.spool import main as spool_main
+
+        sys.exit(spool_main(sys.argv[2:]))
+
     log_dir = user_log_dir(appname="Buzz")
     os.makedirs(log_dir, exist_ok=True)
 
@@ -96,6 +107,12 @@ def main():
         stdout_handler.setFormatter(logging.Formatter(log_format))
         logging.getLogger().addHandler(stdout_handler)
 
+    # Runs with a QCoreApplication instead of the app, see buzz.server
+    if sys.argv[1:2] == ["serve"]:
+        from buzz.server import main as serve_main
+
+        sys.exit(serve_main(sys.argv[2:]))
+
     from buzz.cli import parse_command_line
     from buzz.widgets.application import Application
 
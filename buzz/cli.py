@@ -20,6 +20,7 @@ from buzz.transcriber.transcriber import (
     LANGUAGES,
     OutputFormat,
 )
+from buzz.transcriber.tuning import TUNED_MODEL_TYPES, Calibrator, save_tuned_config
 from buzz.widgets.application import Application
 
 
@@ -100,6 +101,18 @@ def _add_command_options(parser: QCommandLineParser):
     vtt_option = QCommandLineOption(["vtt"], "Output result in a VTT file.")
     txt_option = QCommandLineOption("txt", "Output result in a TXT file.")
     hide_gui_option = QCommandLineOption("hide-gui", "Hide the main application window.")
+    concurrency_option = QCommandLineOption(
+        ["c", "concurrency"],
+        "Number of files to transcribe at the same time. Defaults to the value set in Preferences.",
+        "concurrency",
+    )
+
+    priority_option = QCommandLineOption(
+        "priority",
+        "Priority of the added files, higher runs earlier. Used when the transcription order in Preferences is by priority or shortest file first. Default: 0.",
+        "priority",
+        "0",
+    )
 
     parser.addOptions(
         [
@@ -117,6 +130,8 @@ def _add_command_options(parser: QCommandLineParser):
             vtt_option,
             txt_option,
             hide_gui_option,
+            concurrency_option,
+            priority_option,
         ]
     )
 
@@ -135,6 +150,8 @@ def _add_command_options(parser: QCommandLineParser):
         "vtt": vtt_option,
         "txt": txt_option,
         "hide_gui": hide_gui_option,
+        "concurrency": concurrency_option,
+        "priority": priority_option,
     }
 
 
@@ -166,6 +183,7 @@ def _add_transcription_tasks(
     transcription_options: TranscriptionOptions,
     output_formats: typing.Set[OutputFormat],
     output_directory: str = "",
+    priority: int = 0,
 ):
     for file_path in file_paths:
         path_is_url = is_url(file_path)
@@ -184,6 +202,7 @@ def _add_transcription_tasks(
             transcription_options=transcription_options,
             file_transcription_options=file_transcription_options,
             output_directory=output_directory if output_directory != "" else None,
+            priority=priority,
         )
         app.add_task(transcription_task, quit_on_complete=True)
 
@@ -234,6 +253,17 @@ def _handle_add_command(app: Application, parser: QCommandLineParser):
         if openai_access_token == "":
             raise CommandLineError("No OpenAI access token found")
 
+    concurrency = parser.value(opts["concurrency"])
+    if concurrency != "":
+        if not concurrency.isdigit() or int(concurrency) < 1:
+            raise CommandLineError("Invalid value for --concurrency option.")
+        app.window.transcriber_worker.set_max_concurrent_tasks(int(concurrency))
+
+    try:
+        priority = int(parser.value(opts["priority"]))
+    except ValueError:
+        raise CommandLineError("Invalid value for --priority option.")
+
     transcription_options = TranscriptionOptions(
         model=model,
         task=task,
@@ -251,14 +281,79 @@ def _handle_add_command(app: Application, parser: QCommandLineParser):
         transcription_options,
         output_formats,
         parser.value(opts["output_directory"]),
+        priority,
     )
 
     if parser.isSet(opts["hide_gui"]):
         app.hide_main_window = True
 
 
+def _handle_calibrate_command(app: Application, parser: QCommandLineParser):
+    parser.clearPositionalArguments()
+    model_type_option = QCommandLineOption(
+        ["m", "model-type"],
+        f"Model type to calibrate. Allowed: {CommandLineModelType.WHISPER.value}, {CommandLineModelType.WHISPER_CPP.value}, {CommandLineModelType.FASTER_WHISPER.value}. Default: every one with the model downloaded.",
+        "model-type",
+        "",
+    )
+    model_size_option = QCommandLineOption(
+        ["s", "model-size"],
+        f"Model size. Allowed: {join_values(WhisperModelSize)}. Default: {WhisperModelSize.TINY.value}.",
+        "model-size",
+        WhisperModelSize.TINY.value,
+    )
+    file_option = QCommandLineOption(
+        ["f", "file"],
+        "Audio file to calibrate with, a short recording of speech. Default: a synthetic clip.",
+        "file",
+        "",
+    )
+    parser.addOptions([model_type_option, model_size_option, file_option])
+    parser.addHelpOption()
+    parser.process(app)
+
+    model_size = parse_enum_option(model_size_option, parser, WhisperModelSize)
+    if parser.value(model_type_option) == "":
+        model_types = list(TUNED_MODEL_TYPES)
+    else:
+        model_type = ModelType[
+            parse_enum_option(model_type_option, parser, CommandLineModelType).name
+        ]
+        if model_type not in TUNED_MODEL_TYPES:
+            raise CommandLineError("Invalid value for --model-type option.")
+        model_types = [model_type]
+
+    file_path = parser.value(file_option) or None
+    calibrated = 0
+    for model_type in model_types:
+        model = TranscriptionModel(model_type=model_type, whisper_model_size=model_size)
+        model_path = model.get_local_model_path()
+        if model_path is None:
+            print(f"Skipping {model_type.value} {model_size.value}, the model is not downloaded")
+            continue
+
+        print(f"Calibrating {model_type.value} {model_size.value}...")
+        calibrator = Calibrator(
+            model,
+            model_path,
+            file_path=file_path,
+            on_result=lambda result: print(f"  {result.config}: {result.seconds:.2f}s"),
+        )
+        config = calibrator.calibrate()
+        save_tuned_config(model, config)
+        print(f"Saved {config}")
+        calibrated += 1
+
+    if calibrated == 0:
+        raise CommandLineError("No downloaded model to calibrate")
+
+    sys.exit(0)
+
+
 def parse(app: Application, parser: QCommandLineParser):
-    parser.addPositionalArgument("<command>", "One of the following commands:\n- add")
+    parser.addPositionalArgument(
+        "<command>", "One of the following commands:\n- add\n- batch\n- calibrate\n- serve\n- spool"
+    )
     parser.parse(app.arguments())
 
     args = parser.positionalArguments()
@@ -271,6 +366,8 @@ def parse(app: Application, parser: QCommandLineParser):
     command = args[0]
     if command == "add":
         _handle_add_command(app, parser)
+    elif command == "calibrate":
+        _handle_calibrate_command(app, parser)
 
 T = typing.TypeVar("T", bound=enum.Enum)
 
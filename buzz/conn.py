@@ -1,21 +1,227 @@
+import enum
+import mmap
+import os
+import re
+import struct
 import sys
+import tempfile
 from contextlib import contextmanager
+from dataclasses import dataclass, field
 from multiprocessing.connection import Connection
+from typing import List, Optional
+
+import numpy as np
+
+from buzz.transcriber.transcriber import Segment, Stopped
+
+PROGRESS_REGEX = re.compile(r"\d+(\.\d+)?%")
+
+# Segment payloads larger than this are written to a memory-mapped temporary
+# file and only its path goes through the pipe
+MAPPED_PAYLOAD_THRESHOLD = 4 * 1024 * 1024
+
+
+class MessageKind(enum.IntEnum):
+    PROGRESS = 1
+    # Part of the final result
+    SEGMENTS = 2
+    # Segments transcribed so far and the audio offset they reach
+    CHECKPOINT = 3
+    LOG = 4
+    ERROR = 5
+    # Last message of a task
+    DONE = 6
+    # Seconds a stage of the task took in the worker, see buzz.transcriber.metrics
+    TIMING = 7
+
+
+@dataclass
+class Message:
+    kind: MessageKind
+    # Percent, for PROGRESS
+    progress: float = 0.0
+    # Audio offset in ms, for CHECKPOINT
+    offset: int = 0
+    segments: List[Segment] = field(default_factory=list)
+    # For LOG and ERROR, the stage for TIMING
+    text: str = ""
+    # For TIMING
+    seconds: float = 0.0
+
+
+# Frame layout: kind (with MAPPED_FLAG when the payload is a file path), payload
+_KIND = struct.Struct("<B")
+MAPPED_FLAG = 0x80
+_PROGRESS = struct.Struct("<f")
+_OFFSET = struct.Struct("<q")
+_COUNT = struct.Struct("<I")
+_SECONDS = struct.Struct("<d")
+
+
+def encode_segments(segments: List[Segment]) -> bytes:
+    """Packs segments as arrays of start and end times and text lengths,
+    followed by the UTF-8 texts."""
+    count = len(segments)
+    texts = [segment.text.encode("utf-8") for segment in segments]
+    starts = np.fromiter((segment.start for segment in segments), dtype="<i8", count=count)
+    ends = np.fromiter((segment.end for segment in segments), dtype="<i8", count=count)
+    lengths = np.fromiter((len(text) for text in texts), dtype="<u4", count=count)
+    return b"".join(
+        [_COUNT.pack(count), starts.tobytes(), ends.tobytes(), lengths.tobytes()]
+        + texts
+    )
+
+
+def decode_segments(buffer, offset: int = 0) -> List[Segment]:
+    (count,) = _COUNT.unpack_from(buffer, offset)
+    if count == 0:
+        return []
+
+    position = offset + _COUNT.size
+    starts = np.frombuffer(buffer, dtype="<i8", count=count, offset=position)
+    position += starts.nbytes
+    ends = np.frombuffer(buffer, dtype="<i8", count=count, offset=position)
+    position += ends.nbytes
+    lengths = np.frombuffer(buffer, dtype="<u4", count=count, offset=position)
+    position += lengths.nbytes
+
+    text_ends = (np.cumsum(lengths, dtype=np.int64) + position).tolist()
+    text_starts = [position] + text_ends[:-1]
+    with memoryview(buffer) as view:
+        return [
+            Segment(
+                start=start,
+                end=end,
+                text=str(view[text_start:text_end], "utf-8"),
+                translation="",
+            )
+            for start, end, text_start, text_end in zip(
+                starts.tolist(), ends.tolist(), text_starts, text_ends
+            )
+        ]
+
+
+def decode_message(frame: bytes) -> Message:
+    (kind_byte,) = _KIND.unpack_from(frame, 0)
+    kind = MessageKind(kind_byte & ~MAPPED_FLAG)
+    payload_offset = _KIND.size
+
+    if kind_byte & MAPPED_FLAG:
+        path = frame[payload_offset:].decode("utf-8")
+        try:
+            with open(path, "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped:
+                return _decode_payload(kind, mapped, 0)
+        finally:
+            os.remove(path)
+
+    return _decode_payload(kind, frame, payload_offset)
+
+
+def _decode_payload(kind: MessageKind, buffer, offset: int) -> Message:
+    if kind == MessageKind.PROGRESS:
+        return Message(kind=kind, progress=_PROGRESS.unpack_from(buffer, offset)[0])
+    if kind == MessageKind.SEGMENTS:
+        return Message(kind=kind, segments=decode_segments(buffer, offset))
+    if kind == MessageKind.CHECKPOINT:
+        (checkpoint_offset,) = _OFFSET.unpack_from(buffer, offset)
+        return Message(
+            kind=kind,
+            offset=checkpoint_offset,
+            segments=decode_segments(buffer, offset + _OFFSET.size),
+        )
+    if kind == MessageKind.TIMING:
+        (seconds,) = _SECONDS.unpack_from(buffer, offset)
+        return Message(
+            kind=kind,
+            seconds=seconds,
+            text=bytes(buffer[offset + _SECONDS.size :]).decode("utf-8"),
+        )
+    if kind in (MessageKind.LOG, MessageKind.ERROR):
+        return Message(kind=kind, text=bytes(buffer[offset:]).decode("utf-8", "replace"))
+    return Message(kind=kind)
+
+
+def receive_message(conn: Connection) -> Message:
+    return decode_message(conn.recv_bytes())
 
 
 class ConnWriter:
-    def __init__(self, conn: Connection):
+    """Sends messages of a transcription process to its parent.
+
+    Also stands in for ``sys.stderr``: lines with a percentage are sent as
+    progress, anything else as a log message.
+    """
+
+    def __init__(self, conn: Connection, cancel_event=None):
         self.conn = conn
+        self.cancel_event = cancel_event
 
     def write(self, s: str):
-        self.conn.send(s.strip())
+        line = s.strip()
+        if line == "":
+            return
+
+        match = PROGRESS_REGEX.search(line)
+        if match is not None:
+            self.send_progress(float(match.group().strip("%")))
+        else:
+            self.send_log(line)
+
+    def flush(self):
+        pass
+
+    def send_progress(self, percent: float):
+        self._send(MessageKind.PROGRESS, _PROGRESS.pack(percent))
+
+    def send_log(self, text: str):
+        self._send(MessageKind.LOG, text.encode("utf-8", "replace"))
+
+    def send_error(self, text: str):
+        self._send(MessageKind.ERROR, text.encode("utf-8", "replace"))
+
+    def send_segments(self, segments: List[Segment]):
+        self._send(MessageKind.SEGMENTS, encode_segments(segments))
+
+    def send_checkpoint(self, offset: int, segments: List[Segment]):
+        self._send(MessageKind.CHECKPOINT, _OFFSET.pack(offset) + encode_segments(segments))
+
+    def send_timing(self, stage: str, seconds: float):
+        self._send(MessageKind.TIMING, _SECONDS.pack(seconds) + stage.encode("utf-8"))
+
+    def send_done(self):
+        self._send(MessageKind.DONE, b"")
+
+    def _send(self, kind: MessageKind, payload: bytes):
+        # Progress output is written often by every backend, which makes it a
+        # convenient point to stop a task cooperatively without killing the
+        # process that holds the loaded model.
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise Stopped("Transcription was canceled")
+
+        if len(payload) > MAPPED_PAYLOAD_THRESHOLD:
+            self.conn.send_bytes(
+                _KIND.pack(kind | MAPPED_FLAG) + _write_mapped_file(payload).encode("utf-8")
+            )
+        else:
+            self.conn.send_bytes(_KIND.pack(kind) + payload)
+
+
+def _write_mapped_file(payload: bytes) -> str:
+    """Writes a payload to a temporary file the parent maps and then removes."""
+    fd, path = tempfile.mkstemp(prefix="buzz-", suffix=".segments")
+    with os.fdopen(fd, "wb") as file:
+        file.write(payload)
+    return path
 
 
 @contextmanager
-def pipe_stderr(conn: Connection):
-    sys.stderr = ConnWriter(conn)
+def pipe_stderr(conn: Connection, cancel_event: Optional[object] = None):
+    writer = ConnWriter(conn, cancel_event)
+    sys.stderr = writer
 
     try:
-        yield
+        yield writer
     finally:
         sys.stderr = sys.__stderr__
@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from typing import Dict, List
 from uuid import UUID
 
 from PyQt6.QtSql import QSqlDatabase
@@ -239,7 +240,7 @@ class TranscriptionDAO(DAO[Transcription]):
         query.prepare(
             """
             UPDATE transcription
-            SET status = :status, time_ended = :time_ended
+            SET status = :status, time_ended = :time_ended, resume_offset = NULL
             WHERE id = :id
         """
         )
@@ -333,6 +334,80 @@ class TranscriptionDAO(DAO[Transcription]):
         if not query.exec():
             raise Exception(query.lastError().text())
 
+    def update_transcription_queue_positions(self, positions: Dict[str, int]):
+        query = self._create_query()
+        query.prepare(
+            """
+            UPDATE transcription
+            SET queue_position = NULL
+            WHERE queue_position IS NOT NULL
+        """
+        )
+        if not query.exec():
+            raise Exception(query.lastError().text())
+
+        query.prepare(
+            """
+            UPDATE transcription
+            SET queue_position = :queue_position
+            WHERE id = :id
+        """
+        )
+        for id, position in positions.items():
+            query.bindValue(":id", id)
+            query.bindValue(":queue_position", position)
+            if not query.exec():
+                raise Exception(query.lastError().text())
+
+    def update_transcription_resume_offset(self, id: UUID, resume_offset: int):
+        query = self._create_query()
+        query.prepare(
+            """
+            UPDATE transcription
+            SET resume_offset = :resume_offset
+            WHERE id = :id
+        """
+        )
+
+        query.bindValue(":id", str(id))
+        query.bindValue(":resume_offset", resume_offset)
+        if not query.exec():
+            raise Exception(query.lastError().text())
+
+    def update_transcription_metrics(
+        self,
+        id: UUID,
+        audio_duration: float | None,
+        real_time_factor: float | None,
+        metrics: str,
+    ):
+        query = self._create_query()
+        query.prepare(
+            """
+            UPDATE transcription
+            SET audio_duration = :audio_duration, real_time_factor = :real_time_factor, metrics = :metrics
+            WHERE id = :id
+        """
+        )
+
+        query.bindValue(":id", str(id))
+        query.bindValue(":audio_duration", audio_duration)
+        query.bindValue(":real_time_factor", real_time_factor)
+        query.bindValue(":metrics", metrics)
+        if not query.exec():
+            raise Exception(query.lastError().text())
+
+    def find_all_with_metrics(self) -> List[Transcription]:
+        query = self._create_query()
+        query.prepare(
+            """
+            SELECT * FROM transcription
+            WHERE metrics IS NOT NULL
+            ORDER BY time_queued
+        """
+        )
+        return self._execute_all(query)
+
     def find_completed_transcription_by_filename(self, filename: str):
         query = self._create_query()
         query.prepare(
@@ -32,6 +32,12 @@ class Transcription(Entity):
     url: str | None = None
     name: str | None = None
     notes: str | None = None
+    queue_position: int | None = None
+    resume_offset: int | None = None
+    audio_duration: float | None = None
+    real_time_factor: float | None = None
+    # Seconds spent in each stage as JSON, see buzz.transcriber.metrics
+    metrics: str | None = None
 
     @property
     def id_as_uuid(self):
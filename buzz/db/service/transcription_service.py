@@ -1,9 +1,12 @@
-from typing import List
+import json
+from typing import Dict, List
 from uuid import UUID
 
 from buzz.db.dao.transcription_dao import TranscriptionDAO
 from buzz.db.dao.transcription_segment_dao import TranscriptionSegmentDAO
+from buzz.db.entity.transcription import Transcription
 from buzz.db.entity.transcription_segment import TranscriptionSegment
+from buzz.transcriber.metrics import get_real_time_factor
 from buzz.transcriber.transcriber import Segment
 
 
@@ -16,6 +19,9 @@ class TranscriptionService:
         self.transcription_dao = transcription_dao
         self.transcription_segment_dao = transcription_segment_dao
 
+    def get_transcription(self, id: UUID) -> Transcription | None:
+        return self.transcription_dao.find_by_id(str(id))
+
     def create_transcription(self, task):
         self.transcription_dao.create_transcription(task)
 
@@ -36,6 +42,8 @@ class TranscriptionService:
 
     def update_transcription_as_completed(self, id: UUID, segments: List[Segment]):
         self.transcription_dao.update_transcription_as_completed(id)
+        # Replaces the segments saved by checkpoints while the task was running
+        self.transcription_segment_dao.delete_segments(id)
         for segment in segments:
             self.transcription_segment_dao.insert(
                 TranscriptionSegment(
@@ -61,6 +69,7 @@ class TranscriptionService:
 
     def update_transcription_as_skipped(self, id: UUID, segments: List[Segment]):
         self.transcription_dao.update_transcription_as_skipped(id)
+        self.transcription_segment_dao.delete_segments(id)
         for segment in segments:
             self.transcription_segment_dao.insert(
                 TranscriptionSegment(
@@ -72,6 +81,44 @@ class TranscriptionService:
                 )
             )
 
+    def add_transcription_checkpoint(self, id: UUID, resume_offset: int, segments: List[Segment]):
+        """Saves segments of a running transcription and the audio offset in ms
+        they reach, the task continues from there if it gets interrupted."""
+        db = self.transcription_dao.db
+        db.transaction()
+        try:
+            for segment in segments:
+                self.transcription_segment_dao.insert(
+                    TranscriptionSegment(
+                        start_time=segment.start,
+                        end_time=segment.end,
+                        text=segment.text,
+                        translation='',
+                        transcription_id=str(id),
+                    )
+                )
+            self.transcription_dao.update_transcription_resume_offset(id, resume_offset)
+        except Exception:
+            db.rollback()
+            raise
+        db.commit()
+
+    def update_transcription_queue_positions(self, positions: Dict[str, int]):
+        self.transcription_dao.update_transcription_queue_positions(positions)
+
+    def update_transcription_metrics(
+        self, id: UUID, timings: Dict[str, float], audio_duration: float | None
+    ):
+        self.transcription_dao.update_transcription_metrics(
+            id,
+            audio_duration,
+            get_real_time_factor(timings, audio_duration),
+            json.dumps(timings),
+        )
+
+    def get_transcriptions_with_metrics(self) -> List[Transcription]:
+        return self.transcription_dao.find_all_with_metrics()
+
     def find_completed_transcription_by_filename(self, filename: str):
         return self.transcription_dao.find_completed_transcription_by_filename(filename)
 
@@ -1,77 +1,25 @@
-import json
 import logging
 from dataclasses import dataclass
-import os
-import subprocess
-import sys
 import threading
 import time
 from collections import deque
 from typing import Optional
 
+import av
 import numpy as np
 
-
-def _find_ffmpeg() -> str:
-    import shutil
-    path = shutil.which("ffmpeg")
-    if path:
-        return path
-    for name in ("ffmpeg", "ffmpeg.exe"):
-        p = os.path.join(getattr(sys, "_MEIPASS", ""), name)
-        if os.path.exists(p):
-            return p
-    return "ffmpeg"
-
-
-def _find_ffprobe() -> str:
-    import shutil
-    path = shutil.which("ffprobe")
-    if path:
-        return path
-    for name in ("ffprobe", "ffprobe.exe"):
-        p = os.path.join(getattr(sys, "_MEIPASS", ""), name)
-        if os.path.exists(p):
-            return p
-    return "ffprobe"
+from buzz.media_io import probe
 
 
 def probe_video(file_path: str) -> dict:
     """Returns dict with duration_ms, fps, width, height, has_video."""
-    ffprobe = _find_ffprobe()
-    result = subprocess.run(
-        [ffprobe, "-v", "quiet", "-print_format", "json",
-         "-show_streams", "-show_format", file_path],
-        capture_output=True, check=True, text=True,
-    )
-    info = json.loads(result.stdout)
-
-    duration_s = float(info.get("format", {}).get("duration", 0) or 0)
-    width = height = 0
-    fps = 25.0
-    has_video = False
-
-    for stream in info.get("streams", []):
-        if stream.get("codec_type") == "video":
-            has_video = True
-            width = int(stream.get("width", 0))
-            height = int(stream.get("height", 0))
-            rfr = stream.get("r_frame_rate", "25/1")
-            try:
-                n, d = rfr.split("/")
-                fps = float(n) / float(d)
-            except Exception:
-                fps = 25.0
-            if not duration_s:
-                duration_s = float(stream.get("duration", 0) or 0)
-            break
-
+    info = probe(file_path)
     return {
-        "duration_ms": int(duration_s * 1000),
-        "fps": fps,
-        "width": width,
-        "height": height,
-        "has_video": has_video,
+        "duration_ms": info.duration_ms,
+        "fps": info.fps,
+        "width": info.width,
+        "height": info.height,
+        "has_video": info.has_video,
     }
 
 
@@ -81,13 +29,12 @@ class _VideoParams:
     width: int
     height: int
     fps: float
-    frame_size: int
     start_ms: float
 
 
 class FfmpegFrameReader:
     """
-    Reads raw RGB24 video frames from a file via ffmpeg in a background thread.
+    Decodes RGB24 video frames from a file with PyAV in a background thread.
     Frames are buffered as (timestamp_ms, ndarray) pairs.
     """
 
@@ -99,7 +46,6 @@ class FfmpegFrameReader:
             width=width,
             height=height,
             fps=fps,
-            frame_size=width * height * 3,
             start_ms=float(start_ms),
         )
 
@@ -107,7 +53,6 @@ class FfmpegFrameReader:
         self._frames: deque = deque()
         self._done = False
         self._stop_event = threading.Event()
-        self._proc: Optional[subprocess.Popen] = None
 
         self._thread = threading.Thread(target=self._read_loop, daemon=True)
         self._thread.start()
@@ -118,61 +63,52 @@ class FfmpegFrameReader:
             return self._done and len(self._frames) == 0
 
     def _read_loop(self):
-        ffmpeg = _find_ffmpeg()
-        cmd = [
-            ffmpeg,
-            "-ss", str(self._params.start_ms / 1000.0),
-            "-i", self._params.file_path,
-            "-f", "rawvideo",
-            "-pix_fmt", "rgb24",
-            "-s", f"{self._params.width}x{self._params.height}",
-            "-r", str(self._params.fps),
-            "-an",
-            "-",
-        ]
         try:
-            self._proc = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
-            )
-            frame_ms = 1000.0 / self._params.fps
-            pos = self._params.start_ms
-
-            while not self._stop_event.is_set():
-                # Throttle when buffer is full
-                while not self._stop_event.is_set():
+            with av.open(self._params.file_path) as container:
+                stream = container.streams.video[0]
+                stream.thread_type = "AUTO"
+                if self._params.start_ms > 0:
+                    container.seek(int(self._params.start_ms * 1000))
+
+                frame_ms = 1000.0 / self._params.fps
+                next_ms = self._params.start_ms
+
+                for frame in container.decode(stream):
+                    if self._stop_event.is_set():
+                        break
+                    if frame.time is None:
+                        continue
+
+                    # Frames before the start, which seeking lands before, and
+                    # frames above the frame rate are dropped
+                    pos = frame.time * 1000
+                    if pos < next_ms - frame_ms / 2:
+                        continue
+                    next_ms = max(next_ms, pos) + frame_ms
+
+                    # Throttle when buffer is full
+                    while not self._stop_event.is_set():
+                        with self._lock:
+                            if len(self._frames) < self.MAX_BUFFER:
+                                break
+                        time.sleep(0.005)
+
+                    if self._stop_event.is_set():
+                        break
+
+                    arr = frame.reformat(
+                        width=self._params.width,
+                        height=self._params.height,
+                        format="rgb24",
+                    ).to_ndarray()
                     with self._lock:
-                        if len(self._frames) < self.MAX_BUFFER:
-                            break
-                    time.sleep(0.005)
-
-                if self._stop_event.is_set():
-                    break
-
-                raw = self._proc.stdout.read(self._params.frame_size)
-                if len(raw) < self._params.frame_size:
-                    with self._lock:
-                        self._done = True
-                    break
-
-                arr = np.frombuffer(raw, dtype=np.uint8).reshape(
-                    (self._params.height, self._params.width, 3)
-                ).copy()
-                with self._lock:
-                    self._frames.append((pos, arr))
-                pos += frame_ms
+                        self._frames.append((pos, arr))
 
         except Exception:
             logging.debug("FfmpegFrameReader: read loop error", exc_info=True)
+        finally:
             with self._lock:
                 self._done = True
-        finally:
-            if self._proc:
-                try:
-                    self._proc.stdout.close()
-                    self._proc.kill()
-                    self._proc.wait()
-                except Exception:
-                    pass
 
     def get_frame_for_position(self, position_ms: float) -> Optional[np.ndarray]:
         """Return best frame for position_ms, draining stale frames."""
@@ -201,11 +137,6 @@ class FfmpegFrameReader:
 
     def stop(self):
         self._stop_event.set()
-        if self._proc:
-            try:
-                self._proc.kill()
-            except Exception:
-                pass
 
 
 @dataclass
@@ -219,7 +150,7 @@ class _VideoInfo:
 
 class FfmpegVideoPlayer:
     """
-    Provides software-decoded RGB video frames via ffmpeg.
+    Provides software-decoded RGB video frames via PyAV.
     Avoids Qt's GPU video renderer which can produce green stripe artefacts.
     Call get_frame_for_position(position_ms) from a display timer.
     """
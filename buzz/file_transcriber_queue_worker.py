@@ -4,10 +4,12 @@ import os
 import queue
 import ssl
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Tuple, List, Set
+from typing import Dict, Optional, Tuple, List, Set
 from uuid import UUID
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 # Fix SSL certificate verification for bundled applications (macOS, Windows)
 # This must be done before importing demucs which uses torch.hub with urllib
@@ -54,6 +56,8 @@ if sys.platform == "win32":
 
 from demucs import api as demucsApi
 
+from buzz.audio_cache import get_decoded_audio_path
+from buzz.hardware import get_capabilities
 from buzz.locale import _
 
 
@@ -90,122 +94,429 @@ def _speech_extraction_worker(conn, file_path: str, speech_path: str, device: st
         except Exception:
             pass
 from buzz.model_loader import ModelType
-from buzz.transcriber.file_transcriber import FileTranscriber
+from buzz.transcriber.batch_file_transcriber import (
+    BatchFileTranscriber,
+    get_batch_files,
+    get_batch_key,
+    is_batching_enabled,
+)
+from buzz.transcriber.chunked_file_transcriber import (
+    ChunkedFileTranscriber,
+    should_transcribe_in_chunks,
+)
+from buzz.transcriber.file_transcriber import (
+    FileTranscriber,
+    download_audio,
+    handle_folder_watch,
+    write_outputs,
+)
+from buzz.transcriber.metrics import Stage, add_timing, timed
 from buzz.transcriber.openai_whisper_api_file_transcriber import (
     OpenAIWhisperAPIFileTranscriber,
 )
+from buzz.transcriber.result_cache import get_cache_key
+from buzz.transcriber.task_scheduler import (
+    SchedulingPolicy,
+    TaskScheduler,
+    probe_duration,
+)
 from buzz.transcriber.transcriber import FileTranscriptionTask, Segment
+from buzz.transcriber.tuning import apply_tuned_config
+from buzz.transcriber.warm_model_pool import WarmModelPool, get_model_cache_size
+from buzz.transcriber.whisper_cpp import WHISPER_CPP_SUPPORTED_FORMATS
 from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
 
+# Prepared tasks waiting for a transcription slot, bounds how far the preparation
+# stage runs ahead (and how many extracted speech files wait on disk)
+PREPARED_TASKS_BUFFER_SIZE = 1
+
 
 @dataclass
 class _CurrentTranscription:
     task: Optional[FileTranscriptionTask] = None
     transcriber: Optional[FileTranscriber] = None
     transcriber_thread: Optional[QThread] = None
+    speech_path: Optional[Path] = None
+    # Slots of the tasks transcribed in one batch with this one
+    batch: List["_CurrentTranscription"] = field(default_factory=list)
+    # time.perf_counter() when the task was prepared
+    prepared_at: float = 0.0
 
 
 class FileTranscriberQueueWorker(QObject):
-    tasks_queue: multiprocessing.Queue
+    tasks_queue: TaskScheduler
 
     task_started = pyqtSignal(FileTranscriptionTask)
     task_progress = pyqtSignal(FileTranscriptionTask, float)
     task_download_progress = pyqtSignal(FileTranscriptionTask, float)
     task_completed = pyqtSignal(FileTranscriptionTask, list)
     task_error = pyqtSignal(FileTranscriptionTask, str)
+    # Segments transcribed so far and the audio offset in ms they reach
+    task_checkpoint = pyqtSignal(FileTranscriptionTask, int, list)
+
+    # Position of each waiting task in the queue, by task id
+    queue_positions_changed = pyqtSignal(dict)
 
     completed = pyqtSignal()
     trigger_run = pyqtSignal()
 
-    def __init__(self, parent: Optional[QObject] = None):
+    # Transcriber signals re-emitted together with the slot they belong to
+    _slot_progress = pyqtSignal(tuple, object)
+    _slot_download_progress = pyqtSignal(float, object)
+    _slot_error = pyqtSignal(str, object)
+    _slot_completed = pyqtSignal(list, object)
+    _slot_finished = pyqtSignal(object)
+
+    def __init__(
+        self,
+        parent: Optional[QObject] = None,
+        max_concurrent_tasks: int = 1,
+        scheduling_policy: SchedulingPolicy = SchedulingPolicy.FIFO,
+    ):
         super().__init__(parent)
-        self.tasks_queue = queue.Queue()
+        self.tasks_queue = TaskScheduler(policy=scheduling_policy)
+        # time.perf_counter() when each waiting task was added, by task id
+        self.queued_at: Dict[UUID, float] = {}
+        self.max_concurrent_tasks = max(1, max_concurrent_tasks)
+        # Tasks that went through fetch, speech extraction and plugins, waiting
+        # for a free transcription slot
+        # Batches are formed from the prepared tasks, prepare enough of them
+        self.prepared_tasks_queue = queue.Queue(
+            maxsize=(
+                max(PREPARED_TASKS_BUFFER_SIZE, get_batch_files())
+                if is_batching_enabled()
+                else PREPARED_TASKS_BUFFER_SIZE
+            )
+        )
+        # Prepared slot taken while forming a batch that it could not join
+        self.held_slot: Optional[_CurrentTranscription] = None
+        self.preparer_thread: Optional[threading.Thread] = None
+        # Slot of the task being prepared
+        self.preparing = _CurrentTranscription()
+        # Slot of the most recently started task
         self.current = _CurrentTranscription()
+        # Slots of the tasks being transcribed, by task id
+        self.running: Dict[UUID, _CurrentTranscription] = {}
         self.canceled_tasks: Set[UUID] = set()
-        self.speech_path = None
         self.speech_extractor_process = None
         self.is_running = False
+        self.is_stopped = False
+        # Long-lived worker processes that keep models loaded between tasks
+        model_cache_size = get_model_cache_size()
+        self.model_pool = (
+            WarmModelPool(
+                max_workers=self.max_concurrent_tasks, cache_size=model_cache_size
+            )
+            if model_cache_size > 0
+            else None
+        )
         # Assigned by MainWindow after construction. Duck-typed to avoid an
         # import cycle with the plugins package.
         self.plugin_manager = None
+        # Assigned by MainWindow, a ResultCache with earlier results of the
+        # same audio and options
+        self.result_cache = None
         # Use QueuedConnection to ensure run() is called in the correct thread context
         # and doesn't block signal handlers
         self.trigger_run.connect(self.run, Qt.ConnectionType.QueuedConnection)
 
+        # Transcribers live in their own threads, queue their signals so the
+        # handlers always run in the worker's thread
+        self._slot_progress.connect(
+            self.on_task_progress, Qt.ConnectionType.QueuedConnection
+        )
+        self._slot_download_progress.connect(
+            self.on_task_download_progress, Qt.ConnectionType.QueuedConnection
+        )
+        self._slot_error.connect(self.on_task_error, Qt.ConnectionType.QueuedConnection)
+        self._slot_completed.connect(
+            self.on_task_completed, Qt.ConnectionType.QueuedConnection
+        )
+        self._slot_finished.connect(
+            self._on_task_finished, Qt.ConnectionType.QueuedConnection
+        )
+
+    @property
+    def running_tasks(self) -> List[FileTranscriptionTask]:
+        return [slot.task for slot in self.running.values()]
+
+    def set_max_concurrent_tasks(self, max_concurrent_tasks: int):
+        self.max_concurrent_tasks = max(1, max_concurrent_tasks)
+        if self.model_pool is not None:
+            self.model_pool.set_max_workers(self.max_concurrent_tasks)
+
+        self.is_running = len(self.running) >= self.max_concurrent_tasks
+        if not self.is_running:
+            self.trigger_run.emit()
+
     @pyqtSlot()
     def run(self):
-        if self.is_running:
+        if self.is_running or self.is_stopped:
             return
 
-        logging.debug("Waiting for next transcription task")
+        self._start_preparer_thread()
+
+        while len(self.running) < self.max_concurrent_tasks:
+            logging.debug("Waiting for next transcription task")
+
+            # Only block while idle, a running task must be able to report back
+            slot = self._get_next_prepared_task(block=len(self.running) == 0)
+            if slot is None:
+                break
 
-        self._cleanup_previous_transcriber()
+            logging.debug("Starting next transcription task")
+            self._collect_batch(slot)
+            self.current = slot
+            started_at = time.perf_counter()
+            for member in [slot] + slot.batch:
+                add_timing(
+                    member.task.timings, Stage.QUEUE_WAIT, started_at - member.prepared_at
+                )
+                self.task_progress.emit(member.task, 0)
+
+            self._create_transcriber(slot)
+            self._setup_transcriber_thread(slot)
 
-        if not self._get_next_task():
+        self.is_running = len(self.running) >= self.max_concurrent_tasks
+
+        if self.is_stopped:
             self.is_running = False
             self.completed.emit()
-            return
 
-        self.is_running = True
+    def _start_preparer_thread(self):
+        if self.preparer_thread is None:
+            self.preparer_thread = threading.Thread(
+                target=self._prepare_tasks, name="TaskPreparer", daemon=True
+            )
+            self.preparer_thread.start()
 
-        if self.current.task.transcription_options.extract_speech:
-            status = self._setup_speech_extraction()
-            if status == "error":
-                self.is_running = False
+    def _prepare_tasks(self):
+        """Runs the stages before transcription for queued tasks.
+
+        Tasks are fetched, have their speech extracted and go through the
+        plugins here, so the next task is ready by the time a transcription
+        slot frees up. The prepared tasks buffer is bounded, this stage waits
+        while it is full.
+        """
+        while True:
+            task = self.tasks_queue.get()
+            if task is None:
+                self.prepared_tasks_queue.put(None)
                 return
 
-        if not self._run_plugins():
+            if task.uid in self.canceled_tasks:
+                continue
+
+            self._emit_queue_positions()
+
+            try:
+                slot = self._prepare_task(task)
+            except Exception as e:
+                logging.error(f"Error preparing transcription task: {e}", exc_info=True)
+                task.status = FileTranscriptionTask.Status.FAILED
+                task.error = str(e)
+                self.task_error.emit(task, str(e))
+                continue
+            finally:
+                self.preparing = _CurrentTranscription()
+
+            if slot is not None:
+                self.prepared_tasks_queue.put(slot)
+                # run() only waits for a prepared task while idle, start this
+                # one in a free slot next to the running tasks
+                self.trigger_run.emit()
+
+    def _prepare_task(self, task: FileTranscriptionTask) -> Optional[_CurrentTranscription]:
+        """Fetch, speech extraction and plugin stages of a task.
+
+        Returns None if the task should not be transcribed, because a stage
+        failed, it was canceled or a plugin skipped it.
+        """
+        slot = _CurrentTranscription(task=task)
+        self.preparing = slot
+
+        now = time.perf_counter()
+        add_timing(task.timings, Stage.QUEUE_WAIT, now - self.queued_at.pop(task.uid, now))
+
+        if task.source == FileTranscriptionTask.Source.URL_IMPORT:
+            with timed(task.timings, Stage.DOWNLOAD):
+                if not self._download(slot):
+                    return None
+
+        task.audio_duration = probe_duration(task.file_path)
+
+        if self._complete_from_cache(slot):
+            return None
+
+        if task.transcription_options.extract_speech:
+            with timed(task.timings, Stage.SPEECH_EXTRACTION):
+                status = self._setup_speech_extraction(slot)
+            if status == "error":
+                return None
+
+        if task.uid in self.canceled_tasks:
+            self._delete_speech_file(slot)
+            return None
+
+        with timed(task.timings, Stage.PLUGINS):
+            if not self._run_plugins(slot):
+                return None
+
+        with timed(task.timings, Stage.AUDIO_DECODE):
+            self._prewarm_decoded_audio(slot.task)
+
+        slot.prepared_at = time.perf_counter()
+        return slot
+
+    def _complete_from_cache(self, slot: _CurrentTranscription) -> bool:
+        """Completes the task with an earlier result of the same audio and
+        options, before speech extraction or any model work.
+
+        Returns True on a cache hit.
+        """
+        if self.result_cache is None:
+            return False
+
+        slot.task.cache_key = get_cache_key(slot.task)
+        if slot.task.cache_key is None:
+            return False
+
+        segments = self.result_cache.get(slot.task.cache_key)
+        if segments is None:
+            return False
+
+        logging.debug(f"Using cached result for {slot.task.file_path}")
+        slot.task.status = FileTranscriptionTask.Status.COMPLETED
+        self.task_started.emit(slot.task)
+        # Post-processed like a transcription that completed, see FileTranscriber.run
+        write_outputs(slot.task, segments)
+        self.on_task_completed(segments, slot)
+        handle_folder_watch(slot.task)
+        return True
+
+    def _prewarm_decoded_audio(self, task: FileTranscriptionTask):
+        """Decodes the audio into the decoded audio cache ahead of the
+        transcription, for the backends that read it from there."""
+        model_type = task.transcription_options.model.model_type
+        if model_type == ModelType.HUGGING_FACE:
+            return
+        if (
+            model_type == ModelType.WHISPER_CPP
+            and Path(task.file_path).suffix.lower() in WHISPER_CPP_SUPPORTED_FORMATS
+        ):
             return
 
-        logging.debug("Starting next transcription task")
-        self.task_progress.emit(self.current.task, 0)
+        try:
+            get_decoded_audio_path(task.file_path)
+        except Exception as e:
+            # The transcriber reports the error if the file can not be decoded
+            logging.debug(f"Could not decode audio of {task.file_path}: {e}")
 
-        self._create_transcriber()
-        self._setup_transcriber_thread()
+    def _get_next_prepared_task(
+        self, block: bool = True
+    ) -> Optional[_CurrentTranscription]:
+        """Returns the slot of the next prepared task that was not canceled.
 
-    def _cleanup_previous_transcriber(self):
-        if self.current.transcriber is not None:
-            self.current.transcriber.stop()
-            self.current.transcriber = None
+        Returns None if no task is ready or the stop sentinel was received.
+        """
+        if self.held_slot is not None:
+            slot, self.held_slot = self.held_slot, None
+            if slot.task.uid not in self.canceled_tasks:
+                return slot
+            self._delete_speech_file(slot)
 
-    def _get_next_task(self) -> bool:
         while True:
-            self.current.task = self.tasks_queue.get()
-            if self.current.task is None:
-                return False
-            if self.current.task.uid in self.canceled_tasks:
+            try:
+                slot = self.prepared_tasks_queue.get(block=block)
+            except queue.Empty:
+                return None
+
+            if slot is None:
+                self.is_stopped = True
+                return None
+            if slot.task.uid in self.canceled_tasks:
+                self._delete_speech_file(slot)
                 continue
-            return True
+            return slot
+
+    def _collect_batch(self, slot: _CurrentTranscription):
+        """Adds the prepared tasks that can be transcribed together with the
+        slot's task to its batch. Only waits for tasks that are already
+        prepared, a batch grows while the previous one runs."""
+        key = get_batch_key(slot.task)
+        if key is None:
+            return
+
+        batch_files = get_batch_files()
+        while len(slot.batch) + 1 < batch_files:
+            next_slot = self._get_next_prepared_task(block=False)
+            if next_slot is None:
+                return
+
+            if get_batch_key(next_slot.task) != key:
+                self.held_slot = next_slot
+                return
+
+            slot.batch.append(next_slot)
+
+        logging.debug(f"Transcribing {len(slot.batch) + 1} files in one batch")
 
-    def _setup_speech_extraction(self) -> str:
+    def _download(self, slot: _CurrentTranscription) -> bool:
+        try:
+            slot.task.file_path = download_audio(
+                slot.task.url,
+                lambda fraction: self.task_download_progress.emit(slot.task, fraction),
+            )
+        except Exception as e:
+            logging.debug(f"Error downloading audio: {e}")
+            slot.task.status = FileTranscriptionTask.Status.FAILED
+            slot.task.error = str(e)
+            self.task_error.emit(slot.task, str(e))
+            return False
+        return True
+
+    def _get_thread_budget(self, task: FileTranscriptionTask) -> Optional[int]:
+        """Splits the CPU cores between concurrent local transcriptions.
+
+        Returns None to let the backend pick its default.
+        """
+        if self.max_concurrent_tasks <= 1:
+            return None
+
+        model_type = task.transcription_options.model.model_type
+        if model_type == ModelType.OPEN_AI_WHISPER_API:
+            return None
+
+        return max(1, (os.cpu_count() or 8) // self.max_concurrent_tasks)
+
+    def _setup_speech_extraction(self, slot: _CurrentTranscription) -> str:
         logging.debug("Will extract speech")
 
         force_cpu = os.getenv("BUZZ_FORCE_CPU", "false").lower() == "true"
         if force_cpu:
             device = "cpu"
         else:
-            import torch
-            device = "cuda" if torch.cuda.is_available() else "cpu"
+            device = "cuda" if get_capabilities().cuda else "cpu"
 
-        task_file_path = Path(self.current.task.file_path)
+        task_file_path = Path(slot.task.file_path)
         speech_path = task_file_path.with_name(f"{task_file_path.stem}_speech.mp3")
 
         status = self._extract_speech(str(task_file_path), str(speech_path), device)
 
-        if status == "error":
+        if status == "error" and slot.task.uid not in self.canceled_tasks:
             self.task_error.emit(
-                self.current.task,
+                slot.task,
                 _("Speech extraction failed! Check your internet connection \u2014 a model may need to be downloaded."),
             )
         elif status == "ok":
-            self.speech_path = speech_path
-            if not self.current.task.original_file_path:
-                self.current.task.original_file_path = str(task_file_path)
-            self.current.task.file_path = str(speech_path)
+            slot.speech_path = speech_path
+            if not slot.task.original_file_path:
+                slot.task.original_file_path = str(task_file_path)
+            slot.task.file_path = str(speech_path)
 
         return status
 
-    def _run_plugins(self) -> bool:
+    def _run_plugins(self, slot: _CurrentTranscription) -> bool:
         """Run before_transcription and check_skip hooks.
 
         Returns False if a plugin signaled that the task should be skipped,
@@ -213,26 +524,35 @@ class FileTranscriberQueueWorker(QObject):
         """
         if self.plugin_manager is not None:
             try:
-                self.plugin_manager.run_before_transcription(self.current.task)
+                self.plugin_manager.run_before_transcription(slot.task)
             except Exception as e:
                 logging.error(f"Plugin before_transcription failed: {e}", exc_info=True)
 
-            should_skip, skip_segments = self.plugin_manager.run_check_skip(self.current.task)
+            should_skip, skip_segments = self.plugin_manager.run_check_skip(slot.task)
             if should_skip:
                 logging.debug("Skipping transcription task (plugin signaled skip)")
-                self.current.task.status = FileTranscriptionTask.Status.SKIPPED
-                self.on_task_completed(skip_segments)
-                self.is_running = False
-                self._on_task_finished()
+                slot.task.status = FileTranscriptionTask.Status.SKIPPED
+                self.on_task_completed(skip_segments, slot)
                 return False
 
         return True
 
-    def _create_transcriber(self):
-        model_type = self.current.task.transcription_options.model.model_type
+    def _create_transcriber(self, slot: _CurrentTranscription):
+        slot.task.n_threads = self._get_thread_budget(slot.task)
+        apply_tuned_config(slot.task)
+
+        model_type = slot.task.transcription_options.model.model_type
         if model_type == ModelType.OPEN_AI_WHISPER_API:
-            self.current.transcriber = OpenAIWhisperAPIFileTranscriber(
-                task=self.current.task
+            slot.transcriber = OpenAIWhisperAPIFileTranscriber(task=slot.task)
+        elif len(slot.batch) > 0:
+            slot.transcriber = BatchFileTranscriber(
+                tasks=[slot.task] + [member.task for member in slot.batch],
+                model_pool=self.model_pool,
+            )
+        elif should_transcribe_in_chunks(slot.task):
+            # Long files are split and transcribed by several warm workers
+            slot.transcriber = ChunkedFileTranscriber(
+                task=slot.task, model_pool=self.model_pool
             )
         elif (
             model_type == ModelType.WHISPER_CPP
@@ -240,38 +560,81 @@ class FileTranscriberQueueWorker(QObject):
             or model_type == ModelType.WHISPER
             or model_type == ModelType.FASTER_WHISPER
         ):
-            self.current.transcriber = WhisperFileTranscriber(task=self.current.task)
+            slot.transcriber = WhisperFileTranscriber(
+                task=slot.task, model_pool=self.model_pool
+            )
         else:
             raise Exception(f"Unknown model type: {model_type}")
 
-    def _setup_transcriber_thread(self):
-        self.current.transcriber_thread = QThread(self)
+    def _setup_transcriber_thread(self, slot: _CurrentTranscription):
+        slot.transcriber_thread = QThread(self)
+        transcriber = slot.transcriber
+        transcriber_thread = slot.transcriber_thread
 
-        self.current.transcriber.moveToThread(self.current.transcriber_thread)
+        transcriber.moveToThread(transcriber_thread)
 
-        self.current.transcriber_thread.started.connect(self.current.transcriber.run)
-        self.current.transcriber.completed.connect(self.current.transcriber_thread.quit)
-        self.current.transcriber.error.connect(self.current.transcriber_thread.quit)
+        transcriber_thread.started.connect(transcriber.run)
+        transcriber.completed.connect(transcriber_thread.quit)
+        transcriber.error.connect(transcriber_thread.quit)
 
-        self.current.transcriber.completed.connect(self.current.transcriber.deleteLater)
-        self.current.transcriber.error.connect(self.current.transcriber.deleteLater)
-        self.current.transcriber_thread.finished.connect(
-            self.current.transcriber_thread.deleteLater
-        )
-
-        self.current.transcriber.progress.connect(self.on_task_progress)
-        self.current.transcriber.download_progress.connect(
-            self.on_task_download_progress
-        )
-        self.current.transcriber.error.connect(self.on_task_error)
+        transcriber.completed.connect(transcriber.deleteLater)
+        transcriber.error.connect(transcriber.deleteLater)
+        transcriber_thread.finished.connect(transcriber_thread.deleteLater)
 
-        self.current.transcriber.completed.connect(self.on_task_completed)
+        if isinstance(transcriber, BatchFileTranscriber):
+            self._connect_batch_signals(slot, transcriber)
+        else:
+            transcriber.progress.connect(
+                lambda progress: self._slot_progress.emit(progress, slot)
+            )
+            transcriber.download_progress.connect(
+                lambda fraction: self._slot_download_progress.emit(fraction, slot)
+            )
+            transcriber.error.connect(lambda error: self._slot_error.emit(error, slot))
+            transcriber.checkpoint.connect(
+                lambda offset, segments: self.task_checkpoint.emit(
+                    slot.task, offset, segments
+                )
+            )
 
-        self.current.transcriber.error.connect(lambda: self._on_task_finished())
-        self.current.transcriber.completed.connect(lambda: self._on_task_finished())
+            transcriber.completed.connect(
+                lambda segments: self._slot_completed.emit(segments, slot)
+            )
 
-        self.task_started.emit(self.current.task)
-        self.current.transcriber_thread.start()
+        transcriber.error.connect(lambda: self._slot_finished.emit(slot))
+        transcriber.completed.connect(lambda: self._slot_finished.emit(slot))
+
+        self.running[slot.task.uid] = slot
+        for member in [slot] + slot.batch:
+            self.task_started.emit(member.task)
+        transcriber_thread.start()
+
+    def _connect_batch_signals(
+        self, slot: _CurrentTranscription, transcriber: BatchFileTranscriber
+    ):
+        """Reports the progress and errors of a batch for all of its tasks and
+        each result for its own task."""
+        members = {member.task.uid: member for member in [slot] + slot.batch}
+
+        def on_progress(progress):
+            for member in members.values():
+                self._slot_progress.emit(progress, member)
+
+        def on_error(error):
+            for member in members.values():
+                self._slot_error.emit(error, member)
+
+        def on_task_completed(task, segments):
+            # Tasks canceled while their batch ran are dropped
+            if task.uid not in self.canceled_tasks:
+                self._slot_completed.emit(segments, members[task.uid])
+
+        transcriber.progress.connect(on_progress)
+        transcriber.error.connect(on_error)
+        transcriber.task_completed.connect(on_task_completed)
+        transcriber.task_error.connect(
+            lambda task, error: self._slot_error.emit(error, members[task.uid])
+        )
 
     def _extract_speech(self, file_path: str, speech_path: str, device: str) -> str:
         """Run demucs speech extraction in a separate process.
@@ -303,7 +666,7 @@ class FileTranscriberQueueWorker(QObject):
                     audio_length = int(message[2] * 100)
                     if audio_length:
                         self.task_progress.emit(
-                            self.current.task,
+                            self.preparing.task,
                             int(message[1] * 100) / audio_length,
                         )
                 elif kind == "done":
@@ -349,8 +712,17 @@ class FileTranscriberQueueWorker(QObject):
                 process.kill()
                 process.join(timeout=5)
 
-    def _on_task_finished(self):
-        """Called when a task completes or errors, resets state and triggers next run"""
+
+    def _on_task_finished(self, slot: Optional[_CurrentTranscription] = None):
+        """Called when a task completes or errors, frees its slot and triggers next run"""
+        slot = slot or self.current
+        if slot.task is not None:
+            self.running.pop(slot.task.uid, None)
+
+        if slot.transcriber is not None:
+            slot.transcriber.stop()
+            slot.transcriber = None
+
         self.is_running = False
         # Use signal to avoid blocking in signal handler context
         self.trigger_run.emit()
@@ -360,65 +732,129 @@ class FileTranscriberQueueWorker(QObject):
         if task.uid in self.canceled_tasks:
             self.canceled_tasks.remove(task.uid)
 
+        self.queued_at[task.uid] = time.perf_counter()
         self.tasks_queue.put(task)
-        # If the worker is not currently running, trigger it to start processing
+        self._emit_queue_positions()
+        # If the worker has a free slot, trigger it to start processing
         # Use signal to avoid blocking the main thread
         if not self.is_running:
             self.trigger_run.emit()
 
+    def set_scheduling_policy(self, policy: SchedulingPolicy):
+        self.tasks_queue.set_policy(policy)
+        self._emit_queue_positions()
+
+    def set_task_priority(self, task_id: UUID, priority: int):
+        if self.tasks_queue.set_priority(task_id, priority):
+            self._emit_queue_positions()
+
+    def _emit_queue_positions(self):
+        waiting_task_ids = [
+            task_id
+            for task_id in self.tasks_queue.waiting_task_ids()
+            if task_id not in self.canceled_tasks
+        ]
+        self.queue_positions_changed.emit(
+            {
+                str(task_id): position
+                for position, task_id in enumerate(waiting_task_ids, start=1)
+            }
+        )
+
     def cancel_task(self, task_id: UUID):
         self.canceled_tasks.add(task_id)
+        self._emit_queue_positions()
 
-        if self.current.task is not None and self.current.task.uid == task_id:
+        if self.preparing.task is not None and self.preparing.task.uid == task_id:
+            # Still being prepared, e.g. extracting speech
             self._terminate_speech_extractor_process()
+            return
+
+        slot = self.running.get(task_id)
+        if slot is None and self.current.task is not None and self.current.task.uid == task_id:
+            slot = self.current
+        if slot is None:
+            slot = next(
+                (
+                    running
+                    for running in self.running.values()
+                    if any(member.task.uid == task_id for member in running.batch)
+                ),
+                None,
+            )
+
+        if slot is None:
+            return
+
+        if any(
+            member.task.uid not in self.canceled_tasks
+            for member in [slot] + slot.batch
+        ):
+            # The rest of the batch keeps running, this task's result is dropped
+            return
 
-            if self.current.transcriber is not None:
-                self.current.transcriber.stop()
+        if slot.transcriber is not None:
+            slot.transcriber.stop()
 
-            if self.current.transcriber_thread is not None:
-                if not self.current.transcriber_thread.wait(5000):
-                    logging.warning("Transcriber thread did not terminate gracefully")
-                    self.current.transcriber_thread.terminate()
+        if slot.transcriber_thread is not None:
+            if not slot.transcriber_thread.wait(5000):
+                logging.warning("Transcriber thread did not terminate gracefully")
+                slot.transcriber_thread.terminate()
 
-    def on_task_error(self, error: str):
+    def on_task_error(self, error: str, slot: Optional[_CurrentTranscription] = None):
+        slot = slot or self.current
         if (
-            self.current.task is not None
-            and self.current.task.uid not in self.canceled_tasks
+            slot.task is not None
+            and slot.task.uid not in self.canceled_tasks
         ):
             # Check if the error indicates cancellation
             if "canceled" in error.lower() or "cancelled" in error.lower():
-                self.current.task.status = FileTranscriptionTask.Status.CANCELED
-                self.current.task.error = error
+                slot.task.status = FileTranscriptionTask.Status.CANCELED
+                slot.task.error = error
             else:
-                self.current.task.status = FileTranscriptionTask.Status.FAILED
-                self.current.task.error = error
-            self.task_error.emit(self.current.task, error)
-
-    @pyqtSlot(tuple)
-    def on_task_progress(self, progress: Tuple[int, int]):
-        if self.current.task is not None:
-            self.task_progress.emit(self.current.task, progress[0] / progress[1])
-
-    def on_task_download_progress(self, fraction_downloaded: float):
-        if self.current.task is not None:
-            self.task_download_progress.emit(self.current.task, fraction_downloaded)
-
-    @pyqtSlot(list)
-    def on_task_completed(self, segments: List[Segment]):
-        if self.current.task is not None:
-            self.task_completed.emit(self.current.task, segments)
-
-        if self.speech_path is not None:
+                slot.task.status = FileTranscriptionTask.Status.FAILED
+                slot.task.error = error
+            self.task_error.emit(slot.task, error)
+
+    def on_task_progress(
+        self, progress: Tuple[int, int], slot: Optional[_CurrentTranscription] = None
+    ):
+        slot = slot or self.current
+        if slot.task is not None:
+            self.task_progress.emit(slot.task, progress[0] / progress[1])
+
+    def on_task_download_progress(
+        self, fraction_downloaded: float, slot: Optional[_CurrentTranscription] = None
+    ):
+        slot = slot or self.current
+        if slot.task is not None:
+            self.task_download_progress.emit(slot.task, fraction_downloaded)
+
+    def on_task_completed(
+        self, segments: List[Segment], slot: Optional[_CurrentTranscription] = None
+    ):
+        slot = slot or self.current
+        if slot.task is not None:
+            self.task_completed.emit(slot.task, segments)
+
+        self._delete_speech_file(slot)
+
+    def _delete_speech_file(self, slot: _CurrentTranscription):
+        if slot.speech_path is not None:
             try:
-                Path(self.speech_path).unlink()
+                Path(slot.speech_path).unlink()
             except Exception:
                 pass
-            self.speech_path = None
+            slot.speech_path = None
 
     def stop(self):
         self.tasks_queue.put(None)
-        if self.current.transcriber is not None:
-            self.current.transcriber.stop()
+        for slot in list(self.running.values()):
+            if slot.transcriber is not None:
+                slot.transcriber.stop()
 
         # Terminate the speech extraction process if one is still running.
         self._terminate_speech_extractor_process()
+
+        if self.model_pool is not None:
+            self.model_pool.shutdown()
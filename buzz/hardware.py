@@ -0,0 +1,229 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import platform
+import sys
+from dataclasses import dataclass, field
+from importlib import metadata
+from typing import List, Optional, Tuple
+
+from platformdirs import user_cache_dir
+
+from buzz.__version__ import VERSION
+
+# Set by the first process that probes, spawned workers read it from there
+CAPABILITIES_ENV = "BUZZ_HARDWARE_CAPABILITIES"
+
+# Which GPUs torch may use, hiding them changes what is probed
+VISIBLE_DEVICES_ENVS = ("CUDA_VISIBLE_DEVICES", "HIP_VISIBLE_DEVICES")
+
+# CPU features whisper.cpp and torch pick kernels by
+CPU_FEATURES = (
+    "sse3", "ssse3", "avx", "avx2", "fma", "f16c",
+    "avx512f", "avx512bw", "avx512_vnni", "neon", "asimd",
+)
+
+# Files that change when a GPU driver or Vulkan loader is installed or updated
+DRIVER_FILES = (
+    "/proc/driver/nvidia/version",
+    "/usr/lib/x86_64-linux-gnu/libvulkan.so.1",
+    "/usr/lib64/libvulkan.so.1",
+    "/usr/lib/libvulkan.so.1",
+    "/usr/share/vulkan/icd.d",
+    "/etc/vulkan/icd.d",
+    os.path.join(os.environ.get("SystemRoot", "C:\\Windows"), "System32", "vulkan-1.dll"),
+    os.path.join(os.environ.get("SystemRoot", "C:\\Windows"), "System32", "nvcuda.dll"),
+)
+
+
+@dataclass(frozen=True)
+class HardwareCapabilities:
+    """What the GPU and CPU of this machine support, see get_capabilities"""
+
+    vulkan: bool = False
+    vulkan_version: Optional[str] = None
+    cuda: bool = False
+    cuda_version: Optional[str] = None
+    cpu_features: List[str] = field(default_factory=list)
+
+    def to_json(self) -> str:
+        return json.dumps(dataclasses.asdict(self))
+
+    @classmethod
+    def from_json(cls, value: str) -> "HardwareCapabilities":
+        return cls(**json.loads(value))
+
+
+def _probe_vulkan() -> Optional[str]:
+    """Returns the Vulkan instance version, None without a Vulkan loader"""
+    try:
+        import vulkan
+
+        instance = vulkan.vkCreateInstance(vulkan.VkInstanceCreateInfo(), None)
+        vulkan.vkDestroyInstance(instance, None)
+        vulkan_version = vulkan.vkEnumerateInstanceVersion()
+    except (ImportError, Exception) as e:
+        logging.debug(f"Vulkan import error: {e}")
+        return None
+
+    major = (vulkan_version >> 22) & 0x3FF
+    minor = (vulkan_version >> 12) & 0x3FF
+    logging.debug("Vulkan version = %s.%s", major, minor)
+    return f"{major}.{minor}"
+
+
+def _probe_cuda() -> Optional[str]:
+    """Returns the CUDA version of torch, None if CUDA is not available"""
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            return torch.version.cuda
+    except Exception as e:
+        logging.debug(f"CUDA probe error: {e}")
+    return None
+
+
+def _probe_cpu_features() -> List[str]:
+    flags = set()
+    if sys.platform == "linux":
+        try:
+            with open("/proc/cpuinfo") as file:
+                for line in file:
+                    name, _, value = line.partition(":")
+                    if name.strip() in ("flags", "Features"):
+                        flags.update(value.split())
+        except OSError:
+            pass
+        # Linux names SSE3 after its Prescott New Instructions
+        if "pni" in flags:
+            flags.add("sse3")
+    elif platform.machine().lower() in ("arm64", "aarch64"):
+        flags.add("neon")
+    return [feature for feature in CPU_FEATURES if feature in flags]
+
+
+def probe() -> HardwareCapabilities:
+    vulkan_version = _probe_vulkan()
+    vulkan_supported = False
+    if vulkan_version is not None:
+        major, minor = (int(part) for part in vulkan_version.split("."))
+        # On macOS, default whisper_cpp is compiled with CoreML (Apple Silicon) or Vulkan (Intel).
+        vulkan_supported = platform.system() in ("Linux", "Windows") and (major, minor) >= (1, 2)
+
+    cuda_version = _probe_cuda()
+    return HardwareCapabilities(
+        vulkan=vulkan_supported,
+        vulkan_version=vulkan_version,
+        cuda=cuda_version is not None,
+        cuda_version=cuda_version,
+        cpu_features=_probe_cpu_features(),
+    )
+
+
+def _visible_devices() -> str:
+    return json.dumps({name: os.environ.get(name) for name in VISIBLE_DEVICES_ENVS})
+
+
+def _gpus_hidden() -> bool:
+    """Whether CUDA_VISIBLE_DEVICES hides all GPUs, as BUZZ_FORCE_CPU does"""
+    return os.environ.get("CUDA_VISIBLE_DEVICES") in ("", "-1")
+
+
+def fingerprint() -> str:
+    """Hash of what the capabilities depend on: the OS, the GPU drivers, the
+    visible GPUs and the versions of Buzz, torch and vulkan"""
+    digest = hashlib.blake2b(digest_size=16)
+    parts = [VERSION, platform.platform(), platform.machine(), sys.version, _visible_devices()]
+    for package in ("torch", "vulkan"):
+        try:
+            parts.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            parts.append(f"{package}=")
+    for path in DRIVER_FILES:
+        try:
+            if path.startswith("/proc/"):
+                # Sizes and times of /proc files say nothing about their content
+                with open(path, "rb") as file:
+                    parts.append(file.read().decode("utf-8", "replace"))
+            else:
+                stat = os.stat(path)
+                parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            continue
+    digest.update("\0".join(parts).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# The visible devices the capabilities were probed with, and the capabilities
+_capabilities: Optional[Tuple[str, HardwareCapabilities]] = None
+
+
+def _from_environment() -> Optional[Tuple[str, HardwareCapabilities]]:
+    value = os.environ.get(CAPABILITIES_ENV)
+    if not value:
+        return None
+    try:
+        payload = json.loads(value)
+        return payload["visible_devices"], HardwareCapabilities(**payload["capabilities"])
+    except (ValueError, TypeError, KeyError) as e:
+        logging.debug(f"Invalid {CAPABILITIES_ENV}: {e}")
+        return None
+
+
+def get_capabilities(
+    cache_path: str = os.path.join(user_cache_dir("Buzz"), "hardware.json"),
+) -> HardwareCapabilities:
+    """Returns the hardware capabilities, probed once per machine.
+
+    The result is saved in the cache directory with the fingerprint of the
+    drivers and visible GPUs it was probed with, and probed again once those
+    change. It is also set in the environment, so worker processes started
+    afterwards get it without probing or reading the cache file.
+    """
+    global _capabilities
+    devices = _visible_devices()
+    capabilities = None
+
+    known = _capabilities or _from_environment()
+    if known is not None:
+        probed_devices, known_capabilities = known
+        if probed_devices == devices:
+            capabilities = known_capabilities
+        elif _gpus_hidden():
+            # Hidden after probing, e.g. by a worker with BUZZ_FORCE_CPU
+            capabilities = dataclasses.replace(
+                known_capabilities, cuda=False, cuda_version=None
+            )
+
+    if capabilities is None:
+        key = fingerprint()
+        try:
+            with open(cache_path) as file:
+                cached = json.load(file)
+            if cached.get("fingerprint") == key:
+                capabilities = HardwareCapabilities(**cached["capabilities"])
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+
+    if capabilities is None:
+        capabilities = probe()
+        logging.debug("Probed hardware capabilities: %s", capabilities)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as file:
+                json.dump(
+                    {"fingerprint": key, "capabilities": dataclasses.asdict(capabilities)}, file
+                )
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logging.debug(f"Failed to save hardware capabilities: {e}")
+
+    _capabilities = (devices, capabilities)
+    os.environ[CAPABILITIES_ENV] = json.dumps(
+        {"visible_devices": devices, "capabilities": dataclasses.asdict(capabilities)}
+    )
+    return capabilities
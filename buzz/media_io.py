@@ -0,0 +1,252 @@
+"""Media decoding, resampling, probing and encoding in the process with PyAV.
+
+PyAV runs the ffmpeg libraries in the process, so reading audio costs no
+process start and no copy of the samples through a pipe, and the samples are
+returned as NumPy arrays. PyAV releases the GIL while decoding and encoding,
+so several files or parts of a file can be processed at the same time on the
+thread pool of ``get_executor``.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from fractions import Fraction
+from math import gcd
+from typing import Iterator, Optional, Tuple
+
+import av
+import numpy as np
+
+CHANNEL_LAYOUTS = {1: "mono", 2: "stereo"}
+
+# Samples per frame given to the encoders, they split it into their own frame size
+ENCODE_FRAME_SAMPLES = 65536
+
+# Decoded before the start of a range and dropped, the decoder and the
+# resampler only give the samples of a whole-file decode once they settled
+SEEK_PREROLL_MS = 500
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 4, thread_name_prefix="MediaIO"
+            )
+    return _executor
+
+
+@dataclass
+class MediaInfo:
+    duration_ms: int = 0
+    has_audio: bool = False
+    has_video: bool = False
+    width: int = 0
+    height: int = 0
+    fps: float = 25.0
+
+
+def probe(file_path: str) -> MediaInfo:
+    """Reads the duration and streams of a media file from its header"""
+    with av.open(file_path) as container:
+        duration = (
+            container.duration / av.time_base if container.duration is not None else 0.0
+        )
+        info = MediaInfo(has_audio=len(container.streams.audio) > 0)
+
+        if len(container.streams.video) > 0:
+            video = container.streams.video[0]
+            info.has_video = True
+            info.width = video.codec_context.width
+            info.height = video.codec_context.height
+            rate = video.guessed_rate or video.average_rate
+            if rate:
+                info.fps = float(rate)
+
+        for stream in list(container.streams.video[:1]) + list(container.streams.audio[:1]):
+            if duration == 0 and stream.duration is not None:
+                duration = float(stream.duration * stream.time_base)
+
+        info.duration_ms = int(duration * 1000)
+        return info
+
+
+def _trim_frame(frame: av.AudioFrame, count: int) -> av.AudioFrame:
+    """The frame without its first ``count`` samples"""
+    array = frame.to_ndarray()
+    if frame.format.is_planar:
+        array = array[:, count:]
+    else:
+        array = array[:, count * len(frame.layout.channels):]
+    trimmed = av.AudioFrame.from_ndarray(
+        np.ascontiguousarray(array), format=frame.format.name, layout=frame.layout.name
+    )
+    trimmed.sample_rate = frame.sample_rate
+    trimmed.time_base = frame.time_base
+    trimmed.pts = frame.pts + round(Fraction(count, frame.sample_rate) / frame.time_base)
+    return trimmed
+
+
+def _align_to_resampler(
+    frame: av.AudioFrame, origin: Fraction, sample_rate: int
+) -> Optional[Tuple[int, av.AudioFrame]]:
+    """Drops the first samples of the first frame decoded after a seek, up to
+    one the resampler of a whole-file decode also starts an output period at.
+
+    The resampled samples are then the ones of a whole-file decode rather
+    than shifted by a fraction of a sample. Returns the index of the first
+    resampled sample in a whole-file decode with the trimmed frame, or None
+    if the whole frame is dropped.
+    """
+    divisor = gcd(frame.sample_rate, sample_rate)
+    period_in = frame.sample_rate // divisor
+    period_out = sample_rate // divisor
+
+    index = round((frame.pts * frame.time_base - origin) * frame.sample_rate)
+    periods = max(0, -(-index // period_in))
+    trim = periods * period_in - index
+    if trim >= frame.samples:
+        return None
+    if trim > 0:
+        frame = _trim_frame(frame, trim)
+    return periods * period_out, frame
+
+
+def iter_audio(
+    file_path: str,
+    chunk_samples: int,
+    sample_rate: int,
+    channels: int = 1,
+    start: int = 0,
+    end: Optional[int] = None,
+    reuse_buffer: bool = False,
+) -> Iterator[np.ndarray]:
+    """Decodes the first audio stream of a file from ``start`` to ``end`` ms,
+    resampled to float32 samples at ``sample_rate`` and mixed to ``channels``,
+    and yields it in chunks of ``chunk_samples`` frames (the last one shorter).
+
+    Each chunk is one array the decoded frames are copied into. With
+    ``reuse_buffer`` the same array is filled for every chunk, the next chunk
+    overwrites the previous one, so memory stays at one chunk whatever the
+    duration. Chunks have shape (samples,) for mono and (frames, channels)
+    otherwise.
+    """
+    layout = CHANNEL_LAYOUTS.get(channels)
+    if layout is None:
+        raise ValueError(f"Unsupported number of channels: {channels}")
+
+    shape = chunk_samples if channels == 1 else (chunk_samples, channels)
+    # Frames to drop before ``start`` after seeking to the keyframe before it,
+    # and to keep before ``end``
+    skip = 0 if start == 0 else None
+    remaining = None if end is None else (end - start) * sample_rate // 1000
+
+    try:
+        with av.open(file_path) as container:
+            if len(container.streams.audio) == 0:
+                raise ValueError("No audio streams found")
+            stream = container.streams.audio[0]
+            stream.thread_type = "AUTO"
+            # Ranges are measured from the first sample of the stream, like
+            # the samples of a whole-file decode
+            origin = (
+                Fraction(0)
+                if stream.start_time is None
+                else stream.start_time * stream.time_base
+            )
+            if start > 0:
+                seek_to = origin + Fraction(max(0, start - SEEK_PREROLL_MS), 1000)
+                container.seek(int(seek_to * av.time_base))
+
+            resampler = av.AudioResampler(format="flt", layout=layout, rate=sample_rate)
+
+            buffer = np.empty(shape, dtype=np.float32)
+            filled = 0
+
+            def decoded_samples() -> Iterator[np.ndarray]:
+                nonlocal skip
+                for frame in container.decode(stream):
+                    if skip is None:
+                        if frame.pts is None:
+                            frame_start = 0 if frame.time is None else frame.time * 1000
+                            skip = max(0, int((start - frame_start) * sample_rate // 1000))
+                        else:
+                            aligned = _align_to_resampler(frame, origin, sample_rate)
+                            if aligned is None:
+                                continue
+                            first, frame = aligned
+                            skip = max(0, start * sample_rate // 1000 - first)
+                    for resampled in resampler.resample(frame):
+                        yield resampled.to_ndarray().reshape(-1, channels)
+                for resampled in resampler.resample(None):
+                    yield resampled.to_ndarray().reshape(-1, channels)
+
+            for samples in decoded_samples():
+                if skip > 0:
+                    dropped = min(skip, len(samples))
+                    samples = samples[dropped:]
+                    skip -= dropped
+                if remaining is not None:
+                    samples = samples[:remaining]
+                    remaining -= len(samples)
+
+                while len(samples) > 0:
+                    count = min(chunk_samples - filled, len(samples))
+                    target = buffer[filled : filled + count]
+                    target[...] = samples[:count] if channels > 1 else samples[:count, 0]
+                    filled += count
+                    samples = samples[count:]
+
+                    if filled == chunk_samples:
+                        yield buffer
+                        if not reuse_buffer:
+                            buffer = np.empty(shape, dtype=np.float32)
+                        filled = 0
+
+                if remaining == 0:
+                    break
+
+            if filled > 0:
+                yield buffer[:filled]
+    except (av.error.FFmpegError, OSError, UnicodeDecodeError, ValueError) as e:
+        raise RuntimeError(f"Failed to load audio: {e}") from e
+
+
+def encode_audio(
+    samples: np.ndarray,
+    path: str,
+    sample_rate: int,
+    codec: str = "libmp3lame",
+    bit_rate: Optional[int] = None,
+):
+    """Encodes float32 samples, shaped like the chunks of ``iter_audio``, to
+    a file whose container is given by the extension of ``path``"""
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    layout = CHANNEL_LAYOUTS[channels]
+    samples = np.ascontiguousarray(samples, dtype=np.float32).reshape(-1, channels)
+
+    with av.open(path, "w") as container:
+        stream = container.add_stream(codec, rate=sample_rate)
+        stream.codec_context.layout = layout
+        if bit_rate is not None:
+            stream.codec_context.bit_rate = bit_rate
+
+        for position in range(0, len(samples), ENCODE_FRAME_SAMPLES):
+            block = samples[position : position + ENCODE_FRAME_SAMPLES]
+            # Packed samples are one plane of interleaved channels
+            frame = av.AudioFrame.from_ndarray(
+                block.reshape(1, -1), format="flt", layout=layout
+            )
+            frame.sample_rate = sample_rate
+            frame.time_base = Fraction(1, sample_rate)
+            frame.pts = position
+            # The encoder converts the frame to its own sample format
+            for packet in stream.encode(frame):
+                container.mux(packet)
+
+        for packet in stream.encode(None):
+            container.mux(packet)
@@ -2,9 +2,10 @@
 Enhanced language detection plugin for Buzz.
 
 When a file is queued for transcription with the language left on auto-detect,
-this plugin runs a fast ``whisper.cpp --detect-language`` pass before the
-transcription starts. It uses the largest whisper.cpp model already downloaded
-on the machine, or downloads the ``tiny`` model if none are available.
+this plugin detects the language from the first seconds of the audio before
+the transcription starts, see ``LanguageDetector``. It uses the largest
+whisper.cpp model already downloaded on the machine, or downloads the ``tiny``
+model if none are available.
 
 The detected language code is written back to
 ``task.transcription_options.language`` so it (a) drives the actual
@@ -16,6 +17,7 @@ If the user explicitly picked a language, detection is skipped.
 """
 
 import logging
+import os
 
 from buzz.plugins.base import (
     BuzzPlugin,
@@ -56,6 +58,9 @@ class EnhancedLanguageDetectionPlugin(BuzzPlugin):
         ],
     )
 
+    # Model found for a previous file
+    _model_path = None
+
     def before_transcription(self, task, context: PluginContext):
         options = getattr(task, "transcription_options", None)
         if options is None:
@@ -83,9 +88,9 @@ class EnhancedLanguageDetectionPlugin(BuzzPlugin):
             return None
 
         try:
-            from buzz.transcriber.whisper_cpp import WhisperCpp
+            from buzz.transcriber.language_detection import get_language_detector
 
-            detected = WhisperCpp.detect_language(task.file_path, model_path)
+            detected = get_language_detector().detect(task.file_path, model_path)
         except Exception as exc:
             context.log.error("Language detection failed: %s", exc, exc_info=True)
             return None
@@ -116,7 +121,15 @@ class EnhancedLanguageDetectionPlugin(BuzzPlugin):
 
     def _resolve_model_path(self, context: PluginContext):
         """Return the path to the largest available whisper.cpp model, or the
-        tiny model (downloading it if needed)."""
+        tiny model (downloading it if needed). The path is kept for the next
+        files while the model is still there."""
+        if self._model_path is not None and os.path.isfile(self._model_path):
+            return self._model_path
+
+        self._model_path = self._find_model_path(context)
+        return self._model_path
+
+    def _find_model_path(self, context: PluginContext):
         from buzz.model_loader import (
             ModelType,
             TranscriptionModel,
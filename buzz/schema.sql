@@ -19,7 +19,12 @@ CREATE TABLE transcription (
     word_level_timings BOOLEAN DEFAULT FALSE,
     extract_speech BOOLEAN DEFAULT FALSE,
     name TEXT,
-    notes TEXT
+    notes TEXT,
+    queue_position INTEGER,
+    resume_offset INTEGER,
+    audio_duration DOUBLE PRECISION,
+    real_time_factor DOUBLE PRECISION,
+    metrics TEXT
 );
 
 CREATE TABLE transcription_segment (
@@ -32,3 +37,12 @@ CREATE TABLE transcription_segment (
     FOREIGN KEY (transcription_id) REFERENCES transcription(id) ON DELETE CASCADE
 );
 CREATE INDEX idx_transcription_id ON transcription_segment(transcription_id);
+
+CREATE TABLE transcription_cache (
+    key TEXT PRIMARY KEY,
+    transcription_id TEXT NOT NULL,
+    size INTEGER DEFAULT 0,
+    time_used TIMESTAMP,
+    FOREIGN KEY (transcription_id) REFERENCES transcription(id) ON DELETE CASCADE
+);
+CREATE INDEX idx_transcription_cache_transcription_id ON transcription_cache(transcription_id);
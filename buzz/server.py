@@ -0,0 +1,888 @@
+"""Local HTTP job API: ``buzz serve``.
+
+The transcription queue, database and warm models run as in the app, in the
+Qt thread of a QCoreApplication. The HTTP server is an asyncio loop in its own
+thread: requests reach the queue through queued signals, and the queue's
+events reach the requests through ``loop.call_soon_threadsafe``.
+"""
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import http
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import urllib.parse
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from PyQt6.QtCore import QCoreApplication, QObject, QThread, QTimer, Qt, pyqtSignal
+
+from buzz.batch import (
+    MODEL_TYPES,
+    ManifestError,
+    add_task_options,
+    create_task,
+    get_task_defaults,
+    split_output_formats,
+    validate_entry,
+)
+from buzz.db.service.transcription_service import TranscriptionService
+from buzz.file_transcriber_queue_worker import FileTranscriberQueueWorker
+from buzz.settings.settings import APP_NAME, Settings
+from buzz.transcriber.file_transcriber import format_output
+from buzz.transcriber.result_cache import ResultCache, get_result_cache_max_size
+from buzz.transcriber.task_scheduler import SchedulingPolicy
+from buzz.transcriber.transcriber import FileTranscriptionTask, OutputFormat, Segment
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_MAX_QUEUE_DEPTH = 16
+
+# Multipart forms are parsed in memory, larger files can be sent as the raw
+# body of POST /jobs
+MAX_FORM_SIZE = 256 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Finished jobs kept for status requests, the oldest are forgotten first
+MAX_FINISHED_JOBS = 1000
+SSE_KEEP_ALIVE_SECONDS = 15
+
+ACTIVE_STATUSES = (
+    FileTranscriptionTask.Status.QUEUED,
+    FileTranscriptionTask.Status.IN_PROGRESS,
+)
+
+# Fields of a job submission, as in a line of a `buzz batch` manifest
+TASK_FIELDS = (
+    "model_type",
+    "model_size",
+    "hugging_face_model_id",
+    "language",
+    "task",
+    "initial_prompt",
+    "word_timestamps",
+    "output_formats",
+    "output_directory",
+)
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+def segment_to_json(segment: Segment) -> dict:
+    return {"start": segment.start, "end": segment.end, "text": segment.text}
+
+
+@dataclass
+class Job:
+    task: FileTranscriptionTask
+    status: FileTranscriptionTask.Status = FileTranscriptionTask.Status.QUEUED
+    progress: float = 0.0
+    error: Optional[str] = None
+    segments: List[Segment] = field(default_factory=list)
+    # Temporary directory of an uploaded file, removed when the job finishes
+    upload_directory: Optional[str] = None
+    # Queues of the event streams following the job
+    listeners: Set[asyncio.Queue] = field(default_factory=set)
+    finished: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def id(self) -> str:
+        return str(self.task.uid)
+
+    def to_json(self) -> dict:
+        job = {
+            "id": self.id,
+            "file": self.task.original_file_path or self.task.file_path or self.task.url,
+            "status": self.status.value,
+            "progress": round(self.progress, 3),
+        }
+        if self.error is not None:
+            job["error"] = self.error
+        if self.status == FileTranscriptionTask.Status.COMPLETED:
+            job["text"] = format_output(self.segments, OutputFormat.TXT).strip()
+            job["segments"] = [segment_to_json(segment) for segment in self.segments]
+        return job
+
+
+class JobStore:
+    """Jobs by id. Only used from the thread of the asyncio loop."""
+
+    def __init__(self):
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Submissions whose model is being resolved, counted against the queue depth
+        self.pending = 0
+
+    def add(self, job: Job):
+        self.jobs[job.id] = job
+        finished = [job for job in self.jobs.values() if job.finished.is_set()]
+        for finished_job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[finished_job.id]
+
+    def get(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HttpError(404, f"Job not found: {job_id}")
+        return job
+
+    def active_count(self) -> int:
+        return self.pending + sum(
+            1 for job in self.jobs.values() if job.status in ACTIVE_STATUSES
+        )
+
+    def publish(self, job_id: str, event: dict):
+        """Applies an event of the queue to its job and sends it to the
+        job's event streams"""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished.is_set():
+            return
+
+        kind = event["event"]
+        if kind == "started":
+            job.status = FileTranscriptionTask.Status.IN_PROGRESS
+        elif kind == "progress":
+            job.status = FileTranscriptionTask.Status.IN_PROGRESS
+            job.progress = event["progress"]
+        elif kind == "segments":
+            job.segments.extend(event.pop("segment_list"))
+        elif kind == "completed":
+            job.status = FileTranscriptionTask.Status.COMPLETED
+            job.progress = 1.0
+            job.segments = event.pop("segment_list")
+            event["job"] = job.to_json()
+        elif kind == "failed":
+            job.status = FileTranscriptionTask.Status.FAILED
+            job.error = event["error"]
+        elif kind == "canceled":
+            job.status = FileTranscriptionTask.Status.CANCELED
+
+        for listener in job.listeners:
+            listener.put_nowait(event)
+
+        if job.status not in ACTIVE_STATUSES:
+            job.finished.set()
+            if job.upload_directory is not None:
+                shutil.rmtree(job.upload_directory, ignore_errors=True)
+
+
+class TranscriptionServer(QObject):
+    """Runs the transcription queue for the HTTP API and saves the
+    transcriptions to the Buzz library, like the main window does"""
+
+    task_submitted = pyqtSignal(object)
+    task_cancel_requested = pyqtSignal(object)
+
+    def __init__(
+        self,
+        transcription_service: TranscriptionService,
+        jobs: JobStore,
+        loop: asyncio.AbstractEventLoop,
+        max_concurrent_tasks: Optional[int] = None,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.transcription_service = transcription_service
+        self.jobs = jobs
+        self.loop = loop
+        self.settings = Settings()
+
+        if max_concurrent_tasks is None:
+            max_concurrent_tasks = self.settings.value(
+                Settings.Key.FILE_TRANSCRIBER_CONCURRENT_TASKS, 1
+            )
+
+        self.transcriber_thread = QThread()
+        self.transcriber_worker = FileTranscriberQueueWorker(
+            max_concurrent_tasks=max_concurrent_tasks,
+            scheduling_policy=self.get_scheduling_policy(),
+        )
+
+        result_cache_max_size = get_result_cache_max_size()
+        self.result_cache = (
+            ResultCache(
+                db_path=self.transcription_service.transcription_dao.db.databaseName(),
+                max_size=result_cache_max_size,
+            )
+            if result_cache_max_size > 0
+            else None
+        )
+        self.transcriber_worker.result_cache = self.result_cache
+        self.transcriber_worker.moveToThread(self.transcriber_thread)
+
+        self.transcriber_worker.task_started.connect(self.on_task_started)
+        self.transcriber_worker.task_progress.connect(self.on_task_progress)
+        self.transcriber_worker.task_error.connect(self.on_task_error)
+        self.transcriber_worker.task_completed.connect(self.on_task_completed)
+        self.transcriber_worker.task_checkpoint.connect(self.on_task_checkpoint)
+        self.transcriber_worker.queue_positions_changed.connect(
+            self.transcription_service.update_transcription_queue_positions
+        )
+        self.transcriber_worker.completed.connect(self.transcriber_thread.quit)
+        self.transcriber_thread.started.connect(self.transcriber_worker.run)
+
+        # Emitted from the thread of the asyncio loop
+        self.task_submitted.connect(self.add_task, Qt.ConnectionType.QueuedConnection)
+        self.task_cancel_requested.connect(
+            self.cancel_task, Qt.ConnectionType.QueuedConnection
+        )
+
+        self.transcriber_thread.start()
+
+    def get_scheduling_policy(self) -> SchedulingPolicy:
+        try:
+            return SchedulingPolicy(
+                self.settings.value(
+                    Settings.Key.FILE_TRANSCRIBER_SCHEDULING_POLICY,
+                    SchedulingPolicy.FIFO.value,
+                )
+            )
+        except ValueError:
+            return SchedulingPolicy.FIFO
+
+    def publish(self, task: FileTranscriptionTask, event: dict):
+        self.loop.call_soon_threadsafe(self.jobs.publish, str(task.uid), event)
+
+    def add_task(self, task: FileTranscriptionTask):
+        self.transcription_service.create_transcription(task)
+        self.transcriber_worker.add_task(task)
+
+    def cancel_task(self, task_id: UUID):
+        self.transcriber_worker.cancel_task(task_id)
+        self.transcription_service.update_transcription_as_canceled(task_id)
+
+    def on_task_started(self, task: FileTranscriptionTask):
+        self.transcription_service.update_transcription_as_started(task.uid)
+        self.publish(task, {"event": "started"})
+
+    def on_task_progress(self, task: FileTranscriptionTask, progress: float):
+        self.transcription_service.update_transcription_progress(task.uid, progress)
+        self.publish(task, {"event": "progress", "progress": round(progress, 3)})
+
+    def on_task_checkpoint(
+        self, task: FileTranscriptionTask, resume_offset: int, segments: List[Segment]
+    ):
+        self.transcription_service.add_transcription_checkpoint(
+            task.uid, resume_offset, segments
+        )
+        self.publish(
+            task,
+            {
+                "event": "segments",
+                "segments": [segment_to_json(segment) for segment in segments],
+                "segment_list": list(segments),
+            },
+        )
+
+    def on_task_completed(self, task: FileTranscriptionTask, segments: List[Segment]):
+        if task.status == FileTranscriptionTask.Status.SKIPPED:
+            self.transcription_service.update_transcription_as_skipped(task.uid, segments)
+        else:
+            self.transcription_service.update_transcription_as_completed(task.uid, segments)
+            if self.result_cache is not None and task.cache_key is not None:
+                self.result_cache.put(task.cache_key, str(task.uid))
+        self.save_task_metrics(task)
+        self.publish(task, {"event": "completed", "segment_list": list(segments)})
+
+    def on_task_error(self, task: FileTranscriptionTask, error: str):
+        self.transcription_service.update_transcription_as_failed(task.uid, error)
+        self.save_task_metrics(task)
+        self.publish(task, {"event": "failed", "error": error})
+
+    def save_task_metrics(self, task: FileTranscriptionTask):
+        try:
+            self.transcription_service.update_transcription_metrics(
+                task.uid, task.timings, task.audio_duration
+            )
+        except Exception as e:
+            logging.error(f"Could not save metrics of transcription: {e}")
+
+    def stop(self):
+        self.transcriber_worker.stop()
+        self.transcriber_thread.quit()
+        if self.transcriber_thread.isRunning():
+            if not self.transcriber_thread.wait(10000):
+                logging.warning("Transcriber thread did not finish within 10s timeout, terminating")
+                self.transcriber_thread.terminate()
+                self.transcriber_thread.wait(2000)
+
+        if self.result_cache is not None:
+            self.result_cache.close()
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    reader: asyncio.StreamReader
+
+    @property
+    def content_length(self) -> int:
+        if "chunked" in self.headers.get("transfer-encoding", ""):
+            raise HttpError(411, "Chunked requests are not supported, set Content-Length")
+        try:
+            return int(self.headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    async def read_body(self, max_size: int = MAX_FORM_SIZE) -> bytes:
+        if self.content_length > max_size:
+            raise HttpError(413, f"Request body larger than {max_size} bytes")
+        return await self.reader.readexactly(self.content_length)
+
+    async def read_json(self) -> dict:
+        try:
+            body = json.loads(await self.read_body())
+        except ValueError:
+            raise HttpError(400, "Invalid JSON body")
+        if not isinstance(body, dict):
+            raise HttpError(400, "Expected a JSON object")
+        return body
+
+    async def read_form(self) -> Tuple[Dict[str, str], Dict[str, Tuple[str, bytes]]]:
+        """Parses a multipart form into its fields and its files, as
+        (file name, content) by field name"""
+        if self.content_type != "multipart/form-data":
+            raise HttpError(415, "Expected a multipart/form-data body")
+
+        body = await self.read_body()
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {self.headers['content-type']}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        if not message.is_multipart():
+            raise HttpError(400, "Invalid multipart body")
+
+        fields: Dict[str, str] = {}
+        files: Dict[str, Tuple[str, bytes]] = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name is None:
+                continue
+            content = part.get_payload(decode=True) or b""
+            file_name = part.get_filename()
+            if file_name is not None:
+                files[name] = (file_name, content)
+            else:
+                fields[name] = content.decode("utf-8")
+        return fields, files
+
+    async def save_body(self, path: str):
+        """Writes the body to a file without holding it in memory"""
+        remaining = self.content_length
+        with open(path, "wb") as file:
+            while remaining > 0:
+                chunk = await self.reader.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if chunk == b"":
+                    raise HttpError(400, "Request body ended early")
+                file.write(chunk)
+                remaining -= len(chunk)
+
+
+def parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+
+def get_task_fields(values: Dict[str, str]) -> dict:
+    """Task options of a submission given as query string or form fields"""
+    fields = {key: value for key, value in values.items() if key in TASK_FIELDS}
+    if "word_timestamps" in fields:
+        fields["word_timestamps"] = parse_bool(fields["word_timestamps"])
+    if "output_formats" in fields:
+        fields["output_formats"] = split_output_formats(fields["output_formats"])
+    return fields
+
+
+def get_model_fields(model: str) -> dict:
+    """Model of an OpenAI request: ``whisper-1`` is the server's default model,
+    ``<model type>`` or ``<model type>/<model size>`` choose another one"""
+    model_type, _, model_size = model.partition("/")
+    if model_type not in MODEL_TYPES:
+        return {}
+    if model_type == "huggingface":
+        return {"model_type": model_type, "hugging_face_model_id": model_size}
+    fields = {"model_type": model_type}
+    if model_size != "":
+        fields["model_size"] = model_size
+    return fields
+
+
+class JobApi:
+    """HTTP routes of the server"""
+
+    def __init__(
+        self,
+        server: TranscriptionServer,
+        jobs: JobStore,
+        defaults: dict,
+        max_queue_depth: int = DEFAULT_MAX_QUEUE_DEPTH,
+    ):
+        self.server = server
+        self.jobs = jobs
+        self.defaults = {**defaults, "file": ""}
+        self.max_queue_depth = max_queue_depth
+        self.model_lock = threading.Lock()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            request = await self._read_request(reader)
+            if request is not None:
+                await self._route(request, writer)
+        except HttpError as exc:
+            await self._send_error(writer, exc)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as exc:
+            logging.exception("Error handling request")
+            await self._send_error(writer, HttpError(500, str(exc)))
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        request_line = await reader.readline()
+        if request_line == b"":
+            return None
+        try:
+            method, target, _version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Invalid request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        url = urllib.parse.urlsplit(target)
+        return Request(
+            method=method.upper(),
+            path=url.path.rstrip("/") or "/",
+            query=dict(urllib.parse.parse_qsl(url.query)),
+            headers=headers,
+            reader=reader,
+        )
+
+    async def _route(self, request: Request, writer: asyncio.StreamWriter):
+        parts = request.path.strip("/").split("/")
+
+        if parts == ["jobs"]:
+            if request.method == "GET":
+                await self._send_json(
+                    writer, 200, {"jobs": [job.to_json() for job in self.jobs.jobs.values()]}
+                )
+                return
+            if request.method == "POST":
+                job = await self._submit_job(request)
+                await self._send_json(
+                    writer, 202, job.to_json(), {"Location": f"/jobs/{job.id}"}
+                )
+                return
+            raise HttpError(405, "Method not allowed")
+
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if request.method == "GET":
+                await self._send_json(writer, 200, job.to_json())
+                return
+            if request.method == "DELETE":
+                self._cancel_job(job)
+                await self._send_json(writer, 200, job.to_json())
+                return
+            raise HttpError(405, "Method not allowed")
+
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            if request.method != "GET":
+                raise HttpError(405, "Method not allowed")
+            await self._stream_events(self.jobs.get(parts[1]), writer)
+            return
+
+        if parts in (["v1", "audio", "transcriptions"], ["v1", "audio", "translations"]):
+            if request.method != "POST":
+                raise HttpError(405, "Method not allowed")
+            await self._openai_transcription(
+                request, writer, task="translate" if parts[2] == "translations" else "transcribe"
+            )
+            return
+
+        raise HttpError(404, f"Not found: {request.path}")
+
+    async def _submit_job(self, request: Request) -> Job:
+        """Queues a file given by path in a JSON body, as a multipart form
+        upload, or as the raw body with its name in the ``filename`` parameter"""
+        if request.content_type == "application/json":
+            body = await request.read_json()
+            entry = {
+                key: value
+                for key, value in body.items()
+                if key in TASK_FIELDS or key == "file"
+            }
+            return await self.submit(entry)
+
+        if request.content_type == "multipart/form-data":
+            fields, files = await request.read_form()
+            if "file" not in files:
+                raise HttpError(400, 'Missing "file" in the form')
+            file_name, content = files["file"]
+            upload_directory, path = self._create_upload_path(file_name)
+            with open(path, "wb") as file:
+                file.write(content)
+            return await self.submit(
+                {**get_task_fields(fields), "file": path}, upload_directory
+            )
+
+        if request.content_length == 0:
+            raise HttpError(400, "Expected a JSON body, a form or a file")
+
+        self._check_queue_depth()
+        upload_directory, path = self._create_upload_path(
+            request.query.get("filename", "upload")
+        )
+        try:
+            await request.save_body(path)
+        except BaseException:
+            shutil.rmtree(upload_directory, ignore_errors=True)
+            raise
+        return await self.submit(
+            {**get_task_fields(request.query), "file": path}, upload_directory
+        )
+
+    def _create_upload_path(self, file_name: str) -> Tuple[str, str]:
+        upload_directory = tempfile.mkdtemp(prefix="buzz-serve-")
+        # Keeps the extension, the name is used for the output files
+        file_name = os.path.basename(file_name.replace("\\", "/")) or "upload"
+        return upload_directory, os.path.join(upload_directory, file_name)
+
+    def _check_queue_depth(self):
+        if self.jobs.active_count() >= self.max_queue_depth:
+            raise HttpError(
+                429,
+                f"The queue is full ({self.max_queue_depth} jobs), retry later",
+                {"Retry-After": "5"},
+            )
+
+    async def submit(self, entry: dict, upload_directory: Optional[str] = None) -> Job:
+        try:
+            self._check_queue_depth()
+            entry = {**self.defaults, **entry}
+            try:
+                validate_entry(entry)
+            except ManifestError as exc:
+                raise HttpError(400, str(exc))
+
+            self.jobs.pending += 1
+            try:
+                # May download the model
+                task = await asyncio.get_running_loop().run_in_executor(
+                    None, create_task, entry, self.model_lock
+                )
+            except Exception as exc:
+                raise HttpError(400, str(exc))
+            finally:
+                self.jobs.pending -= 1
+        except BaseException:
+            if upload_directory is not None:
+                shutil.rmtree(upload_directory, ignore_errors=True)
+            raise
+
+        job = Job(task=task, upload_directory=upload_directory)
+        self.jobs.add(job)
+        self.server.task_submitted.emit(task)
+        return job
+
+    def _cancel_job(self, job: Job):
+        if job.status not in ACTIVE_STATUSES:
+            return
+        self.server.task_cancel_requested.emit(job.task.uid)
+        self.jobs.publish(job.id, {"event": "canceled"})
+
+    async def _stream_events(self, job: Job, writer: asyncio.StreamWriter):
+        """Server-sent events of the job: its current state, then progress,
+        segments as they are transcribed, and the final event"""
+        writer.write(
+            self._head(
+                200,
+                {
+                    "Content-Type": "text/event-stream",
+                    "Cache-Control": "no-cache",
+                    "Connection": "close",
+                },
+            )
+        )
+        self._write_event(writer, {"event": "status", "job": job.to_json()})
+        await writer.drain()
+        if job.finished.is_set():
+            return
+
+        listener: asyncio.Queue = asyncio.Queue()
+        job.listeners.add(listener)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        listener.get(), timeout=SSE_KEEP_ALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                    await writer.drain()
+                    continue
+
+                self._write_event(writer, event)
+                await writer.drain()
+                if event["event"] in ("completed", "failed", "canceled"):
+                    return
+        finally:
+            job.listeners.discard(listener)
+
+    def _write_event(self, writer: asyncio.StreamWriter, event: dict):
+        data = {key: value for key, value in event.items() if key != "event"}
+        writer.write(
+            f"event: {event['event']}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+        )
+
+    async def _openai_transcription(
+        self, request: Request, writer: asyncio.StreamWriter, task: str
+    ):
+        """OpenAI-compatible transcription: waits for the job and returns the
+        result in the requested response_format"""
+        fields, files = await request.read_form()
+        if "file" not in files:
+            raise HttpError(400, 'Missing "file" in the form')
+
+        response_format = fields.get("response_format", "json")
+        if response_format not in ("json", "text", "srt", "vtt", "verbose_json"):
+            raise HttpError(400, f"Unsupported response_format: {response_format}")
+
+        entry = {**get_model_fields(fields.get("model", "")), "task": task}
+        if fields.get("language"):
+            entry["language"] = fields["language"]
+        if fields.get("prompt"):
+            entry["initial_prompt"] = fields["prompt"]
+        if "word" in [
+            value for key, value in fields.items() if key.startswith("timestamp_granularities")
+        ]:
+            entry["word_timestamps"] = True
+
+        file_name, content = files["file"]
+        upload_directory, path = self._create_upload_path(file_name)
+        with open(path, "wb") as file:
+            file.write(content)
+
+        job = await self.submit({**entry, "file": path}, upload_directory)
+        try:
+            await job.finished.wait()
+        except asyncio.CancelledError:
+            self._cancel_job(job)
+            raise
+
+        if job.status == FileTranscriptionTask.Status.FAILED:
+            raise HttpError(500, job.error or "Transcription failed")
+        if job.status == FileTranscriptionTask.Status.CANCELED:
+            raise HttpError(409, "Transcription was canceled")
+
+        if response_format in ("text", "srt", "vtt"):
+            body = format_output(job.segments, OutputFormat(
+                "txt" if response_format == "text" else response_format
+            ))
+            content_type = "text/vtt" if response_format == "vtt" else "text/plain"
+            await self._send(writer, 200, body.encode("utf-8"), f"{content_type}; charset=utf-8")
+            return
+
+        text = format_output(job.segments, OutputFormat.TXT).strip()
+        if response_format == "json":
+            await self._send_json(writer, 200, {"text": text})
+            return
+
+        items = [
+            {"start": segment.start / 1000, "end": segment.end / 1000}
+            for segment in job.segments
+        ]
+        response = {
+            "task": task,
+            "language": job.task.transcription_options.language or "",
+            "duration": job.task.audio_duration,
+            "text": text,
+        }
+        if job.task.transcription_options.word_level_timings:
+            response["words"] = [
+                {"word": segment.text, **item} for segment, item in zip(job.segments, items)
+            ]
+        else:
+            response["segments"] = [
+                {"id": i, "text": segment.text, **item}
+                for i, (segment, item) in enumerate(zip(job.segments, items))
+            ]
+        await self._send_json(writer, 200, response)
+
+    def _head(self, status: int, headers: dict) -> bytes:
+        lines = [f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: Optional[dict] = None,
+    ):
+        writer.write(
+            self._head(
+                status,
+                {
+                    "Content-Type": content_type,
+                    "Content-Length": str(len(body)),
+                    "Connection": "close",
+                    **(headers or {}),
+                },
+            )
+            + body
+        )
+        await writer.drain()
+
+    async def _send_json(
+        self, writer: asyncio.StreamWriter, status: int, body: dict, headers: Optional[dict] = None
+    ):
+        await self._send(
+            writer, status, json.dumps(body).encode("utf-8"), "application/json", headers
+        )
+
+    async def _send_error(self, writer: asyncio.StreamWriter, error: HttpError):
+        # The error format of the OpenAI API, for its clients
+        body = {
+            "error": {
+                "message": error.message,
+                "type": "invalid_request_error" if error.status < 500 else "server_error",
+            }
+        }
+        try:
+            await self._send_json(writer, error.status, body, error.headers)
+        except (ConnectionError, OSError):
+            pass
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="buzz serve",
+        description="Serve the transcription queue over HTTP on this machine.",
+    )
+    parser.add_argument(
+        "--host", default=DEFAULT_HOST, help=f"Address to listen on. Default: {DEFAULT_HOST}."
+    )
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on. Default: {DEFAULT_PORT}."
+    )
+    parser.add_argument(
+        "-q",
+        "--max-queue-depth",
+        type=int,
+        default=DEFAULT_MAX_QUEUE_DEPTH,
+        help="Queued and running jobs above which new jobs are refused with 429. "
+        f"Default: {DEFAULT_MAX_QUEUE_DEPTH}.",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Files transcribed at the same time. Default: the preference of the app.",
+    )
+    add_task_options(
+        parser,
+        default_output_formats="",
+        output_directory_help="Default output directory of the output files. "
+        "Default: the directory of each file.",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.max_queue_depth < 1:
+        parser.error("--max-queue-depth must be at least 1")
+    if args.concurrency is not None and args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    app = QCoreApplication(sys.argv[:1])
+    app.setApplicationName(APP_NAME)
+
+    settings = Settings()
+    if settings.value(key=Settings.Key.FORCE_CPU, default_value=False):
+        os.environ["BUZZ_FORCE_CPU"] = "true"
+    if settings.value(key=Settings.Key.REDUCE_GPU_MEMORY, default_value=False):
+        os.environ["BUZZ_REDUCE_GPU_MEMORY"] = "true"
+
+    from buzz.db.dao.transcription_dao import TranscriptionDAO
+    from buzz.db.dao.transcription_segment_dao import TranscriptionSegmentDAO
+    from buzz.db.db import close_app_db, setup_app_db
+
+    db = setup_app_db()
+    transcription_service = TranscriptionService(
+        TranscriptionDAO(db), TranscriptionSegmentDAO(db)
+    )
+
+    loop = asyncio.new_event_loop()
+    jobs = JobStore()
+    server = TranscriptionServer(
+        transcription_service, jobs, loop, max_concurrent_tasks=args.concurrency
+    )
+    api = JobApi(server, jobs, get_task_defaults(args), args.max_queue_depth)
+
+    try:
+        http_server = loop.run_until_complete(
+            asyncio.start_server(api.handle_connection, args.host, args.port)
+        )
+    except OSError as exc:
+        print(f"Error: could not listen on {args.host}:{args.port}, {exc}", file=sys.stderr)
+        server.stop()
+        close_app_db()
+        return 1
+
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+    print(f"Listening on http://{args.host}:{args.port}", flush=True)
+
+    # Qt's event loop does not return to Python, wake it up to handle Ctrl+C
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    timer = QTimer()
+    timer.timeout.connect(lambda: None)
+    timer.start(500)
+
+    exit_code = app.exec()
+
+    http_server.close()
+    loop.call_soon_threadsafe(loop.stop)
+    loop_thread.join(timeout=5)
+    server.stop()
+    close_app_db()
+    return exit_code
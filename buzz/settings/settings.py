@@ -46,6 +46,8 @@ class Settings:
         FILE_TRANSCRIBER_LLM_PROMPT = "file-transcriber/llm-prompt"
         FILE_TRANSCRIBER_WORD_LEVEL_TIMINGS = "file-transcriber/word-level-timings"
         FILE_TRANSCRIBER_EXPORT_FORMATS = "file-transcriber/export-formats"
+        FILE_TRANSCRIBER_CONCURRENT_TASKS = "file-transcriber/concurrent-tasks"
+        FILE_TRANSCRIBER_SCHEDULING_POLICY = "file-transcriber/scheduling-policy"
 
         TRANSCRIPTION_RESIZER_CREATE_NEW_TRANSCRIPT = (
             "transcription-resizer/create-new-transcript"
@@ -56,6 +58,7 @@ class Settings:
         OPENAI_API_MODEL = "transcriber/openai-api-model"
         CUSTOM_FASTER_WHISPER_ID = "transcriber/custom-faster-whisper-id"
         HUGGINGFACE_MODEL_ID = "transcriber/huggingface-model-id"
+        TUNED_CONFIGURATIONS = "transcriber/tuned-configurations"
 
         SHORTCUTS = "shortcuts"
 
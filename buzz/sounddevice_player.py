@@ -1,52 +1,13 @@
 import logging
-import os
-import subprocess
-import sys
-import tempfile
 import threading
-import wave
 from typing import Optional
 
 import numpy as np
 import sounddevice as sd
 
+from buzz.audio_cache import load_pcm
 
-def _find_ffmpeg() -> str:
-    import shutil
-    path = shutil.which("ffmpeg")
-    if path:
-        return path
-    frozen = os.path.join(getattr(sys, "_MEIPASS", ""), "ffmpeg")
-    if os.path.exists(frozen):
-        return frozen
-    frozen_exe = frozen + ".exe"
-    if os.path.exists(frozen_exe):
-        return frozen_exe
-    return "ffmpeg"
-
-
-def decode_audio_to_wav(input_path: str, output_wav: str) -> None:
-    ffmpeg = _find_ffmpeg()
-    subprocess.run(
-        [ffmpeg, "-y", "-i", input_path, "-vn", "-ar", "44100", "-ac", "2",
-         "-f", "wav", output_wav],
-        capture_output=True,
-        check=True,
-    )
-
-
-def load_wav(wav_path: str):
-    with wave.open(wav_path, "rb") as wf:
-        n_channels = wf.getnchannels()
-        sampwidth = wf.getsampwidth()
-        framerate = wf.getframerate()
-        n_frames = wf.getnframes()
-        raw = wf.readframes(n_frames)
-    dtype = {1: np.int8, 2: np.int16, 4: np.int32}.get(sampwidth, np.int16)
-    data = np.frombuffer(raw, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
-    if n_channels > 1:
-        data = data.reshape(-1, n_channels)
-    return data, framerate
+PLAYBACK_SAMPLE_RATE = 44100
 
 
 class SounddevicePlayer:
@@ -141,20 +102,17 @@ class SounddevicePlayer:
 
 class AudioFilePlayer:
     """
-    Decodes an audio/video file via ffmpeg and plays audio through sounddevice.
+    Decodes an audio/video file via the decoded audio cache and plays audio through sounddevice.
     Provides the same interface used by AudioPlayer and VideoPlayer.
     """
 
     def __init__(self, file_path: str):
-        self._tmp_dir = tempfile.TemporaryDirectory()
-        self._wav_path = os.path.join(self._tmp_dir.name, "audio.wav")
         self._player: Optional[SounddevicePlayer] = None
         self._ready = False
 
         try:
-            decode_audio_to_wav(file_path, self._wav_path)
-            data, samplerate = load_wav(self._wav_path)
-            self._player = SounddevicePlayer(data, samplerate)
+            data = load_pcm(file_path, sample_rate=PLAYBACK_SAMPLE_RATE, channels=2)
+            self._player = SounddevicePlayer(data, PLAYBACK_SAMPLE_RATE)
             self._ready = True
         except Exception:
             logging.error("AudioFilePlayer: failed to decode %s", file_path, exc_info=True)
@@ -198,7 +156,3 @@ class AudioFilePlayer:
     def close(self):
         if self._player:
             self._player.close()
-        try:
-            self._tmp_dir.cleanup()
-        except Exception:
-            pass
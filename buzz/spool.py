@@ -0,0 +1,547 @@
+"""Job spool shared by Buzz workers on several machines: ``buzz spool``.
+
+A spool is a directory, usually on a network share that every worker mounts,
+with a subdirectory per state of a job:
+
+    queued/<id>.json      waiting for a worker
+    running/<id>.json     claimed by a worker, with the segments of its last checkpoint
+    running/<id>.lease    the worker holding the job, its progress and lease end
+    completed/<id>.json   transcribed, with the segments
+    failed/<id>.json      failed, with the error
+
+Each job file holds the task as written by ``FileTranscriptionTask.to_json``.
+A worker claims a job by renaming it from queued/ to running/, which only one
+worker can do, then renews its lease while transcribing. Any worker re-queues
+the jobs whose lease expired, so the job of a crashed machine resumes from its
+last checkpoint on another one. Files referenced by jobs must be reachable at
+the same path from every worker.
+"""
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, TextIO
+
+from buzz.batch import (
+    EXIT_OK,
+    EXIT_USAGE,
+    ManifestError,
+    add_task_options,
+    build_task,
+    get_task_defaults,
+    read_manifest,
+    resolve_model,
+    run_task,
+)
+from buzz.transcriber.transcriber import FileTranscriptionTask, Segment
+
+DEFAULT_LEASE_SECONDS = 60
+# Jobs whose lease expired this many times, e.g. files crashing the backend,
+# are failed instead of re-queued
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL_SECONDS = 5
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+STATES = (QUEUED, RUNNING, COMPLETED, FAILED)
+
+
+@dataclass
+class SpoolJob:
+    id: str
+    task: FileTranscriptionTask
+    worker_id: str
+    attempts: int = 0
+
+
+class Spool(ABC):
+    """Jobs shared by workers. Implemented by a directory; a coordinator
+    service can implement the same operations."""
+
+    lease_seconds: float
+
+    @abstractmethod
+    def submit(self, task: FileTranscriptionTask) -> str:
+        ...
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[SpoolJob]:
+        """Takes the oldest queued job, None if there is none"""
+
+    @abstractmethod
+    def heartbeat(self, job: SpoolJob, progress: float) -> bool:
+        """Renews the lease of the job, False if the worker lost it"""
+
+    @abstractmethod
+    def checkpoint(self, job: SpoolJob, task: FileTranscriptionTask) -> bool:
+        """Saves the segments transcribed so far, a re-queued job resumes
+        after them"""
+
+    @abstractmethod
+    def complete(self, job: SpoolJob, task: FileTranscriptionTask) -> bool:
+        """Saves the result, False if the worker lost the lease and the
+        result was dropped"""
+
+    @abstractmethod
+    def fail(self, job: SpoolJob, error: str) -> bool:
+        ...
+
+    @abstractmethod
+    def release(self, job: SpoolJob) -> bool:
+        """Puts a job back in the queue, e.g. when its worker stops"""
+
+    @abstractmethod
+    def requeue_expired(self) -> List[str]:
+        """Re-queues the jobs whose lease expired, returns their ids"""
+
+    @abstractmethod
+    def status(self) -> dict:
+        ...
+
+
+def _write_json(path: str, data: dict):
+    # Readers on other machines never see a partly written file
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(temp_path, path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class DirectorySpool(Spool):
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in STATES:
+            os.makedirs(os.path.join(path, state), exist_ok=True)
+
+    def _job_path(self, state: str, job_id: str) -> str:
+        return os.path.join(self.path, state, f"{job_id}.json")
+
+    def _lease_path(self, job_id: str) -> str:
+        return os.path.join(self.path, RUNNING, f"{job_id}.lease")
+
+    def _list(self, state: str) -> List[str]:
+        """Ids of the jobs in a state, oldest first"""
+        jobs = []
+        with os.scandir(os.path.join(self.path, state)) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    jobs.append((entry.stat().st_mtime, entry.name[: -len(".json")]))
+                except FileNotFoundError:
+                    continue
+        return [job_id for _, job_id in sorted(jobs)]
+
+    def submit(self, task: FileTranscriptionTask) -> str:
+        job_id = str(task.uid)
+        _write_json(
+            self._job_path(QUEUED, job_id),
+            {
+                "id": job_id,
+                "attempts": 0,
+                "submitted_at": time.time(),
+                "task": json.loads(task.to_json()),
+            },
+        )
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[SpoolJob]:
+        for job_id in self._list(QUEUED):
+            running_path = self._job_path(RUNNING, job_id)
+            try:
+                # Atomic, also over NFS: one worker wins, the others get an error
+                os.rename(self._job_path(QUEUED, job_id), running_path)
+            except OSError:
+                continue
+
+            self._write_lease(job_id, worker_id, 0.0)
+            data = _read_json(running_path)
+            try:
+                task = FileTranscriptionTask.from_json(json.dumps(data["task"]))
+            except Exception as exc:
+                logging.error(f"Invalid spool job {job_id}: {exc}")
+                self._finish(job_id, FAILED, {**(data or {}), "error": f"Invalid job: {exc}"})
+                continue
+
+            return SpoolJob(
+                id=job_id, task=task, worker_id=worker_id, attempts=data.get("attempts", 0)
+            )
+
+        return None
+
+    def _write_lease(self, job_id: str, worker_id: str, progress: float):
+        _write_json(
+            self._lease_path(job_id),
+            {
+                "worker": worker_id,
+                "progress": progress,
+                # Workers compare wall clocks, keep the machines in sync with NTP
+                "expires_at": time.time() + self.lease_seconds,
+            },
+        )
+
+    def _holds_lease(self, job: SpoolJob) -> bool:
+        lease = _read_json(self._lease_path(job.id))
+        return (
+            lease is not None
+            and lease.get("worker") == job.worker_id
+            and os.path.exists(self._job_path(RUNNING, job.id))
+        )
+
+    def heartbeat(self, job: SpoolJob, progress: float) -> bool:
+        if not self._holds_lease(job):
+            return False
+        self._write_lease(job.id, job.worker_id, progress)
+        return True
+
+    def checkpoint(self, job: SpoolJob, task: FileTranscriptionTask) -> bool:
+        if not self._holds_lease(job):
+            return False
+        data = _read_json(self._job_path(RUNNING, job.id)) or {"id": job.id}
+        data["task"] = json.loads(task.to_json())
+        _write_json(self._job_path(RUNNING, job.id), data)
+        return True
+
+    def complete(self, job: SpoolJob, task: FileTranscriptionTask) -> bool:
+        if not self._holds_lease(job):
+            return False
+        data = _read_json(self._job_path(RUNNING, job.id)) or {"id": job.id}
+        data.update(
+            {
+                "task": json.loads(task.to_json()),
+                "worker": job.worker_id,
+                "completed_at": time.time(),
+            }
+        )
+        self._finish(job.id, COMPLETED, data)
+        return True
+
+    def fail(self, job: SpoolJob, error: str) -> bool:
+        if not self._holds_lease(job):
+            return False
+        data = _read_json(self._job_path(RUNNING, job.id)) or {"id": job.id}
+        data.update({"worker": job.worker_id, "error": error})
+        self._finish(job.id, FAILED, data)
+        return True
+
+    def release(self, job: SpoolJob) -> bool:
+        if not self._holds_lease(job):
+            return False
+        data = _read_json(self._job_path(RUNNING, job.id))
+        self._finish(job.id, QUEUED, data)
+        return True
+
+    def _finish(self, job_id: str, state: str, data: dict):
+        _write_json(self._job_path(state, job_id), data)
+        _remove(self._job_path(RUNNING, job_id))
+        _remove(self._lease_path(job_id))
+
+    def requeue_expired(self) -> List[str]:
+        requeued = []
+        now = time.time()
+        for job_id in self._list(RUNNING):
+            running_path = self._job_path(RUNNING, job_id)
+            lease = _read_json(self._lease_path(job_id))
+            if lease is not None:
+                expires_at = lease["expires_at"]
+            else:
+                # Claimed, the lease is not written yet. A rename updates the
+                # change time, the modification time is the submission's.
+                try:
+                    stat = os.stat(running_path)
+                except FileNotFoundError:
+                    continue
+                expires_at = max(stat.st_mtime, stat.st_ctime) + self.lease_seconds
+
+            if expires_at > now:
+                continue
+
+            # Only one of the workers finding the expired lease re-queues it
+            reaping_path = f"{running_path}.{uuid.uuid4().hex}.reaping"
+            try:
+                os.rename(running_path, reaping_path)
+            except OSError:
+                continue
+
+            data = _read_json(reaping_path) or {"id": job_id}
+            data["attempts"] = data.get("attempts", 0) + 1
+            if data["attempts"] >= self.max_attempts:
+                data["error"] = f"Lease expired {data['attempts']} times"
+                _write_json(self._job_path(FAILED, job_id), data)
+            else:
+                _write_json(self._job_path(QUEUED, job_id), data)
+            _remove(reaping_path)
+            _remove(self._lease_path(job_id))
+
+            logging.debug(f"Re-queued spool job {job_id} after its lease expired")
+            requeued.append(job_id)
+
+        return requeued
+
+    def status(self) -> dict:
+        running = []
+        for job_id in self._list(RUNNING):
+            lease = _read_json(self._lease_path(job_id)) or {}
+            running.append(
+                {
+                    "id": job_id,
+                    "worker": lease.get("worker"),
+                    "progress": lease.get("progress", 0.0),
+                }
+            )
+        return {
+            QUEUED: len(self._list(QUEUED)),
+            RUNNING: running,
+            COMPLETED: len(self._list(COMPLETED)),
+            FAILED: len(self._list(FAILED)),
+        }
+
+
+class SpoolWorker:
+    """Transcribes the jobs of a spool one at a time, keeping the last model
+    loaded, and prints one JSON event per line"""
+
+    def __init__(
+        self,
+        spool: Spool,
+        worker_id: Optional[str] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS,
+        output: TextIO = sys.stdout,
+    ):
+        self.spool = spool
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.output = output
+        self.model_lock = threading.Lock()
+        # A worker has the machine to itself
+        self.n_threads = os.cpu_count() or 8
+
+    def emit(self, event: dict):
+        print(json.dumps({**event, "worker": self.worker_id}), file=self.output, flush=True)
+
+    def run(self, exit_when_empty: bool = False) -> int:
+        from buzz.transcriber.model_cache import ModelCache
+        from buzz.transcriber.warm_model_pool import get_model_cache_size
+        from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
+
+        WhisperFileTranscriber.model_cache = ModelCache(max_size=get_model_cache_size())
+        self.emit({"event": "started"})
+
+        while True:
+            for job_id in self.spool.requeue_expired():
+                self.emit({"event": "requeued", "id": job_id})
+
+            job = self.spool.claim(self.worker_id)
+            if job is None:
+                status = self.spool.status()
+                if exit_when_empty and status[QUEUED] == 0 and len(status[RUNNING]) == 0:
+                    self.emit({"event": "finished"})
+                    return EXIT_OK
+                time.sleep(self.poll_interval)
+                continue
+
+            self.process(job)
+
+    def process(self, job: SpoolJob):
+        task = job.task
+        file = task.file_path or task.url
+        self.emit({"event": "claimed", "id": job.id, "file": file, "attempts": job.attempts})
+
+        progress = [0.0]
+        lease_lost = threading.Event()
+        finished = threading.Event()
+
+        def heartbeat():
+            while not finished.wait(self.spool.lease_seconds / 3):
+                if not self.spool.heartbeat(job, progress[0]):
+                    # Re-queued for another worker, stop transcribing
+                    lease_lost.set()
+                    return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+
+        # As claimed, run_task sets the file of a URL job to its local download
+        # and the settings tuned for this machine
+        claimed = dataclasses.replace(task)
+        previous_segments = list(task.segments) if task.resume_offset > 0 else []
+        checkpoint_segments: List[Segment] = []
+
+        def on_progress(fraction: float):
+            progress[0] = round(fraction, 3)
+
+        def on_checkpoint(offset: int, segments: List[Segment]):
+            checkpoint_segments.extend(segments)
+            self.spool.checkpoint(
+                job,
+                dataclasses.replace(
+                    claimed,
+                    segments=previous_segments + checkpoint_segments,
+                    resume_offset=offset,
+                ),
+            )
+
+        def stop_heartbeat():
+            # Before the job leaves running/, a late heartbeat would leave its lease behind
+            finished.set()
+            heartbeat_thread.join()
+
+        try:
+            resolve_model(task, self.model_lock)
+            segments, output_paths = run_task(
+                task, self.n_threads, on_progress, on_checkpoint, cancel_event=lease_lost
+            )
+        except KeyboardInterrupt:
+            stop_heartbeat()
+            self.spool.release(job)
+            raise
+        except Exception as exc:
+            stop_heartbeat()
+            if lease_lost.is_set() or not self.spool.fail(job, str(exc)):
+                self.emit({"event": "lease_lost", "id": job.id, "file": file})
+            else:
+                self.emit({"event": "failed", "id": job.id, "file": file, "error": str(exc)})
+            return
+
+        stop_heartbeat()
+        task.segments = segments
+        task.resume_offset = 0
+        task.status = FileTranscriptionTask.Status.COMPLETED
+        if self.spool.complete(job, task):
+            self.emit(
+                {
+                    "event": "completed",
+                    "id": job.id,
+                    "file": file,
+                    "outputs": output_paths,
+                    "timings": task.timings,
+                }
+            )
+        else:
+            self.emit({"event": "lease_lost", "id": job.id, "file": file})
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="buzz spool",
+        description="Share transcription jobs between Buzz workers on several machines "
+        "through a spool directory.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = commands.add_parser("submit", help="Queue the files of a manifest.")
+    submit_parser.add_argument("spool", help="Spool directory")
+    submit_parser.add_argument(
+        "manifest",
+        help="JSON Lines file with one file to transcribe per line, as for buzz batch, "
+        "- reads standard input",
+    )
+    add_task_options(
+        submit_parser,
+        default_output_formats="txt",
+        output_directory_help="Default output directory. Default: the directory of each file.",
+    )
+
+    work_parser = commands.add_parser("work", help="Transcribe the jobs of the spool.")
+    work_parser.add_argument("spool", help="Spool directory")
+    work_parser.add_argument(
+        "--worker-id", default=None, help="Name of the worker. Default: host name and process id."
+    )
+    work_parser.add_argument(
+        "--exit-when-empty",
+        action="store_true",
+        help="Exit once no job is queued or running instead of waiting for new jobs.",
+    )
+    work_parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Print debug logs to standard error."
+    )
+
+    status_parser = commands.add_parser("status", help="Print the jobs of the spool.")
+    status_parser.add_argument("spool", help="Spool directory")
+
+    return parser
+
+
+def _submit(spool: Spool, args: argparse.Namespace) -> int:
+    try:
+        if args.manifest == "-":
+            entries = read_manifest(sys.stdin, get_task_defaults(args))
+        else:
+            with open(args.manifest, encoding="utf-8") as file:
+                entries = read_manifest(file, get_task_defaults(args))
+        tasks = [build_task(entry) for entry in entries]
+    except (OSError, ValueError, ManifestError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_USAGE
+
+    for entry, task in zip(entries, tasks):
+        job_id = spool.submit(task)
+        print(json.dumps({"event": "submitted", "id": job_id, "file": entry["file"]}), flush=True)
+    return EXIT_OK
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = create_parser().parse_args(argv)
+
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.DEBUG if getattr(args, "verbose", False) else logging.WARNING,
+        format="[%(asctime)s] %(module)s.%(funcName)s:%(lineno)d %(levelname)s -> %(message)s",
+    )
+
+    try:
+        spool = DirectorySpool(args.spool)
+    except OSError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.command == "submit":
+        return _submit(spool, args)
+
+    if args.command == "status":
+        print(json.dumps(spool.status()))
+        return EXIT_OK
+
+    # stdout only carries the events, backends print their own output
+    output = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    try:
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    except OSError:
+        pass
+
+    try:
+        return SpoolWorker(spool, args.worker_id, output=output).run(args.exit_when_empty)
+    except KeyboardInterrupt:
+        return 130
@@ -0,0 +1,173 @@
+import datetime
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from buzz.model_loader import ModelType
+from buzz.transcriber.file_transcriber import handle_folder_watch, write_outputs
+from buzz.transcriber.metrics import Stage, add_timing, timed_inference
+from buzz.transcriber.task_scheduler import probe_duration
+from buzz.transcriber.transcriber import FileTranscriptionTask, Segment
+from buzz.transcriber.warm_model_pool import WarmModelPool
+from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
+
+# Files up to this long are batched, each is a few 30 second windows at most
+BATCH_MAX_FILE_SECONDS = 120
+DEFAULT_BATCH_FILES = 16
+
+
+def is_batching_enabled() -> bool:
+    return os.getenv("BUZZ_BATCH_SHORT_FILES", "false").lower() == "true"
+
+
+def get_batch_files() -> int:
+    """Most files transcribed in one batch, set with BUZZ_BATCH_FILES.
+
+    Unlike get_batch_size, this does not bound memory use: the windows of all
+    the files are decoded get_batch_size at a time.
+    """
+    try:
+        return max(1, int(os.getenv("BUZZ_BATCH_FILES", DEFAULT_BATCH_FILES)))
+    except ValueError:
+        return DEFAULT_BATCH_FILES
+
+
+def get_batch_key(task: FileTranscriptionTask) -> Optional[tuple]:
+    """Tasks with the same key can be transcribed in one batch. Returns None
+    for a task that is not batched."""
+    if not is_batching_enabled():
+        return None
+
+    options = task.transcription_options
+    if options.model.model_type != ModelType.FASTER_WHISPER:
+        return None
+
+    # The language is detected once for the whole batch
+    if options.language is None or task.resume_offset > 0:
+        return None
+
+    duration = probe_duration(task.file_path)
+    if duration is None or duration > BATCH_MAX_FILE_SECONDS:
+        return None
+
+    return (
+        task.model_path,
+        options.task,
+        options.language,
+        options.word_level_timings,
+        options.initial_prompt or "",
+    )
+
+
+class BatchFileTranscriber(WhisperFileTranscriber):
+    """Transcribes short files that share a model and options in one batched
+    inference call of a warm model worker.
+
+    ``progress``, ``completed`` and ``error`` are about the whole batch, the
+    result of each task is reported with ``task_completed`` and ``task_error``.
+    """
+
+    task_completed = pyqtSignal(object, list)  # (FileTranscriptionTask, List[Segment])
+    task_error = pyqtSignal(object, str)  # (FileTranscriptionTask, error)
+
+    def __init__(
+        self,
+        tasks: List[FileTranscriptionTask],
+        parent: Optional["QObject"] = None,
+        model_pool: Optional[WarmModelPool] = None,
+    ) -> None:
+        super().__init__(tasks[0], parent, model_pool=model_pool)
+        self.tasks = tasks
+        self.owns_model_pool = False
+        # Timings of the whole batch, shared out to the tasks when it is done
+        self.batch_timings: Dict[str, float] = {}
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            with timed_inference(self.batch_timings):
+                results = self.transcribe_batch()
+        except Exception as exc:
+            logging.exception("")
+            self.error.emit(str(exc))
+            return
+        finally:
+            self._share_timings()
+
+        for task, (segments, error) in zip(self.tasks, results):
+            if error is not None:
+                self.task_error.emit(task, error)
+                continue
+
+            for segment in segments:
+                segment.text = segment.text.strip()
+
+            write_outputs(task, segments)
+
+            self.task_completed.emit(task, segments)
+
+            handle_folder_watch(task)
+
+        self.completed.emit([])
+
+    def _add_timing(self, stage: Stage, seconds: float):
+        add_timing(self.batch_timings, stage, seconds)
+
+    def _share_timings(self):
+        """Splits the time of the batch between its tasks by audio duration"""
+        durations = [task.audio_duration or 0.0 for task in self.tasks]
+        total = sum(durations)
+        for task, duration in zip(self.tasks, durations):
+            share = duration / total if total > 0 else 1 / len(self.tasks)
+            for stage, seconds in self.batch_timings.items():
+                add_timing(task.timings, Stage(stage), seconds * share)
+        self.batch_timings = {}
+
+    def transcribe_batch(self) -> List[Tuple[List[Segment], Optional[str]]]:
+        """Returns the segments or the error of each task"""
+        time_started = datetime.datetime.now()
+        if self.stopped:
+            raise Exception("Transcription was canceled")
+
+        if self.model_pool is None:
+            # Warm workers are disabled, use one for this batch only
+            self.model_pool = WarmModelPool(max_workers=1)
+            self.owns_model_pool = True
+
+        self.model_worker = self.model_pool.acquire(self.transcription_task)
+        self.model_worker_done.clear()
+        results = []
+        try:
+            recv_pipe = self.model_worker.submit_batch(self.tasks)
+            self.started_process = True
+            for _ in self.tasks:
+                self.segments = []
+                self.error_message = None
+                if not self.read_messages(recv_pipe):
+                    raise Exception("Transcription worker exited unexpectedly")
+                results.append((self.segments, self.error_message))
+        finally:
+            self.started_process = False
+            self.model_pool.release(self.model_worker)
+            self.model_worker_done.set()
+            if self.owns_model_pool:
+                self.model_pool.shutdown()
+
+        logging.debug(
+            "batch of %s files completed, time taken = %s",
+            len(self.tasks),
+            datetime.datetime.now() - time_started,
+        )
+
+        if self.stopped:
+            raise Exception("Transcription was canceled")
+
+        return results
+
+    def transcribe(self) -> List[Segment]:
+        segments, error = self.transcribe_batch()[0]
+        if error is not None:
+            raise Exception(error)
+        return segments
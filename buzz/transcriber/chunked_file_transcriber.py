@@ -0,0 +1,399 @@
+import dataclasses
+import datetime
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from PyQt6.QtCore import QObject, Qt
+
+from buzz import whisper_audio
+from buzz.model_loader import ModelType
+from buzz.transcriber.metrics import Stage, add_timing
+from buzz.transcriber.file_transcriber import FileTranscriber
+from buzz.transcriber.task_scheduler import probe_duration
+from buzz.transcriber.transcriber import FileTranscriptionTask, Segment
+from buzz.transcriber.warm_model_pool import WarmModelPool
+from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
+
+DEFAULT_CHUNK_WORKERS = 1
+DEFAULT_CHUNK_MINUTES = 10
+
+# Model types whose worker can transcribe part of a file
+CHUNKED_MODEL_TYPES = {
+    ModelType.WHISPER_CPP,
+    ModelType.FASTER_WHISPER,
+    ModelType.WHISPER,
+}
+
+# A chunk ends at the last quiet point this long before its nominal end
+CUT_SEARCH_SECONDS = 10.0
+
+# Number of segments at the start of a chunk compared with the end of the
+# previous one to drop repeated text
+BOUNDARY_SEGMENTS = 3
+
+
+def get_chunk_workers() -> int:
+    """Number of processes a long file is transcribed with, 1 disables chunking"""
+    try:
+        return max(1, int(os.getenv("BUZZ_CHUNK_WORKERS", DEFAULT_CHUNK_WORKERS)))
+    except ValueError:
+        return DEFAULT_CHUNK_WORKERS
+
+
+def get_chunk_seconds() -> float:
+    try:
+        minutes = float(os.getenv("BUZZ_CHUNK_MINUTES", DEFAULT_CHUNK_MINUTES))
+    except ValueError:
+        minutes = DEFAULT_CHUNK_MINUTES
+    return max(1.0, minutes * 60)
+
+
+def should_transcribe_in_chunks(task: FileTranscriptionTask) -> bool:
+    """True for a local model and a file that is at least two chunks long"""
+    if get_chunk_workers() <= 1:
+        return False
+
+    if task.transcription_options.model.model_type not in CHUNKED_MODEL_TYPES:
+        return False
+
+    duration = probe_duration(task.file_path)
+    if duration is None:
+        return False
+
+    return duration - task.resume_offset / 1000 >= 2 * get_chunk_seconds()
+
+
+def plan_chunks(
+    samples: np.ndarray, sample_rate: int, chunk_seconds: float, start: int = 0
+) -> List[Tuple[int, int]]:
+    """Splits ``samples[start:]`` into ``(start, end)`` ranges of about
+    ``chunk_seconds``, each cut at a quiet point so no word is split.
+
+    The last chunk takes the remainder, up to one and a half chunks long.
+    """
+    # Imported here, the recording transcriber pulls in the audio devices
+    from buzz.transcriber.recording_transcriber import RecordingTranscriber
+
+    chunk_size = int(chunk_seconds * sample_rate)
+    search_seconds = min(CUT_SEARCH_SECONDS, chunk_seconds / 2)
+
+    chunks = []
+    while len(samples) - start > chunk_size + chunk_size // 2:
+        cut = start + RecordingTranscriber.find_silence_cut_point(
+            samples[start : start + chunk_size],
+            sample_rate,
+            search_seconds=search_seconds,
+        )
+        chunks.append((start, cut))
+        start = cut
+
+    chunks.append((start, len(samples)))
+    return chunks
+
+
+def _normalize(text: str) -> str:
+    return "".join(char for char in text.lower() if char.isalnum())
+
+
+def _is_repeat(previous: Segment, segment: Segment) -> bool:
+    text = _normalize(segment.text)
+    return (
+        text != ""
+        and text == _normalize(previous.text)
+        and segment.start <= previous.end
+    )
+
+
+class SegmentStitcher:
+    """Joins the segments of consecutive chunks, already in the file's time,
+    as they are added.
+
+    The model sometimes transcribes speech at a chunk boundary in both chunks,
+    the copy at the start of the later chunk is dropped. Segments of the
+    earlier chunk that run past the boundary are cut short.
+    """
+
+    def __init__(self):
+        self.segments: List[Segment] = []
+        self.tail: List[Segment] = []
+        self.boundary = 0
+        self.index = 0
+
+    def start_chunk(self):
+        self.tail = self.segments[-BOUNDARY_SEGMENTS:]
+        self.boundary = len(self.segments)
+        self.index = 0
+
+    def add(self, segment: Segment) -> bool:
+        """Adds the next segment of the current chunk, False if it was dropped"""
+        index = self.index
+        self.index += 1
+        if index < BOUNDARY_SEGMENTS and any(
+            _is_repeat(previous, segment) for previous in self.tail
+        ):
+            return False
+
+        if len(self.segments) == self.boundary and self.boundary > 0:
+            previous = self.segments[-1]
+            if previous.end > segment.start:
+                previous.end = max(previous.start, segment.start)
+
+        self.segments.append(segment)
+        return True
+
+
+def stitch_segments(chunks: List[List[Segment]]) -> List[Segment]:
+    """Joins the segments of consecutive chunks, see SegmentStitcher"""
+    stitcher = SegmentStitcher()
+    for segments in chunks:
+        stitcher.start_chunk()
+        for segment in segments:
+            stitcher.add(segment)
+    return stitcher.segments
+
+
+class ChunkedFileTranscriber(FileTranscriber):
+    """Transcribes a long file in parallel.
+
+    The audio is split into chunks of a few minutes at quiet points and the
+    chunks are transcribed by several warm model workers, which split the
+    thread budget of the task. Progress is the share of the audio done
+    across all chunks.
+
+    The chunks run in the queue's warm model pool, which is grown by the
+    extra workers while the file is transcribed. Segments are sent as
+    checkpoints once every chunk before them is done, so an interrupted task
+    resumes after the last one.
+    """
+
+    def __init__(
+        self,
+        task: FileTranscriptionTask,
+        parent: Optional["QObject"] = None,
+        max_workers: Optional[int] = None,
+        chunk_seconds: Optional[float] = None,
+        model_pool: Optional[WarmModelPool] = None,
+    ) -> None:
+        super().__init__(task, parent)
+        self.max_workers = max_workers or get_chunk_workers()
+        self.chunk_seconds = chunk_seconds or get_chunk_seconds()
+        self.stopped = False
+        self.error_message: Optional[str] = None
+        self.lock = threading.Lock()
+        self.running: Set[WhisperFileTranscriber] = set()
+        self.model_pool = model_pool
+        self.chunk_durations: List[int] = []
+        self.chunk_fractions: List[float] = []
+        self.last_progress = -1
+        # Segments received from each chunk, how many of them were stitched
+        # and the offset in ms each chunk reached
+        self.chunk_segments: List[List[Segment]] = []
+        self.chunk_stitched: List[int] = []
+        self.chunk_offsets: List[int] = []
+        self.chunk_done: List[bool] = []
+        # First chunk whose segments are not all stitched
+        self.next_chunk = 0
+        self.stitcher = SegmentStitcher()
+        self.checkpoint_offset = task.resume_offset
+
+    def transcribe(self) -> List[Segment]:
+        time_started = datetime.datetime.now()
+        task = self.transcription_task
+
+        samples = whisper_audio.load_audio(task.file_path)
+        sample_rate = whisper_audio.SAMPLE_RATE
+        ranges = plan_chunks(
+            samples,
+            sample_rate,
+            self.chunk_seconds,
+            start=task.resume_offset * sample_rate // 1000,
+        )
+        # Adjacent chunks share the boundary in ms so no audio is skipped
+        boundaries = [start * 1000 // sample_rate for start, _ in ranges]
+        boundaries.append(len(samples) * 1000 // sample_rate)
+
+        n_workers = min(self.max_workers, len(ranges))
+        n_threads = max(1, (task.n_threads or os.cpu_count() or 8) // n_workers)
+        chunk_tasks = [
+            dataclasses.replace(
+                task,
+                segments=[],
+                resume_offset=0,
+                timings={},
+                n_threads=n_threads,
+                audio_start=boundaries[i],
+                audio_end=boundaries[i + 1] if i < len(ranges) - 1 else None,
+            )
+            for i in range(len(ranges))
+        ]
+        self.chunk_durations = [end - start for start, end in ranges]
+        self.chunk_fractions = [0.0] * len(ranges)
+        self.chunk_segments = [[] for _ in ranges]
+        self.chunk_stitched = [0] * len(ranges)
+        self.chunk_offsets = boundaries[:-1]
+        self.chunk_done = [False] * len(ranges)
+        self.next_chunk = 0
+        self.stitcher = SegmentStitcher()
+        self.stitcher.start_chunk()
+
+        logging.debug(
+            "Transcribing %s in %s chunks with %s workers of %s threads",
+            task.file_path,
+            len(chunk_tasks),
+            n_workers,
+            n_threads,
+        )
+
+        # The task holds one worker of the queue's pool, the other chunks
+        # get workers next to it
+        own_pool = self.model_pool is None
+        if own_pool:
+            self.model_pool = WarmModelPool(max_workers=n_workers)
+        else:
+            self.model_pool.set_max_workers(self.model_pool.max_workers + n_workers - 1)
+        try:
+            with ThreadPoolExecutor(
+                max_workers=n_workers, thread_name_prefix="ChunkTranscriber"
+            ) as executor:
+                futures = [
+                    executor.submit(self._transcribe_chunk, i, chunk_task)
+                    for i, chunk_task in enumerate(chunk_tasks)
+                ]
+                wait(futures)
+        finally:
+            if own_pool:
+                self.model_pool.shutdown()
+            else:
+                self.model_pool.set_max_workers(self.model_pool.max_workers - n_workers + 1)
+
+        # The workers load their models at the same time
+        add_timing(
+            task.timings,
+            Stage.MODEL_LOAD,
+            max(
+                chunk_task.timings.get(Stage.MODEL_LOAD.value, 0.0)
+                for chunk_task in chunk_tasks
+            ),
+        )
+
+        if self.stopped:
+            raise Exception("Transcription was canceled")
+
+        if self.error_message is not None:
+            raise Exception(self.error_message)
+
+        segments = self.stitcher.segments
+
+        logging.debug(
+            "Chunked transcription completed, time taken = %s, number of segments = %s",
+            datetime.datetime.now() - time_started,
+            len(segments),
+        )
+        return segments
+
+    def _transcribe_chunk(self, index: int, task: FileTranscriptionTask) -> List[Segment]:
+        transcriber = WhisperFileTranscriber(task=task, model_pool=self.model_pool)
+        # Emitted on this thread, the chunk transcriber has no event loop
+        transcriber.progress.connect(
+            lambda progress: self._on_chunk_progress(index, progress),
+            Qt.ConnectionType.DirectConnection,
+        )
+        transcriber.checkpoint.connect(
+            lambda offset, segments: self._on_chunk_checkpoint(index, offset, segments),
+            Qt.ConnectionType.DirectConnection,
+        )
+
+        with self.lock:
+            if self.stopped or self.error_message is not None:
+                return []
+            self.running.add(transcriber)
+
+        try:
+            segments = transcriber.transcribe()
+        except Exception as exc:
+            with self.lock:
+                if self.stopped or self.error_message is not None:
+                    return []
+                self.error_message = str(exc)
+            # The result is incomplete without this chunk
+            self._stop_chunks()
+            return []
+        finally:
+            with self.lock:
+                self.running.discard(transcriber)
+
+        self._on_chunk_progress(index, (100, 100))
+        with self.lock:
+            # Also holds the segments sent as checkpoints before
+            self.chunk_segments[index] = list(segments)
+            self.chunk_done[index] = True
+            self._send_checkpoint()
+        return segments
+
+    def _on_chunk_checkpoint(self, index: int, offset: int, segments: List[Segment]):
+        with self.lock:
+            self.chunk_segments[index].extend(segments)
+            self.chunk_offsets[index] = offset
+            self._send_checkpoint()
+
+    def _send_checkpoint(self):
+        """Stitches the segments of the chunks in order, up to the first one
+        still running, and sends the new ones as a checkpoint"""
+        stitched = []
+        offset = None
+        while self.next_chunk < len(self.chunk_segments):
+            index = self.next_chunk
+            segments = self.chunk_segments[index]
+            stitched.extend(
+                segment
+                for segment in segments[self.chunk_stitched[index]:]
+                if self.stitcher.add(segment)
+            )
+            self.chunk_stitched[index] = len(segments)
+
+            if not self.chunk_done[index]:
+                offset = self.chunk_offsets[index]
+                break
+            self.next_chunk += 1
+            self.stitcher.start_chunk()
+            if self.next_chunk < len(self.chunk_offsets):
+                offset = self.chunk_offsets[self.next_chunk]
+
+        # The last chunk completes the task rather than checkpointing it
+        if (
+            offset is not None
+            and self.next_chunk < len(self.chunk_segments)
+            and (len(stitched) > 0 or offset > self.checkpoint_offset)
+        ):
+            self.checkpoint_offset = offset
+            self.checkpoint.emit(offset, stitched)
+
+    def _on_chunk_progress(self, index: int, progress: Tuple[int, int]):
+        current, total = progress
+        with self.lock:
+            self.chunk_fractions[index] = min(1.0, current / total) if total else 0.0
+            done = sum(
+                fraction * duration
+                for fraction, duration in zip(self.chunk_fractions, self.chunk_durations)
+            )
+            percent = int(100 * done / max(1, sum(self.chunk_durations)))
+            if percent <= self.last_progress:
+                return
+            self.last_progress = percent
+            self.progress.emit((percent, 100))
+
+    def _stop_chunks(self):
+        with self.lock:
+            running = list(self.running)
+
+        for transcriber in running:
+            transcriber.stop()
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+        self._stop_chunks()
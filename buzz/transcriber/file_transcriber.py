@@ -1,11 +1,10 @@
+import io
 import logging
 import os
-import sys
-import subprocess
 import shutil
 import tempfile
 from abc import abstractmethod
-from typing import Optional, List
+from typing import Callable, Optional, List, TextIO
 from pathlib import Path
 
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
@@ -13,6 +12,8 @@ from yt_dlp import YoutubeDL
 
 from buzz import whisper_audio
 from buzz.assets import APP_BASE_DIR
+from buzz.audio_cache import write_wav_chunks
+from buzz.transcriber.metrics import Stage, timed, timed_inference
 from buzz.transcriber.transcriber import (
     FileTranscriptionTask,
     get_output_file_path,
@@ -24,11 +25,77 @@ app_env = os.environ.copy()
 app_env['PATH'] = os.pathsep.join([os.path.join(APP_BASE_DIR, "_internal")] + [app_env['PATH']])
 
 
+def download_audio(url: str, on_download_progress: Callable[[float], None]) -> str:
+    """Downloads the audio of a URL and converts it to a 16 kHz mono WAV file.
+
+    Returns the path of the WAV file.
+    """
+    cookiefile = os.getenv("BUZZ_DOWNLOAD_COOKIEFILE")
+
+    extract_options = {
+        "logger": logging.getLogger(),
+    }
+    if cookiefile:
+        extract_options["cookiefile"] = cookiefile
+
+    try:
+        with YoutubeDL(extract_options) as ydl_info:
+            info = ydl_info.extract_info(url, download=False)
+            video_title = info.get("title", "audio")
+    except Exception as exc:
+        logging.debug(f"Error extracting video info: {exc}")
+        video_title = "audio"
+
+    video_title = YoutubeDL.sanitize_info({"title": video_title})["title"]
+    for char in ['/', '\\', ':', '*', '?', '"', '<', '>', '|']:
+        video_title = video_title.replace(char, '_')
+
+    temp_dir = tempfile.mkdtemp()
+    temp_output_path = os.path.join(temp_dir, video_title)
+    wav_file = temp_output_path + ".wav"
+    wav_file = str(Path(wav_file).resolve())
+
+    def on_progress(data: dict):
+        if data["status"] == "downloading":
+            on_download_progress(data["downloaded_bytes"] / data["total_bytes"])
+
+    options = {
+        "format": "bestaudio/best",
+        "progress_hooks": [on_progress],
+        "outtmpl": temp_output_path,
+        "logger": logging.getLogger(),
+    }
+
+    if cookiefile:
+        options["cookiefile"] = cookiefile
+
+    ydl = YoutubeDL(options)
+
+    logging.debug(f"Downloading audio file from URL: {url}")
+    ydl.download([url])
+
+    try:
+        with open(wav_file, "wb") as file:
+            write_wav_chunks(
+                file,
+                whisper_audio.iter_audio(temp_output_path, reuse_buffer=True),
+                whisper_audio.SAMPLE_RATE,
+                channels=1,
+            )
+    except RuntimeError as exc:
+        logging.warning(f"Error processing downloaded audio. Error: {exc}")
+        raise Exception(f"Error processing downloaded audio: {exc}")
+
+    logging.debug(f"Downloaded audio to file: {wav_file}")
+    return wav_file
+
+
 class FileTranscriber(QObject):
     transcription_task: FileTranscriptionTask
     progress = pyqtSignal(tuple)  # (current, total)
     download_progress = pyqtSignal(float)
     completed = pyqtSignal(list)  # List[Segment]
+    checkpoint = pyqtSignal(int, list)  # (offset in ms, List[Segment])
     error = pyqtSignal(str)
 
     def __init__(self, task: FileTranscriptionTask, parent: Optional["QObject"] = None):
@@ -37,142 +104,46 @@ class FileTranscriber(QObject):
 
     @pyqtSlot()
     def run(self):
-        if self.transcription_task.source == FileTranscriptionTask.Source.URL_IMPORT:
+        # The queue worker downloads ahead of time, only fetch if it did not
+        if (
+            self.transcription_task.source == FileTranscriptionTask.Source.URL_IMPORT
+            and self.transcription_task.file_path is None
+        ):
             if not self._download_from_url():
                 return
 
         try:
-            segments = self.transcribe()
+            with timed_inference(self.transcription_task.timings):
+                segments = self.transcribe()
         except Exception as exc:
             logging.exception("")
             self.error.emit(str(exc))
             return
 
+        if self.transcription_task.resume_offset > 0:
+            segments = self.transcription_task.segments + segments
+
         for segment in segments:
             segment.text = segment.text.strip()
 
-        self.completed.emit(segments)
-
-        for (
-            output_format
-        ) in self.transcription_task.file_transcription_options.output_formats:
-            default_path = get_output_file_path(
-                file_path=self.transcription_task.file_path,
-                output_format=output_format,
-                language=self.transcription_task.transcription_options.language,
-                output_directory=self.transcription_task.output_directory,
-                model=self.transcription_task.transcription_options.model,
-                task=self.transcription_task.transcription_options.task,
-            )
+        # Written before completing so the export time is saved with the task
+        write_outputs(self.transcription_task, segments)
 
-            write_output(
-                path=default_path, segments=segments, output_format=output_format
-            )
+        self.completed.emit(segments)
 
-        if self.transcription_task.source == FileTranscriptionTask.Source.FOLDER_WATCH:
-            self._handle_folder_watch()
+        handle_folder_watch(self.transcription_task)
 
     def _download_from_url(self) -> bool:
-        cookiefile = os.getenv("BUZZ_DOWNLOAD_COOKIEFILE")
-
-        extract_options = {
-            "logger": logging.getLogger(),
-        }
-        if cookiefile:
-            extract_options["cookiefile"] = cookiefile
-
-        try:
-            with YoutubeDL(extract_options) as ydl_info:
-                info = ydl_info.extract_info(self.transcription_task.url, download=False)
-                video_title = info.get("title", "audio")
-        except Exception as exc:
-            logging.debug(f"Error extracting video info: {exc}")
-            video_title = "audio"
-
-        video_title = YoutubeDL.sanitize_info({"title": video_title})["title"]
-        for char in ['/', '\\', ':', '*', '?', '"', '<', '>', '|']:
-            video_title = video_title.replace(char, '_')
-
-        temp_dir = tempfile.mkdtemp()
-        temp_output_path = os.path.join(temp_dir, video_title)
-        wav_file = temp_output_path + ".wav"
-        wav_file = str(Path(wav_file).resolve())
-
-        options = {
-            "format": "bestaudio/best",
-            "progress_hooks": [self.on_download_progress],
-            "outtmpl": temp_output_path,
-            "logger": logging.getLogger(),
-        }
-
-        if cookiefile:
-            options["cookiefile"] = cookiefile
-
-        ydl = YoutubeDL(options)
-
         try:
-            logging.debug(f"Downloading audio file from URL: {self.transcription_task.url}")
-            ydl.download([self.transcription_task.url])
+            self.transcription_task.file_path = download_audio(
+                self.transcription_task.url, self.download_progress.emit
+            )
         except Exception as exc:
-            logging.debug(f"Error downloading audio: {exc.msg}")
-            self.error.emit(exc.msg)
+            logging.debug(f"Error downloading audio: {exc}")
+            self.error.emit(str(exc))
             return False
-
-        cmd = [
-            "ffmpeg",
-            "-nostdin",
-            "-threads", "0",
-            "-i", temp_output_path,
-            "-ac", "1",
-            "-ar", str(whisper_audio.SAMPLE_RATE),
-            "-acodec", "pcm_s16le",
-            "-loglevel", "panic",
-            wav_file
-        ]
-
-        if sys.platform == "win32":
-            si = subprocess.STARTUPINFO()
-            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            si.wShowWindow = subprocess.SW_HIDE
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                startupinfo=si,
-                env=app_env,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-        else:
-            result = subprocess.run(cmd, capture_output=True)
-
-        if len(result.stderr):
-            logging.warning(f"Error processing downloaded audio. Error: {result.stderr.decode()}")
-            raise Exception(f"Error processing downloaded audio: {result.stderr.decode()}")
-
-        self.transcription_task.file_path = wav_file
-        logging.debug(f"Downloaded audio to file: {self.transcription_task.file_path}")
         return True
 
-    def _handle_folder_watch(self):
-        source_path = (
-            self.transcription_task.original_file_path
-            or self.transcription_task.file_path
-        )
-        if source_path and os.path.exists(source_path):
-            if self.transcription_task.delete_source_file:
-                os.remove(source_path)
-            else:
-                shutil.move(
-                    source_path,
-                    os.path.join(
-                        self.transcription_task.output_directory,
-                        os.path.basename(source_path),
-                    ),
-                )
-
-    def on_download_progress(self, data: dict):
-        if data["status"] == "downloading":
-            self.download_progress.emit(data["downloaded_bytes"] / data["total_bytes"])
-
     @abstractmethod
     def transcribe(self) -> List[Segment]:
         ...
@@ -182,6 +153,44 @@ class FileTranscriber(QObject):
         ...
 
 
+def write_outputs(task: FileTranscriptionTask, segments: List[Segment]):
+    """Writes the output files the task asks for, a failure is only logged"""
+    try:
+        with timed(task.timings, Stage.EXPORT):
+            for output_format in task.file_transcription_options.output_formats:
+                default_path = get_output_file_path(
+                    file_path=task.file_path,
+                    output_format=output_format,
+                    language=task.transcription_options.language,
+                    output_directory=task.output_directory,
+                    model=task.transcription_options.model,
+                    task=task.transcription_options.task,
+                )
+
+                write_output(
+                    path=default_path, segments=segments, output_format=output_format
+                )
+    except Exception:
+        logging.exception(f"Could not write the output of {task.file_path}")
+
+
+def handle_folder_watch(task: FileTranscriptionTask):
+    """Moves the source file of a completed folder watch task to the output
+    directory, or deletes it"""
+    if task.source != FileTranscriptionTask.Source.FOLDER_WATCH:
+        return
+
+    source_path = task.original_file_path or task.file_path
+    if source_path and os.path.exists(source_path):
+        if task.delete_source_file:
+            os.remove(source_path)
+        else:
+            shutil.move(
+                source_path,
+                os.path.join(task.output_directory, os.path.basename(source_path)),
+            )
+
+
 def write_output(
     path: str,
     segments: List[Segment],
@@ -196,39 +205,56 @@ def write_output(
     )
 
     with open(os.fsencode(path), "w", encoding="utf-8") as file:
-        if output_format == OutputFormat.TXT:
-            combined_text = ""
-            previous_end_time = None
-
-            paragraph_split_time = int(os.getenv("BUZZ_PARAGRAPH_SPLIT_TIME", "2000"))
-            
-            for segment in segments:
-                if previous_end_time is not None and (segment.start - previous_end_time) >= paragraph_split_time:
-                    combined_text += "\n\n"
-                combined_text += getattr(segment, segment_key).strip() + " "
-                previous_end_time = segment.end
-
-            file.write(combined_text)
-
-        elif output_format == OutputFormat.VTT:
-            file.write("WEBVTT\n\n")
-            for segment in segments:
-                file.write(
-                    f"{to_timestamp(segment.start)} --> {to_timestamp(segment.end)}\n"
-                )
-                file.write(f"{getattr(segment, segment_key)}\n\n")
-
-        elif output_format == OutputFormat.SRT:
-            for i, segment in enumerate(segments):
-                file.write(f"{i + 1}\n")
-                file.write(
-                    f'{to_timestamp(segment.start, ms_separator=",")} --> {to_timestamp(segment.end, ms_separator=",")}\n'
-                )
-                file.write(f"{getattr(segment, segment_key)}\n\n")
+        write_segments(file, segments, output_format, segment_key)
 
     logging.debug("Written transcription output")
 
 
+def format_output(
+    segments: List[Segment], output_format: OutputFormat, segment_key: str = "text"
+) -> str:
+    file = io.StringIO()
+    write_segments(file, segments, output_format, segment_key)
+    return file.getvalue()
+
+
+def write_segments(
+    file: TextIO,
+    segments: List[Segment],
+    output_format: OutputFormat,
+    segment_key: str = "text",
+):
+    if output_format == OutputFormat.TXT:
+        combined_text = ""
+        previous_end_time = None
+
+        paragraph_split_time = int(os.getenv("BUZZ_PARAGRAPH_SPLIT_TIME", "2000"))
+        
+        for segment in segments:
+            if previous_end_time is not None and (segment.start - previous_end_time) >= paragraph_split_time:
+                combined_text += "\n\n"
+            combined_text += getattr(segment, segment_key).strip() + " "
+            previous_end_time = segment.end
+
+        file.write(combined_text)
+
+    elif output_format == OutputFormat.VTT:
+        file.write("WEBVTT\n\n")
+        for segment in segments:
+            file.write(
+                f"{to_timestamp(segment.start)} --> {to_timestamp(segment.end)}\n"
+            )
+            file.write(f"{getattr(segment, segment_key)}\n\n")
+
+    elif output_format == OutputFormat.SRT:
+        for i, segment in enumerate(segments):
+            file.write(f"{i + 1}\n")
+            file.write(
+                f'{to_timestamp(segment.start, ms_separator=",")} --> {to_timestamp(segment.end, ms_separator=",")}\n'
+            )
+            file.write(f"{getattr(segment, segment_key)}\n\n")
+
+
 def to_timestamp(ms: float, ms_separator=".") -> str:
     hr = int(ms / (1000 * 60 * 60))
     ms -= hr * (1000 * 60 * 60)
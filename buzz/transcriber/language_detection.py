@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from buzz.transcriber.whisper_cpp import WhisperCpp
+from buzz.transcriber.whisper_cpp_server import WhisperCppServer, is_server_enabled
+from buzz.whisper_audio import SAMPLE_RATE, iter_audio
+
+# Whisper detects the language from a single 30 second window
+DETECTION_SECONDS = 30
+MAX_CACHED_RESULTS = 10000
+
+
+class LanguageDetector:
+    """Detects the spoken language of files with a whisper.cpp model.
+
+    Only the first ``DETECTION_SECONDS`` of a file are decoded and posted to a
+    whisper-server that keeps the model loaded, so a queue of files pays the
+    model load once. The server stops when idle, see WhisperCppServer. Results
+    are cached by a hash of the decoded audio and the model, a file imported
+    again under another name is not detected again.
+    """
+
+    def __init__(self, max_results: int = MAX_CACHED_RESULTS):
+        self.max_results = max_results
+        self.results: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self.servers: Dict[str, WhisperCppServer] = {}
+        self.lock = threading.Lock()
+
+    def detect(self, file_path: str, model_path: str) -> Optional[str]:
+        """Returns the detected language code, or None if detection failed"""
+        samples = self._read_head(file_path)
+        digest = hashlib.blake2b(model_path.encode("utf-8") + b"\0", digest_size=16)
+        digest.update(memoryview(samples).cast("B"))
+        key = digest.hexdigest()
+
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return self.results[key]
+
+            if is_server_enabled():
+                language = WhisperCpp.detect_language_with_server(
+                    samples, self._get_server(model_path)
+                )
+            else:
+                language = WhisperCpp.detect_language(file_path, model_path)
+
+            if language is not None:
+                self.results[key] = language
+                while len(self.results) > self.max_results:
+                    self.results.popitem(last=False)
+            return language
+
+    def close(self):
+        with self.lock:
+            for server in self.servers.values():
+                server.stop()
+            self.servers.clear()
+
+    def _get_server(self, model_path: str) -> WhisperCppServer:
+        server = self.servers.get(model_path)
+        if server is None:
+            # One model is used for detection, stop the server of another one
+            for other in self.servers.values():
+                other.stop()
+            self.servers.clear()
+
+            logging.debug(f"Starting language detection server for {model_path}")
+            server = WhisperCppServer(model_path, WhisperCpp.detection_server_args())
+            self.servers[model_path] = server
+        return server
+
+    @staticmethod
+    def _read_head(file_path: str) -> np.ndarray:
+        chunk_samples = DETECTION_SECONDS * SAMPLE_RATE
+        for chunk in iter_audio(
+            file_path, chunk_samples=chunk_samples, end=DETECTION_SECONDS * 1000
+        ):
+            return np.ascontiguousarray(chunk, dtype="<f4")
+        return np.zeros(0, dtype=np.float32)
+
+
+_language_detector: Optional[LanguageDetector] = None
+
+
+def get_language_detector() -> LanguageDetector:
+    global _language_detector
+    if _language_detector is None:
+        _language_detector = LanguageDetector()
+    return _language_detector
@@ -0,0 +1,154 @@
+import csv
+import enum
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from buzz.locale import _
+
+
+class Stage(enum.Enum):
+    """Stages a file transcription goes through, in order"""
+
+    QUEUE_WAIT = "queue_wait"
+    DOWNLOAD = "download"
+    SPEECH_EXTRACTION = "speech_extraction"
+    PLUGINS = "plugins"
+    AUDIO_DECODE = "audio_decode"
+    MODEL_LOAD = "model_load"
+    INFERENCE = "inference"
+    EXPORT = "export"
+    DB_PERSIST = "db_persist"
+
+
+STAGE_LABELS = {
+    Stage.QUEUE_WAIT: _("Queue Wait"),
+    Stage.DOWNLOAD: _("Download"),
+    Stage.SPEECH_EXTRACTION: _("Speech Extraction"),
+    Stage.PLUGINS: _("Plugins"),
+    Stage.AUDIO_DECODE: _("Audio Decode"),
+    Stage.MODEL_LOAD: _("Model Load"),
+    Stage.INFERENCE: _("Inference"),
+    Stage.EXPORT: _("Export"),
+    Stage.DB_PERSIST: _("Save"),
+}
+
+# Columns of an exported metrics file, followed by one per stage
+METRICS_FIELDS = [
+    "id",
+    "name",
+    "model_type",
+    "whisper_model_size",
+    "status",
+    "time_queued",
+    "audio_duration",
+    "processing_time",
+    "real_time_factor",
+]
+
+
+def add_timing(timings: Dict[str, float], stage: Stage, seconds: float):
+    """Adds to the time of a stage, which may run more than once for a task"""
+    timings[stage.value] = timings.get(stage.value, 0.0) + seconds
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: Stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(timings, stage, time.perf_counter() - started)
+
+
+@contextmanager
+def timed_inference(timings: Dict[str, float]):
+    """Times a transcription as inference, less the model load time the
+    transcriber reports while it runs"""
+    model_load_before = timings.get(Stage.MODEL_LOAD.value, 0.0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        model_load = timings.get(Stage.MODEL_LOAD.value, 0.0) - model_load_before
+        elapsed = time.perf_counter() - started
+        add_timing(timings, Stage.INFERENCE, max(0.0, elapsed - model_load))
+
+
+def get_processing_time(timings: Dict[str, float]) -> float:
+    """Seconds spent working on a task, which excludes waiting in the queue"""
+    return sum(
+        seconds
+        for stage, seconds in timings.items()
+        if stage != Stage.QUEUE_WAIT.value
+    )
+
+
+def get_real_time_factor(
+    timings: Dict[str, float], audio_duration: Optional[float]
+) -> Optional[float]:
+    """Processing time over audio duration, below 1 is faster than real time"""
+    if not audio_duration or not timings:
+        return None
+    return get_processing_time(timings) / audio_duration
+
+
+def load_timings(metrics: Optional[str]) -> Dict[str, float]:
+    """Stage timings saved as JSON with a transcription"""
+    if not metrics:
+        return {}
+    try:
+        timings = json.loads(metrics)
+    except ValueError:
+        return {}
+    return {stage: float(seconds) for stage, seconds in timings.items()}
+
+
+def format_stage_timings(metrics: Optional[str]) -> str:
+    timings = load_timings(metrics)
+    return ", ".join(
+        f"{STAGE_LABELS[stage]} {timings[stage.value]:.1f}s"
+        for stage in Stage
+        if stage.value in timings
+    )
+
+
+def get_metrics_row(transcription) -> dict:
+    """Metrics of a saved transcription, see METRICS_FIELDS"""
+    timings = load_timings(transcription.metrics)
+    row = {
+        "id": transcription.id,
+        "name": transcription.name
+        or transcription.file
+        or transcription.url
+        or "",
+        "model_type": transcription.model_type,
+        "whisper_model_size": transcription.whisper_model_size or "",
+        "status": transcription.status,
+        "time_queued": transcription.time_queued,
+        "audio_duration": transcription.audio_duration,
+        "processing_time": get_processing_time(timings) if timings else None,
+        "real_time_factor": transcription.real_time_factor,
+    }
+    for stage in Stage:
+        row[stage.value] = timings.get(stage.value)
+    return row
+
+
+def write_metrics(path: str, transcriptions: Iterable) -> None:
+    """Writes the metrics of transcriptions as JSON if the path ends with
+    .json, as CSV otherwise"""
+    rows: List[dict] = [get_metrics_row(transcription) for transcription in transcriptions]
+
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(rows, file, indent=2)
+        return
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(
+            file, fieldnames=METRICS_FIELDS + [stage.value for stage in Stage]
+        )
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,65 @@
+import gc
+import logging
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+# (model_type, model_path, compute_type, device)
+ModelKey = Tuple[str, str, str, str]
+
+
+class ModelCache:
+    """Least-recently-used cache of loaded models.
+
+    Lives inside a long-lived transcription worker process so that consecutive
+    files using the same model skip the (often multi-second) load from disk.
+    Models are keyed by ``(model_type, model_path, compute_type, device)``.
+    """
+
+    def __init__(self, max_size: int = 1):
+        self.max_size = max(1, max_size)
+        self.models: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        if key in self.models:
+            logging.debug("Model cache hit: %s", key)
+            self.models.move_to_end(key)
+            return self.models[key]
+
+        logging.debug("Model cache miss: %s", key)
+        # Make room before loading so two large models are never resident at once
+        while len(self.models) >= self.max_size:
+            self._evict_oldest()
+
+        model = loader()
+        self.models[key] = model
+        return model
+
+    def _evict_oldest(self):
+        key, _model = self.models.popitem(last=False)
+        logging.debug("Evicting model from cache: %s", key)
+        # Models running in a process of their own, like whisper-server, stop it
+        close = getattr(_model, "close", None)
+        if callable(close):
+            close()
+        del _model, close
+        gc.collect()
+
+        # Only touch torch if it has already been imported by a loaded model
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            try:
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except Exception as e:
+                logging.debug(f"Failed to empty CUDA cache: {e}")
+
+    def clear(self):
+        while self.models:
+            self._evict_oldest()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.models
+
+    def __len__(self) -> int:
+        return len(self.models)
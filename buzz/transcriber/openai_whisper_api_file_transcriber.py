@@ -1,19 +1,21 @@
 import logging
 import math
 import os
-import sys
-import subprocess
 import tempfile
 
 from pathlib import Path
 from typing import Optional, List
 
+import av
 from PyQt6.QtCore import QObject
 from openai import OpenAI
 
+from buzz.audio_cache import load_pcm
+from buzz.media_io import encode_audio, get_executor
 from buzz.settings.settings import Settings
-from buzz.transcriber.file_transcriber import FileTranscriber, app_env
+from buzz.transcriber.file_transcriber import FileTranscriber
 from buzz.transcriber.transcriber import FileTranscriptionTask, Segment, Task
+from buzz.whisper_audio import SAMPLE_RATE
 
 
 def append_segment(result, txt: bytes, start: int, end: int):
@@ -62,66 +64,18 @@ class OpenAIWhisperAPIFileTranscriber(FileTranscriber):
             self.task,
         )
 
+        # Encode the decoded audio shared with other consumers, it is already
+        # 16 kHz mono which is also what the API resamples to
+        samples = load_pcm(self.transcription_task.file_path)
+        duration_secs = len(samples) / SAMPLE_RATE
+
         mp3_file = tempfile.mktemp() + ".mp3"
         mp3_file = str(Path(mp3_file).resolve())
-
-        cmd = [
-            "ffmpeg",
-            "-threads", "0",
-            "-loglevel", "panic",
-            "-i", self.transcription_task.file_path, mp3_file
-        ]
-
-        if sys.platform == "win32":
-            si = subprocess.STARTUPINFO()
-            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            si.wShowWindow = subprocess.SW_HIDE
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                startupinfo=si,
-                env=app_env,
-                creationflags = subprocess.CREATE_NO_WINDOW
-            )
-        else:
-            result = subprocess.run(cmd, capture_output=True)
-
-        if result.returncode != 0:
-            logging.warning(f"FFMPEG audio load warning. Process return code was not zero: {result.returncode}")
-
-        if len(result.stderr):
-            logging.warning(f"FFMPEG audio load error. Error: {result.stderr.decode()}")
-            raise Exception(f"FFMPEG Failed to load audio: {result.stderr.decode()}")
-
-        # fmt: off
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            mp3_file,
-        ]
-
-        # fmt: on
-        if sys.platform == "win32":
-            si = subprocess.STARTUPINFO()
-            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            si.wShowWindow = subprocess.SW_HIDE
-
-            duration_secs = float(
-                subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    check=True,
-                    startupinfo=si,
-                    env=app_env,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                ).stdout.decode("utf-8"),
-            )
-        else:
-            duration_secs = float(
-                subprocess.run(cmd, capture_output=True, check=True).stdout.decode("utf-8")
-            )
+        try:
+            encode_audio(samples, mp3_file, SAMPLE_RATE)
+        except (av.error.FFmpegError, OSError) as exc:
+            logging.warning(f"Audio encoding error. Error: {exc}")
+            raise Exception(f"Failed to encode audio: {exc}")
 
         total_size = os.path.getsize(mp3_file)
         max_chunk_size = 25 * 1024 * 1024
@@ -135,46 +89,27 @@ class OpenAIWhisperAPIFileTranscriber(FileTranscriber):
         # and transcribe each chunk separately
         num_chunks = math.ceil(total_size / max_chunk_size)
         chunk_duration = duration_secs / num_chunks
+        os.remove(mp3_file)
 
-        segments = []
-
-        for i in range(num_chunks):
-            chunk_start = i * chunk_duration
-            chunk_end = min((i + 1) * chunk_duration, duration_secs)
-
+        def encode_chunk(i: int) -> str:
             chunk_file = tempfile.mktemp() + ".mp3"
             chunk_file = str(Path(chunk_file).resolve())
+            start = int(i * chunk_duration * SAMPLE_RATE)
+            end = int(min((i + 1) * chunk_duration, duration_secs) * SAMPLE_RATE)
+            encode_audio(samples[start:end], chunk_file, SAMPLE_RATE)
+            logging.debug('Created chunk file "%s"', chunk_file)
+            return chunk_file
 
-            # fmt: off
-            cmd = [
-                "ffmpeg",
-                "-i", mp3_file,
-                "-ss", str(chunk_start),
-                "-to", str(chunk_end),
-                "-c", "copy",
-                chunk_file,
-            ]
-            # fmt: on
-            if sys.platform == "win32":
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                si.wShowWindow = subprocess.SW_HIDE
-                subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    check=True,
-                    startupinfo=si,
-                    env=app_env,
-                    creationflags=subprocess.CREATE_NO_WINDOW
-                )
-            else:
-                subprocess.run(cmd, capture_output=True, check=True)
+        # Chunks are encoded on the media thread pool while earlier ones are
+        # sent, in the order they are transcribed
+        chunk_files = get_executor().map(encode_chunk, range(num_chunks))
 
-            logging.debug('Created chunk file "%s"', chunk_file)
+        segments = []
 
+        for i, chunk_file in enumerate(chunk_files):
             segments.extend(
                 self.get_segments_for_file(
-                    chunk_file, offset_ms=int(chunk_start * 1000)
+                    chunk_file, offset_ms=int(i * chunk_duration * 1000)
                 )
             )
             os.remove(chunk_file)
@@ -22,11 +22,14 @@ from openai import OpenAI
 from PyQt6.QtCore import QObject, pyqtSignal
 
 from buzz import whisper_audio
+from buzz.hardware import get_capabilities
 from buzz.locale import _
-from buzz.assets import APP_BASE_DIR
 from buzz.model_loader import ModelType, map_language_to_mms
 from buzz.settings.settings import Settings
 from buzz.transcriber.transcriber import TranscriptionOptions, Task, DEFAULT_WHISPER_TEMPERATURE
+from buzz.transcriber.tuning import get_tuned_n_threads, load_tuned_config
+from buzz.transcriber.whisper_cpp import get_whisper_server_path
+from buzz.transcriber.whisper_cpp_server import find_free_port
 from buzz.transformers_whisper import TransformersTranscriber
 from buzz.settings.recording_transcriber_mode import RecordingTranscriberMode
 
@@ -165,10 +168,11 @@ class RecordingTranscriber(QObject):
         model_path = self.model_path
 
         force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        use_cuda = torch.cuda.is_available() and force_cpu == "false"
+        capabilities = get_capabilities()
+        use_cuda = capabilities.cuda and force_cpu == "false"
 
-        if torch.cuda.is_available():
-            logging.debug(f"CUDA version detected: {torch.version.cuda}")
+        if capabilities.cuda:
+            logging.debug(f"CUDA version detected: {capabilities.cuda_version}")
 
         if self.transcription_options.model.model_type == ModelType.WHISPER:
             device = "cuda" if use_cuda else "cpu"
@@ -191,11 +195,11 @@ class RecordingTranscriber(QObject):
             model_root_dir = os.getenv("BUZZ_MODEL_ROOT", model_root_dir)
 
             device = "auto"
-            if torch.cuda.is_available() and torch.version.cuda < "12":
+            if capabilities.cuda and capabilities.cuda_version < "12":
                 logging.debug("Unsupported CUDA version (<12), using CPU")
                 device = "cpu"
 
-            if not torch.cuda.is_available():
+            if not capabilities.cuda:
                 logging.debug("CUDA is not available, using CPU")
                 device = "cpu"
 
@@ -204,7 +208,8 @@ class RecordingTranscriber(QObject):
 
             # Check if user wants reduced GPU memory usage (int8 quantization)
             reduce_gpu_memory = os.getenv("BUZZ_REDUCE_GPU_MEMORY", "false") != "false"
-            compute_type = "default"
+            tuned_config = load_tuned_config(self.transcription_options.model)
+            compute_type = (tuned_config and tuned_config.compute_type) or "default"
             if reduce_gpu_memory:
                 compute_type = "int8" if device == "cpu" else "int8_float16"
                 logging.debug(f"Using {compute_type} compute type for reduced memory usage")
@@ -214,7 +219,7 @@ class RecordingTranscriber(QObject):
                 download_root=model_root_dir,
                 device=device,
                 compute_type=compute_type,
-                cpu_threads=(os.cpu_count() or 8) // 2,
+                cpu_threads=get_tuned_n_threads(self.transcription_options.model),
             )
 
         if self.transcription_options.model.model_type == ModelType.OPEN_AI_WHISPER_API:
@@ -364,7 +369,7 @@ class RecordingTranscriber(QObject):
     def _cleanup_model(self, model):
         if model:
             del model
-        if torch.cuda.is_available():
+        if get_capabilities().cuda:
             torch.cuda.empty_cache()
 
         self.finished.emit()
@@ -460,18 +465,12 @@ class RecordingTranscriber(QObject):
 
         self.process = None
 
-        server_executable = "whisper-server.exe" if sys.platform == "win32" else "whisper-server"
-        server_path = os.path.join(APP_BASE_DIR, "whisper_cpp", server_executable)
-
-        # If running Mac and Windows installed version
-        if not os.path.exists(server_path):
-            server_path = os.path.join(APP_BASE_DIR, "buzz", "whisper_cpp", server_executable)
-
+        port = find_free_port()
         cmd = [
-            server_path,
-            "--port", "3003",
+            get_whisper_server_path(),
+            "--port", str(port),
             "--inference-path", "/audio/transcriptions",
-            "--threads", str(os.getenv("BUZZ_WHISPERCPP_N_THREADS", (os.cpu_count() or 8) // 2)),
+            "--threads", str(os.getenv("BUZZ_WHISPERCPP_N_THREADS", get_tuned_n_threads(self.transcription_options.model))),
             "--model", self.model_path,
             "--no-timestamps",
             # Protections against hallucinated repetition. Seems to be problem on macOS
@@ -548,7 +547,7 @@ class RecordingTranscriber(QObject):
 
         self.openai_client = OpenAI(
             api_key="not-used",
-            base_url="http://127.0.0.1:3003",
+            base_url=f"http://127.0.0.1:{port}",
             timeout=30.0,
             max_retries=0
         )
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from buzz.transcriber.transcriber import FileTranscriptionTask, Segment
+from buzz.transcriber.tuning import get_beam_size
+
+DEFAULT_RESULT_CACHE_MAX_SIZE_MB = 100
+
+# Files up to this size are hashed in full, larger ones by sampled blocks
+FULL_HASH_MAX_BYTES = 64 * 1024 * 1024
+SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_BLOCK_COUNT = 256
+
+
+def get_result_cache_max_size() -> int:
+    """Size limit of the cached results in bytes, 0 disables the cache"""
+    try:
+        size_mb = float(
+            os.getenv("BUZZ_RESULT_CACHE_MAX_SIZE_MB", DEFAULT_RESULT_CACHE_MAX_SIZE_MB)
+        )
+    except ValueError:
+        size_mb = DEFAULT_RESULT_CACHE_MAX_SIZE_MB
+    return max(0, int(size_mb * 1024 * 1024))
+
+
+def compute_file_hash(file_path: str) -> str:
+    """Fast content hash of a media file.
+
+    Large files are hashed by their size and evenly spaced blocks, which is
+    enough to tell apart different recordings without reading gigabytes of
+    video.
+    """
+    file_size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(file_size.to_bytes(8, "little"))
+
+    with open(file_path, "rb") as file:
+        if file_size <= FULL_HASH_MAX_BYTES:
+            while chunk := file.read(1024 * 1024):
+                digest.update(chunk)
+        else:
+            step = (file_size - SAMPLE_BLOCK_SIZE) // (SAMPLE_BLOCK_COUNT - 1)
+            for i in range(SAMPLE_BLOCK_COUNT):
+                file.seek(i * step)
+                digest.update(file.read(SAMPLE_BLOCK_SIZE))
+
+    return digest.hexdigest()
+
+
+def get_cache_key(task: FileTranscriptionTask) -> Optional[str]:
+    """Key of a task's result, built from the audio content and the options
+    that change the transcript. Returns None if the file can not be read."""
+    file_path = task.original_file_path or task.file_path
+    if file_path is None:
+        return None
+
+    try:
+        file_hash = compute_file_hash(file_path)
+    except OSError as e:
+        logging.debug(f"Could not hash {file_path}: {e}")
+        return None
+
+    options = task.transcription_options
+    model = options.model
+    key_fields = {
+        "audio": file_hash,
+        "model_type": model.model_type.value,
+        "whisper_model_size": (
+            model.whisper_model_size.value if model.whisper_model_size else None
+        ),
+        "hugging_face_model_id": model.hugging_face_model_id or None,
+        "model_path": task.model_path,
+        "task": options.task.value,
+        "language": options.language or None,
+        "word_level_timings": options.word_level_timings,
+        "extract_speech": options.extract_speech,
+        "initial_prompt": options.initial_prompt or "",
+        "temperature": list(options.temperature),
+        # A greedy search found by calibration may give another transcript
+        "beam_size": get_beam_size(task),
+    }
+    return hashlib.blake2b(
+        json.dumps(key_fields, sort_keys=True).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+class ResultCache:
+    """Finds earlier transcriptions of the same audio with the same options.
+
+    Results are not copied, an entry points at a completed transcription and
+    its segments are read from ``transcription_segment``. Entries are removed
+    together with their transcription, and the least recently used ones once
+    the text they hold is over ``max_size`` bytes.
+
+    Uses its own connection so it can be called from the queue worker threads.
+    """
+
+    def __init__(self, db_path: str, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            db_path, isolation_level=None, timeout=10.0, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA foreign_keys = ON")
+
+    def get(self, key: str) -> Optional[List[Segment]]:
+        try:
+            return self._get(key)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not read result cache: {e}")
+            return None
+
+    def _get(self, key: str) -> Optional[List[Segment]]:
+        with self.lock:
+            row = self.conn.execute(
+                """
+                SELECT transcription_cache.transcription_id
+                FROM transcription_cache
+                JOIN transcription ON transcription.id = transcription_cache.transcription_id
+                WHERE transcription_cache.key = ? AND transcription.status = 'completed'
+                """,
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                self._log_stats("miss", key)
+                return None
+
+            self.conn.execute(
+                "UPDATE transcription_cache SET time_used = ? WHERE key = ?",
+                (datetime.now().isoformat(), key),
+            )
+            segments = [
+                Segment(start=start, end=end, text=text)
+                for start, end, text in self.conn.execute(
+                    """
+                    SELECT start_time, end_time, text FROM transcription_segment
+                    WHERE transcription_id = ?
+                    ORDER BY id
+                    """,
+                    (row[0],),
+                )
+            ]
+
+            self.hits += 1
+            self._log_stats("hit", key)
+            return segments
+
+    def put(self, key: str, transcription_id: str):
+        """Adds a completed transcription, its segments must already be saved"""
+        with self.lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO transcription_cache (key, transcription_id, size, time_used)
+                SELECT ?, ?, COALESCE(SUM(LENGTH(CAST(text AS BLOB))), 0), ?
+                FROM transcription_segment
+                WHERE transcription_id = ?
+                """,
+                (key, transcription_id, datetime.now().isoformat(), transcription_id),
+            )
+            self._evict()
+
+    def _evict(self):
+        (total_size,) = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM transcription_cache"
+        ).fetchone()
+        if total_size <= self.max_size:
+            return
+
+        rows = self.conn.execute(
+            "SELECT key, size FROM transcription_cache ORDER BY time_used"
+        ).fetchall()
+        evicted_keys = []
+        for key, size in rows:
+            if total_size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            total_size -= size
+
+        self.conn.executemany("DELETE FROM transcription_cache WHERE key = ?", evicted_keys)
+        logging.debug(
+            f"Result cache evicted {len(evicted_keys)} entries, size: {total_size} bytes"
+        )
+
+    def _log_stats(self, result: str, key: str):
+        logging.info(
+            f"Result cache {result} for {key}, hits: {self.hits}, misses: {self.misses}"
+        )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,171 @@
+import enum
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+from uuid import UUID
+
+import av
+
+from buzz.media_io import probe
+from buzz.transcriber.transcriber import FileTranscriptionTask
+
+# Stand-in for files whose duration cannot be probed (e.g. URL imports)
+UNKNOWN_DURATION_SECONDS = 60 * 60
+
+# Waiting tasks gain one priority level per interval so long files and low
+# priority tasks are not starved by a steady stream of newer ones
+DEFAULT_AGING_INTERVAL_SECONDS = 10 * 60
+
+TASK_PRIORITY_HIGH = 1
+TASK_PRIORITY_NORMAL = 0
+TASK_PRIORITY_LOW = -1
+
+
+class SchedulingPolicy(enum.Enum):
+    FIFO = "fifo"
+    SHORTEST_FIRST = "shortest-first"
+    PRIORITY = "priority"
+
+
+def probe_duration(file_path: Optional[str]) -> Optional[float]:
+    """Returns the duration of a media file in seconds, read from its header."""
+    if file_path is None:
+        return None
+
+    try:
+        duration_ms = probe(file_path).duration_ms
+    except (av.error.FFmpegError, OSError, UnicodeDecodeError) as e:
+        logging.debug(f"Could not probe duration of {file_path}: {e}")
+        return None
+
+    return duration_ms / 1000 if duration_ms > 0 else None
+
+
+@dataclass
+class _Entry:
+    task: FileTranscriptionTask
+    sequence: int
+    queued_at: float
+    duration: Optional[float] = None
+    is_probed: bool = False
+
+
+class TaskScheduler:
+    """Queue of transcription tasks ordered by a scheduling policy.
+
+    Has the same ``put``/``get``/``qsize`` interface as ``queue.Queue``. A
+    ``None`` sentinel is returned before any waiting task so the queue stops
+    promptly.
+
+    - FIFO: tasks run in the order they were added.
+    - PRIORITY: tasks with a higher ``priority`` run first, ties in order added.
+    - SHORTEST_FIRST: like PRIORITY, but ties run shortest file first.
+      Durations are probed lazily in the thread calling ``get``.
+
+    Except for FIFO, a task's priority goes up by one level for each aging
+    interval it waits.
+    """
+
+    def __init__(
+        self,
+        policy: SchedulingPolicy = SchedulingPolicy.FIFO,
+        aging_interval_seconds: float = DEFAULT_AGING_INTERVAL_SECONDS,
+    ):
+        self.policy = policy
+        self.aging_interval_seconds = aging_interval_seconds
+        self.entries: List[_Entry] = []
+        self.is_stopped = False
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+
+    def put(self, task: Optional[FileTranscriptionTask]):
+        with self.condition:
+            if task is None:
+                self.is_stopped = True
+            else:
+                self.entries.append(
+                    _Entry(
+                        task=task,
+                        sequence=next(self.sequence),
+                        queued_at=time.monotonic(),
+                    )
+                )
+            self.condition.notify()
+
+    def get(self) -> Optional[FileTranscriptionTask]:
+        """Removes and returns the next task, blocks until there is one.
+
+        Returns None once the stop sentinel was put.
+        """
+        while True:
+            with self.condition:
+                while not self.is_stopped and len(self.entries) == 0:
+                    self.condition.wait()
+
+                if self.is_stopped:
+                    self.is_stopped = False
+                    return None
+
+                unprobed = self._unprobed_entries()
+                if len(unprobed) == 0:
+                    entry = self._ordered_entries()[0]
+                    self.entries.remove(entry)
+                    return entry.task
+
+            # Probe outside the lock, opening files can be slow on network drives
+            for entry in unprobed:
+                entry.duration = probe_duration(entry.task.file_path)
+                entry.is_probed = True
+
+    def qsize(self) -> int:
+        with self.condition:
+            return len(self.entries) + (1 if self.is_stopped else 0)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def set_policy(self, policy: SchedulingPolicy):
+        with self.condition:
+            self.policy = policy
+
+    def set_priority(self, task_id: UUID, priority: int) -> bool:
+        """Changes the priority of a waiting task, returns False if it is not waiting."""
+        with self.condition:
+            for entry in self.entries:
+                if entry.task.uid == task_id:
+                    entry.task.priority = priority
+                    return True
+        return False
+
+    def waiting_task_ids(self) -> List[UUID]:
+        """Returns the ids of the waiting tasks in the order they would run."""
+        with self.condition:
+            return [entry.task.uid for entry in self._ordered_entries()]
+
+    def _unprobed_entries(self) -> List[_Entry]:
+        if self.policy != SchedulingPolicy.SHORTEST_FIRST:
+            return []
+        return [entry for entry in self.entries if not entry.is_probed]
+
+    def _ordered_entries(self) -> List[_Entry]:
+        now = time.monotonic()
+
+        def sort_key(entry: _Entry):
+            if self.policy == SchedulingPolicy.FIFO:
+                return (entry.sequence,)
+
+            aging = int((now - entry.queued_at) // self.aging_interval_seconds)
+            effective_priority = entry.task.priority + aging
+            if self.policy == SchedulingPolicy.SHORTEST_FIRST:
+                duration = (
+                    entry.duration
+                    if entry.duration is not None
+                    else UNKNOWN_DURATION_SECONDS
+                )
+                return -effective_priority, duration, entry.sequence
+            return -effective_priority, entry.sequence
+
+        return sorted(self.entries, key=sort_key)
@@ -5,7 +5,7 @@ import os
 import uuid
 from dataclasses import dataclass, field
 from random import randint
-from typing import List, Optional, Tuple, Set
+from typing import Dict, List, Optional, Tuple, Set
 
 from dataclasses_json import dataclass_json, config, Exclude
 
@@ -208,12 +208,92 @@ class FileTranscriptionTask:
     delete_source_file: bool = False
     url: Optional[str] = None
     fraction_downloaded: float = 0.0
+    # CPU threads assigned by the queue when several tasks run at once
+    n_threads: Optional[int] = None
+    # Decoding settings found by calibration, see buzz.transcriber.tuning.
+    # None keeps the backend's default.
+    compute_type: Optional[str] = None
+    beam_size: Optional[int] = None
+    batch_size: Optional[int] = None
+    # Higher runs earlier with the priority and shortest-first scheduling policies
+    priority: int = 0
+    # Audio time in ms transcribed by an earlier, interrupted run. The task
+    # continues from there and ``segments`` holds what was transcribed before.
+    resume_offset: int = 0
+    # Key of the result in the result cache, set by the queue worker
+    cache_key: Optional[str] = None
+    # Part of the audio in ms a chunk of a long file covers, see
+    # ChunkedFileTranscriber. Segment times stay relative to the whole file.
+    audio_start: int = 0
+    audio_end: Optional[int] = None
+    # Seconds spent in each stage, keyed by buzz.transcriber.metrics.Stage
+    # values, and the length of the audio in seconds
+    timings: Dict[str, float] = field(default_factory=dict)
+    audio_duration: Optional[float] = None
 
     def __post_init__(self):
         # Ensure shared UI settings do not affect queued task
         self.transcription_options = copy.deepcopy(self.transcription_options)
 
 
+def get_n_threads(task: FileTranscriptionTask) -> int:
+    """Number of CPU threads a local model may use for the task"""
+    if task.n_threads is not None:
+        return task.n_threads
+    return (os.cpu_count() or 8) // 2
+
+
+# Rough memory one 30 second window takes in a batch, with its features,
+# encoder output and decoder state
+BATCH_ITEM_MEMORY_BYTES = 256 * 1024 * 1024
+MAX_BATCH_SIZE = 16
+
+
+def get_batch_size() -> int:
+    """Number of 30 second windows decoded together when files are batched,
+    see get_batch_files for the number of files.
+
+    Set with BUZZ_BATCH_SIZE, otherwise half of the available memory is
+    budgeted for the batch.
+    """
+    try:
+        return max(1, int(os.getenv("BUZZ_BATCH_SIZE", "")))
+    except ValueError:
+        pass
+
+    import psutil
+
+    available = psutil.virtual_memory().available
+    return max(1, min(MAX_BATCH_SIZE, available // 2 // BATCH_ITEM_MEMORY_BYTES))
+
+
+# Whisper keeps about half of its 448 token context for the prompt
+RESUME_PROMPT_MAX_CHARS = 400
+
+
+def get_resume_prompt(task: FileTranscriptionTask) -> str:
+    """Initial prompt for a resumed task, ending with the text transcribed
+    right before the resume offset so the model keeps its context."""
+    initial_prompt = task.transcription_options.initial_prompt or ""
+    if task.resume_offset == 0 or len(task.segments) == 0:
+        return initial_prompt
+
+    tail = ""
+    for segment in reversed(task.segments):
+        text = segment.text.strip()
+        if len(tail) + len(text) + 1 > RESUME_PROMPT_MAX_CHARS:
+            break
+        tail = f"{text} {tail}" if tail else text
+
+    if tail == "":
+        return initial_prompt
+
+    budget = RESUME_PROMPT_MAX_CHARS - len(tail) - 1
+    if initial_prompt and budget > 0:
+        return f"{initial_prompt[:budget]} {tail}"
+    return tail
+
+
 class OutputFormat(enum.Enum):
     TXT = "txt"
     SRT = "srt"
@@ -0,0 +1,270 @@
+import dataclasses
+import functools
+import hashlib
+import json
+import logging
+import os
+import platform
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from buzz.model_loader import ModelType, TranscriptionModel
+from buzz.settings.settings import Settings
+from buzz.transcriber.transcriber import FileTranscriptionTask
+
+# Backends whose threads and decoding options are tuned
+TUNED_MODEL_TYPES = (ModelType.WHISPER_CPP, ModelType.FASTER_WHISPER, ModelType.WHISPER)
+
+DEFAULT_BEAM_SIZE = 5
+# Default of faster_whisper.BatchedInferencePipeline.transcribe
+DEFAULT_FASTER_WHISPER_BATCH_SIZE = 8
+
+CALIBRATION_CLIP_SECONDS = 20
+
+
+@dataclass
+class TunedConfig:
+    """Fastest settings of a backend and model size found on this machine.
+    None keeps the backend's default."""
+
+    n_threads: int
+    compute_type: Optional[str] = None
+    beam_size: Optional[int] = None
+    batch_size: Optional[int] = None
+
+
+@functools.lru_cache(maxsize=1)
+def get_machine_fingerprint() -> str:
+    """Identifies the hardware a configuration was tuned on, so a settings
+    file copied to another machine is not used there"""
+    import psutil
+
+    parts = [
+        platform.system(),
+        platform.machine(),
+        platform.processor(),
+        str(os.cpu_count()),
+        str(round(psutil.virtual_memory().total / 1024**3)),
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def get_tuning_key(model: TranscriptionModel) -> str:
+    if model.model_type == ModelType.HUGGING_FACE or model.whisper_model_size is None:
+        size = model.hugging_face_model_id or ""
+    else:
+        size = model.whisper_model_size.value
+    return f"{model.model_type.name.lower()}/{size}/{get_machine_fingerprint()}"
+
+
+def _load_all(settings: Settings) -> Dict[str, dict]:
+    try:
+        return json.loads(settings.value(Settings.Key.TUNED_CONFIGURATIONS, "{}"))
+    except ValueError:
+        return {}
+
+
+def load_tuned_config(
+    model: TranscriptionModel, settings: Optional[Settings] = None
+) -> Optional[TunedConfig]:
+    if model.model_type not in TUNED_MODEL_TYPES:
+        return None
+
+    config = _load_all(settings or Settings()).get(get_tuning_key(model))
+    if config is None:
+        return None
+
+    try:
+        return TunedConfig(**config)
+    except TypeError:
+        logging.debug(f"Ignoring invalid tuned configuration: {config}")
+        return None
+
+
+def save_tuned_config(
+    model: TranscriptionModel, config: TunedConfig, settings: Optional[Settings] = None
+):
+    settings = settings or Settings()
+    configs = _load_all(settings)
+    configs[get_tuning_key(model)] = dataclasses.asdict(config)
+    settings.set_value(Settings.Key.TUNED_CONFIGURATIONS, json.dumps(configs))
+
+
+def apply_tuned_config(task: FileTranscriptionTask, settings: Optional[Settings] = None):
+    """Fills in the stored configuration of the task's model. Threads stay
+    within the budget the queue assigned to the task."""
+    config = load_tuned_config(task.transcription_options.model, settings)
+    if config is None:
+        return
+
+    if task.n_threads is None:
+        task.n_threads = config.n_threads
+    else:
+        task.n_threads = min(task.n_threads, config.n_threads)
+
+    if task.compute_type is None:
+        task.compute_type = config.compute_type
+    if task.beam_size is None:
+        task.beam_size = config.beam_size
+    if task.batch_size is None:
+        task.batch_size = config.batch_size
+
+
+def get_beam_size(task: FileTranscriptionTask) -> Optional[int]:
+    """Beam size the task is decoded with, before apply_tuned_config fills it
+    in. None keeps the backend's default."""
+    if task.beam_size is not None:
+        return task.beam_size
+    config = load_tuned_config(task.transcription_options.model)
+    return config.beam_size if config is not None else None
+
+
+def get_tuned_n_threads(model: TranscriptionModel) -> int:
+    """Threads for a model outside the file queue, such as live recording"""
+    config = load_tuned_config(model)
+    if config is not None:
+        return config.n_threads
+    return (os.cpu_count() or 8) // 2
+
+
+def get_thread_candidates(cpu_count: int) -> List[int]:
+    return sorted(
+        {max(1, cpu_count // 4), max(1, cpu_count // 2), max(1, cpu_count * 3 // 4), cpu_count}
+    )
+
+
+def write_calibration_clip(path: str, seconds: float = CALIBRATION_CLIP_SECONDS):
+    """Writes a speech-like clip: voiced harmonics modulated at the rate of
+    syllables, with short pauses, so every backend decodes several windows
+    of it the way it decodes speech"""
+    from buzz.audio_cache import write_wav
+    from buzz.whisper_audio import SAMPLE_RATE
+
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    pauses = (np.sin(2 * np.pi * 0.2 * t) > -0.8).astype(np.float32)
+    samples = 0.2 * voiced * syllables * pauses + 0.005 * rng.standard_normal(len(t))
+    write_wav(path, samples.astype(np.float32))
+
+
+@dataclass
+class CalibrationResult:
+    config: TunedConfig
+    seconds: float
+    text: str
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class Calibrator:
+    """Finds the fastest configuration of a backend and model size.
+
+    Each setting is swept in turn while the others keep their best value so
+    far: threads, then compute type and batch size where the backend has
+    them, then the beam size. A smaller beam is only kept if it gives the
+    same text as the default one, it trades accuracy for speed otherwise.
+    """
+
+    def __init__(
+        self,
+        model: TranscriptionModel,
+        model_path: str,
+        file_path: Optional[str] = None,
+        on_result: Optional[Callable[[CalibrationResult], None]] = None,
+    ):
+        self.model = model
+        self.model_path = model_path
+        self.file_path = file_path
+        self.on_result = on_result
+        self.model_pool = None
+
+    def calibrate(self) -> TunedConfig:
+        from buzz.transcriber.warm_model_pool import WarmModelPool
+
+        # Every run goes to the same worker process, so runs are not timed
+        # with a process start and the model stays loaded between them
+        self.model_pool = WarmModelPool(max_workers=1)
+        try:
+            with tempfile.TemporaryDirectory(prefix="buzz-calibration-") as directory:
+                if self.file_path is None:
+                    self.file_path = os.path.join(directory, "calibration.wav")
+                    write_calibration_clip(self.file_path)
+                return self._sweep()
+        finally:
+            self.model_pool.shutdown()
+            self.model_pool = None
+
+    def _sweep(self) -> TunedConfig:
+        cpu_count = os.cpu_count() or 8
+        best = TunedConfig(n_threads=max(1, cpu_count // 2))
+        # Starts the worker and loads the model, not compared
+        self.run(best)
+
+        best = self._best_of(
+            [dataclasses.replace(best, n_threads=n) for n in get_thread_candidates(cpu_count)]
+        ).config
+
+        if self.model.model_type == ModelType.FASTER_WHISPER:
+            best = self._best_of(
+                [
+                    dataclasses.replace(best, compute_type=compute_type)
+                    for compute_type in (None, "int8", "float32")
+                ]
+            ).config
+            best = self._best_of(
+                [
+                    dataclasses.replace(best, batch_size=batch_size)
+                    for batch_size in (4, DEFAULT_FASTER_WHISPER_BATCH_SIZE, 16)
+                ]
+            ).config
+
+        baseline = self.run(best)
+        greedy = self.run(dataclasses.replace(best, beam_size=1))
+        if greedy.seconds < baseline.seconds and _normalize(greedy.text) == _normalize(
+            baseline.text
+        ):
+            best = greedy.config
+
+        return best
+
+    def _best_of(self, configs: List[TunedConfig]) -> CalibrationResult:
+        return min((self.run(config) for config in configs), key=lambda result: result.seconds)
+
+    def run(self, config: TunedConfig) -> CalibrationResult:
+        # Imported here, the transcriber pulls in every backend
+        from buzz.transcriber.metrics import Stage, timed_inference
+        from buzz.transcriber.transcriber import FileTranscriptionOptions, TranscriptionOptions
+        from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
+
+        task = FileTranscriptionTask(
+            file_path=self.file_path,
+            # A set language skips detection, which is not tuned
+            transcription_options=TranscriptionOptions(model=self.model, language="en"),
+            file_transcription_options=FileTranscriptionOptions(),
+            model_path=self.model_path,
+            n_threads=config.n_threads,
+            compute_type=config.compute_type,
+            beam_size=config.beam_size,
+            batch_size=config.batch_size,
+        )
+        with timed_inference(task.timings):
+            segments = WhisperFileTranscriber(task=task, model_pool=self.model_pool).transcribe()
+
+        result = CalibrationResult(
+            config=config,
+            seconds=task.timings[Stage.INFERENCE.value],
+            text=" ".join(segment.text for segment in segments),
+        )
+        logging.debug(f"Calibration run: {result.config}, {result.seconds:.2f}s")
+        if self.on_result is not None:
+            self.on_result(result)
+        return result
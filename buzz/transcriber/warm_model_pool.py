@@ -0,0 +1,238 @@
+import logging
+import multiprocessing
+import os
+import threading
+from multiprocessing.connection import Connection
+from typing import List, Optional, Set
+
+from buzz.hardware import get_capabilities
+from buzz.transcriber.model_cache import ModelCache
+from buzz.transcriber.transcriber import FileTranscriptionTask
+from buzz.transcriber.whisper_cpp import WhisperCpp
+from buzz.transcriber.whisper_cpp_server import WhisperCppServer
+from buzz.transcriber.whisper_file_transcriber import (
+    WhisperFileTranscriber,
+    terminate_child_processes,
+)
+
+DEFAULT_MODEL_CACHE_SIZE = 1
+
+
+def get_model_cache_size() -> int:
+    """Number of models each warm worker keeps loaded, 0 disables warm workers."""
+    try:
+        return max(0, int(os.getenv("BUZZ_MODEL_CACHE_SIZE", DEFAULT_MODEL_CACHE_SIZE)))
+    except ValueError:
+        return DEFAULT_MODEL_CACHE_SIZE
+
+
+def _cancel_when_set(cancel_event, done: threading.Event) -> None:
+    """Stops what the current task waits on once it is canceled: whisper-cli,
+    which only reports progress every few percent, and requests to cached
+    whisper-servers, which keep running with their models loaded."""
+    while not done.is_set():
+        if cancel_event.wait(timeout=0.1):
+            WhisperCpp.cancel()
+            for model in list(WhisperFileTranscriber.model_cache.models.values()):
+                if isinstance(model, WhisperCppServer):
+                    model.cancel()
+            return
+
+
+def _warm_model_worker(
+    task_conn: Connection,
+    result_conn: Connection,
+    cancel_event,
+    cache_size: int,
+) -> None:
+    """Entry point of a long-lived transcription process.
+
+    Receives tasks one at a time and runs them with the same code as the
+    one-shot worker process, but with a model cache so the next file using the
+    same model does not reload it. A list of tasks is transcribed as one
+    batch. A ``None`` task, or the parent closing the pipe, ends the worker.
+    """
+    WhisperFileTranscriber.model_cache = ModelCache(max_size=cache_size)
+
+    while True:
+        try:
+            task = task_conn.recv()
+        except (EOFError, OSError):
+            break
+
+        if task is None:
+            break
+
+        done = threading.Event()
+        watcher = threading.Thread(
+            target=_cancel_when_set, args=(cancel_event, done), daemon=True
+        )
+        watcher.start()
+        try:
+            if isinstance(task, list):
+                WhisperFileTranscriber.transcribe_whisper_batch(
+                    result_conn, task, cancel_event
+                )
+            else:
+                WhisperFileTranscriber.transcribe_whisper(result_conn, task, cancel_event)
+        except (BrokenPipeError, OSError) as exc:
+            logging.debug(f"Warm model worker lost its parent: {exc}")
+            break
+        except Exception:
+            # Already reported to the parent through result_conn
+            pass
+        finally:
+            done.set()
+            watcher.join()
+
+    WhisperFileTranscriber.model_cache.clear()
+
+
+class WarmModelWorker:
+    """Parent-side handle of one warm model worker process."""
+
+    def __init__(self, cache_size: int = DEFAULT_MODEL_CACHE_SIZE):
+        self.task_conn, task_recv_conn = multiprocessing.Pipe(duplex=False)
+        self.result_conn, result_send_conn = multiprocessing.Pipe(duplex=False)
+        self.cancel_event = multiprocessing.Event()
+        self.model_path: Optional[str] = None
+
+        # Probed here once, the worker reads it from the environment it inherits
+        get_capabilities()
+        self.process = multiprocessing.Process(
+            target=_warm_model_worker,
+            args=(task_recv_conn, result_send_conn, self.cancel_event, cache_size),
+        )
+        self.process.start()
+
+        # Close our copies of the child's ends so either side sees EOF when the
+        # other one goes away.
+        task_recv_conn.close()
+        result_send_conn.close()
+
+    def submit(self, task: FileTranscriptionTask) -> Connection:
+        """Send a task to the worker, returns the connection its output is read from."""
+        self.cancel_event.clear()
+        self.model_path = task.model_path
+        self.task_conn.send(task)
+        return self.result_conn
+
+    def submit_batch(self, tasks: List[FileTranscriptionTask]) -> Connection:
+        """Send tasks that are transcribed together, their results are read
+        from the returned connection one task after the other."""
+        self.cancel_event.clear()
+        self.model_path = tasks[0].model_path
+        self.task_conn.send(tasks)
+        return self.result_conn
+
+    def cancel(self):
+        """Stop the current task while keeping the process and its models,
+        including running whisper-servers. The worker stops whisper-cli."""
+        self.cancel_event.set()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def terminate(self):
+        if self.process.pid is not None:
+            terminate_child_processes(self.process.pid)
+        self.process.terminate()
+        self._close_connections()
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            logging.warning("Warm model worker didn't terminate gracefully, force killing")
+            self.process.kill()
+            self.process.join(timeout=5)
+
+    def stop(self):
+        try:
+            self.task_conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.terminate()
+        self._close_connections()
+
+    def _close_connections(self):
+        for conn in (self.task_conn, self.result_conn):
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+
+class WarmModelPool:
+    """A small pool of warm model workers shared by the transcription queue.
+
+    Workers are started lazily and reused across tasks, preferring a worker that
+    last ran the same model so its cached copy is hit.
+    """
+
+    def __init__(self, max_workers: int = 1, cache_size: int = DEFAULT_MODEL_CACHE_SIZE):
+        self.max_workers = max(1, max_workers)
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.idle: List[WarmModelWorker] = []
+        self.busy: Set[WarmModelWorker] = set()
+        self.closed = False
+
+    def acquire(self, task: FileTranscriptionTask) -> WarmModelWorker:
+        with self.lock:
+            self.idle = [worker for worker in self.idle if worker.is_alive()]
+
+            worker = next(
+                (w for w in self.idle if w.model_path == task.model_path), None
+            )
+            if (
+                worker is None
+                and len(self.idle) > 0
+                and len(self.idle) + len(self.busy) >= self.max_workers
+            ):
+                # Reuse the least recently used worker, its cache evicts the old model
+                worker = self.idle[0]
+
+            if worker is not None:
+                self.idle.remove(worker)
+
+        if worker is None:
+            logging.debug("Starting warm model worker")
+            worker = WarmModelWorker(cache_size=self.cache_size)
+
+        with self.lock:
+            self.busy.add(worker)
+        return worker
+
+    def release(self, worker: WarmModelWorker):
+        with self.lock:
+            self.busy.discard(worker)
+            keep = (
+                not self.closed
+                and worker.is_alive()
+                and len(self.idle) + len(self.busy) < self.max_workers
+            )
+            if keep:
+                self.idle.append(worker)
+
+        if not keep:
+            worker.stop()
+
+    def set_max_workers(self, max_workers: int):
+        with self.lock:
+            self.max_workers = max(1, max_workers)
+            surplus = len(self.idle) + len(self.busy) - self.max_workers
+            # Busy workers are let go when they are released
+            stopped = self.idle[: max(0, surplus)]
+            self.idle = self.idle[len(stopped):]
+
+        for worker in stopped:
+            worker.stop()
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+
+        for worker in idle:
+            worker.stop()
@@ -1,3 +1,5 @@
+import codecs
+import itertools
 import platform
 import os
 import re
@@ -5,32 +7,24 @@ import sys
 import logging
 import subprocess
 import json
-from typing import List, Optional
-from buzz.assets import APP_BASE_DIR
-from buzz.transcriber.transcriber import Segment, Task, FileTranscriptionTask
-from buzz.transcriber.file_transcriber import app_env
-
-
-IS_VULKAN_SUPPORTED = False
-try:
-    import vulkan
-
-    instance = vulkan.vkCreateInstance(vulkan.VkInstanceCreateInfo(), None)
-    vulkan.vkDestroyInstance(instance, None)
-    vulkan_version = vulkan.vkEnumerateInstanceVersion()
-    major = (vulkan_version >> 22) & 0x3FF
-    minor = (vulkan_version >> 12) & 0x3FF
-
-    logging.debug("Vulkan version = %s.%s", major, minor)
+import tempfile
+import threading
+import uuid
+from collections import deque
+from typing import TYPE_CHECKING, IO, Deque, Iterable, Iterator, List, Optional, Tuple
 
-    # On macOS, default whisper_cpp is compiled with CoreML (Apple Silicon) or Vulkan (Intel).
-    if platform.system() in ("Linux", "Windows") and ((major > 1) or (major == 1 and minor >= 2)):
-        IS_VULKAN_SUPPORTED = True
+import numpy as np
 
-except (ImportError, Exception) as e:
-    logging.debug(f"Vulkan import error: {e}")
+from buzz import whisper_audio
+from buzz.assets import APP_BASE_DIR
+from buzz.audio_cache import get_decoded_audio_path, wav_header
+from buzz.hardware import get_capabilities
+from buzz.transcriber.transcriber import Segment, Task, FileTranscriptionTask, get_n_threads
+from buzz.transcriber.file_transcriber import app_env
+from buzz.transcriber.task_scheduler import probe_duration
 
-    IS_VULKAN_SUPPORTED = False
+if TYPE_CHECKING:
+    from buzz.transcriber.whisper_cpp_server import WhisperCppServer
 
 
 def get_whisper_cli_path() -> str:
@@ -45,9 +39,52 @@ def get_whisper_cli_path() -> str:
     return whisper_cli_path
 
 
-def _make_offset_mapper(segment_data, vad_enabled):
-    """Return a function mapping a token offset to original audio time."""
-    if not vad_enabled:
+def get_whisper_server_path() -> str:
+    """Return the path to the bundled whisper-server executable."""
+    server_executable = "whisper-server.exe" if sys.platform == "win32" else "whisper-server"
+    return os.path.join(os.path.dirname(get_whisper_cli_path()), server_executable)
+
+
+# A whisper-cli process gets little faster beyond this many threads
+MAX_THREADS_PER_PROCESSOR = 8
+# Shortest part of the audio given to a processor. Each part is transcribed
+# without the text before it, short parts cost accuracy for little speedup.
+MIN_PROCESSOR_SECONDS = 5 * 60
+
+
+def get_processors(n_threads: int, duration: Optional[float], uses_gpu: bool) -> Tuple[int, int]:
+    """Return how many processors, parts of the audio transcribed in parallel
+    by one whisper-cli, and how many threads each uses for ``n_threads``
+    threads and ``duration`` seconds of audio.
+
+    Set with BUZZ_WHISPERCPP_N_PROCESSORS, otherwise threads past the point a
+    single processor stops scaling are given to more processors on CPU.
+    """
+    try:
+        processors = int(os.getenv("BUZZ_WHISPERCPP_N_PROCESSORS", ""))
+    except ValueError:
+        # Each processor holds its own state, on the GPU it doesn't pay off
+        if uses_gpu or duration is None:
+            processors = 1
+        else:
+            processors = min(
+                n_threads // MAX_THREADS_PER_PROCESSOR, int(duration // MIN_PROCESSOR_SECONDS)
+            )
+
+    processors = max(1, processors)
+    return processors, max(1, n_threads // processors)
+
+
+def _make_offset_mapper(segment_data, remap_tokens):
+    """Return a function mapping a token offset to original audio time.
+
+    With VAD, whisper-cli maps segment offsets back to the original audio but
+    leaves token offsets in the audio without silence. With several
+    processors, token offsets stay relative to the part of the audio their
+    processor transcribed. In both cases ``remap_tokens`` rescales the token
+    offsets onto the time range of their segment.
+    """
+    if not remap_tokens:
         return lambda offset: offset
 
     token_offsets = [
@@ -104,67 +141,300 @@ def _flush_complete_chars(buffer: bytes, start: int, end: int, segments: list) -
     return b""
 
 
-def _append_word(buffer: bytes, start: int, end: int, segments: list) -> bool:
-    """Try to decode and append a word segment, handling multi-byte UTF-8"""
-    if not buffer:
-        return True
+def _chars_of_segment_bytewise(segment_data, remap_tokens) -> List[Segment]:
+    """Characters of a segment of a non-space language, decoded a byte at a
+    time. Used for segments with invalid UTF-8, whose characters after the
+    invalid bytes are dropped."""
+    segments = []
+    map_offset = _make_offset_mapper(segment_data, remap_tokens)
+    char_buffer = b""
+    char_start = 0
+    char_end = 0
+
+    for token_data in segment_data.get("tokens", []):
+        token_text = token_data.get("text", "")
+
+        if token_text.startswith("[_") or not token_text:
+            continue
+
+        token_start = map_offset(int(token_data.get("offsets", {}).get("from", 0)))
+        token_end = map_offset(int(token_data.get("offsets", {}).get("to", 0)))
+
+        if not char_buffer:
+            char_start = token_start
+
+        char_buffer += token_text.encode("latin-1")
+        char_end = token_end
+
+        char_buffer = _flush_complete_chars(char_buffer, char_start, char_end, segments)
+
+    return segments
+
+
+# Segments whose token offsets are mapped together, see _map_token_offsets
+WORD_TIMING_BATCH_SEGMENTS = 256
+
+NON_SPACE_LANGUAGES = {"zh", "ja", "th", "lo", "km", "my"}
+
+
+def _map_token_offsets(batch: List[dict], remap_tokens: bool):
+    """Return the texts, probabilities, start and end times of the tokens of
+    a batch of segments, and where the tokens of each segment start and end
+    in them. The times of all tokens are mapped at once, see
+    _make_offset_mapper."""
+    texts = []
+    probabilities = []
+    froms = []
+    tos = []
+    counts = []
+    for segment_data in batch:
+        tokens = segment_data.get("tokens", [])
+        counts.append(len(tokens))
+        for token_data in tokens:
+            offsets = token_data.get("offsets", {})
+            texts.append(token_data.get("text", ""))
+            probabilities.append(token_data.get("p", 1.0))
+            froms.append(offsets.get("from", 0))
+            tos.append(offsets.get("to", 0))
+
+    bounds = np.concatenate(([0], np.cumsum(counts))).tolist()
+    starts = np.asarray(froms).astype(np.int64)
+    ends = np.asarray(tos).astype(np.int64)
+
+    if remap_tokens and len(texts) > 0:
+        segment_ids = np.repeat(np.arange(len(batch)), counts)
+        eligible = np.fromiter(
+            (not text.startswith("[_") for text in texts), dtype=bool, count=len(texts)
+        )
+        has_tokens = np.bincount(segment_ids[eligible], minlength=len(batch)) > 0
+
+        token_min = np.full(len(batch), np.iinfo(np.int64).max)
+        token_max = np.full(len(batch), np.iinfo(np.int64).min)
+        np.minimum.at(token_min, segment_ids[eligible], starts[eligible])
+        np.maximum.at(token_max, segment_ids[eligible], ends[eligible])
+        token_min = np.where(has_tokens, token_min, 0)
+        token_max = np.where(has_tokens, token_max, 0)
+
+        segment_offsets = [segment_data.get("offsets", {}) for segment_data in batch]
+        orig_from = np.array([int(o.get("from", 0)) for o in segment_offsets], dtype=np.int64)
+        orig_to = np.array([int(o.get("to", 0)) for o in segment_offsets], dtype=np.int64)
+        span = token_max - token_min
+        scale = (orig_to - orig_from) / np.where(span > 0, span, 1)
+
+        def remap(offsets: np.ndarray) -> np.ndarray:
+            mapped = (
+                orig_from[segment_ids]
+                + (offsets - token_min[segment_ids]) * scale[segment_ids]
+            ).astype(np.int64)
+            mapped = np.where(span[segment_ids] > 0, mapped, orig_from[segment_ids])
+            return np.where(has_tokens[segment_ids], mapped, offsets)
+
+        starts = remap(starts)
+        ends = remap(ends)
+
+    return texts, probabilities, starts.tolist(), ends.tolist(), bounds
+
+
+def _words_of_segment(texts, probabilities, starts, ends, begin, end) -> Iterator[Segment]:
+    """Words of the tokens ``begin`` to ``end`` of a segment. A token starting
+    with a space starts a word, a token starting with ", " ends the word
+    before it with the comma."""
+    kept = [
+        i
+        for i in range(begin, end)
+        if texts[i] and not texts[i].startswith("[_") and probabilities[i] >= 0.01
+    ]
+    if not kept:
+        return
+
+    # Latin-1 has a byte per character, positions in the text are positions
+    # in the bytes and each word is a slice of them
+    data = memoryview("".join([texts[i] for i in kept]).encode("latin-1"))
+    word_begin = 0
+    word_start = 0
+    word_end = 0
+    position = 0
+
+    def word(stop: int) -> Optional[Segment]:
+        if stop == word_begin:
+            return None
+        try:
+            text = str(data[word_begin:stop], "utf-8").strip()
+        except UnicodeDecodeError:
+            return None
+        return Segment(start=word_start, end=word_end, text=text, translation="") if text else None
+
+    for i in kept:
+        text = texts[i]
+        if text.startswith(" ") and position > word_begin:
+            segment = word(position)
+            if segment is not None:
+                yield segment
+            word_begin = position
+            word_start = starts[i]
+            word_end = ends[i]
+        elif text.startswith(", "):
+            segment = word(position + 1)
+            if segment is not None:
+                yield segment
+            word_begin = position + 1
+            word_start = starts[i]
+            word_end = ends[i]
+        else:
+            if position == word_begin:
+                word_start = starts[i]
+            word_end = ends[i]
+        position += len(text)
+
+    segment = word(position)
+    if segment is not None:
+        yield segment
+
+
+def _chars_of_segment(texts, starts, ends, begin, end) -> Optional[List[Segment]]:
+    """Characters of the tokens ``begin`` to ``end`` of a segment of a
+    non-space language, each with the time of the tokens it was split over.
+    None if the tokens are not valid UTF-8."""
+    kept = [i for i in range(begin, end) if texts[i] and not texts[i].startswith("[_")]
+    data = memoryview("".join([texts[i] for i in kept]).encode("latin-1"))
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    segments = []
+    char_start = 0
+    char_end = 0
+    position = 0
 
     try:
-        text = buffer.decode("utf-8").strip()
-        if text:
-            segments.append(
-                Segment(
-                    start=start,
-                    end=end,
-                    text=text,
-                    translation=""
-                )
+        for i in kept:
+            # A character completed by this token started with an earlier one
+            if not decoder.getstate()[0]:
+                char_start = starts[i]
+            char_end = ends[i]
+            size = len(texts[i])
+            chars = decoder.decode(data[position : position + size])
+            position += size
+            segments.extend(
+                Segment(start=char_start, end=char_end, text=char, translation="")
+                for char in chars
+                if char.strip()
             )
-        return True
     except UnicodeDecodeError:
-        return False
+        return None
+    return segments
+
+
+# Characters read from the whisper-cli JSON output at a time
+JSON_READ_SIZE = 1 << 20
+
+# Audio posted to whisper-server in one request
+SERVER_WINDOW_SECONDS = 60
+
+
+def _iter_json_array(file: IO[str], key: str) -> Iterator[dict]:
+    """Yield the objects of the array under ``key`` in a JSON file one at a
+    time, reading the file in blocks so memory holds a block and an object
+    rather than the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def read_block():
+        nonlocal buffer, position, eof
+        block = file.read(JSON_READ_SIZE)
+        eof = not block
+        buffer = buffer[position:] + block
+        position = 0
+
+    marker = f'"{key}"'
+    while True:
+        index = buffer.find(marker, position)
+        start = buffer.find("[", index) if index >= 0 else -1
+        if start >= 0:
+            position = start + 1
+            break
+        if eof:
+            return
+        # Keep the end of the block in case the marker is cut in two
+        position = max(position, len(buffer) - len(marker)) if index < 0 else index
+        read_block()
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            read_block()
+            continue
+        if buffer[position] == "]":
+            return
+
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # The object continues in the next block
+            if eof:
+                raise
+            read_block()
+            continue
+        yield item
+
+
+# Formats whisper-cli reads directly, others are decoded to WAV first
+WHISPER_CPP_SUPPORTED_FORMATS = ('.mp3', '.wav', '.flac')
 
 
 class WhisperCpp:
+    # whisper-cli of the task running in this process, see cancel
+    running_process: Optional[subprocess.Popen] = None
+
+    @staticmethod
+    def cancel():
+        """Kills the running whisper-cli, it only reports progress every few
+        percent so the task would not notice it was canceled before then"""
+        process = WhisperCpp.running_process
+        if process is not None and process.poll() is None:
+            process.kill()
+
     @staticmethod
     def _convert_to_wav(file_path: str) -> str:
-        """Convert audio file to WAV format using ffmpeg."""
-        temp_file = file_path + ".wav"
-        logging.info(f"Converting {file_path} to WAV format")
-
-        ffmpeg_cmd = [
-            "ffmpeg",
-            "-i", file_path,
-            "-ar", "16000",
-            "-ac", "1",
-            "-y",
-            temp_file
-        ]
+        """Returns the file decoded to a 16 kHz mono WAV file by the audio cache.
 
+        The file is shared with other consumers of the audio and must not be
+        removed.
+        """
+        logging.info(f"Using decoded WAV of {file_path}")
+        return get_decoded_audio_path(file_path)
+
+    @staticmethod
+    def _write_wav_to_stdin(process: subprocess.Popen, samples: np.ndarray):
+        """Writes float32 samples as a WAV file to the standard input of
+        whisper-cli, which reads it to the end before transcribing."""
+        data = np.ascontiguousarray(samples, dtype="<f4")
         try:
-            if sys.platform == "win32":
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                si.wShowWindow = subprocess.SW_HIDE
-                subprocess.run(
-                    ffmpeg_cmd,
-                    capture_output=True,
-                    startupinfo=si,
-                    env=app_env,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    check=True
-                )
-            else:
-                subprocess.run(ffmpeg_cmd, capture_output=True, check=True)
-
-            return temp_file
-        except subprocess.CalledProcessError as e:
-            raise Exception(f"Failed to convert audio file: {e.stderr.decode()}")
-        except FileNotFoundError:
-            raise Exception("ffmpeg not found. Please install ffmpeg to process this audio format.")
+            # The text wrapper decodes stderr, the audio goes to its binary buffer
+            process.stdin.buffer.write(wav_header(whisper_audio.SAMPLE_RATE, 1, data.nbytes))
+            process.stdin.buffer.write(memoryview(data).cast("B"))
+        except OSError as e:
+            # whisper-cli exited early, its return code reports why
+            logging.debug(f"whisper-cli closed its input: {e}")
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _uses_gpu() -> bool:
+        force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
+        return force_cpu == "false" and (
+            get_capabilities().vulkan or platform.system() == "Darwin"
+        )
 
     @staticmethod
-    def _build_command(task, file_to_process, language, vad_enabled) -> list:
+    def _build_command(
+        task, file_to_process, language, vad_enabled, output_file=None, processors=1, threads=None
+    ) -> list:
         """Build the whisper-cli command line."""
         cmd = [
             get_whisper_cli_path(),
@@ -175,35 +445,76 @@ class WhisperCpp:
             "--max-context", "0",
             "--entropy-thold", "2.8",
             "--output-json-full",
-            "--threads", str(os.getenv("BUZZ_WHISPERCPP_N_THREADS", (os.cpu_count() or 8) // 2)),
+            "--threads", str(threads or WhisperCpp._get_n_threads(task)),
             "-f", file_to_process,
         ]
 
+        if processors > 1:
+            cmd.extend(["--processors", str(processors)])
+
         if vad_enabled:
-            vad_model_path = os.path.join(
-                os.path.dirname(get_whisper_cli_path()), "ggml-silero-v6.2.0.bin"
-            )
+            vad_model_path = WhisperCpp._vad_model_path()
             cmd.extend(["--vad", "--vad-model", vad_model_path])
 
         if task.transcription_options.task == Task.TRANSLATE:
             cmd.extend(["--translate"])
 
-        force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        if force_cpu != "false" or (not IS_VULKAN_SUPPORTED and platform.system() != "Darwin"):
+        if task.beam_size:
+            cmd.extend(["--beam-size", str(task.beam_size)])
+
+        # Audio read from stdin has no file name to write the output next to
+        if output_file is not None:
+            cmd.extend(["--output-file", output_file])
+
+        if not WhisperCpp._uses_gpu():
             cmd.extend(["--no-gpu"])
 
         print(f"Running Whisper CLI: {' '.join(cmd)}")
         return cmd
 
     @staticmethod
-    def _run_whisper(cmd) -> int:
-        """Run whisper-cli subprocess and return the return code."""
+    def server_args(task: FileTranscriptionTask) -> list:
+        """Build the whisper-server options matching the whisper-cli command,
+        the ones that can change per file are sent with each request."""
+        args = [
+            "--suppress-nst",
+            "--max-context", "0",
+            "--entropy-thold", "2.8",
+            "--threads", str(WhisperCpp._get_n_threads(task)),
+        ]
+
+        vad_model_path = WhisperCpp._vad_model_path()
+        if os.path.exists(vad_model_path):
+            args.extend(["--vad", "--vad-model", vad_model_path])
+
+        if not WhisperCpp._uses_gpu():
+            args.extend(["--no-gpu"])
+
+        return args
+
+    @staticmethod
+    def _get_n_threads(task: FileTranscriptionTask) -> int:
+        try:
+            return max(1, int(os.getenv("BUZZ_WHISPERCPP_N_THREADS", "")))
+        except ValueError:
+            return get_n_threads(task)
+
+    @staticmethod
+    def _vad_model_path() -> str:
+        return os.path.join(os.path.dirname(get_whisper_cli_path()), "ggml-silero-v6.2.0.bin")
+
+    @staticmethod
+    def _run_whisper(cmd, samples: Optional[np.ndarray] = None) -> int:
+        """Run whisper-cli subprocess and return the return code. ``samples``
+        are piped to it for a command reading the audio from stdin."""
+        stdin = subprocess.PIPE if samples is not None else None
         if sys.platform == "win32":
             si = subprocess.STARTUPINFO()
             si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
             si.wShowWindow = subprocess.SW_HIDE
             process = subprocess.Popen(
                 cmd,
+                stdin=stdin,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -216,6 +527,7 @@ class WhisperCpp:
         else:
             process = subprocess.Popen(
                 cmd,
+                stdin=stdin,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -223,106 +535,94 @@ class WhisperCpp:
                 errors="replace",
             )
 
-        for line in iter(process.stderr.readline, ''):
-            sys.stderr.write(line)
+        WhisperCpp.running_process = process
+        if samples is not None:
+            # Written from a thread while progress is read from stderr, so
+            # neither pipe fills up and blocks the other
+            threading.Thread(
+                target=WhisperCpp._write_wav_to_stdin, args=(process, samples), daemon=True
+            ).start()
+
+        try:
+            for line in iter(process.stderr.readline, ''):
+                sys.stderr.write(line)
+        except BaseException:
+            # Writing progress raises when the task is canceled in a warm
+            # worker process, don't leave whisper-cli running behind it.
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            WhisperCpp.running_process = None
 
         process.wait()
         return process.returncode
 
     @staticmethod
-    def _read_json_output(file_to_process: str) -> dict:
-        """Read the JSON output file generated by whisper-cli."""
-        json_output_path = f"{file_to_process}.json"
+    def _iter_json_output(output_file: str) -> Iterator[dict]:
+        """Yield the segments of the JSON output file generated by whisper-cli
+        as they are read, the file of a long recording takes hundreds of MB."""
+        json_output_path = f"{output_file}.json"
         with open(json_output_path, 'r', encoding='latin-1') as f:
-            return json.load(f)
+            yield from _iter_json_array(f, "transcription")
 
     @staticmethod
-    def _parse_word_level_timings(result, language, vad_enabled) -> list:
-        """Parse word-level timings from whisper-cli JSON output."""
-        segments = []
-        transcription = result.get("transcription", [])
-        non_space_languages = {"zh", "ja", "th", "lo", "km", "my"}
-        is_non_space_language = language in non_space_languages
-
-        for segment_data in transcription:
-            tokens = segment_data.get("tokens", [])
-            map_offset = _make_offset_mapper(segment_data, vad_enabled)
-
-            if is_non_space_language:
-                char_buffer = b""
-                char_start = 0
-                char_end = 0
-
-                for token_data in tokens:
-                    token_text = token_data.get("text", "")
-
-                    if token_text.startswith("[_") or not token_text:
-                        continue
-
-                    token_start = map_offset(int(token_data.get("offsets", {}).get("from", 0)))
-                    token_end = map_offset(int(token_data.get("offsets", {}).get("to", 0)))
-
-                    token_bytes = token_text.encode("latin-1")
+    def _server_segments(result: dict) -> Iterator[dict]:
+        """Convert the segments of a verbose_json response of whisper-server to
+        the layout of the whisper-cli JSON output, with text read as latin-1
+        like that file."""
+        def latin1(text: str) -> str:
+            return text.encode("utf-8").decode("latin-1")
+
+        def offsets(item: dict) -> dict:
+            return {
+                "from": int(round(item.get("start", 0) * 1000)),
+                "to": int(round(item.get("end", 0) * 1000)),
+            }
+
+        for segment in result.get("segments", []):
+            yield {
+                "offsets": offsets(segment),
+                "text": latin1(segment.get("text", "")),
+                "tokens": [
+                    {
+                        "text": latin1(word.get("word", "")),
+                        "offsets": offsets(word),
+                        "p": word.get("probability", 1.0),
+                    }
+                    for word in segment.get("words", [])
+                ],
+            }
 
-                    if not char_buffer:
-                        char_start = token_start
-
-                    char_buffer += token_bytes
-                    char_end = token_end
-
-                    char_buffer = _flush_complete_chars(char_buffer, char_start, char_end, segments)
-
-                    if not char_buffer:
-                        char_start = token_end
-
-                if char_buffer:
-                    _flush_complete_chars(char_buffer, char_start, char_end, segments)
-            else:
-                word_buffer = b""
-                word_start = 0
-                word_end = 0
-
-                for token_data in tokens:
-                    token_text = token_data.get("text", "")
-
-                    if token_text.startswith("[_") or not token_text:
-                        continue
-
-                    token_p = token_data.get("p", 1.0)
-                    if token_p < 0.01:
-                        continue
-
-                    token_start = map_offset(int(token_data.get("offsets", {}).get("from", 0)))
-                    token_end = map_offset(int(token_data.get("offsets", {}).get("to", 0)))
-
-                    token_bytes = token_text.encode("latin-1")
-
-                    if token_bytes.startswith(b" ") and word_buffer:
-                        _append_word(word_buffer, word_start, word_end, segments)
-                        word_buffer = token_bytes
-                        word_start = token_start
-                        word_end = token_end
-                    elif token_bytes.startswith(b", "):
-                        word_buffer += b","
-                        _append_word(word_buffer, word_start, word_end, segments)
-                        word_buffer = token_bytes.lstrip(b",")
-                        word_start = token_start
-                        word_end = token_end
-                    else:
-                        if not word_buffer:
-                            word_start = token_start
-                        word_buffer += token_bytes
-                        word_end = token_end
-
-                _append_word(word_buffer, word_start, word_end, segments)
-
-        return segments
+    @staticmethod
+    def _parse_word_level_timings(
+        transcription: Iterable[dict], language, remap_tokens
+    ) -> Iterator[Segment]:
+        """Parse word-level timings from the segments of whisper-cli JSON
+        output, yielding the words of each batch of segments once it is read."""
+        is_non_space_language = language in NON_SPACE_LANGUAGES
+        transcription = iter(transcription)
+
+        while True:
+            batch = list(itertools.islice(transcription, WORD_TIMING_BATCH_SEGMENTS))
+            if not batch:
+                return
+
+            texts, probabilities, starts, ends, bounds = _map_token_offsets(batch, remap_tokens)
+            for index, segment_data in enumerate(batch):
+                begin, end = bounds[index], bounds[index + 1]
+                if is_non_space_language:
+                    chars = _chars_of_segment(texts, starts, ends, begin, end)
+                    if chars is None:
+                        chars = _chars_of_segment_bytewise(segment_data, remap_tokens)
+                    yield from chars
+                else:
+                    yield from _words_of_segment(texts, probabilities, starts, ends, begin, end)
 
     @staticmethod
-    def _parse_segment_timings(result) -> list:
-        """Parse segment-level timings from whisper-cli JSON output."""
-        segments = []
-        transcription = result.get("transcription", [])
+    def _parse_segment_timings(transcription: Iterable[dict]) -> Iterator[Segment]:
+        """Parse segment-level timings from the segments of whisper-cli JSON
+        output as they are read."""
         for segment_data in transcription:
             segment_text_latin1 = segment_data.get("text", "")
             try:
@@ -330,18 +630,32 @@ class WhisperCpp:
             except (UnicodeDecodeError, UnicodeEncodeError):
                 segment_text = segment_text_latin1.strip()
 
-            segments.append(
-                Segment(
-                    start=int(segment_data.get("offsets", {}).get("from", 0)),
-                    end=int(segment_data.get("offsets", {}).get("to", 0)),
-                    text=segment_text,
-                    translation=""
-                )
+            yield Segment(
+                start=int(segment_data.get("offsets", {}).get("from", 0)),
+                end=int(segment_data.get("offsets", {}).get("to", 0)),
+                text=segment_text,
+                translation=""
             )
-        return segments
 
     @staticmethod
-    def _cleanup_files(temp_file, json_output_path):
+    def _parse_segments(
+        transcription: Iterable[dict], task: FileTranscriptionTask, language, remap_tokens, start
+    ) -> Iterator[Tuple[int, List[Segment]]]:
+        """Yield the segments parsed from whisper-cli JSON output segments with
+        the audio offset in ms transcribed so far. Times are relative to
+        ``start`` ms, where the transcribed audio starts."""
+        if task.transcription_options.word_level_timings:
+            segments = WhisperCpp._parse_word_level_timings(transcription, language, remap_tokens)
+        else:
+            segments = WhisperCpp._parse_segment_timings(transcription)
+
+        for segment in segments:
+            segment.start += start
+            segment.end += start
+            yield segment.end, [segment]
+
+    @staticmethod
+    def _cleanup_files(json_output_path):
         """Clean up temporary files."""
         if json_output_path and os.path.exists(json_output_path):
             try:
@@ -349,55 +663,180 @@ class WhisperCpp:
             except Exception as e:
                 print(f"Failed to remove JSON output file {json_output_path}: {e}")
 
-        if temp_file and os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except Exception as e:
-                print(f"Failed to remove temporary file {temp_file}: {e}")
-
     @staticmethod
     def transcribe(task: FileTranscriptionTask) -> List[Segment]:
         """Transcribe audio using whisper-cli subprocess."""
+        return [
+            segment
+            for _, segments in WhisperCpp.iter_transcribe(task)
+            for segment in segments
+        ]
+
+    @staticmethod
+    def iter_transcribe(task: FileTranscriptionTask) -> Iterator[Tuple[int, List[Segment]]]:
+        """Transcribe audio using whisper-cli subprocess, yielding the segments
+        read from its output with the audio offset in ms transcribed so far."""
         language = (
             task.transcription_options.language
             if task.transcription_options.language is not None
             else "auto"
         )
 
-        supported_formats = ('.mp3', '.wav', '.flac')
         file_ext = os.path.splitext(task.file_path)[1].lower()
 
-        temp_file = None
+        # Continue an interrupted task after the last checkpoint, a chunk of a
+        # long file from where the chunk starts
+        start = max(task.resume_offset, task.audio_start)
         file_to_process = task.file_path
+        samples = None
 
-        if file_ext not in supported_formats:
-            temp_file = WhisperCpp._convert_to_wav(task.file_path)
-            file_to_process = temp_file
+        if start > 0 or task.audio_end is not None:
+            # Piped from the decoded audio, rather than copied to a WAV file
+            samples = whisper_audio.load_audio_range(task.file_path, start, task.audio_end)
+            file_to_process = "-"
+        elif file_ext not in WHISPER_CPP_SUPPORTED_FORMATS:
+            file_to_process = WhisperCpp._convert_to_wav(task.file_path)
 
-        vad_model_path = os.path.join(
-            os.path.dirname(get_whisper_cli_path()), "ggml-silero-v6.2.0.bin"
-        )
-        vad_enabled = os.path.exists(vad_model_path)
+        if samples is not None:
+            output_file = os.path.join(tempfile.gettempdir(), f"buzz-chunk-{uuid.uuid4().hex}")
+        else:
+            output_file = file_to_process
 
-        cmd = WhisperCpp._build_command(task, file_to_process, language, vad_enabled)
-        return_code = WhisperCpp._run_whisper(cmd)
+        vad_enabled = os.path.exists(WhisperCpp._vad_model_path())
 
-        if return_code != 0:
-            WhisperCpp._cleanup_files(temp_file, None)
-            raise Exception(f"whisper-cli failed with return code {return_code}")
+        if samples is not None:
+            duration = len(samples) / whisper_audio.SAMPLE_RATE
+        else:
+            duration = probe_duration(task.file_path)
+        processors, threads = get_processors(
+            WhisperCpp._get_n_threads(task), duration, WhisperCpp._uses_gpu()
+        )
 
         try:
-            result = WhisperCpp._read_json_output(file_to_process)
-            if task.transcription_options.word_level_timings:
-                segments = WhisperCpp._parse_word_level_timings(
-                    result, language, vad_enabled
-                )
-            else:
-                segments = WhisperCpp._parse_segment_timings(result)
-            return segments
+            cmd = WhisperCpp._build_command(
+                task,
+                file_to_process,
+                language,
+                vad_enabled,
+                output_file if samples is not None else None,
+                processors,
+                threads,
+            )
+            return_code = WhisperCpp._run_whisper(cmd, samples)
+
+            if return_code != 0:
+                raise Exception(f"whisper-cli failed with return code {return_code}")
+
+            yield from WhisperCpp._parse_segments(
+                WhisperCpp._iter_json_output(output_file),
+                task,
+                language,
+                vad_enabled or processors > 1,
+                start,
+            )
         finally:
-            json_output_path = f"{file_to_process}.json"
-            WhisperCpp._cleanup_files(temp_file, json_output_path)
+            json_output_path = f"{output_file}.json"
+            WhisperCpp._cleanup_files(json_output_path)
+
+    @staticmethod
+    def transcribe_with_server(
+        task: FileTranscriptionTask, server: "WhisperCppServer"
+    ) -> List[Segment]:
+        """Transcribe audio with a running whisper-server, see iter_transcribe_with_server."""
+        return [
+            segment
+            for _, segments in WhisperCpp.iter_transcribe_with_server(task, server)
+            for segment in segments
+        ]
+
+    @staticmethod
+    def iter_transcribe_with_server(
+        task: FileTranscriptionTask, server: "WhisperCppServer"
+    ) -> Iterator[Tuple[int, List[Segment]]]:
+        """Transcribe audio with a running whisper-server, which keeps the
+        model loaded between files. The samples are posted from memory."""
+        language = (
+            task.transcription_options.language
+            if task.transcription_options.language is not None
+            else "auto"
+        )
+        vad_enabled = "--vad" in server.args
+
+        # Imported here, both modules import this one
+        from buzz.transcriber.chunked_file_transcriber import plan_chunks
+        from buzz.transcriber.whisper_file_transcriber import (
+            WINDOW_PROMPT_SEGMENTS,
+            get_window_prompt,
+        )
+
+        start = max(task.resume_offset, task.audio_start)
+        samples = whisper_audio.load_audio_range(task.file_path, start, task.audio_end)
+        previous_segments: Deque[Segment] = deque(
+            task.segments if task.resume_offset > 0 else [], maxlen=WINDOW_PROMPT_SEGMENTS
+        )
+
+        # A request returns once its audio is transcribed, windows give
+        # progress and checkpoints while a long file is transcribed
+        sys.stderr.write("0%\n")
+        for window_start, window_end in plan_chunks(
+            samples, whisper_audio.SAMPLE_RATE, SERVER_WINDOW_SECONDS
+        ):
+            offset = start + window_start * 1000 // whisper_audio.SAMPLE_RATE
+            fields = {
+                "response_format": "verbose_json",
+                "language": language,
+                "translate": str(task.transcription_options.task == Task.TRANSLATE).lower(),
+            }
+            if task.beam_size:
+                fields["beam_size"] = str(task.beam_size)
+            prompt = get_window_prompt(task, previous_segments, offset)
+            if prompt:
+                fields["prompt"] = prompt
+
+            result = server.transcribe(samples[window_start:window_end], fields)
+            if language == "auto":
+                # The next windows keep the language detected in the first one
+                language = WhisperCpp._server_language(result) or language
+
+            for end, segments in WhisperCpp._parse_segments(
+                WhisperCpp._server_segments(result), task, language, vad_enabled, offset
+            ):
+                previous_segments.extend(segments)
+                yield end, segments
+
+            sys.stderr.write(f"{window_end * 100 // max(1, len(samples))}%\n")
+
+    @staticmethod
+    def detection_server_args() -> list:
+        """Build the options of a whisper-server used for language detection."""
+        args = ["--threads", str(max(1, (os.cpu_count() or 8) // 2))]
+        if not WhisperCpp._uses_gpu():
+            args.extend(["--no-gpu"])
+        return args
+
+    @staticmethod
+    def detect_language_with_server(
+        samples: np.ndarray, server: "WhisperCppServer"
+    ) -> Optional[str]:
+        """Detect the spoken language of samples with a running whisper-server.
+        Returns the language code or ``None`` if detection failed."""
+        result = server.transcribe(
+            samples,
+            {"language": "auto", "detect_language": "true", "response_format": "verbose_json"},
+        )
+        return WhisperCpp._server_language(result)
+
+    @staticmethod
+    def _server_language(result: dict) -> Optional[str]:
+        """Code of the language a whisper-server response was transcribed in"""
+        language = result.get("detected_language")
+        if language:
+            return language.lower()
+
+        # Older servers only return the name of the language
+        from whisper.tokenizer import TO_LANGUAGE_CODE
+
+        return TO_LANGUAGE_CODE.get(str(result.get("language", "")).lower())
 
     @staticmethod
     def detect_language(file_path: str, model_path: str) -> Optional[str]:
@@ -415,43 +854,10 @@ class WhisperCpp:
         supported_formats = ('.mp3', '.wav', '.flac', '.ogg')
         file_ext = os.path.splitext(file_path)[1].lower()
 
-        temp_file = None
         file_to_process = file_path
 
         if file_ext not in supported_formats:
-            temp_file = file_path + ".wav"
-            logging.info(f"Converting {file_path} to WAV format for language detection")
-
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-i", file_path,
-                "-ar", "16000",
-                "-ac", "1",
-                "-y",
-                temp_file,
-            ]
-
-            try:
-                if sys.platform == "win32":
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    si.wShowWindow = subprocess.SW_HIDE
-                    subprocess.run(
-                        ffmpeg_cmd,
-                        capture_output=True,
-                        startupinfo=si,
-                        env=app_env,
-                        creationflags=subprocess.CREATE_NO_WINDOW,
-                        check=True,
-                    )
-                else:
-                    subprocess.run(ffmpeg_cmd, capture_output=True, check=True)
-
-                file_to_process = temp_file
-            except subprocess.CalledProcessError as e:
-                raise Exception(f"Failed to convert audio file: {e.stderr.decode()}")
-            except FileNotFoundError:
-                raise Exception("ffmpeg not found. Please install ffmpeg to process this audio format.")
+            file_to_process = WhisperCpp._convert_to_wav(file_path)
 
         cmd = [
             whisper_cli_path,
@@ -461,48 +867,40 @@ class WhisperCpp:
         ]
 
         # Force CPU if specified (mirrors transcribe()).
-        force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        if force_cpu != "false" or (not IS_VULKAN_SUPPORTED and platform.system() != "Darwin"):
+        if not WhisperCpp._uses_gpu():
             cmd.extend(["--no-gpu"])
 
         print(f"Running Whisper CLI language detection: {' '.join(cmd)}")
 
-        try:
-            if sys.platform == "win32":
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                si.wShowWindow = subprocess.SW_HIDE
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    encoding="utf-8",
-                    errors="replace",
-                    startupinfo=si,
-                    env=app_env,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                )
-            else:
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    encoding="utf-8",
-                    errors="replace",
-                )
-
-            # whisper-cli writes the detection line to stderr, e.g.:
-            #   whisper_full_with_state: auto-detected language: fr (p = 0.99)
-            output = (result.stderr or "") + (result.stdout or "")
-            match = re.search(r"auto-detected language:\s*([a-zA-Z]{2,3})", output)
-            if match:
-                return match.group(1).lower()
-
-            logging.warning("Language detection produced no result")
-            return None
-        finally:
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except Exception as e:
-                    print(f"Failed to remove temporary file {temp_file}: {e}")
\ No newline at end of file
+        if sys.platform == "win32":
+            si = subprocess.STARTUPINFO()
+            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            si.wShowWindow = subprocess.SW_HIDE
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                startupinfo=si,
+                env=app_env,
+                creationflags=subprocess.CREATE_NO_WINDOW,
+            )
+        else:
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+
+        # whisper-cli writes the detection line to stderr, e.g.:
+        #   whisper_full_with_state: auto-detected language: fr (p = 0.99)
+        output = (result.stderr or "") + (result.stdout or "")
+        match = re.search(r"auto-detected language:\s*([a-zA-Z]{2,3})", output)
+        if match:
+            return match.group(1).lower()
+
+        logging.warning("Language detection produced no result")
+        return None
@@ -0,0 +1,294 @@
+import atexit
+import http.client
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from buzz.audio_cache import wav_header
+from buzz.transcriber.file_transcriber import app_env
+from buzz.transcriber.whisper_cpp import get_whisper_server_path
+from buzz.whisper_audio import SAMPLE_RATE
+
+HOST = "127.0.0.1"
+
+# The first use of a model on Apple Silicon compiles its CoreML encoder
+READY_TIMEOUT_SECONDS = 10 * 60
+HEALTH_TIMEOUT_SECONDS = 5
+DEFAULT_IDLE_SECONDS = 5 * 60
+START_ATTEMPTS = 3
+
+
+class WhisperCppServerError(Exception):
+    def __init__(self, message: str, output: str = ""):
+        super().__init__(message)
+        self.output = output
+
+
+def is_server_enabled() -> bool:
+    return (
+        os.getenv("BUZZ_WHISPERCPP_SERVER", "true").lower() != "false"
+        and os.path.exists(get_whisper_server_path())
+    )
+
+
+def get_idle_seconds() -> float:
+    try:
+        return float(os.getenv("BUZZ_WHISPERCPP_SERVER_IDLE_SECONDS", DEFAULT_IDLE_SECONDS))
+    except ValueError:
+        return DEFAULT_IDLE_SECONDS
+
+
+def find_free_port() -> int:
+    """Returns a port nothing listens on, picked by the OS"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+class WhisperCppServer:
+    """A whisper-server process serving one model, kept running between
+    requests so the model is loaded once.
+
+    The server is started on a free port on the first request and each
+    request waits until ``/health`` reports the model is loaded. A server that
+    exited or stopped answering is started again before the next request, and
+    one that received no request for ``idle_seconds`` is stopped.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        args: List[str],
+        inference_path: str = "/inference",
+        idle_seconds: Optional[float] = None,
+    ):
+        self.model_path = model_path
+        self.args = args
+        self.inference_path = inference_path
+        self.idle_seconds = get_idle_seconds() if idle_seconds is None else idle_seconds
+        self.port: Optional[int] = None
+        self.process: Optional[subprocess.Popen] = None
+        # Of the request in flight, see cancel
+        self.connection: Optional[http.client.HTTPConnection] = None
+        self.output_file = None
+        self.idle_timer: Optional[threading.Timer] = None
+        self.lock = threading.Lock()
+        self.request_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{HOST}:{self.port}"
+
+    def start(self):
+        """Starts the server, or starts it again if it stopped answering"""
+        with self.lock:
+            if self.process is not None:
+                if self.process.poll() is None and self._health_status() in (200, 404):
+                    return
+                logging.warning(
+                    "whisper-server stopped answering, restarting it. Output: %s",
+                    self._read_output(),
+                )
+                self._kill()
+
+            output = ""
+            for _ in range(START_ATTEMPTS):
+                self._spawn()
+                if self._wait_until_ready():
+                    logging.debug("whisper-server ready on port %s", self.port)
+                    return
+
+                output = self._read_output()
+                self._kill()
+                # Another process took the port between picking and binding it
+                if "bind" not in output:
+                    break
+
+            logging.error("whisper-server failed to start. Output: %s", output)
+            raise WhisperCppServerError("whisper-server failed to start", output)
+
+    def transcribe(
+        self, samples: np.ndarray, fields: Dict[str, str], sample_rate: int = SAMPLE_RATE
+    ) -> dict:
+        """Posts mono float32 samples as a WAV file with the form ``fields`` to
+        the inference endpoint and returns the decoded JSON response"""
+        with self.request_lock:
+            self._cancel_idle_timer()
+            self.start()
+
+            boundary = uuid.uuid4().hex
+            head = "".join(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+                for name, value in fields.items()
+            )
+            head += (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+                f'filename="audio.wav"\r\nContent-Type: audio/wav\r\n\r\n'
+            )
+            # The samples are sent as they are in memory, without a copy
+            pcm = memoryview(np.ascontiguousarray(samples, dtype="<f4")).cast("B")
+            body = [
+                head.encode("utf-8"),
+                wav_header(sample_rate, 1, pcm.nbytes),
+                pcm,
+                f"\r\n--{boundary}--\r\n".encode("utf-8"),
+            ]
+
+            # No timeout, transcribing a long file takes as long as it takes
+            connection = http.client.HTTPConnection(HOST, self.port)
+            self.connection = connection
+            try:
+                connection.request(
+                    "POST",
+                    self.inference_path,
+                    body=body,
+                    headers={
+                        "Content-Type": f"multipart/form-data; boundary={boundary}",
+                        "Content-Length": str(sum(len(part) for part in body)),
+                    },
+                )
+                response = connection.getresponse()
+                content = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                raise WhisperCppServerError(
+                    f"whisper-server request failed: {e}", self._read_output()
+                ) from e
+            finally:
+                self.connection = None
+                connection.close()
+                self._schedule_idle_stop()
+
+        if response.status != 200:
+            raise WhisperCppServerError(
+                f"whisper-server returned {response.status}: "
+                f"{content[:500].decode('utf-8', 'replace')}"
+            )
+
+        result = json.loads(content)
+        if "error" in result:
+            raise WhisperCppServerError(f"whisper-server failed: {result['error']}")
+        return result
+
+    def cancel(self):
+        """Aborts the request in flight by closing its connection. The server
+        keeps running with its model loaded for the next request."""
+        connection = self.connection
+        if connection is None or connection.sock is None:
+            return
+        try:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def stop(self):
+        with self.lock:
+            self._cancel_idle_timer()
+            self._kill()
+
+    # Cached models are closed when evicted from the ModelCache
+    close = stop
+
+    def _spawn(self):
+        self.port = find_free_port()
+        cmd = [
+            get_whisper_server_path(),
+            "--host", HOST,
+            "--port", str(self.port),
+            "--inference-path", self.inference_path,
+            "--model", self.model_path,
+            *self.args,
+        ]
+        logging.debug(f"Starting whisper-server: {' '.join(cmd)}")
+
+        # A file rather than a pipe, nothing has to drain it while the server runs
+        self.output_file = tempfile.TemporaryFile()
+        if sys.platform == "win32":
+            self.process = subprocess.Popen(
+                cmd,
+                stdout=self.output_file,
+                stderr=subprocess.STDOUT,
+                env=app_env,
+                creationflags=subprocess.CREATE_NO_WINDOW,
+            )
+        else:
+            self.process = subprocess.Popen(
+                cmd, stdout=self.output_file, stderr=subprocess.STDOUT
+            )
+
+    def _wait_until_ready(self) -> bool:
+        deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                return False
+            # Servers without a health endpoint only listen once the model is loaded
+            if self._health_status() in (200, 404):
+                return True
+            time.sleep(0.1)
+        return False
+
+    def _health_status(self) -> Optional[int]:
+        """Status of GET /health, 503 while the model loads, None if nothing answers"""
+        connection = http.client.HTTPConnection(HOST, self.port, timeout=HEALTH_TIMEOUT_SECONDS)
+        try:
+            connection.request("GET", "/health")
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            return None
+        finally:
+            connection.close()
+
+    def _read_output(self) -> str:
+        if self.output_file is None:
+            return ""
+        try:
+            self.output_file.seek(0)
+            return self.output_file.read().decode("utf-8", "replace")
+        except (OSError, ValueError):
+            return ""
+
+    def _kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        if self.output_file is not None:
+            self.output_file.close()
+            self.output_file = None
+
+    def _schedule_idle_stop(self):
+        if self.idle_seconds <= 0:
+            return
+        timer = threading.Timer(self.idle_seconds, lambda: self._stop_when_idle(timer))
+        timer.daemon = True
+        self.idle_timer = timer
+        timer.start()
+
+    def _stop_when_idle(self, timer: threading.Timer):
+        with self.request_lock:
+            # A request came in since the timer was started
+            if self.idle_timer is not timer:
+                return
+            logging.debug("Stopping idle whisper-server")
+            self.stop()
+
+    def _cancel_idle_timer(self):
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
@@ -1,10 +1,10 @@
+import dataclasses
 import datetime
-import json
 import logging
 import multiprocessing
-import re
 import os
 import sys
+import time
 
 # Preload CUDA libraries before importing torch - required for subprocess contexts
 from buzz import cuda_setup  # noqa: F401
@@ -14,28 +14,154 @@ import platform
 import subprocess
 from platformdirs import user_cache_dir
 from multiprocessing.connection import Connection
-from threading import Thread
-from typing import Optional, List
+from collections import deque
+from threading import Thread, Event
+from typing import Deque, Iterable, Iterator, Optional, List, Tuple
 
 import tqdm
 import psutil
+import numpy as np
 from PyQt6.QtCore import QObject
 
 from buzz import whisper_audio
-from buzz.conn import pipe_stderr
+from buzz.conn import (
+    ConnWriter,
+    MessageKind,
+    PROGRESS_REGEX,  # noqa: F401
+    pipe_stderr,
+    receive_message,
+)
+from buzz.hardware import get_capabilities
 from buzz.model_loader import ModelType, map_language_to_mms
 from buzz.transformers_whisper import TransformersTranscriber
 from buzz.transcriber.file_transcriber import FileTranscriber
-from buzz.transcriber.transcriber import FileTranscriptionTask, Segment, Task, DEFAULT_WHISPER_TEMPERATURE
+from buzz.transcriber.metrics import Stage, add_timing
+from buzz.transcriber.tuning import DEFAULT_BEAM_SIZE, DEFAULT_FASTER_WHISPER_BATCH_SIZE
+from buzz.transcriber.model_cache import ModelCache
+from buzz.transcriber.transcriber import (
+    FileTranscriptionTask,
+    Segment,
+    Task,
+    DEFAULT_WHISPER_TEMPERATURE,
+    get_batch_size,
+    get_n_threads,
+    get_resume_prompt,
+)
 from buzz.transcriber.whisper_cpp import WhisperCpp
+from buzz.transcriber.whisper_cpp_server import WhisperCppServer, is_server_enabled
 
 import av
 import faster_whisper
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 import whisper
 import stable_whisper
 from stable_whisper import WhisperResult
 
-PROGRESS_REGEX = re.compile(r"\d+(\.\d+)?%")
+# Streamed segments are sent to the parent in batches of up to this many
+SEGMENT_BATCH_SIZE = 100
+# Longest time a streamed segment waits in the worker before it is sent
+SEGMENT_BATCH_INTERVAL_SECONDS = 1.0
+
+# Long files are transcribed by Whisper and Faster Whisper in windows of about
+# this length, see iter_audio_windows
+TRANSCRIBE_WINDOW_SECONDS = 30 * 60
+# Segments of a window given to the next one as its prompt
+WINDOW_PROMPT_SEGMENTS = 32
+
+
+def write_checkpoints(
+    writer: ConnWriter, stream: Iterable[Tuple[int, List[Segment]]]
+) -> None:
+    """Send ``(offset, segments)`` pairs as they are transcribed, batched by
+    count and time so a fast model does not flood the parent. The parent saves
+    them so an interrupted task can continue from the last offset."""
+    batch: List[Segment] = []
+    offset = 0
+    last_sent_at = time.monotonic()
+    for offset, segments in stream:
+        batch.extend(segments)
+        if (
+            len(batch) >= SEGMENT_BATCH_SIZE
+            or time.monotonic() - last_sent_at >= SEGMENT_BATCH_INTERVAL_SECONDS
+        ):
+            writer.send_checkpoint(offset, batch)
+            batch = []
+            last_sent_at = time.monotonic()
+
+    if len(batch) > 0:
+        writer.send_checkpoint(offset, batch)
+
+
+def to_segments(whisper_segment, offset: int = 0) -> List[Segment]:
+    """Segments of a faster-whisper segment, one per word if it has word-level
+    timings, shifted by ``offset`` ms"""
+    if whisper_segment.words:
+        return [
+            Segment(
+                start=offset + int(word.start * 1000),
+                end=offset + int(word.end * 1000),
+                text=word.word,
+                translation=""
+            )
+            for word in whisper_segment.words
+        ]
+
+    return [
+        Segment(
+            start=offset + int(whisper_segment.start * 1000),
+            end=offset + int(whisper_segment.end * 1000),
+            text=whisper_segment.text,
+            translation=""
+        )
+    ]
+
+
+def merge_speech_clips(speech_timestamps: List[dict], max_length: int) -> List[Tuple[int, int]]:
+    """Joins consecutive speech regions, in samples, into clips of up to
+    ``max_length`` samples. A single longer region is kept whole."""
+    clips: List[Tuple[int, int]] = []
+    for speech in speech_timestamps:
+        if len(clips) > 0 and speech["end"] - clips[-1][0] <= max_length:
+            clips[-1] = (clips[-1][0], speech["end"])
+        else:
+            clips.append((speech["start"], speech["end"]))
+    return clips
+
+
+def iter_audio_windows(
+    file_path: str, start: int = 0, end: Optional[int] = None
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yields the audio of a file from ``start`` to ``end`` ms in windows of
+    about TRANSCRIBE_WINDOW_SECONDS cut at quiet points, with the offset of
+    each window in ms. The models compute their features for one window at a
+    time, so memory does not grow with the duration of the file."""
+    audio = whisper_audio.load_audio_range(file_path, start, end)
+    window_size = TRANSCRIBE_WINDOW_SECONDS * whisper_audio.SAMPLE_RATE
+    if len(audio) <= window_size + window_size // 2:
+        yield start, audio
+        return
+
+    # Imported here, the chunked transcriber imports this module
+    from buzz.transcriber.chunked_file_transcriber import plan_chunks
+
+    for window_start, window_end in plan_chunks(
+        audio, whisper_audio.SAMPLE_RATE, TRANSCRIBE_WINDOW_SECONDS
+    ):
+        # Views of the memory-mapped decoded audio
+        yield (
+            start + window_start * 1000 // whisper_audio.SAMPLE_RATE,
+            audio[window_start:window_end],
+        )
+
+
+def get_window_prompt(
+    task: FileTranscriptionTask, previous_segments: Deque[Segment], offset: int
+) -> str:
+    """Initial prompt of the window starting at ``offset`` ms, ending with
+    the text of the previous window like for a resumed task"""
+    return get_resume_prompt(
+        dataclasses.replace(task, segments=list(previous_segments), resume_offset=offset)
+    )
 
 
 def terminate_child_processes(pid: int, timeout: float = 5.0) -> None:
@@ -97,6 +223,47 @@ def check_file_has_audio_stream(file_path: str) -> None:
         raise ValueError("File not found")
 
 
+_subprocess_patched = False
+
+
+def _patch_subprocess_for_windows() -> None:
+    """Patch subprocess on Windows to prevent console window flash.
+
+    This is needed because multiprocessing spawns a new process without the main
+    process patches. Applied once per process, warm model workers run many tasks.
+    """
+    global _subprocess_patched
+    if sys.platform != "win32" or _subprocess_patched:
+        return
+    _subprocess_patched = True
+
+    _original_run = subprocess.run
+
+    def _patched_run(*args, **kwargs):
+        if 'startupinfo' not in kwargs:
+            si = subprocess.STARTUPINFO()
+            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            si.wShowWindow = subprocess.SW_HIDE
+            kwargs['startupinfo'] = si
+        if 'creationflags' not in kwargs:
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        return _original_run(*args, **kwargs)
+
+    class _PatchedPopen(subprocess.Popen):
+        def __init__(self, *args, **kwargs):
+            if 'startupinfo' not in kwargs:
+                si = subprocess.STARTUPINFO()
+                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                si.wShowWindow = subprocess.SW_HIDE
+                kwargs['startupinfo'] = si
+            if 'creationflags' not in kwargs:
+                kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+            super().__init__(*args, **kwargs)
+
+    subprocess.run = _patched_run
+    subprocess.Popen = _PatchedPopen
+
+
 class WhisperFileTranscriber(FileTranscriber):
     """WhisperFileTranscriber transcribes an audio file to text, writes the text to a file, and then opens the file
     using the default program for opening txt files."""
@@ -104,10 +271,17 @@ class WhisperFileTranscriber(FileTranscriber):
     current_process: multiprocessing.Process
     running = False
     read_line_thread: Optional[Thread] = None
-    READ_LINE_THREAD_STOP_TOKEN = "--STOP--"
+
+    # Set inside a warm model worker process, see buzz.transcriber.warm_model_pool
+    model_cache: Optional[ModelCache] = None
+    # Seconds spent loading models for the current task, in the worker process
+    model_load_seconds = 0.0
 
     def __init__(
-        self, task: FileTranscriptionTask, parent: Optional["QObject"] = None
+        self,
+        task: FileTranscriptionTask,
+        parent: Optional["QObject"] = None,
+        model_pool=None,
     ) -> None:
         super().__init__(task, parent)
         self.segments = []
@@ -116,6 +290,9 @@ class WhisperFileTranscriber(FileTranscriber):
         self.recv_pipe = None
         self.send_pipe = None
         self.error_message = None
+        self.model_pool = model_pool
+        self.model_worker = None
+        self.model_worker_done = Event()
 
     def transcribe(self) -> List[Segment]:
         time_started = datetime.datetime.now()
@@ -123,8 +300,12 @@ class WhisperFileTranscriber(FileTranscriber):
             "Starting whisper file transcription, task = %s", self.transcription_task
         )
 
-        if torch.cuda.is_available():
-            logging.debug(f"CUDA version detected: {torch.version.cuda}")
+        capabilities = get_capabilities()
+        if capabilities.cuda:
+            logging.debug(f"CUDA version detected: {capabilities.cuda_version}")
+
+        if self.model_pool is not None:
+            return self._transcribe_in_model_worker(time_started)
 
         self.recv_pipe, self.send_pipe = multiprocessing.Pipe(duplex=False)
 
@@ -135,7 +316,7 @@ class WhisperFileTranscriber(FileTranscriber):
             self.current_process.start()
             self.started_process = True
 
-        self.read_line_thread = Thread(target=self.read_line, args=(self.recv_pipe,))
+        self.read_line_thread = Thread(target=self.read_messages, args=(self.recv_pipe,))
         self.read_line_thread.start()
 
         # Only join the process if it was actually started
@@ -187,48 +368,65 @@ class WhisperFileTranscriber(FileTranscriber):
 
         return self.segments
 
+    def _transcribe_in_model_worker(self, time_started: datetime.datetime) -> List[Segment]:
+        """Run the task in a long-lived worker process from the pool, which keeps
+        recently used models loaded between files."""
+        if self.stopped:
+            raise Exception("Transcription was canceled")
+
+        self.model_worker = self.model_pool.acquire(self.transcription_task)
+        self.model_worker_done.clear()
+        completed = False
+        try:
+            self.recv_pipe = self.model_worker.submit(self.transcription_task)
+            self.started_process = True
+            completed = self.read_messages(self.recv_pipe)
+        finally:
+            self.started_process = False
+            self.model_pool.release(self.model_worker)
+            self.model_worker_done.set()
+
+        logging.debug(
+            "warm whisper worker completed, time taken = %s, number of segments = %s",
+            datetime.datetime.now() - time_started,
+            len(self.segments),
+        )
+
+        if self.stopped:
+            raise Exception("Transcription was canceled")
+
+        if self.error_message is not None:
+            logging.error("Whisper worker failed: %s", self.error_message)
+            raise Exception(self.error_message)
+
+        if not completed:
+            raise Exception("Transcription worker exited unexpectedly")
+
+        return self.segments
+
     @classmethod
     def transcribe_whisper(
-        cls, stderr_conn: Connection, task: FileTranscriptionTask
+        cls,
+        stderr_conn: Connection,
+        task: FileTranscriptionTask,
+        cancel_event: Optional[Event] = None,
     ) -> None:
-        # Patch subprocess on Windows to prevent console window flash
-        # This is needed because multiprocessing spawns a new process without the main process patches
-        if sys.platform == "win32":
-            import subprocess
-            _original_run = subprocess.run
-            _original_popen = subprocess.Popen
-
-            def _patched_run(*args, **kwargs):
-                if 'startupinfo' not in kwargs:
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    si.wShowWindow = subprocess.SW_HIDE
-                    kwargs['startupinfo'] = si
-                if 'creationflags' not in kwargs:
-                    kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                return _original_run(*args, **kwargs)
-
-            class _PatchedPopen(subprocess.Popen):
-                def __init__(self, *args, **kwargs):
-                    if 'startupinfo' not in kwargs:
-                        si = subprocess.STARTUPINFO()
-                        si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                        si.wShowWindow = subprocess.SW_HIDE
-                        kwargs['startupinfo'] = si
-                    if 'creationflags' not in kwargs:
-                        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
-                    super().__init__(*args, **kwargs)
-
-            subprocess.run = _patched_run
-            subprocess.Popen = _PatchedPopen
+        _patch_subprocess_for_windows()
+        cls.model_load_seconds = 0.0
 
         try:
             # Check if the file has audio streams before processing
             check_file_has_audio_stream(task.file_path)
 
-            with pipe_stderr(stderr_conn):
+            if task.n_threads is not None:
+                # Share the CPU with the other tasks running concurrently
+                torch.set_num_threads(task.n_threads)
+
+            with pipe_stderr(stderr_conn, cancel_event) as writer:
                 if task.transcription_options.model.model_type == ModelType.WHISPER_CPP:
-                    segments = cls.transcribe_whisper_cpp(task)
+                    # Sent to the parent while the output is parsed
+                    write_checkpoints(writer, cls.iter_whisper_cpp(task))
+                    segments = []
                 elif task.transcription_options.model.model_type == ModelType.HUGGING_FACE:
                     sys.stderr.write("0%\n")
                     segments = cls.transcribe_hugging_face(task)
@@ -236,7 +434,9 @@ class WhisperFileTranscriber(FileTranscriber):
                 elif (
                     task.transcription_options.model.model_type == ModelType.FASTER_WHISPER
                 ):
-                    segments = cls.transcribe_faster_whisper(task)
+                    # Sent to the parent while the model yields them
+                    write_checkpoints(writer, cls.iter_faster_whisper(task))
+                    segments = []
                 elif task.transcription_options.model.model_type == ModelType.WHISPER:
                     segments = cls.transcribe_openai_whisper(task)
                 else:
@@ -244,18 +444,87 @@ class WhisperFileTranscriber(FileTranscriber):
                         f"Invalid model type: {task.transcription_options.model.model_type}"
                     )
 
-                segments_json = json.dumps(segments, ensure_ascii=True, default=vars)
-                sys.stderr.write(f"segments = {segments_json}\n")
-                sys.stderr.write(WhisperFileTranscriber.READ_LINE_THREAD_STOP_TOKEN + "\n")
+                # The parent counts the rest of the time as inference
+                writer.send_timing(Stage.MODEL_LOAD.value, cls.model_load_seconds)
+                # Large results go through a memory-mapped file, see ConnWriter
+                writer.send_segments(segments)
+                writer.send_done()
         except Exception as e:
+            error = str(e)
+            if cancel_event is not None and cancel_event.is_set():
+                error = "Transcription was canceled"
+
             # Send error message back to the parent process
-            stderr_conn.send(f"error = {str(e)}\n")
-            stderr_conn.send(WhisperFileTranscriber.READ_LINE_THREAD_STOP_TOKEN + "\n")
+            writer = ConnWriter(stderr_conn)
+            writer.send_error(error)
+            writer.send_done()
             raise
 
     @classmethod
-    def transcribe_whisper_cpp(cls, task: FileTranscriptionTask) -> List[Segment]:
-        return WhisperCpp.transcribe(task)
+    def transcribe_whisper_batch(
+        cls,
+        stderr_conn: Connection,
+        tasks: List[FileTranscriptionTask],
+        cancel_event: Optional[Event] = None,
+    ) -> None:
+        """Runs a batch of tasks, see transcribe_faster_whisper_batch. The result
+        of each task is sent in order, ending with its DONE message."""
+        _patch_subprocess_for_windows()
+        cls.model_load_seconds = 0.0
+
+        try:
+            with pipe_stderr(stderr_conn, cancel_event):
+                results = cls.transcribe_faster_whisper_batch(tasks)
+        except Exception as e:
+            error = str(e)
+            if cancel_event is not None and cancel_event.is_set():
+                error = "Transcription was canceled"
+            results = [([], error) for _ in tasks]
+
+        writer = ConnWriter(stderr_conn)
+        # For the whole batch, sent before the result of the first task
+        writer.send_timing(Stage.MODEL_LOAD.value, cls.model_load_seconds)
+        for segments, error in results:
+            if error is None:
+                writer.send_segments(segments)
+            else:
+                writer.send_error(error)
+            writer.send_done()
+
+    @classmethod
+    def _load_model(cls, key, loader):
+        started = time.perf_counter()
+        try:
+            if cls.model_cache is None:
+                return loader()
+            return cls.model_cache.get_or_load(key, loader)
+        finally:
+            cls.model_load_seconds += time.perf_counter() - started
+
+    @classmethod
+    def iter_whisper_cpp(
+        cls, task: FileTranscriptionTask
+    ) -> Iterator[Tuple[int, List[Segment]]]:
+        """Yields the transcribed segments with the audio offset in ms
+        transcribed so far, see WhisperCpp.iter_transcribe."""
+        # A worker that stays alive between files keeps whisper-server running
+        # so the model is loaded once, a one-off process runs whisper-cli
+        if cls.model_cache is None or not is_server_enabled():
+            return WhisperCpp.iter_transcribe(task)
+
+        args = WhisperCpp.server_args(task)
+
+        def start_server() -> WhisperCppServer:
+            server = WhisperCppServer(task.model_path, args)
+            server.start()
+            return server
+
+        # Servers started with other options, e.g. threads, are other models
+        server = cls._load_model(
+            (ModelType.WHISPER_CPP.value, task.model_path, "server", " ".join(args)),
+            start_server,
+        )
+        return WhisperCpp.iter_transcribe_with_server(task, server)
 
     @classmethod
     def transcribe_hugging_face(cls, task: FileTranscriptionTask) -> List[Segment]:
@@ -265,7 +534,10 @@ class WhisperFileTranscriber(FileTranscriber):
                 "The model download did not complete, try downloading it again."
             )
 
-        model = TransformersTranscriber(task.model_path)
+        model = cls._load_model(
+            (ModelType.HUGGING_FACE.value, task.model_path, "default", "auto"),
+            lambda: TransformersTranscriber(task.model_path),
+        )
 
         # Handle language - MMS uses ISO 639-3 codes, Whisper uses ISO 639-1
         if model.is_mms_model:
@@ -303,6 +575,14 @@ class WhisperFileTranscriber(FileTranscriber):
 
     @classmethod
     def transcribe_faster_whisper(cls, task: FileTranscriptionTask) -> List[Segment]:
+        return [
+            segment
+            for _, segments in cls.iter_faster_whisper(task)
+            for segment in segments
+        ]
+
+    @classmethod
+    def _load_faster_whisper_model(cls, task: FileTranscriptionTask):
         # Use the already-resolved local model path so we never hit the network
         model_size_or_path = task.model_path
         if not model_size_or_path:
@@ -310,7 +590,6 @@ class WhisperFileTranscriber(FileTranscriber):
                 "Faster Whisper model is not available locally. "
                 "Check BUZZ_MODEL_ROOT and download the model into that cache first."
             )
-            return []
 
         model_root_dir = user_cache_dir("Buzz")
         model_root_dir = os.path.join(model_root_dir, "models")
@@ -320,11 +599,12 @@ class WhisperFileTranscriber(FileTranscriber):
             os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
         device = "auto"
-        if torch.cuda.is_available() and torch.version.cuda < "12":
+        capabilities = get_capabilities()
+        if capabilities.cuda and capabilities.cuda_version < "12":
             logging.debug("Unsupported CUDA version (<12), using CPU")
             device = "cpu"
 
-        if not torch.cuda.is_available():
+        if not capabilities.cuda:
             logging.debug("CUDA is not available, using CPU")
             device = "cpu"
 
@@ -333,57 +613,134 @@ class WhisperFileTranscriber(FileTranscriber):
 
         # Check if user wants reduced GPU memory usage (int8 quantization)
         reduce_gpu_memory = os.getenv("BUZZ_REDUCE_GPU_MEMORY", "false") != "false"
-        compute_type = "default"
+        compute_type = task.compute_type or "default"
         if reduce_gpu_memory:
             compute_type = "int8" if device == "cpu" else "int8_float16"
             logging.debug(f"Using {compute_type} compute type for reduced memory usage")
 
-        model = faster_whisper.WhisperModel(
-            model_size_or_path=model_size_or_path,
-            download_root=model_root_dir,
-            device=device,
-            compute_type=compute_type,
-            cpu_threads=(os.cpu_count() or 8)//2,
+        cpu_threads = get_n_threads(task)
+        # The model keeps the threads it was loaded with
+        return cls._load_model(
+            (ModelType.FASTER_WHISPER.value, model_size_or_path, compute_type, device, cpu_threads),
+            lambda: faster_whisper.WhisperModel(
+                model_size_or_path=model_size_or_path,
+                download_root=model_root_dir,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+            ),
+        )
+
+    @classmethod
+    def iter_faster_whisper(
+        cls, task: FileTranscriptionTask
+    ) -> Iterator[Tuple[int, List[Segment]]]:
+        """Yields the segments of each decoded window with the audio offset in
+        ms transcribed so far."""
+        model = cls._load_faster_whisper_model(task)
+
+        # Continue an interrupted task after the last checkpoint, a chunk of a
+        # long file from where the chunk starts
+        offset = max(task.resume_offset, task.audio_start)
+        language = task.transcription_options.language
+        previous_segments: Deque[Segment] = deque(
+            task.segments if task.resume_offset > 0 else [], maxlen=WINDOW_PROMPT_SEGMENTS
         )
 
-        audio = whisper_audio.load_audio(task.file_path)
+        batched_model = faster_whisper.BatchedInferencePipeline(model=model)
+        for window_offset, audio in iter_audio_windows(task.file_path, offset, task.audio_end):
+            whisper_segments, info = batched_model.transcribe(
+                audio=audio,
+                language=language,
+                task=task.transcription_options.task.value,
+                # Prevent crash on Windows https://github.com/SYSTRAN/faster-whisper/issues/71#issuecomment-1526263764
+                temperature = 0 if platform.system() == "Windows" else DEFAULT_WHISPER_TEMPERATURE,
+                initial_prompt=get_window_prompt(task, previous_segments, window_offset),
+                word_timestamps=task.transcription_options.word_level_timings,
+                no_speech_threshold=0.4,
+                log_progress=True,
+                beam_size=task.beam_size or DEFAULT_BEAM_SIZE,
+                batch_size=task.batch_size or DEFAULT_FASTER_WHISPER_BATCH_SIZE,
+            )
+            # The next windows keep the language detected in the first one
+            language = info.language
+            for segment in whisper_segments:
+                segments = to_segments(segment, window_offset)
+                previous_segments.extend(segments)
+                yield window_offset + int(segment.end * 1000), segments
+
+    @classmethod
+    def transcribe_faster_whisper_batch(
+        cls, tasks: List[FileTranscriptionTask]
+    ) -> List[Tuple[List[Segment], Optional[str]]]:
+        """Transcribes short files that share a model and options in one
+        batched inference call.
+
+        The speech of every file is cut into clips of up to 30 seconds that
+        never span two files, so the windows of all files fill the batches.
+        Returns the segments or the error of each task.
+        """
+        first_task = tasks[0]
+        model = cls._load_faster_whisper_model(first_task)
+
+        results: List[Tuple[List[Segment], Optional[str]]] = [([], None) for _ in tasks]
+        audios = []
+        for i, task in enumerate(tasks):
+            try:
+                check_file_has_audio_stream(task.file_path)
+                audios.append(whisper_audio.load_audio(task.file_path))
+            except Exception as e:
+                results[i] = ([], str(e))
+                audios.append(np.zeros(0, dtype=np.float32))
+
+        # Files are laid end to end, a segment belongs to the last file that
+        # starts at or before it
+        offsets = np.cumsum([0] + [len(audio) for audio in audios[:-1]])
+        clip_timestamps = [
+            {
+                "start": (offset + start) / whisper_audio.SAMPLE_RATE,
+                "end": (offset + end) / whisper_audio.SAMPLE_RATE,
+            }
+            for audio, offset in zip(audios, offsets)
+            if len(audio) > 0
+            for start, end in merge_speech_clips(
+                get_speech_timestamps(
+                    audio,
+                    VadOptions(
+                        max_speech_duration_s=whisper_audio.CHUNK_LENGTH,
+                        min_silence_duration_ms=160,
+                    ),
+                ),
+                whisper_audio.N_SAMPLES,
+            )
+        ]
+        if len(clip_timestamps) == 0:
+            return results
 
         batched_model = faster_whisper.BatchedInferencePipeline(model=model)
         whisper_segments, info = batched_model.transcribe(
-            audio=audio,
-            language=task.transcription_options.language,
-            task=task.transcription_options.task.value,
-            # Prevent crash on Windows https://github.com/SYSTRAN/faster-whisper/issues/71#issuecomment-1526263764
-            temperature = 0 if platform.system() == "Windows" else DEFAULT_WHISPER_TEMPERATURE,
-            initial_prompt=task.transcription_options.initial_prompt,
-            word_timestamps=task.transcription_options.word_level_timings,
+            audio=np.concatenate(audios),
+            language=first_task.transcription_options.language,
+            task=first_task.transcription_options.task.value,
+            temperature=0 if platform.system() == "Windows" else DEFAULT_WHISPER_TEMPERATURE,
+            initial_prompt=first_task.transcription_options.initial_prompt or None,
+            word_timestamps=first_task.transcription_options.word_level_timings,
             no_speech_threshold=0.4,
             log_progress=True,
+            clip_timestamps=clip_timestamps,
+            beam_size=first_task.beam_size or DEFAULT_BEAM_SIZE,
+            batch_size=get_batch_size(),
         )
-        segments = []
+
+        offsets_ms = offsets * 1000 // whisper_audio.SAMPLE_RATE
         for segment in whisper_segments:
-            # Segment will contain words if word-level timings is True
-            if segment.words:
-                for word in segment.words:
-                    segments.append(
-                        Segment(
-                            start=int(word.start * 1000),
-                            end=int(word.end * 1000),
-                            text=word.word,
-                            translation=""
-                        )
-                    )
-            else:
-                segments.append(
-                    Segment(
-                        start=int(segment.start * 1000),
-                        end=int(segment.end * 1000),
-                        text=segment.text,
-                        translation=""
-                    )
-                )
+            # The middle of the segment, its start may round to the end of
+            # the previous file
+            middle = (segment.start + segment.end) * 500
+            i = int(np.searchsorted(offsets_ms, middle, side="right")) - 1
+            results[i][0].extend(to_segments(segment, -int(offsets_ms[i])))
 
-        return segments
+        return results
 
     @classmethod
     def transcribe_openai_whisper(cls, task: FileTranscriptionTask) -> List[Segment]:
@@ -391,7 +748,7 @@ class WhisperFileTranscriber(FileTranscriber):
         if force_cpu != "false":
             os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
-        use_cuda = torch.cuda.is_available() and force_cpu == "false"
+        use_cuda = get_capabilities().cuda and force_cpu == "false"
 
         device = "cuda" if use_cuda else "cpu"
 
@@ -402,57 +759,102 @@ class WhisperFileTranscriber(FileTranscriber):
             kwargs.setdefault('weights_only', False)
             return original_torch_load(*args, **kwargs)
 
-        torch.load = patched_torch_load
-        try:
-            model = whisper.load_model(task.model_path, device=device)
-        finally:
-            torch.load = original_torch_load
+        word_level_timings = task.transcription_options.word_level_timings
 
-        if task.transcription_options.word_level_timings:
-            stable_whisper.modify_model(model)
-            result: WhisperResult = model.transcribe(
-                audio=whisper_audio.load_audio(task.file_path),
-                language=task.transcription_options.language,
-                task=task.transcription_options.task.value,
-                temperature=DEFAULT_WHISPER_TEMPERATURE,
-                initial_prompt=task.transcription_options.initial_prompt,
-                no_speech_threshold=0.4,
-                fp16=False,
-            )
-            return [
-                Segment(
-                    start=int(word.start * 1000),
-                    end=int(word.end * 1000),
-                    text=word.word.strip(),
-                    translation=""
-                )
-                for segment in result.segments
-                for word in segment.words
-            ]
-
-        result: dict = model.transcribe(
-            audio=whisper_audio.load_audio(task.file_path),
-            language=task.transcription_options.language,
-            task=task.transcription_options.task.value,
-            temperature=task.transcription_options.temperature,
-            initial_prompt=task.transcription_options.initial_prompt,
-            verbose=False,
-            fp16=False,
+        def load_model():
+            torch.load = patched_torch_load
+            try:
+                model = whisper.load_model(task.model_path, device=device)
+            finally:
+                torch.load = original_torch_load
+            if word_level_timings:
+                stable_whisper.modify_model(model)
+            return model
+
+        # stable-ts replaces transcribe() of the model it modifies, a cached
+        # model is kept for each kind of transcription
+        model = cls._load_model(
+            (
+                ModelType.WHISPER.value,
+                task.model_path,
+                "stable-ts" if word_level_timings else "default",
+                device,
+            ),
+            load_model,
         )
-        segments = result.get("segments")
-        return [
-            Segment(
-                start=int(segment.get("start") * 1000),
-                end=int(segment.get("end") * 1000),
-                text=segment.get("text"),
-                translation=""
-            )
-            for segment in segments
-        ]
+
+        # Greedy decoding unless calibration picked a beam size
+        decode_options = {"beam_size": task.beam_size} if task.beam_size else {}
+
+        language = task.transcription_options.language
+        previous_segments: Deque[Segment] = deque(maxlen=WINDOW_PROMPT_SEGMENTS)
+        segments: List[Segment] = []
+        for offset, audio in iter_audio_windows(
+            task.file_path, task.audio_start, task.audio_end
+        ):
+            initial_prompt = get_window_prompt(task, previous_segments, offset)
+            if word_level_timings:
+                result: WhisperResult = model.transcribe(
+                    audio=audio,
+                    language=language,
+                    task=task.transcription_options.task.value,
+                    temperature=DEFAULT_WHISPER_TEMPERATURE,
+                    initial_prompt=initial_prompt,
+                    no_speech_threshold=0.4,
+                    fp16=False,
+                    **decode_options,
+                )
+                language = result.language
+                window_segments = [
+                    Segment(
+                        start=offset + int(word.start * 1000),
+                        end=offset + int(word.end * 1000),
+                        text=word.word.strip(),
+                        translation=""
+                    )
+                    for segment in result.segments
+                    for word in segment.words
+                ]
+            else:
+                result: dict = model.transcribe(
+                    audio=audio,
+                    language=language,
+                    task=task.transcription_options.task.value,
+                    temperature=task.transcription_options.temperature,
+                    initial_prompt=initial_prompt,
+                    verbose=False,
+                    fp16=False,
+                    **decode_options,
+                )
+                language = result.get("language")
+                window_segments = [
+                    Segment(
+                        start=offset + int(segment.get("start") * 1000),
+                        end=offset + int(segment.get("end") * 1000),
+                        text=segment.get("text"),
+                        translation=""
+                    )
+                    for segment in result.get("segments")
+                ]
+
+            segments.extend(window_segments)
+            previous_segments.extend(window_segments)
+
+        return segments
 
     def stop(self):
         self.stopped = True
 
+        if self.model_pool is not None:
+            if self.started_process and self.model_worker is not None:
+                # Ask the worker to drop the task but keep its loaded models; only
+                # kill it if it does not react in time.
+                self.model_worker.cancel()
+                if not self.model_worker_done.wait(timeout=10):
+                    logging.warning("Warm model worker did not cancel in time, terminating it")
+                    self.model_worker.terminate()
+            return
+
         if self.started_process:
             # Kill the whisper-cli subprocess the worker spawned first. The
             # worker's own terminate() below does not reach it, so it would
@@ -488,14 +890,15 @@ class WhisperFileTranscriber(FileTranscriber):
                 self.current_process.kill()
                 self.current_process.join(timeout=5)
 
-    def read_line(self, pipe: Connection):
+    def _add_timing(self, stage: Stage, seconds: float):
+        add_timing(self.transcription_task.timings, stage, seconds)
+
+    def read_messages(self, pipe: Connection) -> bool:
+        """Read worker messages until the last one of the task. Returns False if
+        the pipe closed before that."""
         while True:
             try:
-                line = pipe.recv().strip()
-
-                # Uncomment to debug
-                # print(f"*** DEBUG ***: {line}")
-
+                message = receive_message(pipe)
             except (EOFError, BrokenPipeError, ConnectionResetError, OSError):
                 # Connection closed, broken, or process crashed (Windows RPC errors raise OSError)
                 break
@@ -503,29 +906,21 @@ class WhisperFileTranscriber(FileTranscriber):
                 logging.debug(f"Error reading from pipe: {e}")
                 break
 
-            if line == self.READ_LINE_THREAD_STOP_TOKEN:
-                return
-
-            if line.startswith("segments = "):
-                segments_dict = json.loads(line[11:])
-                segments = [
-                    Segment(
-                        start=segment.get("start"),
-                        end=segment.get("end"),
-                        text=segment.get("text"),
-                        translation=""
-                    )
-                    for segment in segments_dict
-                ]
-                self.segments = segments
-            elif line.startswith("error = "):
-                self.error_message = line[8:]
+            if message.kind == MessageKind.DONE:
+                return True
+
+            if message.kind == MessageKind.SEGMENTS:
+                self.segments.extend(message.segments)
+            elif message.kind == MessageKind.CHECKPOINT:
+                self.segments.extend(message.segments)
+                self.checkpoint.emit(message.offset, message.segments)
+            elif message.kind == MessageKind.ERROR:
+                self.error_message = message.text
+            elif message.kind == MessageKind.PROGRESS:
+                self.progress.emit((int(message.progress), 100))
+            elif message.kind == MessageKind.TIMING:
+                self._add_timing(Stage(message.text), message.seconds)
             else:
-                try:
-                    match = PROGRESS_REGEX.search(line)
-                    if match is not None:
-                        progress = int(match.group().strip("%"))
-                        self.progress.emit((progress, 100))
-                except ValueError:
-                    logging.debug("whisper (stderr): %s", line)
-                    continue
+                logging.debug("whisper (stderr): %s", message.text)
+
+        return False
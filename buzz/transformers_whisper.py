@@ -15,6 +15,7 @@ from transformers.pipelines import AutomaticSpeechRecognitionPipeline
 from transformers.pipelines.audio_utils import ffmpeg_read
 from transformers.pipelines.automatic_speech_recognition import is_torchaudio_available
 
+from buzz.hardware import get_capabilities
 from buzz.model_loader import (
     is_mms_model,
     is_parakeet_model,
@@ -193,6 +194,8 @@ class TransformersTranscriber:
         self._is_vibevoice = is_vibevoice_model(model_id)
         self._is_qwen_asr = is_qwen_asr_model(model_id)
         self._is_peft = is_peft_model(model_id)
+        # Loaded Whisper model, kept so a cached transcriber skips reloading
+        self._loaded_whisper = None
 
     @property
     def is_mms_model(self) -> bool:
@@ -272,48 +275,21 @@ class TransformersTranscriber:
     ):
         """Transcribe using Whisper model."""
         force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        use_cuda = torch.cuda.is_available() and force_cpu == "false"
+        use_cuda = get_capabilities().cuda and force_cpu == "false"
         device = "cuda" if use_cuda else "cpu"
         torch_dtype = torch.float16 if use_cuda else torch.float32
 
-        # Check if this is a PEFT model
-        if is_peft_model(self.model_id):
-            model, processor, use_8bit = self._load_peft_model(device, torch_dtype)
+        reduce_gpu_memory = os.getenv("BUZZ_REDUCE_GPU_MEMORY", "false") != "false"
+        load_key = (device, reduce_gpu_memory)
+        if self._loaded_whisper is not None and self._loaded_whisper[0] == load_key:
+            _key, model, processor, use_8bit = self._loaded_whisper
+            if not self._is_peft:
+                model.generation_config.language = language
         else:
-            use_safetensors = True
-            if os.path.isdir(self.model_id):
-                safetensors_files = [f for f in os.listdir(self.model_id) if f.endswith(".safetensors")]
-                use_safetensors = len(safetensors_files) > 0
-
-            # Check if user wants reduced GPU memory usage (8-bit quantization)
-            # Skip on Intel Macs as bitsandbytes is not available there
-            reduce_gpu_memory = os.getenv("BUZZ_REDUCE_GPU_MEMORY", "false") != "false"
-            use_8bit = False
-            if device == "cuda" and reduce_gpu_memory and not is_intel_mac():
-                try:
-                    import bitsandbytes  # noqa: F401
-                    use_8bit = True
-                    print("Using 8-bit quantization for reduced GPU memory usage")
-                except ImportError:
-                    print("bitsandbytes not available, using standard precision")
-
-            if use_8bit:
-                quantization_config = BitsAndBytesConfig(load_in_8bit=True)
-                model = AutoModelForSpeechSeq2Seq.from_pretrained(
-                    self.model_id,
-                    quantization_config=quantization_config,
-                    device_map="auto",
-                    use_safetensors=use_safetensors
-                )
-            else:
-                model = AutoModelForSpeechSeq2Seq.from_pretrained(
-                    self.model_id, dtype=torch_dtype, low_cpu_mem_usage=True, use_safetensors=use_safetensors
-                )
-                model.to(device)
-
-            model.generation_config.language = language
-
-            processor = AutoProcessor.from_pretrained(self.model_id)
+            model, processor, use_8bit = self._load_whisper_model(
+                device, torch_dtype, language
+            )
+            self._loaded_whisper = (load_key, model, processor, use_8bit)
 
         # transformers 5.x deprecates passing generation params alongside a
         # generation_config in the same call; set them on the config instead.
@@ -376,6 +352,49 @@ class TransformersTranscriber:
             "segments": segments,
         }
 
+    def _load_whisper_model(self, device: str, torch_dtype, language: str):
+        """Load a Whisper model and processor, returns (model, processor, use_8bit)."""
+        # Check if this is a PEFT model
+        if is_peft_model(self.model_id):
+            model, processor, use_8bit = self._load_peft_model(device, torch_dtype)
+        else:
+            use_safetensors = True
+            if os.path.isdir(self.model_id):
+                safetensors_files = [f for f in os.listdir(self.model_id) if f.endswith(".safetensors")]
+                use_safetensors = len(safetensors_files) > 0
+
+            # Check if user wants reduced GPU memory usage (8-bit quantization)
+            # Skip on Intel Macs as bitsandbytes is not available there
+            reduce_gpu_memory = os.getenv("BUZZ_REDUCE_GPU_MEMORY", "false") != "false"
+            use_8bit = False
+            if device == "cuda" and reduce_gpu_memory and not is_intel_mac():
+                try:
+                    import bitsandbytes  # noqa: F401
+                    use_8bit = True
+                    print("Using 8-bit quantization for reduced GPU memory usage")
+                except ImportError:
+                    print("bitsandbytes not available, using standard precision")
+
+            if use_8bit:
+                quantization_config = BitsAndBytesConfig(load_in_8bit=True)
+                model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                    self.model_id,
+                    quantization_config=quantization_config,
+                    device_map="auto",
+                    use_safetensors=use_safetensors
+                )
+            else:
+                model = AutoModelForSpeechSeq2Seq.from_pretrained(
+                    self.model_id, dtype=torch_dtype, low_cpu_mem_usage=True, use_safetensors=use_safetensors
+                )
+                model.to(device)
+
+            model.generation_config.language = language
+
+            processor = AutoProcessor.from_pretrained(self.model_id)
+
+        return model, processor, use_8bit
+
     def _load_peft_model(self, device: str, torch_dtype):
         """Load a PEFT (Parameter-Efficient Fine-Tuning) model.
 
@@ -509,7 +528,7 @@ class TransformersTranscriber:
         from transformers.pipelines.audio_utils import ffmpeg_read as pk_ffmpeg_read
 
         force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        use_cuda = torch.cuda.is_available() and force_cpu == "false"
+        use_cuda = get_capabilities().cuda and force_cpu == "false"
         device = "cuda" if use_cuda else "cpu"
         torch_dtype = torch.float16 if use_cuda else torch.float32
 
@@ -602,7 +621,7 @@ class TransformersTranscriber:
         from transformers.pipelines.audio_utils import ffmpeg_read as vv_ffmpeg_read
 
         force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        use_cuda = torch.cuda.is_available() and force_cpu == "false"
+        use_cuda = get_capabilities().cuda and force_cpu == "false"
         device = "cuda" if use_cuda else "cpu"
         torch_dtype = torch.float16 if use_cuda else torch.float32
 
@@ -700,7 +719,7 @@ class TransformersTranscriber:
         from transformers.pipelines.audio_utils import ffmpeg_read as qw_ffmpeg_read
 
         force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        use_cuda = torch.cuda.is_available() and force_cpu == "false"
+        use_cuda = get_capabilities().cuda and force_cpu == "false"
         device = "cuda" if use_cuda else "cpu"
         torch_dtype = torch.float16 if use_cuda else torch.float32
 
@@ -795,7 +814,7 @@ class TransformersTranscriber:
         from transformers.pipelines.audio_utils import ffmpeg_read as mms_ffmpeg_read
 
         force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        use_cuda = torch.cuda.is_available() and force_cpu == "false"
+        use_cuda = get_capabilities().cuda and force_cpu == "false"
         device = "cuda" if use_cuda else "cpu"
 
         # Map language code to ISO 639-3 for MMS
@@ -1,8 +1,6 @@
-import subprocess
 import numpy as np
-import sys
 import os
-import logging
+from typing import Iterator, Optional
 
 from buzz.assets import APP_BASE_DIR
 
@@ -16,6 +14,42 @@ N_SAMPLES = CHUNK_LENGTH * SAMPLE_RATE  # 480000 samples in a 30-second chunk
 app_env = os.environ.copy()
 app_env['PATH'] = os.pathsep.join([os.path.join(APP_BASE_DIR, "_internal")] + [app_env['PATH']])
 
+
+def iter_audio(
+    file: str,
+    chunk_samples: int = N_SAMPLES,
+    sr: int = SAMPLE_RATE,
+    channels: int = 1,
+    start: int = 0,
+    end: Optional[int] = None,
+    reuse_buffer: bool = False,
+) -> Iterator[np.ndarray]:
+    """
+    Decode an audio file in the process and yield it in chunks of
+    ``chunk_samples`` float32 samples, without holding the whole waveform in
+    memory, see buzz.media_io.iter_audio
+
+    Parameters
+    ----------
+    file: str
+        The audio file to open
+
+    sr: int
+        The sample rate to resample the audio if necessary
+
+    start, end: int
+        The part of the file to decode in ms, to the end of the file if
+        ``end`` is None
+
+    reuse_buffer: bool
+        Fill the same array for every chunk, the next chunk overwrites the
+        previous one
+    """
+    from buzz.media_io import iter_audio as decode_audio
+
+    return decode_audio(file, chunk_samples, sr, channels, start, end, reuse_buffer)
+
+
 def load_audio(file: str, sr: int = SAMPLE_RATE):
     """
     Open an audio file and read as mono waveform, resampling as necessary
@@ -30,41 +64,18 @@ def load_audio(file: str, sr: int = SAMPLE_RATE):
 
     Returns
     -------
-    A NumPy array containing the audio waveform, in float32 dtype.
+    A read-only NumPy array containing the audio waveform, in float32 dtype.
+    It is memory-mapped from the decoded audio cache.
     """
+    from buzz.audio_cache import load_pcm
+
+    return load_pcm(file, sample_rate=sr)
+
 
-    # This launches a subprocess to decode audio while down-mixing
-    # and resampling as necessary.  Requires the ffmpeg CLI in PATH.
-    # fmt: off
-    cmd = [
-        "ffmpeg",
-        "-nostdin",
-        "-threads", "0",
-        "-i", file,
-        "-f", "s16le",
-        "-ac", "1",
-        "-acodec", "pcm_s16le",
-        "-ar", str(sr),
-        "-loglevel", "panic",
-        "-"
-    ]
-    # fmt: on
-    if sys.platform == "win32":
-        si = subprocess.STARTUPINFO()
-        si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        si.wShowWindow = subprocess.SW_HIDE
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            startupinfo=si,
-            env=app_env,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-    else:
-        result = subprocess.run(cmd, capture_output=True)
-
-    if result.returncode != 0 and len(result.stderr):
-        error_text = result.stderr.decode("utf-8", errors="replace")
-        raise RuntimeError(f"FFMPEG Failed to load audio: {error_text}")
-
-    return np.frombuffer(result.stdout, np.int16).flatten().astype(np.float32) / 32768.0
+def load_audio_range(file: str, start: int = 0, end: Optional[int] = None, sr: int = SAMPLE_RATE):
+    """
+    Open the part of an audio file from ``start`` to ``end`` ms (or the end of
+    the file), see load_audio
+    """
+    audio = load_audio(file, sr)
+    return audio[start * sr // 1000:None if end is None else end * sr // 1000]
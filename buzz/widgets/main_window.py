@@ -1,6 +1,7 @@
 import os
 import logging
-from typing import Tuple, List, Optional
+import time
+from typing import Dict, Tuple, List, Optional, Set
 from uuid import UUID
 
 from PyQt6 import QtGui
@@ -31,6 +32,9 @@ from buzz.update_checker import UpdateChecker, UpdateInfo
 from buzz.widgets.update_dialog import UpdateDialog
 from buzz.settings.shortcuts import Shortcuts
 from buzz.store.keyring_store import set_password, Key
+from buzz.transcriber.metrics import Stage, add_timing, write_metrics
+from buzz.transcriber.result_cache import ResultCache, get_result_cache_max_size
+from buzz.transcriber.task_scheduler import SchedulingPolicy
 from buzz.transcriber.transcriber import (
     FileTranscriptionTask,
     TranscriptionOptions,
@@ -59,6 +63,8 @@ from buzz.widgets.transcription_viewer.transcription_viewer_widget import (
 class MainWindow(QMainWindow):
     table_widget: TranscriptionTasksTableWidget
     transcriptions_updated = pyqtSignal(UUID)
+    # Segments of a transcription were added while it runs, or replaced when it completes
+    segments_updated = pyqtSignal(UUID)
 
     def __init__(self, transcription_service: TranscriptionService):
         super().__init__(flags=Qt.WindowType.Window)
@@ -73,6 +79,9 @@ class MainWindow(QMainWindow):
         self.shortcuts = Shortcuts(settings=self.settings)
 
         self.quit_on_complete = False
+        # Tasks added in this session that have not completed or failed yet
+        self.unfinished_task_ids: Set[UUID] = set()
+        self.queue_positions: Dict[str, int] = {}
         self.transcription_service = transcription_service
 
         self.plugin_manager = PluginManager(self.transcription_service, self.settings)
@@ -125,6 +134,9 @@ class MainWindow(QMainWindow):
             self.on_openai_access_token_changed
         )
         self.menu_bar.preferences_changed.connect(self.on_preferences_changed)
+        self.menu_bar.export_metrics_action_triggered.connect(
+            self.on_export_metrics_action_triggered
+        )
         self.setMenuBar(self.menu_bar)
 
         self.table_widget = TranscriptionTasksTableWidget(self)
@@ -144,8 +156,24 @@ class MainWindow(QMainWindow):
         # Start transcriber thread
         self.transcriber_thread = QThread()
 
-        self.transcriber_worker = FileTranscriberQueueWorker()
+        self.transcriber_worker = FileTranscriberQueueWorker(
+            max_concurrent_tasks=self.settings.value(
+                Settings.Key.FILE_TRANSCRIBER_CONCURRENT_TASKS, 1
+            ),
+            scheduling_policy=self.get_scheduling_policy(),
+        )
         self.transcriber_worker.plugin_manager = self.plugin_manager
+
+        result_cache_max_size = get_result_cache_max_size()
+        self.result_cache = (
+            ResultCache(
+                db_path=self.transcription_service.transcription_dao.db.databaseName(),
+                max_size=result_cache_max_size,
+            )
+            if result_cache_max_size > 0
+            else None
+        )
+        self.transcriber_worker.result_cache = self.result_cache
         self.transcriber_worker.moveToThread(self.transcriber_thread)
 
         self.transcriber_worker.task_started.connect(self.on_task_started)
@@ -155,6 +183,15 @@ class MainWindow(QMainWindow):
         )
         self.transcriber_worker.task_error.connect(self.on_task_error)
         self.transcriber_worker.task_completed.connect(self.on_task_completed)
+        self.transcriber_worker.task_checkpoint.connect(self.on_task_checkpoint)
+        self.transcriber_worker.queue_positions_changed.connect(
+            self.on_queue_positions_changed
+        )
+        # The worker's thread blocks while waiting for tasks, call it directly
+        self.table_widget.task_priority_changed.connect(
+            self.transcriber_worker.set_task_priority,
+            Qt.ConnectionType.DirectConnection,
+        )
 
         self.transcriber_worker.completed.connect(self.transcriber_thread.quit)
 
@@ -181,6 +218,21 @@ class MainWindow(QMainWindow):
         self.save_preferences(preferences)
         self.folder_watcher.set_preferences(preferences.folder_watch)
         self.folder_watcher.find_tasks()
+        self.transcriber_worker.set_max_concurrent_tasks(
+            self.settings.value(Settings.Key.FILE_TRANSCRIBER_CONCURRENT_TASKS, 1)
+        )
+        self.transcriber_worker.set_scheduling_policy(self.get_scheduling_policy())
+
+    def get_scheduling_policy(self) -> SchedulingPolicy:
+        try:
+            return SchedulingPolicy(
+                self.settings.value(
+                    Settings.Key.FILE_TRANSCRIBER_SCHEDULING_POLICY,
+                    SchedulingPolicy.FIFO.value,
+                )
+            )
+        except ValueError:
+            return SchedulingPolicy.FIFO
 
     def save_preferences(self, preferences: Preferences):
         self.settings.settings.beginGroup("preferences")
@@ -303,6 +355,25 @@ class MainWindow(QMainWindow):
             return
         self.open_file_transcriber_widget(file_paths)
 
+    def on_export_metrics_action_triggered(self):
+        (path, __) = QFileDialog.getSaveFileName(
+            self,
+            _("Export Metrics"),
+            "transcription-metrics.csv",
+            _("CSV files (*.csv);;JSON files (*.json)"),
+        )
+        if not path:
+            return
+
+        try:
+            write_metrics(
+                path, self.transcription_service.get_transcriptions_with_metrics()
+            )
+        except OSError as e:
+            QMessageBox.warning(
+                self, _("Error"), _("Failed to export metrics: {}").format(str(e))
+            )
+
     def open_file_transcriber_widget(
         self, file_paths: Optional[List[str]] = None, url: Optional[str] = None
     ):
@@ -361,6 +432,8 @@ class MainWindow(QMainWindow):
         return FileTranscriptionTask.Status(transcription.status) in (
             FileTranscriptionTask.Status.COMPLETED,
             FileTranscriptionTask.Status.SKIPPED,
+            # Shows the segments transcribed so far, updated live
+            FileTranscriptionTask.Status.IN_PROGRESS,
         )
 
     def should_enable_stop_transcription_action(self):
@@ -407,12 +480,14 @@ class MainWindow(QMainWindow):
             parent=self,
             flags=Qt.WindowType.Window,
             transcriptions_updated_signal=self.transcriptions_updated,
+            segments_updated_signal=self.segments_updated,
         )
         self.transcription_viewer_widget.show()
 
     def add_task(self, task: FileTranscriptionTask):
         self.transcription_service.create_transcription(task)
         self.table_widget.refresh_all()
+        self.unfinished_task_ids.add(task.uid)
         self.transcriber_worker.add_task(task)
 
     def on_transcriptions_updated(self):
@@ -432,14 +507,21 @@ class MainWindow(QMainWindow):
         # TODO: Save download progress in the database
         pass
 
+    def on_task_checkpoint(
+        self, task: FileTranscriptionTask, resume_offset: int, segments: List[Segment]
+    ):
+        self.transcription_service.add_transcription_checkpoint(
+            task.uid, resume_offset, segments
+        )
+        self.segments_updated.emit(task.uid)
+
     def on_task_completed(self, task: FileTranscriptionTask, segments: List[Segment]):
         # Handle skipped tasks (e.g. plugin detected file already transcribed)
         if task.status == FileTranscriptionTask.Status.SKIPPED:
             self.transcription_service.update_transcription_as_skipped(task.uid, segments)
+            self.save_task_metrics(task)
             self.table_widget.refresh_row(task.uid)
-            if self.quit_on_complete:
-                self.close()
-                QApplication.quit()
+            self.quit_if_all_tasks_finished(task)
             return
 
         # Update file path in database only for URL imports where file is downloaded
@@ -458,12 +540,13 @@ class MainWindow(QMainWindow):
         run_async = (
             self.plugin_manager.has_enabled_post_hooks() and not self.quit_on_complete
         )
+        persist_started = time.perf_counter()
         if run_async:
             runnable = FnRunnable(
                 lambda: self.plugin_manager.process_completed(task, segments)
             )
             runnable.signals.finished.connect(
-                lambda: self.table_widget.refresh_row(task.uid)
+                lambda: self.on_task_saved(task, persist_started)
             )
             runnable.signals.error.connect(
                 lambda e: logging.error(f"Plugin post-processing failed: {e}")
@@ -471,21 +554,55 @@ class MainWindow(QMainWindow):
             QThreadPool.globalInstance().start(runnable)
         elif self.plugin_manager.has_enabled_post_hooks():
             self.plugin_manager.process_completed(task, segments)
-            self.table_widget.refresh_row(task.uid)
+            self.on_task_saved(task, persist_started)
         else:
             self.transcription_service.update_transcription_as_completed(task.uid, segments)
-            self.table_widget.refresh_row(task.uid)
+            self.on_task_saved(task, persist_started)
 
-        if self.quit_on_complete:
-            self.close()
-            QApplication.quit()
+        self.quit_if_all_tasks_finished(task)
+
+    def on_task_saved(
+        self, task: FileTranscriptionTask, persist_started: Optional[float] = None
+    ):
+        if persist_started is not None:
+            # Includes the post-processing plugins, which save the result
+            add_timing(
+                task.timings, Stage.DB_PERSIST, time.perf_counter() - persist_started
+            )
+        self.save_task_metrics(task)
 
+        if self.result_cache is not None and task.cache_key is not None:
+            self.result_cache.put(task.cache_key, str(task.uid))
+
+        self.table_widget.refresh_row(task.uid)
+        self.segments_updated.emit(task.uid)
+
+    def save_task_metrics(self, task: FileTranscriptionTask):
+        try:
+            self.transcription_service.update_transcription_metrics(
+                task.uid, task.timings, task.audio_duration
+            )
+        except Exception as e:
+            logging.error(f"Could not save metrics of transcription: {e}")
+
+
+    def on_queue_positions_changed(self, positions: dict):
+        self.transcription_service.update_transcription_queue_positions(positions)
+        for id in set(positions) | set(self.queue_positions):
+            self.table_widget.refresh_row(UUID(id))
+        self.queue_positions = positions
 
     def on_task_error(self, task: FileTranscriptionTask, error: str):
         self.transcription_service.update_transcription_as_failed(task.uid, error)
+        self.save_task_metrics(task)
         self.table_widget.refresh_row(task.uid)
 
-        if self.quit_on_complete:
+        self.quit_if_all_tasks_finished(task)
+
+    def quit_if_all_tasks_finished(self, task: FileTranscriptionTask):
+        self.unfinished_task_ids.discard(task.uid)
+        # Several tasks may run at once, wait for the last one
+        if self.quit_on_complete and len(self.unfinished_task_ids) == 0:
             self.close()
             QApplication.quit()
 
@@ -530,6 +647,9 @@ class MainWindow(QMainWindow):
         if self.transcription_viewer_widget is not None:
             self.transcription_viewer_widget.close()
 
+        if self.result_cache is not None:
+            self.result_cache.close()
+
         try:
             from buzz.widgets.application import Application
             app = Application.instance()
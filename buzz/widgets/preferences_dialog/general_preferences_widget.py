@@ -1,3 +1,4 @@
+import os
 import re
 import logging
 import requests
@@ -28,6 +29,7 @@ from buzz.widgets.openai_api_key_line_edit import OpenAIAPIKeyLineEdit
 from buzz.locale import _
 from buzz.widgets.icon import INFO_ICON_PATH
 from buzz.settings.recording_transcriber_mode import RecordingTranscriberMode
+from buzz.transcriber.task_scheduler import SchedulingPolicy
 
 BASE64_PATTERN = re.compile(r'^[A-Za-z0-9+/=_-]*$')
 
@@ -222,6 +224,52 @@ class GeneralPreferencesWidget(QWidget):
         self.force_cpu_checkbox.stateChanged.connect(self.on_force_cpu_changed)
         layout.addRow(_("Disable GPU"), self.force_cpu_checkbox)
 
+        self.concurrent_tasks_spin_box = QSpinBox(self)
+        self.concurrent_tasks_spin_box.setObjectName("ConcurrentTasksSpinBox")
+        self.concurrent_tasks_spin_box.setMinimum(1)
+        self.concurrent_tasks_spin_box.setMaximum(max(1, os.cpu_count() or 1))
+        self.concurrent_tasks_spin_box.setValue(
+            self.settings.value(
+                key=Settings.Key.FILE_TRANSCRIBER_CONCURRENT_TASKS, default_value=1
+            )
+        )
+        self.concurrent_tasks_spin_box.setToolTip(
+            _("Number of files transcribed at the same time. "
+              "CPU threads are split between them.")
+        )
+        self.concurrent_tasks_spin_box.valueChanged.connect(
+            self.on_concurrent_tasks_changed
+        )
+        layout.addRow(_("Concurrent transcriptions"), self.concurrent_tasks_spin_box)
+
+        self.scheduling_policy_combo_box = QComboBox(self)
+        self.scheduling_policy_combo_box.setObjectName("SchedulingPolicyComboBox")
+        for policy, label in [
+            (SchedulingPolicy.FIFO, _("In order added")),
+            (SchedulingPolicy.SHORTEST_FIRST, _("Shortest file first")),
+            (SchedulingPolicy.PRIORITY, _("By priority")),
+        ]:
+            self.scheduling_policy_combo_box.addItem(label, policy.value)
+        self.scheduling_policy_combo_box.setCurrentIndex(
+            max(
+                0,
+                self.scheduling_policy_combo_box.findData(
+                    self.settings.value(
+                        Settings.Key.FILE_TRANSCRIBER_SCHEDULING_POLICY,
+                        SchedulingPolicy.FIFO.value,
+                    )
+                ),
+            )
+        )
+        self.scheduling_policy_combo_box.setToolTip(
+            _("Order in which queued files are transcribed. "
+              "Files that wait long enough move up the queue.")
+        )
+        self.scheduling_policy_combo_box.currentIndexChanged.connect(
+            self.on_scheduling_policy_changed
+        )
+        layout.addRow(_("Transcription order"), self.scheduling_policy_combo_box)
+
         self.setLayout(layout)
 
     def on_default_export_file_name_changed(self, text: str):
@@ -314,6 +362,15 @@ class GeneralPreferencesWidget(QWidget):
     def on_recording_transcriber_mode_changed(self, value):
         self.settings.set_value(Settings.Key.RECORDING_TRANSCRIBER_MODE, value)
 
+    def on_concurrent_tasks_changed(self, value: int):
+        self.settings.set_value(Settings.Key.FILE_TRANSCRIBER_CONCURRENT_TASKS, value)
+
+    def on_scheduling_policy_changed(self, index: int):
+        self.settings.set_value(
+            Settings.Key.FILE_TRANSCRIBER_SCHEDULING_POLICY,
+            self.scheduling_policy_combo_box.itemData(index),
+        )
+
     def on_force_cpu_changed(self, state: int):
         import os
         self.force_cpu_enabled = state == 2
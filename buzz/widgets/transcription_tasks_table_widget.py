@@ -25,6 +25,13 @@ from PyQt6.QtWidgets import (
 from buzz.db.entity.transcription import Transcription
 from buzz.locale import _
 from buzz.settings.settings import Settings
+from buzz.transcriber.metrics import format_stage_timings
+from buzz.transcriber.task_scheduler import (
+    SchedulingPolicy,
+    TASK_PRIORITY_HIGH,
+    TASK_PRIORITY_LOW,
+    TASK_PRIORITY_NORMAL,
+)
 from buzz.transcriber.transcriber import FileTranscriptionTask, Task, TASK_LABEL_TRANSLATIONS
 from buzz.widgets.record_delegate import RecordDelegate
 from buzz.widgets.transcription_record import TranscriptionRecord
@@ -52,6 +59,11 @@ class Column(enum.Enum):
     EXTRACT_SPEECH = 18
     NAME = 19
     NOTES = 20
+    QUEUE_POSITION = 21
+    RESUME_OFFSET = 22
+    AUDIO_DURATION = 23
+    REAL_TIME_FACTOR = 24
+    METRICS = 25
 
 
 @dataclass
@@ -62,6 +74,8 @@ class ColDef:
     width: Optional[int] = None
     delegate: Optional[QStyledItemDelegate] = None
     hidden_toggleable: bool = True
+    # Toggleable columns shown until the user hides them
+    visible_by_default: bool = True
 
 
 def format_record_status_text(record: QSqlRecord) -> str:
@@ -106,6 +120,30 @@ def format_record_status_text(record: QSqlRecord) -> str:
         case _: # Case to handle UNKNOWN status
             return ""
 
+
+def format_record_queue_position_text(record: QSqlRecord) -> str:
+    position = record.value("queue_position")
+    if record.value("status") != FileTranscriptionTask.Status.QUEUED.value or not position:
+        return ""
+    return str(position)
+
+
+def format_record_audio_duration_text(record: QSqlRecord) -> str:
+    audio_duration = record.value("audio_duration")
+    if not audio_duration:
+        return ""
+    return TranscriptionTasksTableWidget.format_timedelta(
+        timedelta(seconds=audio_duration)
+    )
+
+
+def format_record_real_time_factor_text(record: QSqlRecord) -> str:
+    real_time_factor = record.value("real_time_factor")
+    if not real_time_factor:
+        return ""
+    return f"{real_time_factor:.2f}"
+
+
 column_definitions = [
     ColDef(
         id="file_name",
@@ -170,6 +208,13 @@ column_definitions = [
             ).strftime("%Y-%m-%d %H:%M:%S")
         ),
     ),
+    ColDef(
+        id="queue_position",
+        header=_("Queue Position"),
+        column=Column.QUEUE_POSITION,
+        width=120,
+        delegate=RecordDelegate(text_getter=format_record_queue_position_text),
+    ),
     ColDef(
         id="notes",
         header=_("Notes"),
@@ -180,6 +225,32 @@ column_definitions = [
         ),
         hidden_toggleable=True,
     ),
+    ColDef(
+        id="audio_duration",
+        header=_("Audio Duration"),
+        column=Column.AUDIO_DURATION,
+        width=120,
+        delegate=RecordDelegate(text_getter=format_record_audio_duration_text),
+        visible_by_default=False,
+    ),
+    ColDef(
+        id="real_time_factor",
+        header=_("Real-time Factor"),
+        column=Column.REAL_TIME_FACTOR,
+        width=120,
+        delegate=RecordDelegate(text_getter=format_record_real_time_factor_text),
+        visible_by_default=False,
+    ),
+    ColDef(
+        id="stage_timings",
+        header=_("Stage Timings"),
+        column=Column.METRICS,
+        width=400,
+        delegate=RecordDelegate(
+            text_getter=lambda record: format_stage_timings(record.value("metrics"))
+        ),
+        visible_by_default=False,
+    ),
 ]
 
 class TranscriptionTasksTableHeaderView(QHeaderView):
@@ -250,6 +321,7 @@ class TranscriptionTasksTableHeaderView(QHeaderView):
 class TranscriptionTasksTableWidget(QTableView):
     return_clicked = pyqtSignal()
     delete_requested = pyqtSignal()
+    task_priority_changed = pyqtSignal(UUID, int)
 
     def __init__(self, parent: Optional[QWidget] = None):
         super().__init__(parent)
@@ -323,6 +395,29 @@ class TranscriptionTasksTableWidget(QTableView):
                 restart_action = menu.addAction(_("Restart Transcription"))
                 restart_action.triggered.connect(self.on_restart_transcription_action)
                 menu.addSeparator()
+
+            # Priorities only matter when the queue is not first-in, first-out
+            scheduling_policy = self.settings.value(
+                Settings.Key.FILE_TRANSCRIBER_SCHEDULING_POLICY,
+                SchedulingPolicy.FIFO.value,
+            )
+            if (
+                transcription.status == FileTranscriptionTask.Status.QUEUED.value
+                and scheduling_policy != SchedulingPolicy.FIFO.value
+            ):
+                priority_menu = menu.addMenu(_("Priority"))
+                for label, priority in [
+                    (_("High"), TASK_PRIORITY_HIGH),
+                    (_("Normal"), TASK_PRIORITY_NORMAL),
+                    (_("Low"), TASK_PRIORITY_LOW),
+                ]:
+                    priority_action = priority_menu.addAction(label)
+                    priority_action.triggered.connect(
+                        lambda checked, priority=priority: self.task_priority_changed.emit(
+                            transcription.id_as_uuid, priority
+                        )
+                    )
+                menu.addSeparator()
             
             rename_action = menu.addAction(_("Rename"))
             rename_action.triggered.connect(self.on_rename_action)
@@ -420,7 +515,9 @@ class TranscriptionTasksTableWidget(QTableView):
         for definition in column_definitions:
             visible = True
             if definition.hidden_toggleable:
-                value = self.settings.settings.value(definition.id, "true")
+                value = self.settings.settings.value(
+                    definition.id, "true" if definition.visible_by_default else "false"
+                )
                 visible = value in {"true", "True", True}
             
             self.setColumnHidden(definition.column.value, not visible)
@@ -730,6 +827,7 @@ class TranscriptionTasksTableWidget(QTableView):
             FileTranscriptionTask, 
             TranscriptionOptions, 
             FileTranscriptionOptions,
+            Segment,
             Task
         )
         from buzz.model_loader import TranscriptionModel, ModelType
@@ -806,6 +904,20 @@ class TranscriptionTasksTableWidget(QTableView):
             source=FileTranscriptionTask.Source(transcription.source) if transcription.source else FileTranscriptionTask.Source.FILE_IMPORT,
             uid=UUID(transcription.id)
         )
+
+        # Continue after the last checkpoint of the interrupted run
+        if transcription.resume_offset:
+            task.resume_offset = transcription.resume_offset
+            task.segments = [
+                Segment(
+                    start=segment.start_time,
+                    end=segment.end_time,
+                    text=segment.text,
+                )
+                for segment in self.transcription_service.get_transcription_segments(
+                    UUID(transcription.id)
+                )
+            ]
         
         # Add the task to the queue worker
         # We need to access the main window's transcriber worker
@@ -18,7 +18,6 @@ try:
 except ImportError:
     pass
 
-import faster_whisper
 import torch
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtCore import Qt, QThread, QObject, pyqtSignal, QUrl, QTimer
@@ -39,6 +38,8 @@ from PyQt6.QtWidgets import (
     QSizePolicy,
     QLayout,
 )
+from buzz import whisper_audio
+from buzz.hardware import get_capabilities
 from buzz.locale import _
 from buzz.db.entity.transcription import Transcription
 from buzz.db.service.transcription_service import TranscriptionService
@@ -198,12 +199,12 @@ class IdentificationWorker(QObject):
         full_transcript = " ".join(segment.text for segment in segments)
         full_transcript = re.sub(r' {2,}', ' ', full_transcript)
 
-        audio_waveform = faster_whisper.decode_audio(self.transcription.file)
+        audio_waveform = whisper_audio.load_audio(self.transcription.file)
         return language, full_transcript, audio_waveform
 
     def _setup_device(self):
         force_cpu = os.getenv("BUZZ_FORCE_CPU", "false")
-        use_cuda = torch.cuda.is_available() and force_cpu == "false"
+        use_cuda = get_capabilities().cuda and force_cpu == "false"
         device = "cuda" if use_cuda else "cpu"
         torch_dtype = torch.float16 if use_cuda else torch.float32
 
@@ -245,7 +245,7 @@ class TranscriptionSegmentsEditorWidget(QTableView):
 
     def keyPressEvent(self, event):
         # Allow Enter/Return to trigger editing
-        if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+        if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter) and self.editable:
             current_index = self.currentIndex()
             if current_index.isValid() and not self.state() == QAbstractItemView.State.EditingState:
                 self.edit(current_index)
@@ -300,10 +300,8 @@ class TranscriptionSegmentsEditorWidget(QTableView):
         self.verticalHeader().hide()
         self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.setSelectionMode(QTableView.SelectionMode.SingleSelection)
-        self.setEditTriggers(
-            QAbstractItemView.EditTrigger.EditKeyPressed |
-            QAbstractItemView.EditTrigger.DoubleClicked
-        )
+        self.editable = True
+        self.set_editable(True)
         self.selectionModel().selectionChanged.connect(self.on_selection_changed)
         model.select()
         model.rowsInserted.connect(self.init_row_height)
@@ -322,6 +320,29 @@ class TranscriptionSegmentsEditorWidget(QTableView):
 
         self.setWordWrap(True)
 
+    def set_editable(self, editable: bool):
+        self.editable = editable
+        if editable:
+            self.setEditTriggers(
+                QAbstractItemView.EditTrigger.EditKeyPressed |
+                QAbstractItemView.EditTrigger.DoubleClicked
+            )
+        else:
+            self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+
+    def reload(self):
+        """Reload the segments from the database, keeping the view at the end
+        if it was showing the last segment."""
+        scroll_bar = self.verticalScrollBar()
+        follow = scroll_bar.value() == scroll_bar.maximum()
+
+        self.model().select()
+        self.init_row_height()
+
+        if follow:
+            self._fetch_all_rows()
+            self.scrollToBottom()
+
     def init_row_height(self):
         font_metrics = QFontMetrics(self.font())
         max_row_height = font_metrics.height() * 4
@@ -48,7 +48,11 @@ from buzz.widgets.icon import (
 from buzz.translator import Translator
 from buzz.widgets.text_display_box import TextDisplayBox
 from buzz.widgets.toolbar import ToolBar
-from buzz.transcriber.transcriber import TranscriptionOptions, Segment
+from buzz.transcriber.transcriber import (
+    FileTranscriptionTask,
+    TranscriptionOptions,
+    Segment,
+)
 from buzz.widgets.transcriber.advanced_settings_dialog import AdvancedSettingsDialog
 from buzz.widgets.transcription_viewer.export_transcription_menu import (
     ExportTranscriptionMenu,
@@ -83,6 +87,7 @@ class TranscriptionViewerWidget(QWidget):
         parent: Optional["QWidget"] = None,
         flags: Qt.WindowType = Qt.WindowType.Widget,
         transcriptions_updated_signal: Optional[pyqtSignal] = None,
+        segments_updated_signal: Optional[pyqtSignal] = None,
     ) -> None:
         super().__init__(parent, flags)
         self.transcription = transcription
@@ -120,6 +125,30 @@ class TranscriptionViewerWidget(QWidget):
         self._setup_toolbar()
         self._finalize_ui()
 
+        # A running transcription is shown read-only and follows new segments
+        self.table_widget.set_editable(not self.is_transcription_running())
+        if segments_updated_signal is not None:
+            segments_updated_signal.connect(self.on_segments_updated)
+
+    def is_transcription_running(self) -> bool:
+        return (
+            self.transcription.status
+            == FileTranscriptionTask.Status.IN_PROGRESS.value
+        )
+
+    def on_segments_updated(self, transcription_id: UUID):
+        if transcription_id != self.transcription.id_as_uuid:
+            return
+
+        transcription = self.transcription_service.get_transcription(transcription_id)
+        if transcription is not None:
+            self.transcription = transcription
+
+        self.table_widget.reload()
+        self.table_widget.set_editable(not self.is_transcription_running())
+        if self.view_mode == ViewMode.TEXT:
+            self.reset_view()
+
     def _init_search_debounce(self):
         self.search_text = ""
         self.current_search_index = 0
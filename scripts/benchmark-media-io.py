@@ -0,0 +1,122 @@
+"""Compare in-process media I/O with PyAV to running ffmpeg and ffprobe.
+
+Times decoding to 16 kHz mono float32, probing the duration and encoding to
+MP3 with buzz.media_io and with the subprocesses Buzz used to spawn:
+
+    uv run python scripts/benchmark-media-io.py testdata/whisper-french.mp3
+    uv run python scripts/benchmark-media-io.py --repeat 10 --parallel 4 long.mp4
+"""
+
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from buzz import media_io
+from buzz.whisper_audio import SAMPLE_RATE
+
+
+def ffmpeg_decode(file_path: str) -> np.ndarray:
+    # fmt: off
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-threads", "0", "-i", file_path, "-vn",
+            "-f", "f32le", "-ac", "1", "-acodec", "pcm_f32le",
+            "-ar", str(SAMPLE_RATE), "-loglevel", "error", "-",
+        ],
+        capture_output=True,
+        check=True,
+    )
+    # fmt: on
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def pyav_decode(file_path: str) -> np.ndarray:
+    return np.concatenate(
+        list(media_io.iter_audio(file_path, chunk_samples=SAMPLE_RATE * 30, sample_rate=SAMPLE_RATE))
+    )
+
+
+def ffprobe_duration(file_path: str) -> float:
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1", file_path,
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return float(result.stdout)
+
+
+def pyav_duration(file_path: str) -> float:
+    return media_io.probe(file_path).duration_ms / 1000
+
+
+def ffmpeg_encode(samples: np.ndarray, path: str):
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "1",
+            "-i", "-", "-loglevel", "error", path,
+        ],
+        input=samples.tobytes(),
+        check=True,
+    )
+
+
+def pyav_encode(samples: np.ndarray, path: str):
+    media_io.encode_audio(samples, path, SAMPLE_RATE)
+
+
+def measure(function, repeat: int, parallel: int) -> float:
+    """Median seconds of ``parallel`` concurrent calls, over ``repeat`` runs"""
+    times = []
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(executor.map(lambda _: function(), range(parallel)))
+            times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("file", help="Media file to decode")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measure. Default: 5.")
+    parser.add_argument(
+        "--parallel", type=int, default=1, help="Files processed at the same time. Default: 1."
+    )
+    args = parser.parse_args()
+
+    samples = pyav_decode(args.file)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def mp3_path() -> str:
+            return tempfile.mktemp(dir=temp_dir, suffix=".mp3")
+
+        benchmarks = [
+            ("decode", lambda: ffmpeg_decode(args.file), lambda: pyav_decode(args.file)),
+            ("probe", lambda: ffprobe_duration(args.file), lambda: pyav_duration(args.file)),
+            (
+                "encode mp3",
+                lambda: ffmpeg_encode(samples, mp3_path()),
+                lambda: pyav_encode(samples, mp3_path()),
+            ),
+        ]
+
+        print(f"{'':12}{'subprocess':>12}{'pyav':>12}{'speedup':>10}")
+        for name, subprocess_function, pyav_function in benchmarks:
+            subprocess_seconds = measure(subprocess_function, args.repeat, args.parallel)
+            pyav_seconds = measure(pyav_function, args.repeat, args.parallel)
+            print(
+                f"{name:12}{subprocess_seconds:>11.3f}s{pyav_seconds:>11.3f}s"
+                f"{subprocess_seconds / pyav_seconds:>9.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
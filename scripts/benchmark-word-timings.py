@@ -0,0 +1,158 @@
+"""Time parsing word-level timings from whisper-cli JSON output.
+
+Compares WhisperCpp._parse_word_level_timings with the per-token parser it
+replaced on a file written by whisper-cli --output-json-full, or on a
+generated transcript of the given length, and checks both give the same words:
+
+    uv run python scripts/benchmark-word-timings.py --output-json recording.wav.json
+    uv run python scripts/benchmark-word-timings.py --hours 3 --language zh --remap
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from buzz.transcriber.transcriber import Segment
+from buzz.transcriber.whisper_cpp import (
+    WhisperCpp,
+    _chars_of_segment_bytewise,
+    _make_offset_mapper,
+)
+
+WORDS = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "café", "naïve"]
+CHARS = "我们今天讨论语音识别的性能问题"
+
+
+def generate_transcription(hours: float, language: str) -> list:
+    """Segments of about five seconds with tokens as whisper-cli writes them,
+    text read as latin-1 and characters split over tokens"""
+    transcription = []
+    for index in range(int(hours * 3600 / 5)):
+        start = index * 5000
+        tokens = [{"text": "[_BEG_]", "offsets": {"from": start, "to": start}, "p": 1.0}]
+        for position in range(15):
+            if language == "zh":
+                text = random.choice(CHARS).encode("utf-8")
+                pieces = [text[:1], text[1:]] if random.random() < 0.2 else [text]
+            else:
+                text = (" " + random.choice(WORDS)).encode("utf-8")
+                pieces = [text] if random.random() < 0.9 else [b", "]
+            for piece in pieces:
+                offset = start + position * 300
+                tokens.append(
+                    {
+                        "text": piece.decode("latin-1"),
+                        "offsets": {"from": offset, "to": offset + 300},
+                        "p": random.choice([1.0, 0.9, 0.005]),
+                    }
+                )
+        transcription.append(
+            {"offsets": {"from": start, "to": start + 5000}, "text": "", "tokens": tokens}
+        )
+    return transcription
+
+
+def reference_word_level_timings(transcription, language, remap_tokens) -> list:
+    """The parser before batching, decoding a bytes buffer for every token"""
+    segments = []
+    for segment_data in transcription:
+        if language in {"zh", "ja", "th", "lo", "km", "my"}:
+            segments.extend(_chars_of_segment_bytewise(segment_data, remap_tokens))
+            continue
+
+        map_offset = _make_offset_mapper(segment_data, remap_tokens)
+        word_buffer = b""
+        word_start = 0
+        word_end = 0
+
+        def append_word():
+            try:
+                text = word_buffer.decode("utf-8").strip()
+            except UnicodeDecodeError:
+                return
+            if text:
+                segments.append(Segment(start=word_start, end=word_end, text=text, translation=""))
+
+        for token_data in segment_data.get("tokens", []):
+            token_text = token_data.get("text", "")
+            if token_text.startswith("[_") or not token_text or token_data.get("p", 1.0) < 0.01:
+                continue
+
+            token_start = map_offset(int(token_data.get("offsets", {}).get("from", 0)))
+            token_end = map_offset(int(token_data.get("offsets", {}).get("to", 0)))
+            token_bytes = token_text.encode("latin-1")
+
+            if token_bytes.startswith(b" ") and word_buffer:
+                append_word()
+                word_buffer, word_start, word_end = token_bytes, token_start, token_end
+            elif token_bytes.startswith(b", "):
+                word_buffer += b","
+                append_word()
+                word_buffer = token_bytes.lstrip(b",")
+                word_start, word_end = token_start, token_end
+            else:
+                if not word_buffer:
+                    word_start = token_start
+                word_buffer += token_bytes
+                word_end = token_end
+
+        append_word()
+    return segments
+
+
+def measure(function, repeat: int) -> float:
+    """Median seconds of ``repeat`` runs"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output-json", help="JSON output of whisper-cli --output-json-full")
+    parser.add_argument(
+        "--hours", type=float, default=3, help="Length of the generated transcript. Default: 3."
+    )
+    parser.add_argument("--language", default="en", help="Language of the words. Default: en.")
+    parser.add_argument(
+        "--remap", action="store_true", help="Remap token offsets, as with VAD or processors."
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measure. Default: 5.")
+    args = parser.parse_args()
+
+    if args.output_json:
+        with open(args.output_json, "r", encoding="latin-1") as file:
+            transcription = json.load(file).get("transcription", [])
+    else:
+        random.seed(0)
+        transcription = generate_transcription(args.hours, args.language)
+
+    def parse():
+        return list(
+            WhisperCpp._parse_word_level_timings(transcription, args.language, args.remap)
+        )
+
+    def parse_reference():
+        return reference_word_level_timings(transcription, args.language, args.remap)
+
+    words = parse()
+    if words != parse_reference():
+        raise SystemExit("Word timings differ from the reference parser")
+
+    reference_seconds = measure(parse_reference, args.repeat)
+    seconds = measure(parse, args.repeat)
+    tokens = sum(len(segment_data.get("tokens", [])) for segment_data in transcription)
+    print(f"{len(transcription)} segments, {tokens} tokens, {len(words)} words")
+    print(f"{'':12}{'seconds':>12}{'tokens/s':>14}")
+    for name, measured in (("reference", reference_seconds), ("batched", seconds)):
+        print(f"{name:12}{measured:>11.3f}s{tokens / measured:>14,.0f}")
+    print(f"speedup {reference_seconds / seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
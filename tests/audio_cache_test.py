@@ -0,0 +1,118 @@
+import os
+import shutil
+import struct
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import soundfile
+
+from buzz.audio_cache import WAV_HEADER, AudioCache, wav_header
+from buzz.whisper_audio import SAMPLE_RATE
+from tests.audio import test_audio_path
+
+
+@pytest.fixture()
+def audio_cache(tmp_path):
+    return AudioCache(cache_dir=str(tmp_path / "audio"), max_size=1024 * 1024 * 1024)
+
+
+class TestAudioCache:
+    def test_load_returns_memory_mapped_samples(self, audio_cache):
+        samples = audio_cache.load(test_audio_path)
+
+        assert isinstance(samples, np.memmap)
+        assert samples.dtype == np.float32
+        assert not samples.flags.writeable
+        assert len(samples) > SAMPLE_RATE
+
+    def test_decoded_file_is_a_wav_file(self, audio_cache):
+        path = audio_cache.get_path(test_audio_path)
+
+        info = soundfile.info(path)
+        assert info.samplerate == SAMPLE_RATE
+        assert info.channels == 1
+        assert info.frames == len(audio_cache.load(test_audio_path))
+
+    def test_decodes_once(self, audio_cache):
+        first = audio_cache.load(test_audio_path)
+
+        with patch("buzz.media_io.av.open") as mock_open:
+            second = audio_cache.load(test_audio_path)
+
+        mock_open.assert_not_called()
+        np.testing.assert_array_equal(first, second)
+
+    def test_channels(self, audio_cache):
+        samples = audio_cache.load(test_audio_path, sample_rate=44100, channels=2)
+
+        assert samples.shape[1] == 2
+
+    def test_modified_file_is_decoded_again(self, audio_cache, tmp_path):
+        file_path = str(tmp_path / "audio.mp3")
+        shutil.copy(test_audio_path, file_path)
+        first_path = audio_cache.get_path(file_path)
+
+        stat = os.stat(file_path)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert audio_cache.get_path(file_path) != first_path
+
+    def test_evicts_least_recently_used(self, audio_cache):
+        first_path = audio_cache.get_path(test_audio_path, sample_rate=8000)
+        os.utime(first_path, (0, 0))
+
+        audio_cache.max_size = 1
+        second_path = audio_cache.get_path(test_audio_path)
+
+        assert not os.path.exists(first_path)
+        assert os.path.exists(second_path)
+
+    def test_oversized_entry_does_not_evict_others(self, audio_cache):
+        first_path = audio_cache.get_path(test_audio_path, sample_rate=8000)
+        os.utime(first_path, (0, 0))
+
+        # The second entry is over half the cache, it is kept only until the
+        # next entry is decoded
+        audio_cache.max_size = os.path.getsize(first_path) * 2
+        second_path = audio_cache.get_path(test_audio_path)
+        assert os.path.exists(first_path)
+        assert os.path.exists(second_path)
+
+        third_path = audio_cache.get_path(test_audio_path, sample_rate=4000)
+        assert os.path.exists(first_path)
+        assert not os.path.exists(second_path)
+        assert os.path.exists(third_path)
+
+    def test_decoding_error(self, audio_cache, tmp_path):
+        file_path = tmp_path / "not-audio.mp3"
+        file_path.write_text("not audio")
+
+        with pytest.raises(RuntimeError):
+            audio_cache.load(str(file_path))
+
+        assert os.listdir(audio_cache.cache_dir) == []
+
+
+class TestWavHeader:
+    def test_size_stays_the_same(self):
+        assert len(wav_header(SAMPLE_RATE, 1, 0)) == WAV_HEADER.size
+        assert len(wav_header(SAMPLE_RATE, 1, 5 << 30)) == WAV_HEADER.size
+
+    def test_small_file_is_riff(self):
+        header = wav_header(SAMPLE_RATE, 1, 1000)
+        assert header[:4] == b"RIFF"
+        assert struct.unpack_from("<I", header, 4)[0] == WAV_HEADER.size - 8 + 1000
+        assert header[-8:] == b"data" + struct.pack("<I", 1000)
+
+    def test_samples_over_4_gib_are_rf64(self):
+        data_size = 5 << 30
+        header = wav_header(44100, 2, data_size)
+
+        assert header[:4] == b"RF64"
+        assert header[12:16] == b"ds64"
+        riff_size, ds64_data_size, frames = struct.unpack_from("<QQQ", header, 20)
+        assert riff_size == WAV_HEADER.size - 8 + data_size
+        assert ds64_data_size == data_size
+        assert frames == data_size // 8
+        assert header[-8:] == b"data" + struct.pack("<I", 0xFFFFFFFF)
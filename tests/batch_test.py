@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from buzz.batch import (
+    EXIT_OK,
+    EXIT_USAGE,
+    ManifestError,
+    build_task,
+    main,
+    read_manifest,
+    run_task,
+)
+from buzz.transcriber.transcriber import Segment
+from tests.audio import test_audio_path
+
+DEFAULTS = {
+    "model_type": "whisper",
+    "model_size": "tiny",
+    "hugging_face_model_id": "",
+    "language": "",
+    "task": "transcribe",
+    "initial_prompt": "",
+    "word_timestamps": False,
+    "output_formats": ["txt"],
+    "output_directory": "",
+}
+
+
+class TestReadManifest:
+    def test_entries_use_defaults(self):
+        manifest = io.StringIO(
+            json.dumps(test_audio_path)
+            + "\n\n"
+            + json.dumps({"file": test_audio_path, "language": "fr", "output_formats": ["srt"]})
+        )
+
+        entries = read_manifest(manifest, DEFAULTS)
+
+        assert len(entries) == 2
+        assert entries[0] == {**DEFAULTS, "file": test_audio_path}
+        assert entries[1]["language"] == "fr"
+        assert entries[1]["output_formats"] == ["srt"]
+        assert entries[1]["model_size"] == "tiny"
+
+    @pytest.mark.parametrize(
+        "line,error",
+        [
+            ("{", "Line 1: invalid JSON"),
+            ('{"language": "fr"}', 'expected an object with a "file"'),
+            (json.dumps({"file": test_audio_path, "speed": 2}), "unknown keys speed"),
+            (json.dumps({"file": test_audio_path, "model_type": "x"}), "invalid model_type"),
+            (json.dumps({"file": test_audio_path, "output_formats": ["doc"]}), "output_formats"),
+            (json.dumps({"file": "/does/not/exist.mp3"}), "file not found"),
+        ],
+    )
+    def test_invalid_entries(self, line, error):
+        with pytest.raises(ManifestError, match=error):
+            read_manifest(io.StringIO(line), DEFAULTS)
+
+
+def test_invalid_manifest_exits_with_usage_error(tmp_path, capsys):
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text('{"language": "fr"}\n')
+
+    assert main([str(manifest)]) == EXIT_USAGE
+    assert capsys.readouterr().out == ""
+
+
+def test_batch(tmp_path, capsys):
+    output_directory = tmp_path / "output"
+    output_directory.mkdir()
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(json.dumps({"file": test_audio_path, "language": "fr"}) + "\n")
+
+    exit_code = main(
+        [str(manifest), "--output-directory", str(output_directory), "--output-formats", "txt,srt"]
+    )
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert exit_code == EXIT_OK
+    assert events[0]["event"] == "started"
+    assert events[-1] == {**events[-1], "event": "finished", "completed": 1, "failed": 0}
+
+    completed = next(event for event in events if event["event"] == "file_completed")
+    assert completed["exit_code"] == EXIT_OK
+    assert sorted(os.path.splitext(path)[1] for path in completed["outputs"]) == [".srt", ".txt"]
+    assert all(os.path.isfile(path) for path in completed["outputs"])
+
+
+def test_openai_api_entry_uses_api_transcriber(tmp_path):
+    entry = {
+        **DEFAULTS,
+        "file": test_audio_path,
+        "model_type": "openaiapi",
+        "openai_access_token": "token",
+        "output_directory": str(tmp_path),
+    }
+    task = build_task(entry)
+
+    def transcribe(transcriber):
+        transcriber.progress.emit((1, 1))
+        return [Segment(0, 1000, " Bienvenue")]
+
+    progress = []
+    with patch(
+        "buzz.transcriber.openai_whisper_api_file_transcriber.OpenAIWhisperAPIFileTranscriber.transcribe",
+        transcribe,
+    ), patch(
+        "buzz.transcriber.whisper_file_transcriber.WhisperFileTranscriber.transcribe_whisper"
+    ) as transcribe_whisper:
+        segments, output_paths = run_task(task, 1, progress.append, None, threading.Event())
+
+    transcribe_whisper.assert_not_called()
+    assert [segment.text for segment in segments] == ["Bienvenue"]
+    assert progress == [1.0]
+    assert os.path.isfile(output_paths[0])
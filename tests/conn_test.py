@@ -0,0 +1,130 @@
+import json
+import os
+import pickle
+from typing import List
+from unittest.mock import Mock, patch
+
+import pytest
+
+from buzz.conn import (
+    ConnWriter,
+    MessageKind,
+    decode_message,
+    decode_segments,
+    encode_segments,
+)
+from buzz.transcriber.transcriber import Segment, Stopped
+
+WORD_COUNT = 1_000_000
+
+
+def make_words(count: int) -> List[Segment]:
+    return [
+        Segment(start=i * 300, end=i * 300 + 250, text=f" word{i % 1000}")
+        for i in range(count)
+    ]
+
+
+def capture_frames(send):
+    frames = []
+    conn = Mock()
+    conn.send_bytes.side_effect = frames.append
+    send(ConnWriter(conn))
+    return frames
+
+
+class TestSegmentsEncoding:
+    def test_round_trip(self):
+        segments = [
+            Segment(start=0, end=1200, text=" Hello"),
+            Segment(start=1200, end=2000, text=""),
+            Segment(start=2000, end=3500, text="日本語 ✓"),
+        ]
+
+        assert decode_segments(encode_segments(segments)) == segments
+
+    def test_empty(self):
+        assert decode_segments(encode_segments([])) == []
+
+
+class TestConnWriter:
+    def test_write_sends_progress_and_logs(self):
+        frames = capture_frames(
+            lambda writer: [writer.write("progress = 42%\n"), writer.write("loading model\n"), writer.write("\n")]
+        )
+
+        messages = [decode_message(frame) for frame in frames]
+        assert [message.kind for message in messages] == [MessageKind.PROGRESS, MessageKind.LOG]
+        assert messages[0].progress == 42
+        assert messages[1].text == "loading model"
+
+    def test_checkpoint(self):
+        segments = [Segment(start=0, end=1000, text="Hi")]
+        frames = capture_frames(lambda writer: writer.send_checkpoint(1500, segments))
+
+        message = decode_message(frames[0])
+        assert message.kind == MessageKind.CHECKPOINT
+        assert message.offset == 1500
+        assert message.segments == segments
+
+    def test_timing(self):
+        frames = capture_frames(lambda writer: writer.send_timing("model_load", 2.5))
+
+        message = decode_message(frames[0])
+        assert message.kind == MessageKind.TIMING
+        assert message.text == "model_load"
+        assert message.seconds == 2.5
+
+    def test_large_payload_goes_through_mapped_file(self):
+        segments = make_words(1000)
+        with patch("buzz.conn.MAPPED_PAYLOAD_THRESHOLD", 1024):
+            frames = capture_frames(lambda writer: writer.send_segments(segments))
+
+        assert len(frames[0]) < 1024
+        path = frames[0][1:].decode("utf-8")
+        assert os.path.exists(path)
+
+        message = decode_message(frames[0])
+
+        assert message.segments == segments
+        assert not os.path.exists(path)
+
+    def test_canceled_task_raises_stopped(self):
+        cancel_event = Mock()
+        cancel_event.is_set.return_value = True
+        writer = ConnWriter(Mock(), cancel_event)
+
+        with pytest.raises(Stopped):
+            writer.write("50%")
+
+
+@pytest.fixture(scope="module")
+def words() -> List[Segment]:
+    return make_words(WORD_COUNT)
+
+
+def test_benchmark_json_lines(benchmark, words):
+    """The text protocol used before: one JSON line, pickled by Pipe.send."""
+
+    def round_trip():
+        line = f"segments = {json.dumps(words, ensure_ascii=True, default=vars)}\n"
+        received = pickle.loads(pickle.dumps(line.strip()))
+        return [
+            Segment(
+                start=segment.get("start"),
+                end=segment.get("end"),
+                text=segment.get("text"),
+                translation="",
+            )
+            for segment in json.loads(received[11:])
+        ]
+
+    assert len(benchmark.pedantic(round_trip, rounds=3)) == WORD_COUNT
+
+
+def test_benchmark_framed_messages(benchmark, words):
+    def round_trip():
+        frames = capture_frames(lambda writer: writer.send_segments(words))
+        return decode_message(frames[0]).segments
+
+    assert len(benchmark.pedantic(round_trip, rounds=3)) == WORD_COUNT
@@ -38,7 +38,12 @@ def db():
             word_level_timings BOOLEAN DEFAULT FALSE,
             extract_speech BOOLEAN DEFAULT FALSE,
             name TEXT,
-            notes TEXT
+            notes TEXT,
+            queue_position INTEGER,
+            resume_offset INTEGER,
+            audio_duration DOUBLE PRECISION,
+            real_time_factor DOUBLE PRECISION,
+            metrics TEXT
         )
     """)
     
@@ -244,6 +249,56 @@ class TestTranscriptionDAO:
         assert query.value("name") == ""
         assert query.value("notes") == ""
 
+    def test_update_transcription_queue_positions(self, transcription_dao):
+        """Test that positions are set for queued tasks and cleared for the rest"""
+        first = Transcription(id=str(uuid4()), status="queued", time_queued="2023-01-01T00:00:00")
+        second = Transcription(id=str(uuid4()), status="queued", time_queued="2023-01-01T00:00:01")
+        transcription_dao.insert(first)
+        transcription_dao.insert(second)
+
+        transcription_dao.update_transcription_queue_positions({first.id: 2, second.id: 1})
+        transcription_dao.update_transcription_queue_positions({first.id: 1})
+
+        query = QSqlQuery(transcription_dao.db)
+        query.prepare("SELECT id, queue_position FROM transcription ORDER BY time_queued")
+        assert query.exec()
+        assert query.next()
+        assert query.value("queue_position") == 1
+        assert query.next()
+        assert query.isNull("queue_position")
+
+    def test_update_transcription_resume_offset(self, transcription_dao, sample_transcription):
+        """Test that the resume offset is saved and cleared on completion"""
+        transcription_dao.insert(sample_transcription)
+
+        transcription_dao.update_transcription_resume_offset(UUID(sample_transcription.id), 90_000)
+
+        query = QSqlQuery(transcription_dao.db)
+        query.prepare("SELECT resume_offset FROM transcription WHERE id = :id")
+        query.bindValue(":id", sample_transcription.id)
+        assert query.exec()
+        assert query.next()
+        assert query.value("resume_offset") == 90_000
+
+        transcription_dao.update_transcription_as_completed(UUID(sample_transcription.id))
+
+        assert query.exec()
+        assert query.next()
+        assert query.isNull("resume_offset")
+
+    def test_update_transcription_metrics(self, transcription_dao, sample_transcription):
+        transcription_dao.insert(sample_transcription)
+
+        transcription_dao.update_transcription_metrics(
+            UUID(sample_transcription.id), 60.0, 0.5, '{"inference": 30.0}'
+        )
+
+        transcriptions = transcription_dao.find_all_with_metrics()
+        assert len(transcriptions) == 1
+        assert transcriptions[0].audio_duration == 60.0
+        assert transcriptions[0].real_time_factor == 0.5
+        assert transcriptions[0].metrics == '{"inference": 30.0}'
+
     def test_database_error_handling(self, transcription_dao):
         """Test that database errors are properly handled"""
         # Mock a database error by using an invalid query
@@ -4,6 +4,7 @@ from uuid import UUID, uuid4
 
 from buzz.db.service.transcription_service import TranscriptionService
 from buzz.db.entity.transcription import Transcription
+from buzz.transcriber.transcriber import Segment
 
 
 @pytest.fixture
@@ -219,3 +220,42 @@ class TestTranscriptionService:
         
         # Verify the DAO method was called with unicode string
         mock_transcription_dao.update_transcription_notes.assert_called_once_with(transcription_id, unicode_notes)
+
+    def test_add_transcription_checkpoint(
+        self, transcription_service, mock_transcription_dao, mock_transcription_segment_dao
+    ):
+        """Test that checkpoint segments and offset are saved in one transaction"""
+        transcription_id = uuid4()
+        segments = [Segment(start=0, end=1000, text="Hello"), Segment(start=1000, end=2000, text="world")]
+
+        transcription_service.add_transcription_checkpoint(transcription_id, 2000, segments)
+
+        assert mock_transcription_segment_dao.insert.call_count == 2
+        mock_transcription_dao.update_transcription_resume_offset.assert_called_once_with(transcription_id, 2000)
+        mock_transcription_dao.db.transaction.assert_called_once()
+        mock_transcription_dao.db.commit.assert_called_once()
+
+    def test_add_transcription_checkpoint_rolls_back_on_error(
+        self, transcription_service, mock_transcription_dao, mock_transcription_segment_dao
+    ):
+        """Test that a failed checkpoint does not leave partial segments"""
+        mock_transcription_dao.update_transcription_resume_offset.side_effect = Exception("Database error")
+
+        with pytest.raises(Exception, match="Database error"):
+            transcription_service.add_transcription_checkpoint(uuid4(), 1000, [Segment(start=0, end=1000, text="Hi")])
+
+        mock_transcription_dao.db.rollback.assert_called_once()
+        mock_transcription_dao.db.commit.assert_not_called()
+
+    def test_update_transcription_as_completed_replaces_checkpoint_segments(
+        self, transcription_service, mock_transcription_dao, mock_transcription_segment_dao
+    ):
+        """Test that completion replaces segments saved by checkpoints"""
+        transcription_id = uuid4()
+
+        transcription_service.update_transcription_as_completed(
+            transcription_id, [Segment(start=0, end=1000, text="Hello")]
+        )
+
+        mock_transcription_segment_dao.delete_segments.assert_called_once_with(transcription_id)
+        mock_transcription_segment_dao.insert.assert_called_once()
@@ -1,14 +1,12 @@
-import subprocess
 import time
 
+import av
 import numpy as np
 import pytest
 
 from buzz.ffmpeg_video_player import (
     FfmpegFrameReader,
     FfmpegVideoPlayer,
-    _find_ffmpeg,
-    _find_ffprobe,
     probe_video,
 )
 from tests.audio import test_audio_path
@@ -17,28 +15,20 @@ from tests.audio import test_audio_path
 @pytest.fixture(scope="module")
 def test_video_path(tmp_path_factory):
     path = tmp_path_factory.mktemp("video") / "test.mp4"
-    subprocess.run(
-        [
-            _find_ffmpeg(),
-            "-f", "lavfi", "-i", "testsrc=duration=1:size=64x48:rate=10",
-            "-f", "lavfi", "-i", "sine=frequency=440:duration=1",
-            str(path), "-y", "-loglevel", "quiet",
-        ],
-        check=True,
-    )
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("mpeg4", rate=10)
+        stream.width = 64
+        stream.height = 48
+        stream.pix_fmt = "yuv420p"
+        for i in range(10):
+            image = np.full((48, 64, 3), i * 25, dtype=np.uint8)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(image, format="rgb24")):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
     return str(path)
 
 
-class TestFindFfmpeg:
-    def test_returns_string(self):
-        assert isinstance(_find_ffmpeg(), str)
-        assert len(_find_ffmpeg()) > 0
-
-    def test_returns_string_ffprobe(self):
-        assert isinstance(_find_ffprobe(), str)
-        assert len(_find_ffprobe()) > 0
-
-
 class TestProbeVideo:
     def test_audio_only_file(self):
         info = probe_video(test_audio_path)
@@ -0,0 +1,101 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from buzz import hardware
+from buzz.hardware import (
+    CAPABILITIES_ENV,
+    VISIBLE_DEVICES_ENVS,
+    HardwareCapabilities,
+    fingerprint,
+    get_capabilities,
+)
+
+CAPABILITIES = HardwareCapabilities(
+    vulkan=True, vulkan_version="1.3", cuda=True, cuda_version="12.4", cpu_features=["avx2"]
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_capabilities(monkeypatch):
+    monkeypatch.setattr(hardware, "_capabilities", None)
+    monkeypatch.delenv(CAPABILITIES_ENV, raising=False)
+    for name in VISIBLE_DEVICES_ENVS:
+        monkeypatch.delenv(name, raising=False)
+
+
+class TestGetCapabilities:
+    def test_probes_once_and_saves_result(self, tmp_path, monkeypatch):
+        cache_path = str(tmp_path / "hardware.json")
+        with patch.object(hardware, "probe", return_value=CAPABILITIES) as probe:
+            assert get_capabilities(cache_path) == CAPABILITIES
+            assert get_capabilities(cache_path) == CAPABILITIES
+        probe.assert_called_once()
+
+        with open(cache_path) as file:
+            assert json.load(file)["capabilities"]["cuda_version"] == "12.4"
+
+        # A new process reads the saved result
+        monkeypatch.setattr(hardware, "_capabilities", None)
+        monkeypatch.delenv(CAPABILITIES_ENV)
+        with patch.object(hardware, "probe") as probe:
+            assert get_capabilities(cache_path) == CAPABILITIES
+        probe.assert_not_called()
+
+    def test_probes_again_after_driver_change(self, tmp_path, monkeypatch):
+        cache_path = str(tmp_path / "hardware.json")
+        with patch.object(hardware, "probe", return_value=CAPABILITIES):
+            get_capabilities(cache_path)
+
+        monkeypatch.setattr(hardware, "_capabilities", None)
+        monkeypatch.delenv(CAPABILITIES_ENV)
+        with patch.object(hardware, "fingerprint", return_value="new driver"), \
+                patch.object(hardware, "probe", return_value=HardwareCapabilities()) as probe:
+            assert get_capabilities(cache_path) == HardwareCapabilities()
+        probe.assert_called_once()
+
+    def test_workers_read_capabilities_from_environment(self, tmp_path, monkeypatch):
+        with patch.object(hardware, "probe", return_value=CAPABILITIES):
+            get_capabilities(str(tmp_path / "hardware.json"))
+
+        # A worker inherits the environment but not the module state
+        monkeypatch.setattr(hardware, "_capabilities", None)
+        with patch.object(hardware, "probe") as probe, \
+                patch.object(hardware, "fingerprint") as fingerprint:
+            assert get_capabilities(str(tmp_path / "other.json")) == CAPABILITIES
+        probe.assert_not_called()
+        fingerprint.assert_not_called()
+
+    def test_hiding_gpus_disables_cuda(self, tmp_path, monkeypatch):
+        cache_path = str(tmp_path / "hardware.json")
+        with patch.object(hardware, "probe", return_value=CAPABILITIES):
+            assert get_capabilities(cache_path).cuda
+
+        monkeypatch.setenv("CUDA_VISIBLE_DEVICES", "")
+        with patch.object(hardware, "probe") as probe:
+            capabilities = get_capabilities(cache_path)
+        probe.assert_not_called()
+        assert not capabilities.cuda
+        assert capabilities.cuda_version is None
+        assert capabilities.vulkan
+
+        monkeypatch.delenv("CUDA_VISIBLE_DEVICES")
+        assert get_capabilities(cache_path) == CAPABILITIES
+
+    def test_probes_again_for_other_visible_devices(self, tmp_path, monkeypatch):
+        cache_path = str(tmp_path / "hardware.json")
+        with patch.object(hardware, "probe", return_value=CAPABILITIES):
+            get_capabilities(cache_path)
+
+        monkeypatch.setenv("HIP_VISIBLE_DEVICES", "1")
+        with patch.object(hardware, "probe", return_value=HardwareCapabilities()) as probe:
+            assert get_capabilities(cache_path) == HardwareCapabilities()
+        probe.assert_called_once()
+
+
+def test_fingerprint_depends_on_visible_devices(monkeypatch):
+    monkeypatch.delenv("CUDA_VISIBLE_DEVICES", raising=False)
+    all_visible = fingerprint()
+    monkeypatch.setenv("CUDA_VISIBLE_DEVICES", "")
+    assert fingerprint() != all_visible
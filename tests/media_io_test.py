@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from buzz.media_io import encode_audio, iter_audio, probe
+from buzz.whisper_audio import SAMPLE_RATE
+from tests.audio import test_audio_path
+
+
+def decode(file_path: str, **kwargs) -> np.ndarray:
+    return np.concatenate(
+        list(iter_audio(file_path, chunk_samples=SAMPLE_RATE, sample_rate=SAMPLE_RATE, **kwargs))
+    )
+
+
+class TestProbe:
+    def test_audio_file(self):
+        info = probe(test_audio_path)
+
+        assert info.has_audio
+        assert not info.has_video
+        assert info.duration_ms > 0
+
+    def test_missing_file(self):
+        with pytest.raises(OSError):
+            probe("/does/not/exist.mp3")
+
+
+class TestIterAudio:
+    def test_decodes_whole_file(self):
+        samples = decode(test_audio_path)
+
+        assert samples.dtype == np.float32
+        assert len(samples) == pytest.approx(
+            probe(test_audio_path).duration_ms * SAMPLE_RATE / 1000, rel=0.01
+        )
+        assert np.abs(samples).max() > 0
+
+    def test_range_matches_whole_file(self):
+        samples = decode(test_audio_path)
+        part = decode(test_audio_path, start=1000, end=2500)
+
+        assert len(part) == SAMPLE_RATE * 3 // 2
+        np.testing.assert_allclose(part, samples[SAMPLE_RATE : SAMPLE_RATE * 5 // 2], atol=1e-6)
+
+    @pytest.mark.parametrize("sample_rate,channels", [(16000, 1), (44100, 2)])
+    def test_range_not_on_a_frame_boundary(self, sample_rate, channels):
+        def decode_at_rate(**kwargs):
+            return np.concatenate(
+                list(
+                    iter_audio(
+                        test_audio_path,
+                        chunk_samples=sample_rate,
+                        sample_rate=sample_rate,
+                        channels=channels,
+                        **kwargs,
+                    )
+                )
+            )
+
+        samples = decode_at_rate()
+        part = decode_at_rate(start=2345, end=4000)
+
+        start = 2345 * sample_rate // 1000
+        assert len(part) == (4000 - 2345) * sample_rate // 1000
+        np.testing.assert_allclose(part, samples[start : start + len(part)], atol=1e-6)
+
+    def test_stereo(self):
+        chunks = list(
+            iter_audio(test_audio_path, chunk_samples=1000, sample_rate=44100, channels=2)
+        )
+
+        assert chunks[0].shape == (1000, 2)
+
+    def test_unsupported_channels(self):
+        with pytest.raises(ValueError):
+            list(iter_audio(test_audio_path, chunk_samples=1000, sample_rate=SAMPLE_RATE, channels=6))
+
+
+def test_encode_audio(tmp_path):
+    samples = decode(test_audio_path)
+    path = str(tmp_path / "audio.mp3")
+
+    encode_audio(samples, path, SAMPLE_RATE)
+
+    assert probe(path).duration_ms == pytest.approx(len(samples) * 1000 / SAMPLE_RATE, abs=100)
@@ -503,6 +503,16 @@ class _EldTask:
         self.uid = uid
 
 
+def _patch_language_detector(monkeypatch, language):
+    from buzz.transcriber import language_detection
+
+    class _Detector:
+        def detect(self, file_path, model_path):
+            return language
+
+    monkeypatch.setattr(language_detection, "get_language_detector", lambda: _Detector())
+
+
 def test_enhanced_language_detection_loads():
     plugin = load_plugin_from_dir("buzz/plugins/enhanced_language_detection")
     assert plugin.metadata.id == "enhanced_language_detection"
@@ -532,11 +542,7 @@ def test_eld_detects_when_auto_or_en(monkeypatch, language):
     ctx, captured = _eld_context()
 
     monkeypatch.setattr(plugin, "_resolve_model_path", lambda c: "/fake/model.bin")
-    from buzz.transcriber import whisper_cpp
-
-    monkeypatch.setattr(
-        whisper_cpp.WhisperCpp, "detect_language", staticmethod(lambda f, m: "fr")
-    )
+    _patch_language_detector(monkeypatch, "fr")
 
     task = _EldTask(language=language)
     plugin.before_transcription(task, ctx)
@@ -564,11 +570,7 @@ def test_eld_keeps_language_when_no_detection(monkeypatch):
     ctx, captured = _eld_context()
 
     monkeypatch.setattr(plugin, "_resolve_model_path", lambda c: "/fake/model.bin")
-    from buzz.transcriber import whisper_cpp
-
-    monkeypatch.setattr(
-        whisper_cpp.WhisperCpp, "detect_language", staticmethod(lambda f, m: None)
-    )
+    _patch_language_detector(monkeypatch, None)
 
     task = _EldTask(language=None)
     plugin.before_transcription(task, ctx)
@@ -601,6 +603,35 @@ def test_eld_resolve_model_path_picks_largest_skips_custom_lumii(monkeypatch):
     assert plugin._resolve_model_path(ctx) == "/models/small.bin"
 
 
+def test_eld_resolve_model_path_is_kept_for_next_files(monkeypatch, tmp_path):
+    from buzz import model_loader
+
+    model_path = tmp_path / "tiny.bin"
+    model_path.write_bytes(b"model")
+    calls = []
+
+    def fake_path(self):
+        calls.append(self.whisper_model_size)
+        return str(model_path)
+
+    monkeypatch.setattr(
+        model_loader.TranscriptionModel, "get_local_model_path", fake_path
+    )
+
+    plugin = _eld_plugin()
+    ctx, _ = _eld_context()
+    assert plugin._resolve_model_path(ctx) == str(model_path)
+    searched = len(calls)
+
+    assert plugin._resolve_model_path(ctx) == str(model_path)
+    assert len(calls) == searched
+
+    # Searched again once the model is removed
+    model_path.unlink()
+    plugin._resolve_model_path(ctx)
+    assert len(calls) == 2 * searched
+
+
 def test_eld_resolve_model_path_returns_none_when_download_disabled(monkeypatch):
     from buzz import model_loader
 
@@ -0,0 +1,246 @@
+import asyncio
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from buzz.model_loader import ModelType, TranscriptionModel
+from buzz.server import JobApi, JobStore, get_model_fields, get_task_fields
+from buzz.transcriber.transcriber import (
+    FileTranscriptionOptions,
+    FileTranscriptionTask,
+    Segment,
+    TranscriptionOptions,
+)
+from tests.audio import test_audio_path
+
+DEFAULTS = {
+    "model_type": "whispercpp",
+    "model_size": "tiny",
+    "hugging_face_model_id": "",
+    "language": "",
+    "task": "transcribe",
+    "initial_prompt": "",
+    "word_timestamps": False,
+    "output_formats": [],
+    "output_directory": "",
+}
+
+
+def create_task(entry: dict, model_lock) -> FileTranscriptionTask:
+    return FileTranscriptionTask(
+        file_path=entry["file"],
+        transcription_options=TranscriptionOptions(
+            model=TranscriptionModel(model_type=ModelType.WHISPER_CPP),
+            language=entry["language"] or None,
+        ),
+        file_transcription_options=FileTranscriptionOptions(),
+        model_path="/models/tiny",
+    )
+
+
+def multipart(fields: dict, file_name: str, content: bytes):
+    boundary = "buzz-test-boundary"
+    body = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    )
+    body += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+async def request(port: int, method: str, path: str, body: bytes = b"", headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    head = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+    head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    return status, body
+
+
+def complete_on_submit(jobs: JobStore, segments):
+    def on_submit(task):
+        asyncio.get_running_loop().call_soon(
+            jobs.publish, str(task.uid), {"event": "completed", "segment_list": segments}
+        )
+
+    return on_submit
+
+
+@pytest.fixture(autouse=True)
+def patch_create_task():
+    with patch("buzz.server.create_task", side_effect=create_task):
+        yield
+
+
+def run_api(test, max_queue_depth=16):
+    async def main():
+        jobs = JobStore()
+        server = Mock()
+        api = JobApi(server, jobs, DEFAULTS, max_queue_depth)
+        http_server = await asyncio.start_server(api.handle_connection, "127.0.0.1", 0)
+        try:
+            await test(jobs, server, http_server.sockets[0].getsockname()[1])
+        finally:
+            http_server.close()
+
+    asyncio.run(main())
+
+
+class TestJobApi:
+    def test_submit_and_get_job(self):
+        async def test(jobs, server, port):
+            status, body = await request(
+                port,
+                "POST",
+                "/jobs",
+                json.dumps({"file": test_audio_path, "language": "fr"}).encode(),
+                {"Content-Type": "application/json"},
+            )
+            assert status == 202
+            job = json.loads(body)
+            assert job["status"] == "queued"
+
+            task = server.task_submitted.emit.call_args[0][0]
+            assert task.file_path == test_audio_path
+            assert task.transcription_options.language == "fr"
+
+            jobs.publish(job["id"], {"event": "progress", "progress": 0.5})
+            status, body = await request(port, "GET", f"/jobs/{job['id']}")
+            assert json.loads(body)["progress"] == 0.5
+
+            jobs.publish(
+                job["id"],
+                {"event": "completed", "segment_list": [Segment(0, 1000, "Bonjour")]},
+            )
+            status, body = await request(port, "GET", f"/jobs/{job['id']}")
+            job = json.loads(body)
+            assert job["status"] == "completed"
+            assert job["text"] == "Bonjour"
+            assert job["segments"] == [{"start": 0, "end": 1000, "text": "Bonjour"}]
+
+        run_api(test)
+
+    def test_invalid_submission(self):
+        async def test(jobs, server, port):
+            status, body = await request(
+                port,
+                "POST",
+                "/jobs",
+                json.dumps({"file": "/does/not/exist.mp3"}).encode(),
+                {"Content-Type": "application/json"},
+            )
+            assert status == 400
+            assert "file not found" in json.loads(body)["error"]["message"]
+
+            status, _ = await request(port, "GET", "/jobs/unknown")
+            assert status == 404
+
+        run_api(test)
+
+    def test_full_queue_is_refused(self):
+        async def test(jobs, server, port):
+            body = json.dumps({"file": test_audio_path}).encode()
+            headers = {"Content-Type": "application/json"}
+
+            status, _ = await request(port, "POST", "/jobs", body, headers)
+            assert status == 202
+            status, _ = await request(port, "POST", "/jobs", body, headers)
+            assert status == 429
+
+        run_api(test, max_queue_depth=1)
+
+    def test_cancel(self):
+        async def test(jobs, server, port):
+            body, headers = multipart({"language": "fr"}, "audio.mp3", b"audio")
+            status, body = await request(port, "POST", "/jobs", body, headers)
+            job_id = json.loads(body)["id"]
+
+            status, body = await request(port, "DELETE", f"/jobs/{job_id}")
+
+            assert json.loads(body)["status"] == "canceled"
+            task = server.task_cancel_requested.emit.call_args[0][0]
+            assert str(task) == job_id
+
+        run_api(test)
+
+    def test_event_stream(self):
+        async def test(jobs, server, port):
+            status, body = await request(
+                port,
+                "POST",
+                "/jobs?filename=audio.mp3",
+                b"audio",
+                {"Content-Type": "application/octet-stream"},
+            )
+            job_id = json.loads(body)["id"]
+
+            stream = asyncio.create_task(request(port, "GET", f"/jobs/{job_id}/events"))
+            await asyncio.sleep(0.1)
+            jobs.publish(job_id, {"event": "progress", "progress": 0.5})
+            jobs.publish(
+                job_id,
+                {"event": "completed", "segment_list": [Segment(0, 1000, "Bonjour")]},
+            )
+            status, body = await stream
+
+            events = [
+                line.split(": ", 1)[1]
+                for line in body.decode().splitlines()
+                if line.startswith("event: ")
+            ]
+            assert events == ["status", "progress", "completed"]
+
+        run_api(test)
+
+    @pytest.mark.parametrize(
+        "response_format,expected",
+        [
+            ("json", b'{"text": "Bonjour"}'),
+            ("text", b"Bonjour "),
+            ("srt", b"1\n00:00:00,000 --> 00:00:01,000\nBonjour\n\n"),
+        ],
+    )
+    def test_openai_transcription(self, response_format, expected):
+        async def test(jobs, server, port):
+            server.task_submitted.emit.side_effect = complete_on_submit(
+                jobs, [Segment(0, 1000, "Bonjour")]
+            )
+            body, headers = multipart(
+                {"model": "whisper-1", "response_format": response_format},
+                "audio.mp3",
+                b"audio",
+            )
+
+            status, body = await request(port, "POST", "/v1/audio/transcriptions", body, headers)
+
+            assert status == 200
+            assert body == expected
+
+        run_api(test)
+
+
+def test_get_task_fields():
+    assert get_task_fields(
+        {"language": "fr", "word_timestamps": "true", "output_formats": "srt,vtt", "x": "1"}
+    ) == {"language": "fr", "word_timestamps": True, "output_formats": ["srt", "vtt"]}
+
+
+def test_get_model_fields():
+    assert get_model_fields("whisper-1") == {}
+    assert get_model_fields("fasterwhisper/small") == {
+        "model_type": "fasterwhisper",
+        "model_size": "small",
+    }
+    assert get_model_fields("huggingface/openai/whisper-tiny") == {
+        "model_type": "huggingface",
+        "hugging_face_model_id": "openai/whisper-tiny",
+    }
@@ -0,0 +1,118 @@
+import io
+import json
+import os
+import time
+from unittest.mock import patch
+
+from buzz.batch import build_task
+from buzz.spool import COMPLETED, FAILED, QUEUED, RUNNING, DirectorySpool, SpoolWorker
+from buzz.transcriber.transcriber import Segment
+from tests.audio import test_audio_path
+
+ENTRY = {
+    "file": test_audio_path,
+    "model_type": "whispercpp",
+    "model_size": "tiny",
+    "language": "fr",
+    "task": "transcribe",
+    "output_formats": ["txt"],
+}
+
+
+def expire_lease(spool: DirectorySpool, job_id: str):
+    lease_path = os.path.join(spool.path, RUNNING, f"{job_id}.lease")
+    with open(lease_path) as file:
+        lease = json.load(file)
+    lease["expires_at"] = time.time() - 1
+    with open(lease_path, "w") as file:
+        json.dump(lease, file)
+
+
+class TestDirectorySpool:
+    def test_claim_and_complete(self, tmp_path):
+        spool = DirectorySpool(str(tmp_path))
+        job_id = spool.submit(build_task(ENTRY))
+
+        job = spool.claim("worker-1")
+
+        assert job.id == job_id
+        assert job.task.file_path == test_audio_path
+        assert job.task.transcription_options.language == "fr"
+        assert spool.claim("worker-2") is None
+        assert spool.heartbeat(job, 0.5)
+        assert spool.status()[RUNNING] == [{"id": job_id, "worker": "worker-1", "progress": 0.5}]
+
+        job.task.segments = [Segment(0, 1000, "Bonjour")]
+        assert spool.complete(job, job.task)
+
+        status = spool.status()
+        assert status[QUEUED] == 0 and status[RUNNING] == [] and status[COMPLETED] == 1
+        with open(os.path.join(spool.path, COMPLETED, f"{job_id}.json")) as file:
+            assert json.load(file)["task"]["segments"][0]["text"] == "Bonjour"
+
+    def test_expired_lease_is_requeued_from_checkpoint(self, tmp_path):
+        spool = DirectorySpool(str(tmp_path))
+        job_id = spool.submit(build_task(ENTRY))
+        job = spool.claim("worker-1")
+        job.task.segments = [Segment(0, 1000, "Bonjour")]
+        job.task.resume_offset = 1000
+        assert spool.checkpoint(job, job.task)
+
+        assert spool.requeue_expired() == []
+        expire_lease(spool, job_id)
+        assert spool.requeue_expired() == [job_id]
+
+        # The first worker lost the job and cannot save a result
+        assert not spool.heartbeat(job, 0.9)
+        assert not spool.complete(job, job.task)
+
+        resumed = spool.claim("worker-2")
+        assert resumed.attempts == 1
+        assert resumed.task.resume_offset == 1000
+        assert [segment.text for segment in resumed.task.segments] == ["Bonjour"]
+
+    def test_job_fails_after_max_attempts(self, tmp_path):
+        spool = DirectorySpool(str(tmp_path), max_attempts=2)
+        job_id = spool.submit(build_task(ENTRY))
+
+        for _ in range(2):
+            spool.claim("worker-1")
+            expire_lease(spool, job_id)
+            spool.requeue_expired()
+
+        status = spool.status()
+        assert status[QUEUED] == 0 and status[FAILED] == 1
+
+    def test_release(self, tmp_path):
+        spool = DirectorySpool(str(tmp_path))
+        spool.submit(build_task(ENTRY))
+        job = spool.claim("worker-1")
+
+        assert spool.release(job)
+
+        assert spool.claim("worker-2").attempts == 0
+
+
+class TestSpoolWorker:
+    def test_checkpoint_of_url_job_keeps_url(self, tmp_path):
+        spool = DirectorySpool(str(tmp_path))
+        job_id = spool.submit(build_task({**ENTRY, "file": "https://example.com/audio.mp3"}))
+        job = spool.claim("worker-1")
+        checkpoints = []
+
+        def run_task(task, n_threads, on_progress, on_checkpoint, cancel_event):
+            task.file_path = "/tmp/worker-1/audio.mp3"
+            on_checkpoint(1000, [Segment(0, 1000, "Bonjour")])
+            with open(os.path.join(spool.path, RUNNING, f"{job_id}.json")) as file:
+                checkpoints.append(json.load(file)["task"])
+            return [Segment(0, 1000, "Bonjour")], []
+
+        worker = SpoolWorker(spool, worker_id="worker-1", output=io.StringIO())
+        with patch("buzz.spool.resolve_model"), patch("buzz.spool.run_task", side_effect=run_task):
+            worker.process(job)
+
+        (checkpoint,) = checkpoints
+        assert checkpoint["file_path"] is None
+        assert checkpoint["url"] == "https://example.com/audio.mp3"
+        assert checkpoint["resume_offset"] == 1000
+        assert spool.status()[COMPLETED] == 1
@@ -0,0 +1,123 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from buzz.model_loader import ModelType, TranscriptionModel, WhisperModelSize
+from buzz.transcriber.batch_file_transcriber import (
+    DEFAULT_BATCH_FILES,
+    BatchFileTranscriber,
+    get_batch_files,
+    get_batch_key,
+)
+from buzz.transcriber.transcriber import (
+    FileTranscriptionOptions,
+    FileTranscriptionTask,
+    Segment,
+    TranscriptionOptions,
+    get_batch_size,
+)
+
+
+def make_task(
+    model_type=ModelType.FASTER_WHISPER, language="en", initial_prompt=""
+) -> FileTranscriptionTask:
+    return FileTranscriptionTask(
+        file_path="note.m4a",
+        transcription_options=TranscriptionOptions(
+            model=TranscriptionModel(
+                model_type=model_type, whisper_model_size=WhisperModelSize.TINY
+            ),
+            language=language,
+            initial_prompt=initial_prompt,
+        ),
+        file_transcription_options=FileTranscriptionOptions(),
+        model_path="/models/faster-whisper-tiny",
+    )
+
+
+@pytest.fixture()
+def batching_enabled():
+    with patch.dict("os.environ", {"BUZZ_BATCH_SHORT_FILES": "true"}), patch(
+        "buzz.transcriber.batch_file_transcriber.probe_duration", return_value=20.0
+    ) as probe_duration:
+        yield probe_duration
+
+
+class TestGetBatchKey:
+    def test_same_options_share_a_key(self, batching_enabled):
+        assert get_batch_key(make_task()) is not None
+        assert get_batch_key(make_task()) == get_batch_key(make_task())
+        assert get_batch_key(make_task()) != get_batch_key(
+            make_task(initial_prompt="Meeting notes")
+        )
+
+    @pytest.mark.parametrize(
+        "task",
+        [
+            make_task(model_type=ModelType.WHISPER_CPP),
+            make_task(language=None),
+        ],
+    )
+    def test_not_batched(self, batching_enabled, task):
+        assert get_batch_key(task) is None
+
+    def test_long_file_is_not_batched(self, batching_enabled):
+        batching_enabled.return_value = 3600.0
+
+        assert get_batch_key(make_task()) is None
+
+    def test_disabled_by_default(self):
+        with patch.dict("os.environ", {}, clear=True):
+            assert get_batch_key(make_task()) is None
+
+
+class TestGetBatchSize:
+    def test_from_environment(self):
+        with patch.dict("os.environ", {"BUZZ_BATCH_SIZE": "3"}):
+            assert get_batch_size() == 3
+
+    @pytest.mark.parametrize(
+        "available,expected",
+        [(0, 1), (2 * 1024**3, 4), (1024**4, 16)],
+    )
+    def test_from_available_memory(self, available, expected):
+        with patch.dict("os.environ", {}, clear=True), patch(
+            "psutil.virtual_memory", return_value=Mock(available=available)
+        ):
+            assert get_batch_size() == expected
+
+
+class TestGetBatchFiles:
+    def test_from_environment(self):
+        with patch.dict("os.environ", {"BUZZ_BATCH_FILES": "5", "BUZZ_BATCH_SIZE": "2"}):
+            assert get_batch_files() == 5
+            assert get_batch_size() == 2
+
+    def test_default(self):
+        with patch.dict("os.environ", {"BUZZ_BATCH_SIZE": "2"}, clear=True):
+            assert get_batch_files() == DEFAULT_BATCH_FILES
+
+
+class TestBatchFileTranscriber:
+    def test_reports_result_of_each_task(self, qtbot, tmp_path):
+        tasks = [make_task(), make_task()]
+        for task in tasks:
+            task.output_directory = str(tmp_path)
+        transcriber = BatchFileTranscriber(tasks)
+
+        completed = []
+        errors = []
+        transcriber.task_completed.connect(
+            lambda task, segments: completed.append((task, segments))
+        )
+        transcriber.task_error.connect(lambda task, error: errors.append((task, error)))
+
+        with patch.object(
+            BatchFileTranscriber,
+            "transcribe_batch",
+            return_value=[([Segment(0, 1000, " Hello ")], None), ([], "Invalid media file")],
+        ), qtbot.wait_signal(transcriber.completed):
+            transcriber.run()
+
+        assert completed == [(tasks[0], [Segment(0, 1000, "Hello")])]
+        assert errors == [(tasks[1], "Invalid media file")]
@@ -0,0 +1,241 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from buzz.model_loader import ModelType, TranscriptionModel, WhisperModelSize
+from buzz.transcriber.chunked_file_transcriber import (
+    ChunkedFileTranscriber,
+    plan_chunks,
+    should_transcribe_in_chunks,
+    stitch_segments,
+)
+from buzz.transcriber.transcriber import (
+    FileTranscriptionOptions,
+    FileTranscriptionTask,
+    Segment,
+    TranscriptionOptions,
+)
+
+SAMPLE_RATE = 1000
+
+
+def make_task(model_type=ModelType.WHISPER_CPP) -> FileTranscriptionTask:
+    return FileTranscriptionTask(
+        file_path="audio.mp3",
+        transcription_options=TranscriptionOptions(
+            model=TranscriptionModel(
+                model_type=model_type, whisper_model_size=WhisperModelSize.TINY
+            ),
+        ),
+        file_transcription_options=FileTranscriptionOptions(),
+        model_path="/models/ggml-tiny.bin",
+    )
+
+
+def speech_with_pauses(seconds: int, pauses) -> np.ndarray:
+    samples = np.ones(seconds * SAMPLE_RATE, dtype=np.float32)
+    for pause in pauses:
+        samples[pause * SAMPLE_RATE : (pause + 1) * SAMPLE_RATE] = 0.0
+    return samples
+
+
+class TestPlanChunks:
+    def test_cuts_at_pauses(self):
+        samples = speech_with_pauses(100, pauses=[27, 55])
+
+        chunks = plan_chunks(samples, SAMPLE_RATE, chunk_seconds=30)
+
+        assert len(chunks) == 3
+        assert 27 * SAMPLE_RATE <= chunks[0][1] < 28 * SAMPLE_RATE
+        assert 55 * SAMPLE_RATE <= chunks[1][1] < 56 * SAMPLE_RATE
+        assert chunks[-1][1] == len(samples)
+        for (_, end), (start, _) in zip(chunks, chunks[1:]):
+            assert end == start
+
+    def test_short_audio_is_one_chunk(self):
+        samples = speech_with_pauses(40, pauses=[10])
+
+        assert plan_chunks(samples, SAMPLE_RATE, chunk_seconds=30) == [
+            (0, len(samples))
+        ]
+
+    def test_starts_at_offset(self):
+        samples = speech_with_pauses(100, pauses=[])
+
+        chunks = plan_chunks(samples, SAMPLE_RATE, chunk_seconds=30, start=60 * SAMPLE_RATE)
+
+        assert chunks == [(60 * SAMPLE_RATE, len(samples))]
+
+
+class TestStitchSegments:
+    def test_drops_repeated_segment_at_boundary(self):
+        segments = stitch_segments(
+            [
+                [Segment(0, 1000, "Hello"), Segment(1000, 2100, "there.")],
+                [Segment(2000, 2500, "There"), Segment(2500, 3000, "again")],
+            ]
+        )
+
+        assert [segment.text for segment in segments] == ["Hello", "there.", "again"]
+
+    def test_trims_segment_running_into_next_chunk(self):
+        segments = stitch_segments(
+            [[Segment(0, 2500, "Hello")], [Segment(2000, 3000, "world")]]
+        )
+
+        assert (segments[0].end, segments[1].start) == (2000, 2000)
+
+    def test_keeps_repeated_words_within_a_chunk(self):
+        segments = stitch_segments(
+            [[Segment(0, 500, "no"), Segment(500, 1000, "no")]]
+        )
+
+        assert len(segments) == 2
+
+
+class TestShouldTranscribeInChunks:
+    @pytest.mark.parametrize(
+        "workers,model_type,duration,expected",
+        [
+            ("4", ModelType.WHISPER_CPP, 3600.0, True),
+            ("4", ModelType.FASTER_WHISPER, 600.0, False),
+            ("1", ModelType.WHISPER, 3600.0, False),
+            ("4", ModelType.HUGGING_FACE, 3600.0, False),
+            ("4", ModelType.WHISPER, None, False),
+        ],
+    )
+    def test_should_transcribe_in_chunks(self, workers, model_type, duration, expected):
+        with patch.dict(
+            "os.environ", {"BUZZ_CHUNK_WORKERS": workers, "BUZZ_CHUNK_MINUTES": "10"}
+        ), patch(
+            "buzz.transcriber.chunked_file_transcriber.probe_duration",
+            return_value=duration,
+        ):
+            assert should_transcribe_in_chunks(make_task(model_type)) is expected
+
+
+class TestChunkedFileTranscriber:
+    def test_transcribes_chunks_and_stitches(self):
+        chunk_tasks = []
+
+        def create_transcriber(task, model_pool):
+            chunk_tasks.append(task)
+            transcriber = MagicMock()
+            transcriber.transcribe.return_value = [
+                Segment(task.audio_start, task.audio_start + 1000, f"{task.audio_start}")
+            ]
+            return transcriber
+
+        samples = np.ones(65 * 16000, dtype=np.float32)
+        task = make_task()
+        task.n_threads = 4
+        transcriber = ChunkedFileTranscriber(task, max_workers=2, chunk_seconds=20)
+
+        with patch(
+            "buzz.transcriber.chunked_file_transcriber.whisper_audio.load_audio",
+            return_value=samples,
+        ), patch(
+            "buzz.transcriber.chunked_file_transcriber.WhisperFileTranscriber",
+            side_effect=create_transcriber,
+        ), patch("buzz.transcriber.chunked_file_transcriber.WarmModelPool"):
+            segments = transcriber.transcribe()
+
+        chunk_tasks.sort(key=lambda chunk_task: chunk_task.audio_start)
+        assert [chunk_task.audio_start for chunk_task in chunk_tasks] == [0, 20000, 40000]
+        assert chunk_tasks[-1].audio_end is None
+        assert all(chunk_task.n_threads == 2 for chunk_task in chunk_tasks)
+        assert [segment.text for segment in segments] == ["0", "20000", "40000"]
+
+    def test_error_in_a_chunk_fails_the_task(self):
+        def create_transcriber(task, model_pool):
+            transcriber = MagicMock()
+            if task.audio_start > 0:
+                transcriber.transcribe.side_effect = Exception("whisper-cli failed")
+            return transcriber
+
+        transcriber = ChunkedFileTranscriber(
+            make_task(), max_workers=2, chunk_seconds=20
+        )
+
+        with patch(
+            "buzz.transcriber.chunked_file_transcriber.whisper_audio.load_audio",
+            return_value=np.ones(65 * 16000, dtype=np.float32),
+        ), patch(
+            "buzz.transcriber.chunked_file_transcriber.WhisperFileTranscriber",
+            side_effect=create_transcriber,
+        ), patch("buzz.transcriber.chunked_file_transcriber.WarmModelPool"):
+            with pytest.raises(Exception, match="whisper-cli failed"):
+                transcriber.transcribe()
+
+    def test_runs_in_queue_pool(self):
+        pool = MagicMock(max_workers=1)
+        pool.set_max_workers.side_effect = lambda n: setattr(pool, "max_workers", n)
+        pools = []
+
+        def create_transcriber(task, model_pool):
+            pools.append(model_pool)
+            transcriber = MagicMock()
+            transcriber.transcribe.return_value = []
+            return transcriber
+
+        transcriber = ChunkedFileTranscriber(
+            make_task(), max_workers=2, chunk_seconds=20, model_pool=pool
+        )
+
+        with patch(
+            "buzz.transcriber.chunked_file_transcriber.whisper_audio.load_audio",
+            return_value=np.ones(65 * 16000, dtype=np.float32),
+        ), patch(
+            "buzz.transcriber.chunked_file_transcriber.WhisperFileTranscriber",
+            side_effect=create_transcriber,
+        ):
+            transcriber.transcribe()
+
+        assert pools == [pool] * 3
+        assert [call.args[0] for call in pool.set_max_workers.call_args_list] == [2, 1]
+        pool.shutdown.assert_not_called()
+
+    def test_sends_checkpoints_in_chunk_order(self):
+        def create_transcriber(task, model_pool):
+            start = task.audio_start
+            first = Segment(start, start + 500, f"{start}a")
+            second = Segment(start + 500, start + 1000, f"{start}b")
+            transcriber = MagicMock()
+
+            def transcribe():
+                on_checkpoint = transcriber.checkpoint.connect.call_args.args[0]
+                on_checkpoint(start + 500, [first])
+                return [first, second]
+
+            transcriber.transcribe.side_effect = transcribe
+            return transcriber
+
+        transcriber = ChunkedFileTranscriber(make_task(), max_workers=1, chunk_seconds=20)
+        checkpoints = []
+        transcriber.checkpoint.connect(
+            lambda offset, segments: checkpoints.append(
+                (offset, [segment.text for segment in segments])
+            )
+        )
+
+        with patch(
+            "buzz.transcriber.chunked_file_transcriber.whisper_audio.load_audio",
+            return_value=np.ones(65 * 16000, dtype=np.float32),
+        ), patch(
+            "buzz.transcriber.chunked_file_transcriber.WhisperFileTranscriber",
+            side_effect=create_transcriber,
+        ), patch("buzz.transcriber.chunked_file_transcriber.WarmModelPool"):
+            segments = transcriber.transcribe()
+
+        # The last chunk completes the task
+        assert checkpoints == [
+            (500, ["0a"]),
+            (20000, ["0b"]),
+            (20500, ["20000a"]),
+            (40000, ["20000b"]),
+            (40500, ["40000a"]),
+        ]
+        assert [segment.text for segment in segments] == [
+            "0a", "0b", "20000a", "20000b", "40000a", "40000b"
+        ]
@@ -1,10 +1,12 @@
 import pytest
+import shutil
 import unittest.mock
 import uuid
 from PyQt6.QtCore import QCoreApplication, QThread
 from buzz.file_transcriber_queue_worker import FileTranscriberQueueWorker
 from buzz.model_loader import ModelType, TranscriptionModel, WhisperModelSize
-from buzz.transcriber.transcriber import FileTranscriptionTask, TranscriptionOptions, FileTranscriptionOptions, Segment
+from buzz.transcriber.transcriber import FileTranscriptionTask, TranscriptionOptions, FileTranscriptionOptions, OutputFormat, Segment
+from buzz.transcriber.task_scheduler import SchedulingPolicy, TASK_PRIORITY_HIGH
 from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
 from tests.audio import test_multibyte_utf8_audio_path
 import time
@@ -67,6 +69,24 @@ class TestFileTranscriberQueueWorker:
         simple_worker.add_task(task)
         assert task.uid not in simple_worker.canceled_tasks
 
+    def test_add_task_emits_queue_positions(self, simple_worker):
+        simple_worker.set_scheduling_policy(SchedulingPolicy.PRIORITY)
+        first, second = self._make_task(), self._make_task()
+        second.priority = TASK_PRIORITY_HIGH
+
+        positions_spy = unittest.mock.Mock()
+        simple_worker.queue_positions_changed.connect(positions_spy)
+
+        # Prevent trigger_run from starting the run loop
+        simple_worker.is_running = True
+        simple_worker.add_task(first)
+        simple_worker.add_task(second)
+
+        assert positions_spy.call_args[0][0] == {str(second.uid): 1, str(first.uid): 2}
+
+        simple_worker.set_task_priority(first.uid, TASK_PRIORITY_HIGH + 1)
+        assert positions_spy.call_args[0][0] == {str(first.uid): 1, str(second.uid): 2}
+
     def test_on_task_error_with_cancellation(self, simple_worker):
         options = TranscriptionOptions()
         task = FileTranscriptionTask(
@@ -145,7 +165,7 @@ class TestFileTranscriberQueueWorker:
         # Create a temporary file to simulate speech extraction output
         speech_file = tmp_path / "audio_speech.mp3"
         speech_file.write_bytes(b"fake audio data")
-        simple_worker.speech_path = speech_file
+        simple_worker.current.speech_path = speech_file
 
         completed_spy = unittest.mock.Mock()
         simple_worker.task_completed.connect(completed_spy)
@@ -154,7 +174,7 @@ class TestFileTranscriberQueueWorker:
 
         completed_spy.assert_called_once()
         # Speech path should be cleaned up
-        assert simple_worker.speech_path is None
+        assert simple_worker.current.speech_path is None
         assert not speech_file.exists()
 
     def test_on_task_completed_speech_path_missing(self, simple_worker, tmp_path):
@@ -169,7 +189,7 @@ class TestFileTranscriberQueueWorker:
         simple_worker.current.task = task
 
         # Set a speech path that doesn't exist
-        simple_worker.speech_path = tmp_path / "nonexistent_speech.mp3"
+        simple_worker.current.speech_path = tmp_path / "nonexistent_speech.mp3"
 
         completed_spy = unittest.mock.Mock()
         simple_worker.task_completed.connect(completed_spy)
@@ -178,7 +198,7 @@ class TestFileTranscriberQueueWorker:
         simple_worker.on_task_completed([])
 
         completed_spy.assert_called_once()
-        assert simple_worker.speech_path is None
+        assert simple_worker.current.speech_path is None
 
     def test_on_task_download_progress(self, simple_worker):
         """Test on_task_download_progress emits signal"""
@@ -319,9 +339,8 @@ class TestFileTranscriberQueueWorkerRun:
 
             assert isinstance(simple_worker.current.transcriber, WhisperFileTranscriber)
 
-    def test_run_speech_extraction_failure_emits_error(self, simple_worker, qapp):
+    def test_prepare_task_speech_extraction_failure_emits_error(self, simple_worker, qapp):
         task = self._make_task(extract_speech=True)
-        simple_worker.tasks_queue.put(task)
 
         error_spy = unittest.mock.Mock()
         simple_worker.task_error.connect(error_spy)
@@ -329,17 +348,226 @@ class TestFileTranscriberQueueWorkerRun:
         with unittest.mock.patch.object(
             FileTranscriberQueueWorker, '_extract_speech', return_value="error"
         ):
-            simple_worker.run()
+            slot = simple_worker._prepare_task(task)
 
+        assert slot is None
         error_spy.assert_called_once()
         args = error_spy.call_args[0]
         assert args[0] == task
+
+    def test_prepare_task_downloads_url_import(self, simple_worker, qapp):
+        task = self._make_task()
+        task.source = FileTranscriptionTask.Source.URL_IMPORT
+        task.url = "https://example.com/audio"
+
+        with unittest.mock.patch(
+            'buzz.file_transcriber_queue_worker.download_audio', return_value="/tmp/audio.wav"
+        ) as mock_download:
+            slot = simple_worker._prepare_task(task)
+
+        mock_download.assert_called_once()
+        assert slot.task.file_path == "/tmp/audio.wav"
+
+    def test_prepare_task_download_failure_emits_error(self, simple_worker, qapp):
+        task = self._make_task()
+        task.source = FileTranscriptionTask.Source.URL_IMPORT
+        task.url = "https://example.com/audio"
+
+        error_spy = unittest.mock.Mock()
+        simple_worker.task_error.connect(error_spy)
+
+        with unittest.mock.patch(
+            'buzz.file_transcriber_queue_worker.download_audio',
+            side_effect=Exception("Unsupported URL"),
+        ):
+            slot = simple_worker._prepare_task(task)
+
+        assert slot is None
+        error_spy.assert_called_once_with(task, "Unsupported URL")
+        assert task.status == FileTranscriptionTask.Status.FAILED
+
+    def test_prepare_task_completes_from_result_cache(self, simple_worker, qapp):
+        task = self._make_task(extract_speech=True)
+        segments = [Segment(start=0, end=1000, text="Cached")]
+        simple_worker.result_cache = unittest.mock.Mock()
+        simple_worker.result_cache.get.return_value = segments
+
+        completed_spy = unittest.mock.Mock()
+        simple_worker.task_completed.connect(completed_spy)
+
+        with unittest.mock.patch.object(
+            FileTranscriberQueueWorker, '_extract_speech'
+        ) as mock_extract_speech:
+            slot = simple_worker._prepare_task(task)
+
+        assert slot is None
+        mock_extract_speech.assert_not_called()
+        simple_worker.result_cache.get.assert_called_once_with(task.cache_key)
+        completed_spy.assert_called_once_with(task, segments)
+        assert task.status == FileTranscriptionTask.Status.COMPLETED
+
+    def test_cache_hit_writes_outputs_and_moves_watched_file(
+        self, simple_worker, qapp, tmp_path
+    ):
+        watched_path = tmp_path / "watched" / "audio.mp3"
+        watched_path.parent.mkdir()
+        shutil.copy(test_multibyte_utf8_audio_path, watched_path)
+        output_directory = tmp_path / "output"
+        output_directory.mkdir()
+
+        task = self._make_task()
+        task.file_path = str(watched_path)
+        task.source = FileTranscriptionTask.Source.FOLDER_WATCH
+        task.output_directory = str(output_directory)
+        task.file_transcription_options.output_formats = {OutputFormat.TXT}
+        simple_worker.result_cache = unittest.mock.Mock()
+        simple_worker.result_cache.get.return_value = [
+            Segment(start=0, end=1000, text="Cached")
+        ]
+
+        assert simple_worker._prepare_task(task) is None
+
+        assert not watched_path.exists()
+        assert (output_directory / "audio.mp3").exists()
+        (output_file,) = output_directory.glob("*.txt")
+        assert output_file.read_text(encoding="utf-8").strip() == "Cached"
+
+    def test_prepare_task_cache_miss_keeps_key(self, simple_worker, qapp):
+        task = self._make_task()
+        simple_worker.result_cache = unittest.mock.Mock()
+        simple_worker.result_cache.get.return_value = None
+
+        slot = simple_worker._prepare_task(task)
+
+        assert slot.task is task
+        assert task.cache_key is not None
+
+    def test_next_task_is_prepared_while_current_one_runs(self, simple_worker, qapp):
+        first, second = self._make_task(), self._make_task()
+        simple_worker.tasks_queue.put(first)
+        simple_worker.tasks_queue.put(second)
+
+        with unittest.mock.patch.object(WhisperFileTranscriber, 'run'), \
+             unittest.mock.patch.object(WhisperFileTranscriber, 'moveToThread'), \
+             unittest.mock.patch('buzz.file_transcriber_queue_worker.QThread'):
+            simple_worker.run()
+
+        assert simple_worker.running_tasks == [first]
+
+        start_time = time.time()
+        while simple_worker.prepared_tasks_queue.qsize() == 0 and time.time() - start_time < 5:
+            time.sleep(0.01)
+
+        assert simple_worker.prepared_tasks_queue.get_nowait().task == second
+
+    def test_run_starts_tasks_up_to_max_concurrent_tasks(self, simple_worker, qapp):
+        simple_worker.max_concurrent_tasks = 2
+        tasks = [self._make_task() for _ in range(3)]
+
+        started_spy = unittest.mock.Mock()
+        simple_worker.task_started.connect(started_spy)
+
+        with unittest.mock.patch.object(WhisperFileTranscriber, 'run'), \
+             unittest.mock.patch.object(WhisperFileTranscriber, 'moveToThread'), \
+             unittest.mock.patch('buzz.file_transcriber_queue_worker.QThread'):
+            simple_worker.tasks_queue.put(tasks[0])
+            simple_worker.run()
+            assert simple_worker.running_tasks == tasks[:1]
+
+            # Prepared after the first task started, the preparer starts it
+            # next to the running one
+            simple_worker.tasks_queue.put(tasks[1])
+            simple_worker.tasks_queue.put(tasks[2])
+            start_time = time.time()
+            while len(simple_worker.running) < 2 and time.time() - start_time < 5:
+                qapp.processEvents()
+                time.sleep(0.01)
+
+            # The third task waits for a free slot
+            for _ in range(10):
+                qapp.processEvents()
+                time.sleep(0.01)
+
+        assert started_spy.call_count == 2
+        assert simple_worker.running_tasks == tasks[:2]
+        assert simple_worker.is_running is True
+
+    def test_run_splits_threads_between_concurrent_tasks(self, simple_worker, qapp):
+        simple_worker.max_concurrent_tasks = 2
+        task = self._make_task()
+        simple_worker.tasks_queue.put(task)
+
+        with unittest.mock.patch.object(WhisperFileTranscriber, 'run'), \
+             unittest.mock.patch.object(WhisperFileTranscriber, 'moveToThread'), \
+             unittest.mock.patch('buzz.file_transcriber_queue_worker.QThread'), \
+             unittest.mock.patch('buzz.file_transcriber_queue_worker.os.cpu_count', return_value=8):
+            simple_worker.run()
+
+        assert task.n_threads == 4
+
+    def test_run_keeps_default_threads_for_single_task(self, simple_worker, qapp):
+        task = self._make_task()
+        simple_worker.tasks_queue.put(task)
+
+        with unittest.mock.patch.object(WhisperFileTranscriber, 'run'), \
+             unittest.mock.patch.object(WhisperFileTranscriber, 'moveToThread'), \
+             unittest.mock.patch('buzz.file_transcriber_queue_worker.QThread'):
+            simple_worker.run()
+
+        assert task.n_threads is None
+
+    def test_slot_signals_are_reported_for_their_own_task(self, simple_worker, qapp):
+        simple_worker.max_concurrent_tasks = 2
+        first, second = self._make_task(), self._make_task()
+        simple_worker.tasks_queue.put(first)
+        simple_worker.tasks_queue.put(second)
+
+        with unittest.mock.patch.object(WhisperFileTranscriber, 'run'), \
+             unittest.mock.patch.object(WhisperFileTranscriber, 'moveToThread'), \
+             unittest.mock.patch('buzz.file_transcriber_queue_worker.QThread'):
+            simple_worker.run()
+
+        first_slot = simple_worker.running[first.uid]
+
+        progress_spy = unittest.mock.Mock()
+        completed_spy = unittest.mock.Mock()
+        simple_worker.task_progress.connect(progress_spy)
+        simple_worker.task_completed.connect(completed_spy)
+
+        simple_worker.on_task_progress((1, 4), first_slot)
+        simple_worker.on_task_completed([], first_slot)
+        simple_worker._on_task_finished(first_slot)
+
+        assert progress_spy.call_args[0] == (first, 0.25)
+        assert completed_spy.call_args[0][0] == first
+        assert simple_worker.running_tasks == [second]
         assert simple_worker.is_running is False
 
+    def test_cancel_task_stops_only_its_slot(self, simple_worker, qapp):
+        simple_worker.max_concurrent_tasks = 2
+        first, second = self._make_task(), self._make_task()
+        simple_worker.tasks_queue.put(first)
+        simple_worker.tasks_queue.put(second)
+
+        with unittest.mock.patch.object(WhisperFileTranscriber, 'run'), \
+             unittest.mock.patch.object(WhisperFileTranscriber, 'moveToThread'), \
+             unittest.mock.patch('buzz.file_transcriber_queue_worker.QThread'):
+            simple_worker.run()
+
+        first_transcriber = unittest.mock.Mock()
+        second_transcriber = unittest.mock.Mock()
+        simple_worker.running[first.uid].transcriber = first_transcriber
+        simple_worker.running[second.uid].transcriber = second_transcriber
+
+        simple_worker.cancel_task(first.uid)
+
+        first_transcriber.stop.assert_called_once()
+        second_transcriber.stop.assert_not_called()
+
     def _run_extract_speech(self, simple_worker, messages, exitcode=0):
         """Drive _extract_speech with a scripted sequence of pipe messages."""
         task = self._make_task(extract_speech=True)
-        simple_worker.current.task = task
+        simple_worker.preparing.task = task
 
         recv_conn = unittest.mock.Mock()
         recv_conn.recv.side_effect = list(messages) + [EOFError()]
@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock, patch
+
+from buzz.transcriber.language_detection import DETECTION_SECONDS, LanguageDetector
+from buzz.transcriber.whisper_cpp import WhisperCpp
+from buzz.whisper_audio import SAMPLE_RATE
+from tests.audio import test_audio_path
+
+
+class TestLanguageDetector:
+    def test_detects_from_head_of_file_with_server(self):
+        detector = LanguageDetector()
+        server = MagicMock()
+
+        with patch(
+            "buzz.transcriber.language_detection.is_server_enabled", return_value=True
+        ), patch.object(detector, "_get_server", return_value=server), patch.object(
+            WhisperCpp, "detect_language_with_server", return_value="fr"
+        ) as mock_detect:
+            assert detector.detect(test_audio_path, "/fake/model.bin") == "fr"
+
+        samples, used_server = mock_detect.call_args[0]
+        assert 0 < len(samples) <= DETECTION_SECONDS * SAMPLE_RATE
+        assert used_server is server
+
+    def test_caches_results_by_audio_and_model(self):
+        detector = LanguageDetector()
+
+        with patch(
+            "buzz.transcriber.language_detection.is_server_enabled", return_value=False
+        ), patch.object(
+            WhisperCpp, "detect_language", return_value="fr"
+        ) as mock_detect:
+            assert detector.detect(test_audio_path, "/fake/tiny.bin") == "fr"
+            assert detector.detect(test_audio_path, "/fake/tiny.bin") == "fr"
+            assert mock_detect.call_count == 1
+
+            detector.detect(test_audio_path, "/fake/small.bin")
+            assert mock_detect.call_count == 2
+
+    def test_failed_detection_is_not_cached(self):
+        detector = LanguageDetector()
+
+        with patch(
+            "buzz.transcriber.language_detection.is_server_enabled", return_value=False
+        ), patch.object(WhisperCpp, "detect_language", return_value=None) as mock_detect:
+            assert detector.detect(test_audio_path, "/fake/tiny.bin") is None
+            assert detector.detect(test_audio_path, "/fake/tiny.bin") is None
+
+        assert mock_detect.call_count == 2
@@ -0,0 +1,87 @@
+import csv
+import json
+from unittest.mock import patch
+
+import pytest
+
+from buzz.db.entity.transcription import Transcription
+from buzz.transcriber.metrics import (
+    Stage,
+    add_timing,
+    format_stage_timings,
+    get_real_time_factor,
+    timed_inference,
+    write_metrics,
+)
+
+
+class TestTimings:
+    def test_add_timing_accumulates(self):
+        timings = {}
+        add_timing(timings, Stage.DOWNLOAD, 1.5)
+        add_timing(timings, Stage.DOWNLOAD, 0.5)
+
+        assert timings == {"download": 2.0}
+
+    def test_real_time_factor_excludes_queue_wait(self):
+        timings = {"queue_wait": 100.0, "model_load": 5.0, "inference": 25.0}
+
+        assert get_real_time_factor(timings, 60.0) == 0.5
+        assert get_real_time_factor(timings, None) is None
+        assert get_real_time_factor({}, 60.0) is None
+
+    def test_timed_inference_excludes_model_load(self):
+        timings = {"model_load": 1.0}
+        with patch("buzz.transcriber.metrics.time.perf_counter", side_effect=[10.0, 20.0]):
+            with timed_inference(timings):
+                add_timing(timings, Stage.MODEL_LOAD, 4.0)
+
+        assert timings == {"model_load": 5.0, "inference": 6.0}
+
+    def test_format_stage_timings_in_stage_order(self):
+        metrics = json.dumps({"inference": 12.34, "queue_wait": 1.0})
+
+        assert format_stage_timings(metrics) == "Queue Wait 1.0s, Inference 12.3s"
+        assert format_stage_timings(None) == ""
+
+
+@pytest.fixture()
+def transcriptions():
+    return [
+        Transcription(
+            id="1",
+            file="/a/b/c.mp3",
+            model_type="whisper_cpp",
+            whisper_model_size="tiny",
+            status="completed",
+            audio_duration=60.0,
+            real_time_factor=0.5,
+            metrics=json.dumps({"queue_wait": 3.0, "inference": 30.0}),
+        )
+    ]
+
+
+class TestWriteMetrics:
+    def test_csv(self, tmp_path, transcriptions):
+        path = str(tmp_path / "metrics.csv")
+        write_metrics(path, transcriptions)
+
+        with open(path, newline="") as file:
+            rows = list(csv.DictReader(file))
+
+        assert len(rows) == 1
+        assert rows[0]["name"] == "/a/b/c.mp3"
+        assert rows[0]["processing_time"] == "30.0"
+        assert rows[0]["queue_wait"] == "3.0"
+        assert rows[0]["model_load"] == ""
+
+    def test_json(self, tmp_path, transcriptions):
+        path = str(tmp_path / "metrics.json")
+        write_metrics(path, transcriptions)
+
+        with open(path) as file:
+            rows = json.load(file)
+
+        assert rows[0]["real_time_factor"] == 0.5
+        assert rows[0]["inference"] == 30.0
+        assert rows[0]["model_load"] is None
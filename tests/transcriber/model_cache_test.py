@@ -0,0 +1,48 @@
+import unittest.mock
+
+from buzz.transcriber.model_cache import ModelCache
+
+
+class TestModelCache:
+    def test_loads_once_per_key(self):
+        cache = ModelCache(max_size=2)
+        loader = unittest.mock.Mock(return_value="model")
+
+        assert cache.get_or_load(("whisper", "tiny", "default", "cpu"), loader) == "model"
+        assert cache.get_or_load(("whisper", "tiny", "default", "cpu"), loader) == "model"
+
+        loader.assert_called_once()
+
+    def test_evicts_least_recently_used(self):
+        cache = ModelCache(max_size=2)
+        key_a = ("whisper", "a", "default", "cpu")
+        key_b = ("whisper", "b", "default", "cpu")
+        key_c = ("whisper", "c", "default", "cpu")
+
+        cache.get_or_load(key_a, lambda: "a")
+        cache.get_or_load(key_b, lambda: "b")
+        # Touch a so that b becomes the least recently used
+        cache.get_or_load(key_a, lambda: "a")
+        cache.get_or_load(key_c, lambda: "c")
+
+        assert key_a in cache
+        assert key_b not in cache
+        assert key_c in cache
+        assert len(cache) == 2
+
+    def test_clear(self):
+        cache = ModelCache(max_size=1)
+        cache.get_or_load(("whisper", "a", "default", "cpu"), lambda: "a")
+
+        cache.clear()
+
+        assert len(cache) == 0
+
+    def test_closes_evicted_model(self):
+        cache = ModelCache(max_size=1)
+        model = unittest.mock.Mock()
+        cache.get_or_load(("whispercpp", "a", "server", "cpu"), lambda: model)
+
+        cache.get_or_load(("whispercpp", "b", "server", "cpu"), lambda: "b")
+
+        model.close.assert_called_once()
@@ -0,0 +1,156 @@
+import uuid
+from unittest.mock import patch
+
+import pytest
+from PyQt6.QtSql import QSqlQuery
+
+from buzz.db.entity.transcription import Transcription
+from buzz.model_loader import ModelType, TranscriptionModel, WhisperModelSize
+from buzz.transcriber.result_cache import (
+    ResultCache,
+    compute_file_hash,
+    get_cache_key,
+)
+from buzz.transcriber.transcriber import (
+    FileTranscriptionOptions,
+    FileTranscriptionTask,
+    Segment,
+    Task,
+    TranscriptionOptions,
+)
+from buzz.transcriber.tuning import TunedConfig
+
+
+def make_task(file_path: str, **options) -> FileTranscriptionTask:
+    return FileTranscriptionTask(
+        file_path=file_path,
+        transcription_options=TranscriptionOptions(
+            model=TranscriptionModel(
+                model_type=ModelType.WHISPER_CPP,
+                whisper_model_size=WhisperModelSize.TINY,
+            ),
+            **options,
+        ),
+        file_transcription_options=FileTranscriptionOptions(),
+        model_path="/models/ggml-tiny.bin",
+    )
+
+
+@pytest.fixture()
+def result_cache(db):
+    cache = ResultCache(db_path=db.databaseName(), max_size=1024 * 1024)
+    yield cache
+    cache.close()
+
+
+def add_completed_transcription(transcription_service, segments) -> str:
+    transcription = Transcription(
+        id=str(uuid.uuid4()), status=FileTranscriptionTask.Status.COMPLETED.value
+    )
+    transcription_service.transcription_dao.insert(transcription)
+    transcription_service.replace_transcription_segments(
+        transcription.id_as_uuid, segments
+    )
+    return transcription.id
+
+
+class TestGetCacheKey:
+    def test_same_content_in_another_file(self, tmp_path):
+        first, second = tmp_path / "a.mp3", tmp_path / "b.mp3"
+        first.write_bytes(b"audio" * 100)
+        second.write_bytes(b"audio" * 100)
+
+        assert get_cache_key(make_task(str(first))) == get_cache_key(
+            make_task(str(second))
+        )
+
+    def test_changes_with_options_and_content(self, tmp_path):
+        file = tmp_path / "a.mp3"
+        file.write_bytes(b"audio" * 100)
+        key = get_cache_key(make_task(str(file)))
+
+        assert get_cache_key(make_task(str(file), task=Task.TRANSLATE)) != key
+        assert get_cache_key(make_task(str(file), language="fr")) != key
+        assert get_cache_key(make_task(str(file), initial_prompt="Hi")) != key
+
+        file.write_bytes(b"other" * 100)
+        assert get_cache_key(make_task(str(file))) != key
+
+    def test_changes_with_beam_size(self, tmp_path):
+        file = tmp_path / "a.mp3"
+        file.write_bytes(b"audio" * 100)
+        key = get_cache_key(make_task(str(file)))
+
+        greedy_task = make_task(str(file))
+        greedy_task.beam_size = 1
+        assert get_cache_key(greedy_task) != key
+
+        # A tuned beam size is used before it is set on the task
+        with patch(
+            "buzz.transcriber.tuning.load_tuned_config",
+            return_value=TunedConfig(n_threads=4, beam_size=1),
+        ):
+            assert get_cache_key(make_task(str(file))) == get_cache_key(greedy_task)
+
+    def test_missing_file(self, tmp_path):
+        assert get_cache_key(make_task(str(tmp_path / "missing.mp3"))) is None
+
+    def test_large_files_are_sampled(self, tmp_path):
+        file = tmp_path / "a.mp4"
+        file.write_bytes(bytes(4096))
+
+        with patch("buzz.transcriber.result_cache.FULL_HASH_MAX_BYTES", 1024), patch(
+            "buzz.transcriber.result_cache.SAMPLE_BLOCK_SIZE", 16
+        ), patch("buzz.transcriber.result_cache.SAMPLE_BLOCK_COUNT", 4):
+            sampled_hash = compute_file_hash(str(file))
+
+        assert sampled_hash != compute_file_hash(str(file))
+
+
+class TestResultCache:
+    def test_hit_returns_saved_segments(self, result_cache, transcription_service):
+        segments = [Segment(0, 1000, "Hello"), Segment(1000, 2000, "world")]
+        transcription_id = add_completed_transcription(transcription_service, segments)
+
+        assert result_cache.get("key") is None
+        result_cache.put("key", transcription_id)
+
+        assert result_cache.get("key") == segments
+        assert (result_cache.hits, result_cache.misses) == (1, 1)
+
+    def test_ignores_transcriptions_that_are_not_completed(
+        self, result_cache, transcription_service
+    ):
+        transcription_id = add_completed_transcription(
+            transcription_service, [Segment(0, 1000, "Hello")]
+        )
+        result_cache.put("key", transcription_id)
+        transcription_service.reset_transcription_for_restart(uuid.UUID(transcription_id))
+
+        assert result_cache.get("key") is None
+
+    def test_evicts_least_recently_used(self, result_cache, transcription_service):
+        result_cache.max_size = 10
+        first = add_completed_transcription(transcription_service, [Segment(0, 1, "x" * 6)])
+        second = add_completed_transcription(transcription_service, [Segment(0, 1, "y" * 6)])
+
+        result_cache.put("first", first)
+        result_cache.put("second", second)
+
+        assert result_cache.get("first") is None
+        assert result_cache.get("second") is not None
+
+    def test_entry_removed_with_transcription(
+        self, db, result_cache, transcription_service
+    ):
+        transcription_id = add_completed_transcription(
+            transcription_service, [Segment(0, 1000, "Hello")]
+        )
+        result_cache.put("key", transcription_id)
+
+        query = QSqlQuery(db)
+        query.prepare("DELETE FROM transcription WHERE id = :id")
+        query.bindValue(":id", transcription_id)
+        assert query.exec()
+
+        assert result_cache.get("key") is None
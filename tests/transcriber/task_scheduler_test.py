@@ -0,0 +1,143 @@
+import threading
+from unittest.mock import patch
+
+from buzz.model_loader import ModelType, TranscriptionModel, WhisperModelSize
+from buzz.transcriber.task_scheduler import (
+    SchedulingPolicy,
+    TaskScheduler,
+    TASK_PRIORITY_HIGH,
+    TASK_PRIORITY_LOW,
+    probe_duration,
+)
+from buzz.transcriber.transcriber import (
+    FileTranscriptionTask,
+    FileTranscriptionOptions,
+    TranscriptionOptions,
+)
+from tests.audio import test_audio_path
+
+
+def make_task(file_path: str = test_audio_path, priority: int = 0) -> FileTranscriptionTask:
+    return FileTranscriptionTask(
+        file_path=file_path,
+        transcription_options=TranscriptionOptions(
+            model=TranscriptionModel(
+                model_type=ModelType.WHISPER_CPP,
+                whisper_model_size=WhisperModelSize.TINY,
+            )
+        ),
+        file_transcription_options=FileTranscriptionOptions(),
+        model_path="",
+        priority=priority,
+    )
+
+
+class TestTaskScheduler:
+    def test_fifo_ignores_priority(self):
+        scheduler = TaskScheduler(SchedulingPolicy.FIFO)
+        first = make_task(priority=TASK_PRIORITY_LOW)
+        second = make_task(priority=TASK_PRIORITY_HIGH)
+        scheduler.put(first)
+        scheduler.put(second)
+
+        assert scheduler.get() is first
+        assert scheduler.get() is second
+
+    def test_priority_runs_higher_priority_first(self):
+        scheduler = TaskScheduler(SchedulingPolicy.PRIORITY)
+        low = make_task(priority=TASK_PRIORITY_LOW)
+        normal = make_task()
+        high = make_task(priority=TASK_PRIORITY_HIGH)
+        for task in (low, normal, high):
+            scheduler.put(task)
+
+        assert scheduler.waiting_task_ids() == [high.uid, normal.uid, low.uid]
+        assert [scheduler.get() for _ in range(3)] == [high, normal, low]
+
+    def test_shortest_first_uses_probed_duration(self):
+        scheduler = TaskScheduler(SchedulingPolicy.SHORTEST_FIRST)
+        long = make_task(file_path="long.mp3")
+        unknown = make_task(file_path="unknown.mp3")
+        short = make_task(file_path="short.mp3")
+        for task in (long, unknown, short):
+            scheduler.put(task)
+
+        durations = {"long.mp3": 60 * 60 * 2, "short.mp3": 30}
+        with patch(
+            "buzz.transcriber.task_scheduler.probe_duration",
+            side_effect=lambda path: durations.get(path),
+        ) as mock_probe:
+            assert [scheduler.get() for _ in range(3)] == [short, unknown, long]
+
+        assert mock_probe.call_count == 3
+
+    def test_shortest_first_honors_priority(self):
+        scheduler = TaskScheduler(SchedulingPolicy.SHORTEST_FIRST)
+        long = make_task(file_path="long.mp3", priority=TASK_PRIORITY_HIGH)
+        short = make_task(file_path="short.mp3")
+        scheduler.put(short)
+        scheduler.put(long)
+
+        with patch(
+            "buzz.transcriber.task_scheduler.probe_duration",
+            side_effect=lambda path: 10 if path == "short.mp3" else 1000,
+        ):
+            assert scheduler.get() is long
+
+    def test_waiting_tasks_age_up(self):
+        with patch("buzz.transcriber.task_scheduler.time.monotonic", return_value=0):
+            scheduler = TaskScheduler(
+                SchedulingPolicy.PRIORITY, aging_interval_seconds=10
+            )
+            old = make_task(priority=TASK_PRIORITY_LOW)
+            scheduler.put(old)
+
+        with patch("buzz.transcriber.task_scheduler.time.monotonic", return_value=25):
+            new = make_task(priority=TASK_PRIORITY_HIGH)
+            scheduler.put(new)
+            assert scheduler.get() is old
+
+    def test_set_priority(self):
+        scheduler = TaskScheduler(SchedulingPolicy.PRIORITY)
+        first = make_task()
+        second = make_task()
+        scheduler.put(first)
+        scheduler.put(second)
+
+        assert scheduler.set_priority(second.uid, TASK_PRIORITY_HIGH)
+        assert second.priority == TASK_PRIORITY_HIGH
+        assert scheduler.waiting_task_ids() == [second.uid, first.uid]
+
+        scheduler.get()
+        assert not scheduler.set_priority(second.uid, TASK_PRIORITY_LOW)
+
+    def test_stop_sentinel_is_returned_first(self):
+        scheduler = TaskScheduler()
+        scheduler.put(make_task())
+        scheduler.put(None)
+
+        assert scheduler.qsize() == 2
+        assert scheduler.get() is None
+        assert scheduler.qsize() == 1
+
+    def test_get_blocks_until_task_is_put(self):
+        scheduler = TaskScheduler()
+        task = make_task()
+        results = []
+
+        thread = threading.Thread(target=lambda: results.append(scheduler.get()))
+        thread.start()
+        scheduler.put(task)
+        thread.join(timeout=5)
+
+        assert results == [task]
+
+
+def test_probe_duration():
+    duration = probe_duration(test_audio_path)
+    assert duration is not None and duration > 0
+
+
+def test_probe_duration_of_missing_file():
+    assert probe_duration("/does/not/exist.mp3") is None
+    assert probe_duration(None) is None
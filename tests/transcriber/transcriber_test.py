@@ -4,8 +4,13 @@ import pytest
 
 from buzz.transcriber.file_transcriber import write_output, to_timestamp
 from buzz.transcriber.transcriber import (
+    FileTranscriptionOptions,
+    FileTranscriptionTask,
     OutputFormat,
+    RESUME_PROMPT_MAX_CHARS,
     Segment,
+    TranscriptionOptions,
+    get_resume_prompt,
 )
 
 
@@ -41,3 +46,41 @@ def test_write_output(
 
     with open(output_file_path, encoding="utf-8") as output_file:
         assert output_text == output_file.read()
+
+
+class TestGetResumePrompt:
+    def _make_task(self, initial_prompt="", resume_offset=0, segments=None):
+        return FileTranscriptionTask(
+            transcription_options=TranscriptionOptions(initial_prompt=initial_prompt),
+            file_transcription_options=FileTranscriptionOptions(),
+            model_path="",
+            resume_offset=resume_offset,
+            segments=segments or [],
+        )
+
+    def test_returns_initial_prompt_without_checkpoint(self):
+        task = self._make_task(initial_prompt="Glossary: Buzz")
+        assert get_resume_prompt(task) == "Glossary: Buzz"
+
+    def test_ends_with_tail_of_previous_segments(self):
+        task = self._make_task(
+            initial_prompt="Glossary: Buzz",
+            resume_offset=2000,
+            segments=[
+                Segment(start=0, end=1000, text=" Hello"),
+                Segment(start=1000, end=2000, text=" world."),
+            ],
+        )
+        assert get_resume_prompt(task) == "Glossary: Buzz Hello world."
+
+    def test_tail_is_limited(self):
+        segments = [
+            Segment(start=i * 1000, end=(i + 1) * 1000, text=f"word{i}")
+            for i in range(1000)
+        ]
+        task = self._make_task(resume_offset=1_000_000, segments=segments)
+
+        prompt = get_resume_prompt(task)
+
+        assert len(prompt) <= RESUME_PROMPT_MAX_CHARS
+        assert prompt.endswith("word998 word999")
@@ -0,0 +1,134 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from buzz.model_loader import ModelType, TranscriptionModel, WhisperModelSize
+from buzz.transcriber.transcriber import (
+    FileTranscriptionOptions,
+    FileTranscriptionTask,
+    TranscriptionOptions,
+)
+from buzz.transcriber.tuning import (
+    CalibrationResult,
+    Calibrator,
+    TunedConfig,
+    apply_tuned_config,
+    get_thread_candidates,
+    load_tuned_config,
+    save_tuned_config,
+)
+
+
+def make_model(model_type=ModelType.FASTER_WHISPER, size=WhisperModelSize.TINY):
+    return TranscriptionModel(model_type=model_type, whisper_model_size=size)
+
+
+def make_task(model: TranscriptionModel, n_threads=None) -> FileTranscriptionTask:
+    return FileTranscriptionTask(
+        file_path="audio.mp3",
+        transcription_options=TranscriptionOptions(model=model),
+        file_transcription_options=FileTranscriptionOptions(),
+        model_path="/models/tiny",
+        n_threads=n_threads,
+    )
+
+
+@pytest.fixture()
+def tuned_settings(settings):
+    yield settings
+    settings.settings.remove("transcriber/tuned-configurations")
+
+
+class TestTunedConfig:
+    def test_saved_per_backend_and_model_size(self, tuned_settings):
+        config = TunedConfig(n_threads=6, compute_type="int8", beam_size=1)
+        save_tuned_config(make_model(), config, tuned_settings)
+
+        assert load_tuned_config(make_model(), tuned_settings) == config
+        assert load_tuned_config(make_model(ModelType.WHISPER_CPP), tuned_settings) is None
+        assert (
+            load_tuned_config(make_model(size=WhisperModelSize.SMALL), tuned_settings)
+            is None
+        )
+
+    def test_not_used_on_another_machine(self, tuned_settings):
+        save_tuned_config(make_model(), TunedConfig(n_threads=6), tuned_settings)
+
+        with patch(
+            "buzz.transcriber.tuning.get_machine_fingerprint", return_value="other"
+        ):
+            assert load_tuned_config(make_model(), tuned_settings) is None
+
+    @pytest.mark.parametrize("budget,expected", [(None, 6), (4, 4), (8, 6)])
+    def test_apply_keeps_thread_budget(self, tuned_settings, budget, expected):
+        save_tuned_config(
+            make_model(), TunedConfig(n_threads=6, compute_type="int8"), tuned_settings
+        )
+        task = make_task(make_model(), n_threads=budget)
+
+        apply_tuned_config(task, tuned_settings)
+
+        assert task.n_threads == expected
+        assert task.compute_type == "int8"
+        assert task.beam_size is None
+
+
+def test_thread_candidates():
+    assert get_thread_candidates(8) == [2, 4, 6, 8]
+    assert get_thread_candidates(1) == [1]
+
+
+class TestCalibrator:
+    def run_with_timings(self, seconds_of, text_of=lambda config: "hello"):
+        calibrator = Calibrator(make_model(), "/models/tiny", file_path="audio.wav")
+
+        def run(config):
+            return CalibrationResult(
+                config=config, seconds=seconds_of(config), text=text_of(config)
+            )
+
+        with patch.object(calibrator, "run", side_effect=run), patch(
+            "buzz.transcriber.tuning.os.cpu_count", return_value=8
+        ):
+            return calibrator.calibrate()
+
+    def test_picks_fastest_settings(self):
+        config = self.run_with_timings(
+            lambda config: abs(config.n_threads - 6)
+            + (0 if config.compute_type == "int8" else 1)
+            + (0 if config.batch_size == 16 else 1)
+            + (0 if config.beam_size == 1 else 0.5)
+        )
+
+        assert config == TunedConfig(
+            n_threads=6, compute_type="int8", batch_size=16, beam_size=1
+        )
+
+    def test_keeps_beam_size_when_greedy_changes_text(self):
+        config = self.run_with_timings(
+            lambda config: 1.0 if config.beam_size == 1 else 2.0,
+            text_of=lambda config: "hello" if config.beam_size is None else "hallo",
+        )
+
+        assert config.beam_size is None
+
+    def test_runs_in_one_warm_worker(self):
+        calibrator = Calibrator(make_model(), "/models/tiny", file_path="audio.wav")
+        pools = []
+
+        def create_transcriber(task, model_pool):
+            pools.append(model_pool)
+            transcriber = MagicMock()
+            transcriber.transcribe.return_value = []
+            return transcriber
+
+        with patch("buzz.transcriber.warm_model_pool.WarmModelPool") as pool_class, patch(
+            "buzz.transcriber.whisper_file_transcriber.WhisperFileTranscriber",
+            side_effect=create_transcriber,
+        ), patch("buzz.transcriber.tuning.os.cpu_count", return_value=8):
+            calibrator.calibrate()
+
+        pool_class.assert_called_once_with(max_workers=1)
+        assert len(pools) > 1
+        assert all(pool is pool_class.return_value for pool in pools)
+        pool_class.return_value.shutdown.assert_called_once()
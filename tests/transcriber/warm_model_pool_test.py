@@ -0,0 +1,151 @@
+import threading
+import unittest.mock
+
+from buzz.model_loader import ModelType, TranscriptionModel, WhisperModelSize
+from buzz.transcriber.transcriber import (
+    FileTranscriptionTask,
+    FileTranscriptionOptions,
+    TranscriptionOptions,
+)
+from buzz.transcriber.model_cache import ModelCache
+from buzz.transcriber.warm_model_pool import (
+    WarmModelPool,
+    _cancel_when_set,
+    get_model_cache_size,
+)
+from buzz.transcriber.whisper_cpp_server import WhisperCppServer
+from buzz.transcriber.whisper_file_transcriber import WhisperFileTranscriber
+from tests.audio import test_audio_path
+
+
+def make_task(model_path: str) -> FileTranscriptionTask:
+    return FileTranscriptionTask(
+        file_path=test_audio_path,
+        transcription_options=TranscriptionOptions(
+            model=TranscriptionModel(
+                model_type=ModelType.FASTER_WHISPER,
+                whisper_model_size=WhisperModelSize.TINY,
+            )
+        ),
+        file_transcription_options=FileTranscriptionOptions(),
+        model_path=model_path,
+    )
+
+
+def fake_worker(*args, **kwargs):
+    worker = unittest.mock.Mock()
+    worker.model_path = None
+    worker.is_alive.return_value = True
+    return worker
+
+
+class TestWarmModelPool:
+    def test_reuses_idle_worker(self):
+        with unittest.mock.patch(
+            "buzz.transcriber.warm_model_pool.WarmModelWorker", side_effect=fake_worker
+        ) as worker_class:
+            pool = WarmModelPool(max_workers=1)
+
+            worker = pool.acquire(make_task("tiny"))
+            worker.model_path = "tiny"
+            pool.release(worker)
+
+            assert pool.acquire(make_task("base")) is worker
+            worker_class.assert_called_once()
+
+    def test_prefers_worker_with_same_model(self):
+        with unittest.mock.patch(
+            "buzz.transcriber.warm_model_pool.WarmModelWorker", side_effect=fake_worker
+        ):
+            pool = WarmModelPool(max_workers=2)
+
+            tiny_worker = pool.acquire(make_task("tiny"))
+            tiny_worker.model_path = "tiny"
+            base_worker = pool.acquire(make_task("base"))
+            base_worker.model_path = "base"
+            pool.release(base_worker)
+            pool.release(tiny_worker)
+
+            assert pool.acquire(make_task("tiny")) is tiny_worker
+
+    def test_replaces_dead_worker(self):
+        with unittest.mock.patch(
+            "buzz.transcriber.warm_model_pool.WarmModelWorker", side_effect=fake_worker
+        ) as worker_class:
+            pool = WarmModelPool(max_workers=1)
+
+            worker = pool.acquire(make_task("tiny"))
+            pool.release(worker)
+            worker.is_alive.return_value = False
+
+            assert pool.acquire(make_task("tiny")) is not worker
+            assert worker_class.call_count == 2
+
+    def test_shutdown_stops_idle_workers(self):
+        with unittest.mock.patch(
+            "buzz.transcriber.warm_model_pool.WarmModelWorker", side_effect=fake_worker
+        ):
+            pool = WarmModelPool(max_workers=1)
+            worker = pool.acquire(make_task("tiny"))
+            pool.release(worker)
+
+            pool.shutdown()
+
+            worker.stop.assert_called_once()
+
+    def test_set_max_workers_stops_surplus_idle_workers(self):
+        with unittest.mock.patch(
+            "buzz.transcriber.warm_model_pool.WarmModelWorker", side_effect=fake_worker
+        ):
+            pool = WarmModelPool(max_workers=2)
+            first = pool.acquire(make_task("tiny"))
+            second = pool.acquire(make_task("base"))
+            pool.release(first)
+            pool.release(second)
+
+            pool.set_max_workers(1)
+
+            first.stop.assert_called_once()
+            second.stop.assert_not_called()
+            assert pool.idle == [second]
+
+
+class TestGetModelCacheSize:
+    def test_default(self, monkeypatch):
+        monkeypatch.delenv("BUZZ_MODEL_CACHE_SIZE", raising=False)
+        assert get_model_cache_size() == 1
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setenv("BUZZ_MODEL_CACHE_SIZE", "0")
+        assert get_model_cache_size() == 0
+
+
+class TestCancelWhenSet:
+    def test_stops_whisper_cli_and_server_requests(self, monkeypatch):
+        server = unittest.mock.Mock(spec=WhisperCppServer)
+        cache = ModelCache(max_size=2)
+        cache.get_or_load("server", lambda: server)
+        cache.get_or_load("model", unittest.mock.Mock)
+        monkeypatch.setattr(WhisperFileTranscriber, "model_cache", cache)
+        cancel_event = threading.Event()
+        cancel_event.set()
+
+        with unittest.mock.patch(
+            "buzz.transcriber.warm_model_pool.WhisperCpp.cancel"
+        ) as cancel_whisper_cpp:
+            _cancel_when_set(cancel_event, threading.Event())
+
+        cancel_whisper_cpp.assert_called_once()
+        server.cancel.assert_called_once()
+        server.stop.assert_not_called()
+
+    def test_returns_when_task_is_done(self):
+        done = threading.Event()
+        done.set()
+
+        with unittest.mock.patch(
+            "buzz.transcriber.warm_model_pool.WhisperCpp.cancel"
+        ) as cancel_whisper_cpp:
+            _cancel_when_set(threading.Event(), done)
+
+        cancel_whisper_cpp.assert_not_called()
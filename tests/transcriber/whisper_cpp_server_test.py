@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from buzz.audio_cache import WAV_HEADER
+from buzz.transcriber.whisper_cpp_server import WhisperCppServer, WhisperCppServerError
+
+RESPONSE = {
+    "segments": [
+        {
+            "start": 0.0,
+            "end": 1.5,
+            "text": " Bonjour",
+            "words": [{"word": " Bonjour", "start": 0.0, "end": 1.5, "probability": 0.9}],
+        }
+    ]
+}
+
+
+class FakeWhisperServer(BaseHTTPRequestHandler):
+    requests = []
+    health_status = 200
+    delay = 0.0
+
+    def do_GET(self):
+        self.send_response(self.health_status)
+        self.end_headers()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests.append((self.path, self.headers["Content-Type"], body))
+        time.sleep(self.delay)
+        content = json.dumps(RESPONSE).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    FakeWhisperServer.requests = []
+    FakeWhisperServer.health_status = 200
+    FakeWhisperServer.delay = 0.0
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), FakeWhisperServer)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield http_server
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def running_server(port: int, idle_seconds: float = 0) -> WhisperCppServer:
+    server = WhisperCppServer("model.bin", [], idle_seconds=idle_seconds)
+    server.port = port
+    server.process = MagicMock()
+    server.process.poll.return_value = None
+    return server
+
+
+class TestWhisperCppServer:
+    def test_transcribe_posts_samples_as_wav(self, fake_server):
+        server = running_server(fake_server.server_port)
+        samples = np.linspace(-1, 1, 1600, dtype=np.float32)
+
+        result = server.transcribe(samples, {"language": "fr"})
+
+        assert result == RESPONSE
+        path, content_type, body = FakeWhisperServer.requests[0]
+        assert path == "/inference"
+        boundary = content_type.split("boundary=")[1].encode()
+        parts = body.split(b"--" + boundary)
+        assert b'name="language"\r\n\r\nfr\r\n' in parts[1]
+        wav_bytes = parts[2].split(b"\r\n\r\n", 1)[1][: -len(b"\r\n")]
+        assert wav_bytes.startswith(b"RIFF")
+        assert np.array_equal(np.frombuffer(wav_bytes[WAV_HEADER.size:], dtype="<f4"), samples)
+
+    def test_restarts_server_that_stopped_answering(self, fake_server):
+        server = running_server(fake_server.server_port)
+        server.process.poll.return_value = 1
+
+        def spawn():
+            server.process = MagicMock()
+            server.process.poll.return_value = None
+            server.port = fake_server.server_port
+
+        with patch.object(server, "_spawn", side_effect=spawn) as mock_spawn:
+            server.transcribe(np.zeros(160, dtype=np.float32), {})
+
+        mock_spawn.assert_called_once()
+
+    def test_start_fails_when_server_exits(self):
+        server = WhisperCppServer("model.bin", [])
+
+        def spawn():
+            server.process = MagicMock()
+            server.process.poll.return_value = 1
+
+        with patch.object(server, "_spawn", side_effect=spawn), patch.object(
+            server, "_read_output", return_value="ErrorOutOfDeviceMemory"
+        ):
+            with pytest.raises(WhisperCppServerError) as error:
+                server.start()
+
+        assert "ErrorOutOfDeviceMemory" in error.value.output
+        assert server.process is None
+
+    def test_stops_when_idle(self, fake_server):
+        server = running_server(fake_server.server_port, idle_seconds=0.05)
+        process = server.process
+
+        server.transcribe(np.zeros(160, dtype=np.float32), {})
+        deadline = time.monotonic() + 5
+        while server.process is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        process.terminate.assert_called_once()
+        assert server.process is None
+
+    def test_cancel_aborts_request_and_keeps_server(self, fake_server):
+        server = running_server(fake_server.server_port)
+        FakeWhisperServer.delay = 1.0
+        errors = []
+
+        def transcribe():
+            try:
+                server.transcribe(np.zeros(160, dtype=np.float32), {})
+            except WhisperCppServerError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=transcribe)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while not FakeWhisperServer.requests and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        server.cancel()
+        thread.join(timeout=0.5)
+
+        assert not thread.is_alive()
+        assert len(errors) == 1
+        server.process.terminate.assert_not_called()
+        assert server.process is not None
@@ -1,6 +1,9 @@
 from unittest.mock import patch, MagicMock, mock_open
+import io
 import json
 
+import numpy as np
+
 from buzz.model_loader import TranscriptionModel, ModelType, WhisperModelSize
 from buzz.transcriber.transcriber import (
     TranscriptionOptions,
@@ -8,7 +11,7 @@ from buzz.transcriber.transcriber import (
     FileTranscriptionTask,
     FileTranscriptionOptions,
 )
-from buzz.transcriber.whisper_cpp import WhisperCpp
+from buzz.transcriber.whisper_cpp import WhisperCpp, _iter_json_array, get_processors
 from tests.audio import test_audio_path, test_multibyte_utf8_audio_path
 from tests.model_loader import get_model_path
 
@@ -84,32 +87,28 @@ class TestWhisperCpp:
                 WhisperCpp.detect_language("/fake/audio.wav", "/fake/model.bin") is None
             )
 
-    def test_detect_language_converts_unsupported_format(self):
-        # .m4a is not directly supported, so ffmpeg should convert to .wav first
-        # and the converted path should be fed to whisper-cli.
+    def test_detect_language_uses_decoded_audio_for_unsupported_format(self):
+        # .m4a is not directly supported, whisper-cli gets the WAV file from
+        # the decoded audio cache
         detect_result = MagicMock(
             stderr="auto-detected language: en (p = 0.9)\n", stdout=""
         )
-        calls = []
-
-        def fake_run(cmd, *args, **kwargs):
-            calls.append(cmd)
-            if cmd[0] == "ffmpeg":
-                return MagicMock(returncode=0)
-            return detect_result
 
         with patch(
-            "buzz.transcriber.whisper_cpp.subprocess.run", side_effect=fake_run
-        ), patch(
+            "buzz.transcriber.whisper_cpp.subprocess.run", return_value=detect_result
+        ) as mock_run, patch(
+            "buzz.transcriber.whisper_cpp.get_decoded_audio_path",
+            return_value="/cache/audio/decoded.wav",
+        ) as mock_decoded_audio_path, patch(
             "buzz.transcriber.whisper_cpp.get_whisper_cli_path",
             return_value="/fake/whisper-cli",
         ):
             result = WhisperCpp.detect_language("/fake/audio.m4a", "/fake/model.bin")
 
         assert result == "en"
-        assert calls[0][0] == "ffmpeg"
-        detect_cmd = calls[-1]
-        assert detect_cmd[detect_cmd.index("-f") + 1] == "/fake/audio.m4a.wav"
+        mock_decoded_audio_path.assert_called_once_with("/fake/audio.m4a")
+        detect_cmd = mock_run.call_args[0][0]
+        assert detect_cmd[detect_cmd.index("-f") + 1] == "/cache/audio/decoded.wav"
 
     def test_transcribe_word_level_timestamps(self):
         transcription_options = TranscriptionOptions(
@@ -412,4 +411,307 @@ class TestWhisperCpp:
         assert segments[0].end == 1000
         assert segments[1].text == "world"
         assert segments[1].start == 1500
-        assert segments[1].end == 3000
\ No newline at end of file
+        assert segments[1].end == 3000
+    def test_transcribe_with_server(self):
+        transcription_options = TranscriptionOptions(
+            language="fr",
+            task=Task.TRANSCRIBE,
+            word_level_timings=True,
+            model=TranscriptionModel(
+                model_type=ModelType.WHISPER_CPP,
+                whisper_model_size=WhisperModelSize.TINY,
+            ),
+        )
+        task = FileTranscriptionTask(
+            transcription_options=transcription_options,
+            file_transcription_options=FileTranscriptionOptions(),
+            model_path="/fake/model.bin",
+            file_path=test_audio_path,
+            audio_start=1000,
+            audio_end=3000,
+        )
+        server = MagicMock(args=["--threads", "4"])
+        server.transcribe.return_value = {
+            "segments": [
+                {
+                    "start": 0.0,
+                    "end": 1.0,
+                    "text": " Café au lait",
+                    "words": [
+                        {"word": " Café", "start": 0.0, "end": 0.4, "probability": 0.9},
+                        {"word": " au", "start": 0.4, "end": 0.6, "probability": 0.9},
+                        {"word": " lait", "start": 0.6, "end": 1.0, "probability": 0.9},
+                    ],
+                }
+            ]
+        }
+
+        segments = WhisperCpp.transcribe_with_server(task, server)
+
+        samples, fields = server.transcribe.call_args[0]
+        assert len(samples) == 2 * 16000
+        assert fields["language"] == "fr"
+        assert fields["translate"] == "false"
+        assert [segment.text for segment in segments] == ["Café", "au", "lait"]
+        assert (segments[0].start, segments[0].end) == (1000, 1400)
+        assert (segments[2].start, segments[2].end) == (1600, 2000)
+
+    def test_transcribe_with_server_in_windows(self, capsys):
+        task = FileTranscriptionTask(
+            transcription_options=TranscriptionOptions(
+                language=None,
+                model=TranscriptionModel(
+                    model_type=ModelType.WHISPER_CPP,
+                    whisper_model_size=WhisperModelSize.TINY,
+                ),
+            ),
+            file_transcription_options=FileTranscriptionOptions(),
+            model_path="/fake/model.bin",
+            file_path=test_audio_path,
+        )
+        server = MagicMock(args=[])
+        server.transcribe.side_effect = [
+            {"language": "french", "segments": [{"start": 0.0, "end": 2.0, "text": " Bonjour"}]},
+            {"language": "french", "segments": [{"start": 1.0, "end": 3.0, "text": " Merci"}]},
+        ]
+
+        with patch(
+            "buzz.transcriber.whisper_cpp.whisper_audio.load_audio_range",
+            return_value=np.zeros(150 * 16000, dtype=np.float32),
+        ), patch(
+            "buzz.transcriber.chunked_file_transcriber.plan_chunks",
+            return_value=[(0, 60 * 16000), (60 * 16000, 150 * 16000)],
+        ):
+            checkpoints = list(WhisperCpp.iter_transcribe_with_server(task, server))
+
+        first_fields = server.transcribe.call_args_list[0][0][1]
+        samples, second_fields = server.transcribe.call_args_list[1][0]
+        assert len(samples) == 90 * 16000
+        assert first_fields["language"] == "auto"
+        assert "prompt" not in first_fields
+        assert second_fields["language"] == "fr"
+        assert second_fields["prompt"] == "Bonjour"
+        assert [
+            (offset, [segment.text for segment in segments]) for offset, segments in checkpoints
+        ] == [(2000, ["Bonjour"]), (63000, ["Merci"])]
+        assert capsys.readouterr().err.split() == ["0%", "40%", "100%"]
+
+    def test_processors_remap_word_offsets_to_segment_time(self):
+        """With several processors, whisper-cli shifts segment offsets by the
+        start of the processor's part of the audio but not token offsets."""
+        mock_json_data = {
+            "transcription": [
+                {
+                    "offsets": {"from": 600000, "to": 603000},
+                    "text": "",
+                    "tokens": [
+                        {"text": " Hello", "offsets": {"from": 0, "to": 1000}},
+                        {"text": " world", "offsets": {"from": 1500, "to": 3000}},
+                    ],
+                }
+            ]
+        }
+
+        with patch("buzz.transcriber.whisper_cpp.probe_duration", return_value=1200.0), \
+                patch.dict("os.environ", {"BUZZ_WHISPERCPP_N_PROCESSORS": "2"}):
+            segments = self._run_with_mocked_json(mock_json_data, language="en", vad_enabled=False)
+
+        assert [(s.text, s.start, s.end) for s in segments] == [
+            ("Hello", 600000, 601000),
+            ("world", 601500, 603000),
+        ]
+
+    def test_detect_language_with_server(self):
+        server = MagicMock()
+        server.transcribe.return_value = {"language": "french", "detected_language": "fr"}
+        assert WhisperCpp.detect_language_with_server(np.zeros(16000), server) == "fr"
+        assert server.transcribe.call_args[0][1]["language"] == "auto"
+
+        # Older servers only return the name of the language
+        server.transcribe.return_value = {"language": "german"}
+        assert WhisperCpp.detect_language_with_server(np.zeros(16000), server) == "de"
+
+
+class TestParseWordLevelTimings:
+    @staticmethod
+    def parse(transcription, language="en", remap_tokens=False):
+        return [
+            (segment.text, segment.start, segment.end)
+            for segment in WhisperCpp._parse_word_level_timings(
+                transcription, language, remap_tokens
+            )
+        ]
+
+    @staticmethod
+    def segment(tokens, offsets=(0, 0)):
+        return {
+            "offsets": {"from": offsets[0], "to": offsets[1]},
+            "text": "",
+            "tokens": [
+                {"text": text, "offsets": {"from": start, "to": end}, "p": p}
+                for text, start, end, p in tokens
+            ],
+        }
+
+    def test_words_with_commas_and_unlikely_tokens(self):
+        transcription = [
+            self.segment(
+                [
+                    (", ", 0, 100, 1.0),
+                    (" Hel", 100, 200, 1.0),
+                    ("lo", 200, 300, 1.0),
+                    (" um", 300, 400, 0.001),
+                    (", ", 400, 500, 1.0),
+                    ("world", 500, 600, 1.0),
+                    ("\xff", 600, 700, 1.0),
+                    (" end", 700, 800, 1.0),
+                ]
+            )
+        ]
+
+        # A leading comma keeps the times it started with, the word with an
+        # invalid byte is dropped
+        assert self.parse(transcription) == [
+            (",", 0, 0),
+            ("Hello,", 100, 300),
+            ("end", 700, 800),
+        ]
+
+    def test_chars_split_over_tokens(self):
+        zhong = "中".encode("utf-8").decode("latin-1")
+        wen = "文".encode("utf-8").decode("latin-1")
+        transcription = [
+            self.segment(
+                [
+                    ("[_BEG_]", 0, 0, 1.0),
+                    (zhong[:2], 0, 100, 1.0),
+                    (zhong[2:] + wen[:1], 100, 200, 1.0),
+                    (wen[1:], 200, 300, 1.0),
+                ]
+            ),
+            # Characters after invalid bytes are dropped
+            self.segment([(zhong, 300, 400, 1.0), ("\xff", 400, 500, 1.0), (wen, 500, 600, 1.0)]),
+        ]
+
+        # A character starts where the bytes pending before it started
+        assert self.parse(transcription, language="zh") == [
+            ("中", 0, 200),
+            ("文", 0, 300),
+            ("中", 300, 400),
+        ]
+
+    def test_remap_across_batches(self):
+        transcription = [
+            self.segment(
+                [(" a", 0, 1000, 1.0), (" b", 1000, 2000, 1.0)],
+                offsets=(index * 10000, index * 10000 + 4000),
+            )
+            for index in range(5)
+        ] + [self.segment([])]
+
+        with patch("buzz.transcriber.whisper_cpp.WORD_TIMING_BATCH_SEGMENTS", 2):
+            words = self.parse(transcription, remap_tokens=True)
+
+        assert words == [
+            word
+            for index in range(5)
+            for word in (
+                ("a", index * 10000, index * 10000 + 2000),
+                ("b", index * 10000 + 2000, index * 10000 + 4000),
+            )
+        ]
+
+
+class TestIterJsonArray:
+    def test_yields_items_across_blocks(self):
+        transcription = [
+            {"offsets": {"from": 0, "to": 1000}, "text": " a ] b", "tokens": []},
+            {"offsets": {"from": 1000, "to": 2000}, "text": " c", "tokens": []},
+        ]
+        output = json.dumps(
+            {"params": {"model": "tiny"}, "transcription": transcription}, indent=2
+        )
+
+        for read_size in (1, 5, 1 << 20):
+            with patch("buzz.transcriber.whisper_cpp.JSON_READ_SIZE", read_size):
+                items = _iter_json_array(io.StringIO(output), "transcription")
+                assert list(items) == transcription
+
+    def test_missing_or_empty_array(self):
+        assert list(_iter_json_array(io.StringIO('{"transcription": []}'), "transcription")) == []
+        assert list(_iter_json_array(io.StringIO('{"params": {}}'), "transcription")) == []
+
+
+class TestWhisperCppChunkInput:
+    def test_chunk_is_piped_to_stdin(self):
+        transcription_options = TranscriptionOptions(
+            language="fr",
+            task=Task.TRANSCRIBE,
+            word_level_timings=False,
+            model=TranscriptionModel(
+                model_type=ModelType.WHISPER_CPP,
+                whisper_model_size=WhisperModelSize.TINY,
+            ),
+        )
+        task = FileTranscriptionTask(
+            transcription_options=transcription_options,
+            file_transcription_options=FileTranscriptionOptions(),
+            model_path="/fake/model.bin",
+            file_path=test_audio_path,
+            audio_start=1000,
+            audio_end=3000,
+        )
+        output = {"transcription": [{"offsets": {"from": 0, "to": 1500}, "text": " Bonjour"}]}
+        mock_process = MagicMock()
+        mock_process.stderr.readline.side_effect = [""]
+        mock_process.returncode = 0
+
+        with patch(
+            "buzz.transcriber.whisper_cpp.whisper_audio.load_audio_range",
+            return_value=np.zeros(2 * 16000, dtype=np.float32),
+        ) as mock_load_audio_range, patch(
+            "buzz.transcriber.whisper_cpp.subprocess.Popen", return_value=mock_process
+        ) as mock_popen, patch(
+            "buzz.transcriber.whisper_cpp.threading.Thread"
+        ) as mock_thread, patch(
+            "builtins.open", mock_open(read_data=json.dumps(output))
+        ):
+            segments = WhisperCpp.transcribe(task=task)
+
+        mock_load_audio_range.assert_called_once_with(test_audio_path, 1000, 3000)
+        cmd = mock_popen.call_args[0][0]
+        assert cmd[cmd.index("-f") + 1] == "-"
+        assert "--output-file" in cmd
+        samples = mock_thread.call_args.kwargs["args"][1]
+        assert len(samples) == 2 * 16000
+        assert [(s.start, s.end, s.text) for s in segments] == [(1000, 2500, "Bonjour")]
+
+    def test_write_wav_to_stdin(self):
+        process = MagicMock()
+        samples = np.ones(160, dtype=np.float32)
+
+        WhisperCpp._write_wav_to_stdin(process, samples)
+
+        header, data = [call.args[0] for call in process.stdin.buffer.write.call_args_list]
+        assert header.startswith(b"RIFF")
+        assert bytes(data) == samples.tobytes()
+        process.stdin.close.assert_called_once()
+
+
+class TestGetProcessors:
+    def test_single_processor_below_thread_limit(self):
+        assert get_processors(8, 3600, uses_gpu=False) == (1, 8)
+
+    def test_splits_threads_of_long_audio(self):
+        assert get_processors(32, 3600, uses_gpu=False) == (4, 8)
+
+    def test_short_audio_keeps_one_processor(self):
+        assert get_processors(32, 400, uses_gpu=False) == (1, 32)
+
+    def test_gpu_or_unknown_duration_keeps_one_processor(self):
+        assert get_processors(32, 3600, uses_gpu=True) == (1, 32)
+        assert get_processors(32, None, uses_gpu=False) == (1, 32)
+
+    def test_environment_override(self):
+        with patch.dict("os.environ", {"BUZZ_WHISPERCPP_N_PROCESSORS": "3"}):
+            assert get_processors(12, None, uses_gpu=True) == (3, 4)
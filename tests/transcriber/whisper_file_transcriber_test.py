@@ -9,13 +9,17 @@ import sys
 import tempfile
 import time
 from threading import Thread
+from types import SimpleNamespace
 from typing import List
+import unittest.mock
 from unittest.mock import Mock
 
+import numpy as np
 import psutil
 import pytest
 from pytestqt.qtbot import QtBot
 
+from buzz.conn import ConnWriter
 from buzz.model_loader import TranscriptionModel, ModelType, WhisperModelSize
 from buzz.transcriber.transcriber import (
     OutputFormat,
@@ -26,12 +30,18 @@ from buzz.transcriber.transcriber import (
     FileTranscriptionOptions,
     Segment,
 )
+from buzz.transcriber.model_cache import ModelCache
 from buzz.transcriber.whisper_file_transcriber import (
     WhisperFileTranscriber,
     check_file_has_audio_stream,
+    iter_audio_windows,
+    merge_speech_clips,
     terminate_child_processes,
+    write_checkpoints,
     PROGRESS_REGEX,
+    SEGMENT_BATCH_SIZE,
 )
+from buzz.whisper_audio import SAMPLE_RATE
 from tests.audio import test_audio_path
 from tests.model_loader import get_model_path
 
@@ -113,6 +123,88 @@ class TestProgressRegex:
         assert percentage == 85
 
 
+class TestReadMessages:
+    def _make_transcriber(self):
+        return WhisperFileTranscriber(
+            task=FileTranscriptionTask(
+                file_path=test_audio_path,
+                transcription_options=TranscriptionOptions(),
+                file_transcription_options=FileTranscriptionOptions(),
+                model_path="",
+            )
+        )
+
+    def _send(self, *send_calls):
+        """Returns a pipe that replays the frames written by the given ConnWriter calls."""
+        frames = []
+        conn = Mock()
+        conn.send_bytes.side_effect = frames.append
+        writer = ConnWriter(conn)
+        for call in send_calls:
+            call(writer)
+        writer.send_done()
+
+        pipe = Mock()
+        pipe.recv_bytes.side_effect = frames
+        return pipe
+
+    def test_checkpoint_is_emitted(self):
+        transcriber = self._make_transcriber()
+        checkpoint_spy = Mock()
+        transcriber.checkpoint.connect(checkpoint_spy)
+
+        pipe = self._send(
+            lambda writer: writer.send_checkpoint(1500, [Segment(start=0, end=1200, text=" Hello")])
+        )
+
+        assert transcriber.read_messages(pipe) is True
+        checkpoint_spy.assert_called_once_with(
+            1500, [Segment(start=0, end=1200, text=" Hello", translation="")]
+        )
+
+    def test_segments_progress_and_error(self):
+        transcriber = self._make_transcriber()
+        progress_spy = Mock()
+        transcriber.progress.connect(progress_spy)
+
+        pipe = self._send(
+            lambda writer: writer.write(" 45%|####      | 45/100"),
+            lambda writer: writer.send_segments([Segment(start=0, end=1000, text="Hello")]),
+            lambda writer: writer.send_segments([Segment(start=1000, end=2000, text="world")]),
+            lambda writer: writer.send_error("Out of memory"),
+        )
+
+        assert transcriber.read_messages(pipe) is True
+        progress_spy.assert_called_once_with((45, 100))
+        assert [segment.text for segment in transcriber.segments] == ["Hello", "world"]
+        assert transcriber.error_message == "Out of memory"
+
+    def test_returns_false_when_pipe_closes_early(self):
+        transcriber = self._make_transcriber()
+        pipe = Mock()
+        pipe.recv_bytes.side_effect = EOFError()
+
+        assert transcriber.read_messages(pipe) is False
+
+
+class TestWriteCheckpoints:
+    def test_batches_by_count(self):
+        stream = (
+            (i + 1, [Segment(start=i, end=i + 1, text=str(i))])
+            for i in range(SEGMENT_BATCH_SIZE + 1)
+        )
+        writer = Mock()
+        with unittest.mock.patch(
+            "buzz.transcriber.whisper_file_transcriber.time.monotonic", return_value=0
+        ):
+            write_checkpoints(writer, stream)
+
+        calls = writer.send_checkpoint.call_args_list
+        assert len(calls) == 2
+        assert len(calls[0].args[1]) == SEGMENT_BATCH_SIZE
+        assert calls[1].args[0] == SEGMENT_BATCH_SIZE + 1
+
+
 class TestTerminateChildProcesses:
     def test_kills_grandchild_subprocess(self):
         """The whisper-cli stand-in (a grandchild) must be killed, not orphaned.
@@ -566,4 +658,154 @@ class TestTranscribeFasterWhisper:
         with pytest.raises(FileNotFoundError, match="BUZZ_MODEL_ROOT"):
             WhisperFileTranscriber.transcribe_faster_whisper(task)
 
-        time.sleep(3)
\ No newline at end of file
+        time.sleep(3)
+
+
+class TestTranscribeOpenAIWhisper:
+    def test_plain_task_after_word_level_task_on_same_worker(self, monkeypatch):
+        def make_task(word_level_timings: bool) -> FileTranscriptionTask:
+            return FileTranscriptionTask(
+                model_path="/models/tiny.pt",
+                transcription_options=TranscriptionOptions(
+                    model=TranscriptionModel(
+                        model_type=ModelType.WHISPER,
+                        whisper_model_size=WhisperModelSize.TINY,
+                    ),
+                    language="en",
+                    word_level_timings=word_level_timings,
+                ),
+                file_transcription_options=FileTranscriptionOptions(),
+                file_path=test_audio_path,
+            )
+
+        models = []
+
+        def load_model(*args, **kwargs):
+            model = Mock()
+            model.transcribe.return_value = {
+                "language": "en",
+                "segments": [{"start": 0.0, "end": 1.0, "text": " plain"}],
+            }
+            models.append(model)
+            return model
+
+        def modify_model(model):
+            word = SimpleNamespace(start=0.5, end=1.0, word=" word")
+            model.transcribe.return_value = SimpleNamespace(
+                language="en", segments=[SimpleNamespace(words=[word])]
+            )
+
+        monkeypatch.setattr(WhisperFileTranscriber, "model_cache", ModelCache(max_size=2))
+        module = "buzz.transcriber.whisper_file_transcriber"
+        with unittest.mock.patch(
+            f"{module}.whisper.load_model", side_effect=load_model
+        ), unittest.mock.patch(
+            f"{module}.stable_whisper.modify_model", side_effect=modify_model
+        ) as mock_modify_model, unittest.mock.patch(
+            f"{module}.iter_audio_windows",
+            side_effect=lambda *args: [(0, np.zeros(SAMPLE_RATE, dtype=np.float32))],
+        ):
+            word_segments = WhisperFileTranscriber.transcribe_openai_whisper(make_task(True))
+            segments = WhisperFileTranscriber.transcribe_openai_whisper(make_task(False))
+            WhisperFileTranscriber.transcribe_openai_whisper(make_task(True))
+
+        assert word_segments == [Segment(500, 1000, "word")]
+        # The plain task gets a model stable-ts did not modify
+        assert segments == [Segment(0, 1000, " plain")]
+        mock_modify_model.assert_called_once_with(models[0])
+        assert len(models) == 2
+
+
+class TestMergeSpeechClips:
+    def test_joins_regions_up_to_max_length(self):
+        speech = [
+            {"start": 0, "end": 10},
+            {"start": 15, "end": 25},
+            {"start": 30, "end": 45},
+            {"start": 50, "end": 120},
+        ]
+
+        assert merge_speech_clips(speech, max_length=30) == [(0, 25), (30, 45), (50, 120)]
+
+
+class TestIterAudioWindows:
+    def test_short_audio_is_one_window(self):
+        audio = np.zeros(SAMPLE_RATE * 2, dtype=np.float32)
+        with unittest.mock.patch(
+            "buzz.transcriber.whisper_file_transcriber.whisper_audio.load_audio_range",
+            return_value=audio,
+        ):
+            windows = list(iter_audio_windows("audio.mp3", start=500))
+
+        assert len(windows) == 1
+        assert windows[0][0] == 500
+        assert windows[0][1] is audio
+
+    def test_long_audio_is_cut_in_adjacent_windows(self):
+        audio = np.random.default_rng(0).uniform(-1, 1, SAMPLE_RATE * 10).astype(np.float32)
+        module = "buzz.transcriber.whisper_file_transcriber"
+        with unittest.mock.patch(
+            f"{module}.whisper_audio.load_audio_range", return_value=audio
+        ), unittest.mock.patch(f"{module}.TRANSCRIBE_WINDOW_SECONDS", 2):
+            windows = list(iter_audio_windows("audio.mp3", start=1000))
+
+        assert len(windows) > 1
+        assert windows[0][0] == 1000
+        assert sum(len(window) for _, window in windows) == len(audio)
+        offsets = [offset for offset, _ in windows]
+        assert offsets == sorted(offsets)
+
+
+class TestTranscribeFasterWhisperBatch:
+    def test_splits_segments_by_file(self):
+        def make_task(file_path: str) -> FileTranscriptionTask:
+            return FileTranscriptionTask(
+                model_path="/models/faster-whisper-tiny",
+                transcription_options=TranscriptionOptions(
+                    model=TranscriptionModel(
+                        model_type=ModelType.FASTER_WHISPER,
+                        whisper_model_size=WhisperModelSize.TINY,
+                    ),
+                    language="en",
+                ),
+                file_transcription_options=FileTranscriptionOptions(),
+                file_path=file_path,
+            )
+
+        def check_file(file_path):
+            if file_path == "broken.mp3":
+                raise ValueError("No audio streams found")
+
+        pipeline = Mock()
+        pipeline.transcribe.return_value = (
+            [
+                SimpleNamespace(start=0.5, end=1.5, text="first", words=None),
+                SimpleNamespace(start=2.5, end=3.5, text="second", words=None),
+            ],
+            None,
+        )
+        module = "buzz.transcriber.whisper_file_transcriber"
+
+        with unittest.mock.patch.object(
+            WhisperFileTranscriber, "_load_faster_whisper_model"
+        ), unittest.mock.patch(
+            f"{module}.check_file_has_audio_stream", side_effect=check_file
+        ), unittest.mock.patch(
+            f"{module}.whisper_audio.load_audio",
+            return_value=np.zeros(32000, dtype=np.float32),
+        ), unittest.mock.patch(
+            f"{module}.get_speech_timestamps", return_value=[{"start": 0, "end": 32000}]
+        ), unittest.mock.patch(
+            f"{module}.faster_whisper.BatchedInferencePipeline", return_value=pipeline
+        ):
+            results = WhisperFileTranscriber.transcribe_faster_whisper_batch(
+                [make_task("a.mp3"), make_task("broken.mp3"), make_task("b.mp3")]
+            )
+
+        assert pipeline.transcribe.call_args.kwargs["clip_timestamps"] == [
+            {"start": 0.0, "end": 2.0},
+            {"start": 2.0, "end": 4.0},
+        ]
+        assert results[0] == ([Segment(500, 1500, "first")], None)
+        assert results[1] == ([], "No audio streams found")
+        assert results[2] == ([Segment(500, 1500, "second")], None)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from buzz.whisper_audio import SAMPLE_RATE, iter_audio, load_audio
+from tests.audio import test_audio_path
+
+
+class TestIterAudio:
+    def test_chunks_match_load_audio(self):
+        chunks = [chunk.copy() for chunk in iter_audio(test_audio_path, chunk_samples=SAMPLE_RATE)]
+
+        assert all(len(chunk) == SAMPLE_RATE for chunk in chunks[:-1])
+        assert 0 < len(chunks[-1]) <= SAMPLE_RATE
+        np.testing.assert_allclose(np.concatenate(chunks), load_audio(test_audio_path), atol=1e-6)
+
+    def test_reuse_buffer(self):
+        chunks = list(iter_audio(test_audio_path, chunk_samples=SAMPLE_RATE, reuse_buffer=True))
+
+        assert len(chunks) > 1
+        assert all(np.shares_memory(chunk, chunks[0]) for chunk in chunks)
+
+    def test_range(self):
+        samples = np.concatenate(list(iter_audio(test_audio_path, start=1000, end=2000)))
+
+        assert abs(len(samples) - SAMPLE_RATE) < SAMPLE_RATE // 100
+
+    def test_invalid_file(self, tmp_path):
+        file_path = tmp_path / "audio.mp3"
+        file_path.write_bytes(b"not audio")
+
+        with pytest.raises(RuntimeError, match="Failed to load audio"):
+            list(iter_audio(str(file_path)))
@@ -432,7 +432,7 @@ class TestSpeakerIdentificationWidget:
 
         fake_waveform = np.zeros(10, dtype=np.float32)
         with patch(
-            "buzz.widgets.transcription_viewer.speaker_identification_widget.faster_whisper.decode_audio",
+            "buzz.widgets.transcription_viewer.speaker_identification_widget.whisper_audio.load_audio",
             return_value=fake_waveform,
         ) as mock_decode:
             language, full_transcript, waveform = worker._get_transcript_data()
@@ -110,7 +110,12 @@ def db():
         "word_level_timings BOOLEAN DEFAULT FALSE,"  # 18
         "extract_speech BOOLEAN DEFAULT FALSE,"  # 19
         "name TEXT,"  # 20
-        "notes TEXT"  # 21
+        "notes TEXT,"  # 21
+        "queue_position INTEGER,"  # 22
+        "resume_offset INTEGER,"  # 23
+        "audio_duration DOUBLE PRECISION,"  # 24
+        "real_time_factor DOUBLE PRECISION,"  # 25
+        "metrics TEXT"  # 26
         ")"
     )
     query.exec(
@@ -311,6 +316,24 @@ class TestTranscriptionTasksTableWidget:
         text = notes_column_def.delegate.callback(record_no_notes)
         assert text == ""
 
+    def test_metrics_columns(self, widget):
+        assert widget.isColumnHidden(Column.REAL_TIME_FACTOR.value)
+
+        definitions = {col.column: col for col in column_definitions}
+        record = mock_record(
+            {
+                "audio_duration": 90.0,
+                "real_time_factor": 0.125,
+                "metrics": '{"queue_wait": 2.0, "inference": 10.25}',
+            }
+        )
+        assert definitions[Column.AUDIO_DURATION].delegate.callback(record) == "1m 30s"
+        assert definitions[Column.REAL_TIME_FACTOR].delegate.callback(record) == "0.12"
+        assert (
+            definitions[Column.METRICS].delegate.callback(record)
+            == "Queue Wait 2.0s, Inference 10.2s"
+        )
+
     def test_column_visibility_management(self, widget):
         """Test column visibility save/load functionality"""
         # Test saving column visibility
@@ -355,6 +355,40 @@ class TestTranscriptionSegmentsEditorWidget:
         assert len(segments) == 3
         assert isinstance(segments[0], QSqlRecord)
 
+    def test_reload_shows_new_segments(
+            self, qtbot: QtBot, transcription, translator, transcription_segment_dao
+    ):
+        """Test reload() picks up segments added while the transcription runs"""
+        widget = TranscriptionSegmentsEditorWidget(
+            transcription_id=uuid.UUID(hex=transcription.id),
+            translator=translator,
+            parent=None
+        )
+        qtbot.add_widget(widget)
+        assert len(widget.segments()) == 3
+
+        transcription_segment_dao.insert(
+            TranscriptionSegment(1000, 1500, "Live", "", transcription.id)
+        )
+        widget.reload()
+
+        assert len(widget.segments()) == 4
+
+    def test_set_editable(self, qtbot: QtBot, transcription, translator):
+        """Test that a read-only widget does not start editing"""
+        widget = TranscriptionSegmentsEditorWidget(
+            transcription_id=uuid.UUID(hex=transcription.id),
+            translator=translator,
+            parent=None
+        )
+        qtbot.add_widget(widget)
+
+        widget.set_editable(False)
+        assert widget.editTriggers() == widget.EditTrigger.NoEditTriggers
+
+        widget.set_editable(True)
+        assert widget.editTriggers() != widget.EditTrigger.NoEditTriggers
+
     def test_segment_method(self, qtbot: QtBot, transcription, translator):
         """Test segment() method returns specific segment"""
         widget = TranscriptionSegmentsEditorWidget(